@@ -1,26 +1,339 @@
 #!/usr/bin/env python3
-"""Create a simple test image for ComfyUI workflow testing."""
+"""Create test images and synthetic run fixtures for ComfyUI workflow testing.
 
-from PIL import Image, ImageDraw
+Without arguments this writes the 576x1024 test keyframe to the ComfyUI
+input folder, as before. With --logs-dir it generates a deterministic
+synthetic logs tree instead, shaped like real E2E runs:
+
+    <logs-dir>/<YYYYmmdd-HHMMSS>/artifact-metadata.json
+    <logs-dir>/<run>/<scene-id>/keyframe-start.png, keyframe-end.png
+    <logs-dir>/<run>/<scene-id>/generated-frames/gemdirect1_<scene-id>_00001_.png ...
+                                                 gemdirect1_<scene-id>.done
+                                                 gemdirect1_<scene-id>.mp4   (--format mp4|both)
+
+Frames are a moving procedural scene (gradient, drifting shapes, noise). A
+fraction of scenes (--anomaly-rate) gets injected defects the quality checks
+should catch: brightness flicker, a frozen segment, or a duplicate of an
+earlier scene. Everything derives from --seed, so the same arguments always
+produce the same tree. fixtures-manifest.json records the parameters and
+which scenes carry which defect.
+
+Usage:
+    python create_test_image.py                                   # ComfyUI test keyframe
+    python create_test_image.py --output keyframe.jpg
+    python create_test_image.py --logs-dir fixtures/logs --runs 3 --scenes 4 --frames 49
+    python create_test_image.py --logs-dir fixtures/big --runs 2000 --scenes 8 --frames 0   # metadata only
+"""
+
+import argparse
+import json
 import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+from PIL import Image, ImageDraw
+
+DEFAULT_OUTPUT = r"C:\ComfyUI\ComfyUI_windows_portable\ComfyUI\input\test_keyframe.jpg"
+FRAME_PREFIX = "gemdirect1"
+ANOMALIES = ("flicker", "frozen", "duplicate")
+BASE_TIME = datetime(2025, 11, 1, 9, 0, 0, tzinfo=timezone.utc)
+
+SUBJECTS = ["a detective", "two lovers", "a lone astronaut", "the old captain", "a street musician", "a young hacker"]
+ACTIONS = [
+    "chase a thief across rooftops", "share a quiet embrace at dawn", "discover a hidden clue in the archive",
+    "talk and answer questions in a crowded bar", "reveal the truth to the council", "face a threat in the dark",
+    "laugh at a clumsy joke", "cry after the emotional conflict", "escape the burning lab", "walk through the market",
+]
+SETTINGS = ["neon-lit city street", "misty harbor", "abandoned space station", "sunlit meadow", "candle-lit library"]
+STYLES = ["cinematic lighting", "handheld camera", "slow dolly-in", "wide establishing shot", "shallow depth of field"]
+
+
+def create_test_image(output_path=DEFAULT_OUTPUT, size=(576, 1024)):
+    """Draw the simple shapes keyframe (576x1024 matches SVD requirements)."""
+    width, height = size
+    sx, sy = width / 576, height / 1024
+    img = Image.new('RGB', size, color='white')
+    draw = ImageDraw.Draw(img)
+
+    # Draw some basic shapes to make it non-trivial
+    draw.rectangle([100 * sx, 100 * sy, 476 * sx, 400 * sy], fill='blue', outline='black', width=2)
+    draw.ellipse([200 * sx, 500 * sy, 376 * sx, 676 * sy], fill='red', outline='black', width=2)
+    draw.polygon([(288 * sx, 750 * sy), (100 * sx, 900 * sy), (476 * sx, 900 * sy)], fill='green', outline='black')
+
+    # Add text
+    draw.text((200 * sx, 920 * sy), "Test Image for ComfyUI", fill='black')
+
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    img.save(output_path, quality=95)
+    return img
+
+
+# ---------------------------------------------------------------------------
+# Synthetic runs
+# ---------------------------------------------------------------------------
+
+def _rng(seed, *keys):
+    import numpy as np
+
+    return np.random.default_rng([seed, *keys])
+
+
+def render_frames(seed, count, width, height, anomaly=None):
+    """(count, H, W, 3) uint8 frames of a drifting procedural scene."""
+    import numpy as np
+
+    rng = _rng(seed, 1)
+    yy, xx = np.mgrid[0:height, 0:width].astype(np.float32)
+    base_color = rng.uniform(40, 200, size=3).astype(np.float32)
+    tilt = rng.uniform(-0.5, 0.5, size=2).astype(np.float32)
+    gradient = base_color + (xx[..., None] / width * tilt[0] + yy[..., None] / height * tilt[1]) * 80
+    blobs = [(rng.uniform(0.2, 0.8, 2), rng.uniform(0.01, 0.03, 2) * rng.choice([-1, 1], 2), rng.uniform(0.05, 0.15),
+              rng.uniform(-90, 90, 3)) for _ in range(3)]
+    noise = rng.normal(0, 3, size=(height, width, 1)).astype(np.float32)
+
+    frames = np.empty((count, height, width, 3), dtype=np.uint8)
+    for t in range(count):
+        img = gradient.copy()
+        for (cx, cy), (vx, vy), radius, color in blobs:
+            px, py = (cx + vx * t) * width, (cy + vy * t) * height
+            mask = ((xx - px) ** 2 + (yy - py) ** 2) < (radius * min(width, height)) ** 2
+            img[mask] += color
+        frames[t] = np.clip(img + np.roll(noise, t, axis=1), 0, 255).astype(np.uint8)
+
+    if anomaly == "flicker" and count > 2:
+        gains = np.where(rng.random(count) < 0.3, rng.choice([-55, 55], size=count), 0)
+        frames = np.clip(frames.astype(np.int16) + gains[:, None, None, None], 0, 255).astype(np.uint8)
+    elif anomaly == "frozen" and count > 6:
+        start = int(rng.integers(1, count // 2))
+        frames[start:start + max(4, count // 4)] = frames[start]
+    return frames
+
+
+def _prompt(rng):
+    return (f"{rng.choice(SUBJECTS)} {rng.choice(ACTIONS)} in a {rng.choice(SETTINGS)}, "
+            f"{rng.choice(STYLES)}")
+
+
+def _scene_metadata(scene_id, prompt, frame_count, run_time, rng, frames_dir):
+    duration = round(float(rng.uniform(40, 240)), 1)
+    vram_before = int(rng.integers(8, 20)) * 1024
+    vram_delta = -int(rng.integers(200, 1600))
+    done = run_time + timedelta(seconds=duration)
+    return {
+        "SceneId": scene_id,
+        "Prompt": prompt,
+        "NegativePrompt": "blurry, low quality, watermark, distorted",
+        "FrameFloor": 25,
+        "FrameCount": frame_count,
+        "DurationSeconds": duration,
+        "FramePrefix": f"{FRAME_PREFIX}_{scene_id}",
+        "HistoryPath": f"{scene_id}/history.json",
+        "HistoryRetrievedAt": done.strftime('%Y-%m-%dT%H:%M:%S.000Z'),
+        "HistoryPollLog": [],
+        "HistoryErrors": [],
+        "Success": True,
+        "MeetsFrameFloor": frame_count >= 25,
+        "HistoryRetrieved": True,
+        "HistoryAttempts": int(rng.integers(1, 4)),
+        "Warnings": [] if frame_count >= 25 else [f"Frame count {frame_count} below floor 25"],
+        "Errors": [],
+        "AttemptsRun": 1,
+        "Requeued": False,
+        "AttemptSummaries": [],
+        "GeneratedFramesDir": frames_dir,
+        "KeyframeSource": f"{scene_id}/keyframe-start.png",
+        "StartKeyframe": f"{scene_id}/keyframe-start.png",
+        "EndKeyframe": f"{scene_id}/keyframe-end.png",
+        "Telemetry": {
+            "DurationSeconds": duration,
+            "MaxWaitSeconds": 600,
+            "PollIntervalSeconds": 2,
+            "HistoryAttempts": 1,
+            "HistoryAttemptLimit": 3,
+            "HistoryExitReason": "success",
+            "HistoryPostExecutionTimeoutReached": False,
+            "PostExecutionTimeoutSeconds": 30,
+            "ExecutionSuccessDetected": True,
+            "ExecutionSuccessAt": done.strftime('%Y-%m-%dT%H:%M:%S.000Z'),
+            "SceneRetryBudget": 1,
+            "DoneMarkerDetected": True,
+            "ForcedCopyTriggered": False,
+            "GPU": {
+                "Name": "NVIDIA GeForce RTX 3090",
+                "VramFreeBefore": vram_before * 1024 * 1024,
+                "VramFreeAfter": (vram_before + vram_delta) * 1024 * 1024,
+                "VramDelta": vram_delta * 1024 * 1024,
+                "VramBeforeMB": vram_before,
+                "VramAfterMB": vram_before + vram_delta,
+                "VramDeltaMB": vram_delta,
+            },
+            "System": {"FallbackNotes": []},
+        },
+        "HistoryAttemptLimit": 3,
+        "SceneRetryBudget": 1,
+        "HistoryConfig": None,
+    }
+
+
+def plan_runs(args):
+    """Deterministic per-run plan: names, scene prompts/seeds and injected anomalies."""
+    plans = []
+    earlier_scenes = []
+    for r in range(args.runs):
+        rng = _rng(args.seed, r)
+        run_time = BASE_TIME + timedelta(minutes=37 * r, seconds=int(rng.integers(0, 60)))
+        scenes = []
+        for s in range(args.scenes):
+            scene_seed = int(rng.integers(0, 2**31))
+            anomaly = None
+            if rng.random() < args.anomaly_rate:
+                anomaly = ANOMALIES[int(rng.integers(0, len(ANOMALIES)))]
+                if anomaly == "duplicate" and not earlier_scenes:
+                    anomaly = "flicker"
+            duplicate_of = None
+            if anomaly == "duplicate":
+                duplicate_of = earlier_scenes[int(rng.integers(0, len(earlier_scenes)))]
+                scene_seed = duplicate_of["seed"]
+            scene = {"scene_id": f"scene-{s + 1:03d}", "seed": scene_seed, "prompt": _prompt(rng),
+                     "anomaly": anomaly, "duplicate_of": duplicate_of and duplicate_of["ref"]}
+            scenes.append(scene)
+        run_name = run_time.strftime('%Y%m%d-%H%M%S')
+        for scene in scenes:
+            earlier_scenes.append({"seed": scene["seed"], "ref": f"{run_name}/{scene['scene_id']}"})
+        plans.append({"run": run_name, "time": run_time.isoformat(), "scenes": scenes})
+    return plans
+
+
+def write_run(logs_dir, plan, frames, width, height, fmt, fps):
+    """Materialise one planned run. Returns the run directory."""
+    import numpy as np
+
+    run_time = datetime.fromisoformat(plan["time"])
+    run_dir = os.path.join(logs_dir, plan["run"])
+    os.makedirs(run_dir, exist_ok=True)
+    rng = _rng(plan["scenes"][0]["seed"] if plan["scenes"] else 0, 7)
+
+    scenes_meta = []
+    for scene in plan["scenes"]:
+        scene_id = scene["scene_id"]
+        frames_rel = f"{scene_id}/generated-frames"
+        frames_dir = os.path.join(run_dir, scene_id, "generated-frames")
+        prefix = f"{FRAME_PREFIX}_{scene_id}"
+        scenes_meta.append(_scene_metadata(scene_id, scene["prompt"], frames, run_time, rng, frames_rel))
+        if frames == 0:
+            continue
+        os.makedirs(frames_dir, exist_ok=True)
+
+        seq = render_frames(scene["seed"], frames, width, height, scene["anomaly"])
+        if fmt in ("png", "both"):
+            for i, frame in enumerate(seq, start=1):
+                Image.fromarray(frame).save(os.path.join(frames_dir, f"{prefix}_{i:05d}_.png"), compress_level=1)
+        if fmt in ("mp4", "both"):
+            try:
+                import imageio.v3 as iio
+
+                iio.imwrite(os.path.join(frames_dir, f"{prefix}.mp4"), seq, fps=fps)
+            except (ImportError, OSError, ValueError) as exc:
+                print(f"[WARN] {plan['run']}/{scene_id}: MP4 not written ({exc})", file=sys.stderr)
+        # Keyframes: the bookends the generator was conditioned on, slightly perturbed
+        key_rng = _rng(scene["seed"], 2)
+        for name, frame in (("keyframe-start.png", seq[0]), ("keyframe-end.png", seq[-1])):
+            noisy = np.clip(frame + key_rng.normal(0, 4, frame.shape), 0, 255).astype(np.uint8)
+            Image.fromarray(noisy).save(os.path.join(run_dir, scene_id, name))
+        with open(os.path.join(frames_dir, f"{prefix}.done"), 'w', encoding='utf-8') as f:
+            json.dump({"Timestamp": run_time.strftime('%Y-%m-%dT%H:%M:%SZ'), "FrameCount": frames}, f)
+
+    metadata = {
+        "RunId": plan["run"],
+        "Timestamp": run_time.strftime('%Y-%m-%dT%H:%M:%S.000Z'),
+        "RunDir": os.path.abspath(run_dir),
+        "Story": {
+            "Id": f"story-{plan['run']}",
+            "Logline": plan["scenes"][0]["prompt"] if plan["scenes"] else "",
+            "DirectorsVision": "Synthetic fixture",
+            "Generator": "synthetic",
+            "File": "story.json",
+            "StoryDir": "story",
+        },
+        "Scenes": scenes_meta,
+        "QueueConfig": {
+            "SceneRetryBudget": 1,
+            "HistoryMaxWaitSeconds": 600,
+            "HistoryPollIntervalSeconds": 2,
+            "HistoryMaxAttempts": 0,
+            "PostExecutionTimeoutSeconds": 30,
+        },
+    }
+    with open(os.path.join(run_dir, "artifact-metadata.json"), 'w', encoding='utf-8') as f:
+        json.dump(metadata, f, indent=2)
+    # Give runs distinct, ordered mtimes so "most recent run" discovery is deterministic
+    stamp = run_time.timestamp()
+    os.utime(run_dir, (stamp, stamp))
+    return run_dir
+
+
+def generate_fixtures(args):
+    plans = plan_runs(args)
+    os.makedirs(args.logs_dir, exist_ok=True)
+    jobs = max(1, min(args.jobs or os.cpu_count() or 1, len(plans)))
+    write_args = (args.frames, args.width, args.height, args.format, args.fps)
+    if jobs == 1 or args.frames == 0:
+        for plan in plans:
+            write_run(args.logs_dir, plan, *write_args)
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            list(pool.map(write_run, [args.logs_dir] * len(plans), plans, *[[a] * len(plans) for a in write_args]))
+
+    manifest = {
+        "seed": args.seed,
+        "runs": args.runs,
+        "scenes": args.scenes,
+        "frames": args.frames,
+        "width": args.width,
+        "height": args.height,
+        "format": args.format,
+        "anomaly_rate": args.anomaly_rate,
+        "anomalies": [
+            {"run": p["run"], "scene_id": s["scene_id"], "anomaly": s["anomaly"], "duplicate_of": s["duplicate_of"]}
+            for p in plans for s in p["scenes"] if s["anomaly"]
+        ],
+    }
+    with open(os.path.join(args.logs_dir, "fixtures-manifest.json"), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
 
-# Create a simple test image (576x1024 to match SVD requirements)
-img = Image.new('RGB', (576, 1024), color='white')
-draw = ImageDraw.Draw(img)
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Create a ComfyUI test keyframe or synthetic run fixtures")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help="Test keyframe path (keyframe mode)")
+    parser.add_argument('--logs-dir', default=None, help="Generate synthetic runs under this directory")
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--scenes', type=int, default=4, help="Scenes per run")
+    parser.add_argument('--frames', type=int, default=25, help="Frames per scene (0: metadata only)")
+    parser.add_argument('--width', type=int, default=576)
+    parser.add_argument('--height', type=int, default=1024)
+    parser.add_argument('--format', choices=["png", "mp4", "both"], default="png")
+    parser.add_argument('--fps', type=int, default=16)
+    parser.add_argument('--anomaly-rate', type=float, default=0.2,
+                        help="Fraction of scenes with injected flicker/frozen/duplicate defects")
+    parser.add_argument('--seed', type=int, default=1234)
+    parser.add_argument('--jobs', type=int, default=None, help="Runs written in parallel (default: CPU count)")
+    args = parser.parse_args(argv)
 
-# Draw some basic shapes to make it non-trivial
-draw.rectangle([100, 100, 476, 400], fill='blue', outline='black', width=2)
-draw.ellipse([200, 500, 376, 676], fill='red', outline='black', width=2)
-draw.polygon([(288, 750), (100, 900), (476, 900)], fill='green', outline='black')
+    if args.logs_dir is None:
+        img = create_test_image(args.output)
+        print(f"✅ Test image created: {args.output}")
+        print(f"✅ Size: {img.size}")
+        print(f"✅ Format: JPEG")
+        return 0
 
-# Add text
-draw.text((200, 920), "Test Image for ComfyUI", fill='black')
+    manifest = generate_fixtures(args)
+    total = args.runs * args.scenes
+    print(f"✅ {args.runs} runs, {total} scenes, {total * args.frames} frames in {args.logs_dir}")
+    print(f"✅ Injected anomalies: {len(manifest['anomalies'])} (see fixtures-manifest.json)")
+    return 0
 
-# Save to ComfyUI input folder
-output_path = r"C:\ComfyUI\ComfyUI_windows_portable\ComfyUI\input\test_keyframe.jpg"
-os.makedirs(os.path.dirname(output_path), exist_ok=True)
-img.save(output_path, quality=95)
 
-print(f"✅ Test image created: {output_path}")
-print(f"✅ Size: {img.size}")
-print(f"✅ Format: JPEG")
+if __name__ == "__main__":
+    raise SystemExit(main())
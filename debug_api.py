@@ -1,32 +1,33 @@
 #!/usr/bin/env python3
-"""Debug ComfyUI node types."""
+"""Debug ComfyUI node types (served from the cached /object_info index)."""
 
-import requests
-import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "scripts", "comfyui-tools"))
+
+from object_info_cache import load_index
 
 try:
-    response = requests.get("http://127.0.0.1:8188/api", timeout=5)
-    api = response.json()
-    
+    index = load_index("http://127.0.0.1:8188")
+
     # Find SVD-related nodes
-    svd_nodes = [k for k in api.keys() if 'SVD' in k]
-    sampler_nodes = [k for k in api.keys() if 'Sampler' in k]
-    
+    svd_nodes = index.search('SVD')
+    sampler_nodes = index.search('Sampler')
+
     print("SVD Nodes:")
     for node in svd_nodes:
         print(f"  - {node}")
-        if hasattr(api[node], '__getitem__'):
-            outputs = api[node].get('return_types', [])
-            print(f"    Return types: {outputs}")
-    
+        print(f"    Return types: {list(index.get(node).outputs)}")
+
     print("\nSampler Nodes:")
     for node in sampler_nodes:
         print(f"  - {node}")
-        
+
 except Exception as e:
     print(f"Error: {e}")
     # Try raw request
     import subprocess
-    result = subprocess.run(['curl', '-s', 'http://127.0.0.1:8188/api'], 
+    result = subprocess.run(['curl', '-s', 'http://127.0.0.1:8188/object_info'],
                           capture_output=True, text=True)
     print(f"Raw curl response (first 500 chars):\n{result.stdout[:500]}")
@@ -1,24 +1,64 @@
+"""
+Generate injection_script.js, which Playwright evaluates to seed the settings
+store in IndexedDB from localGenSettings.json.
+
+Default mode embeds the full settings object (including every workflowJson
+string) and overwrites the stored value.
+
+--incremental emits a compact payload instead:
+- settings and embedded workflow JSON are minified
+- each workflow profile carries a content hash; in the browser, a profile is
+  reused from IndexedDB (never decoded or re-parsed) when its hash matches
+  the previous injection's and the stored copy still hashes to what that
+  injection wrote, so profiles the app has edited since are rewritten
+- --compress additionally gzips each profile (base64) and inflates it in the
+  page with DecompressionStream, only for the profiles that changed
+"""
+import argparse
+import base64
+import gzip
+import hashlib
 import json
 import os
 
-def generate_script():
-    json_path = r'c:\Dev\gemDirect1\localGenSettings.json'
-    output_path = r'c:\Dev\gemDirect1\injection_script.js'
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+# Sidecar key holding {profileId: {hash, stored}} from the last incremental injection:
+# the payload hash, and the browser-side SHA-256 of the profile as written to IndexedDB
+HASHES_KEY = 'gemDirect-settings-store:profileHashes'
 
-    with open(json_path, 'r', encoding='utf-8') as f:
-        settings = json.load(f)
 
-    # Validation logic requested by user
-    wan_t2i = settings.get('workflowProfiles', {}).get('wan-t2i', {})
-    workflow_json = wan_t2i.get('workflowJson', '')
-    
-    if len(workflow_json) == 0:
-        print("Error: wan-t2i workflowJson is empty in the source file!")
-    
-    # Construct the JS code
+def minify_profile(profile):
+    """Minify a workflow profile, including its embedded workflowJson string."""
+    profile = dict(profile)
+    workflow_json = profile.get('workflowJson')
+    if workflow_json:
+        try:
+            profile['workflowJson'] = json.dumps(json.loads(workflow_json), separators=(',', ':'), ensure_ascii=False)
+        except ValueError:
+            pass  # leave non-JSON placeholders untouched
+    return profile
+
+
+def build_incremental_payload(settings, compress=False):
+    """Split settings into a base object and hashed (optionally gzipped) profiles."""
+    base = {k: v for k, v in settings.items() if k != 'workflowProfiles'}
+    profiles = {}
+    for profile_id, profile in (settings.get('workflowProfiles') or {}).items():
+        minified = minify_profile(profile)
+        data = json.dumps(minified, separators=(',', ':'), sort_keys=True, ensure_ascii=False)
+        entry = {'hash': hashlib.sha256(data.encode('utf-8')).hexdigest()[:16]}
+        if compress:
+            entry['gz'] = base64.b64encode(gzip.compress(data.encode('utf-8'), mtime=0)).decode('ascii')
+        else:
+            entry['profile'] = minified
+        profiles[profile_id] = entry
+    return base, profiles
+
+
+def render_full_script(settings):
     settings_json_str = json.dumps(settings)
-    
-    js_code = f"""
+
+    return f"""
 async () => {{
     const settings = {settings_json_str};
 
@@ -61,11 +101,136 @@ async () => {{
     }});
 }}
 """
-    
+
+
+def render_incremental_script(settings, compress=False):
+    base, profiles = build_incremental_payload(settings, compress)
+    base_json = json.dumps(base, separators=(',', ':'))
+    profiles_json = json.dumps(profiles, separators=(',', ':'))
+
+    return f"""async () => {{
+    const settings = {base_json};
+    const profiles = {profiles_json};
+
+    const dbName = 'cinematic-story-db';
+    const storeName = 'misc';
+    const key = 'gemDirect-settings-store';
+    const hashesKey = '{HASHES_KEY}';
+
+    // Key-sorted JSON, so a profile hashes the same however its keys were ordered
+    const canonical = (value) => {{
+        if (Array.isArray(value)) return `[${{value.map(canonical).join(',')}}]`;
+        if (value && typeof value === 'object') {{
+            return `{{${{Object.keys(value).sort().map(k => `${{JSON.stringify(k)}}:${{canonical(value[k])}}`).join(',')}}}}`;
+        }}
+        return JSON.stringify(value) ?? 'null';
+    }};
+    const digest = async (value) => {{
+        const hash = await crypto.subtle.digest('SHA-256', new TextEncoder().encode(canonical(value)));
+        return Array.from(new Uint8Array(hash), b => b.toString(16).padStart(2, '0')).join('');
+    }};
+    const inflate = async (b64) => {{
+        const bytes = Uint8Array.from(atob(b64), c => c.charCodeAt(0));
+        const stream = new Blob([bytes]).stream().pipeThrough(new DecompressionStream('gzip'));
+        return await new Response(stream).text();
+    }};
+    const wrap = (request) => new Promise((resolve, reject) => {{
+        request.onsuccess = () => resolve(request.result);
+        request.onerror = () => reject(request.error);
+    }});
+
+    const db = await new Promise((resolve, reject) => {{
+        const request = indexedDB.open(dbName);
+        request.onerror = (event) => reject("Database error: " + event.target.errorCode);
+        request.onsuccess = (event) => resolve(event.target.result);
+    }});
+    if (!db.objectStoreNames.contains(storeName)) {{
+        throw new Error(`Store ${{storeName}} not found. Is the app loaded?`);
+    }}
+
+    const readStore = db.transaction([storeName], "readonly").objectStore(storeName);
+    const [existing, storedHashes] = await Promise.all([wrap(readStore.get(key)), wrap(readStore.get(hashesKey))]);
+    const existingProfiles = (existing && existing.state && existing.state.workflowProfiles) || {{}};
+    const knownHashes = storedHashes || {{}};
+
+    const workflowProfiles = {{}};
+    const changed = [];
+    for (const [id, entry] of Object.entries(profiles)) {{
+        const current = existingProfiles[id];
+        const known = knownHashes[id];
+        if (current && known && known.hash === entry.hash && known.stored === await digest(current)) {{
+            workflowProfiles[id] = current;
+            continue;
+        }}
+        workflowProfiles[id] = entry.gz !== undefined ? JSON.parse(await inflate(entry.gz)) : entry.profile;
+        changed.push(id);
+    }}
+
+    if (!workflowProfiles['wan-t2i'] || !workflowProfiles['wan-t2i'].workflowJson || workflowProfiles['wan-t2i'].workflowJson.length === 0) {{
+        throw new Error("wan-t2i workflowJson is missing or empty");
+    }}
+
+    const value = {{
+        state: {{
+            ...settings,
+            workflowProfiles,
+            _hasHydrated: true,
+            _isInitialized: true
+        }},
+        version: 0
+    }};
+    const hashes = {{}};
+    for (const [id, entry] of Object.entries(profiles)) {{
+        hashes[id] = {{ hash: entry.hash, stored: await digest(workflowProfiles[id]) }};
+    }}
+
+    const transaction = db.transaction([storeName], "readwrite");
+    const store = transaction.objectStore(storeName);
+    store.put(value, key);
+    store.put(hashes, hashesKey);
+    await new Promise((resolve, reject) => {{
+        transaction.oncomplete = resolve;
+        transaction.onerror = () => reject("Put error: " + transaction.error);
+    }});
+    return `Injection successful (${{changed.length}}/${{Object.keys(profiles).length}} profiles updated)`;
+}}
+"""
+
+
+def generate_script(json_path=None, output_path=None, incremental=False, compress=False):
+    json_path = json_path or os.path.join(SCRIPT_DIR, 'localGenSettings.json')
+    output_path = output_path or os.path.join(SCRIPT_DIR, 'injection_script.js')
+
+    with open(json_path, 'r', encoding='utf-8') as f:
+        settings = json.load(f)
+
+    # Validation logic requested by user
+    wan_t2i = settings.get('workflowProfiles', {}).get('wan-t2i', {})
+    workflow_json = wan_t2i.get('workflowJson', '')
+
+    if len(workflow_json) == 0:
+        print("Error: wan-t2i workflowJson is empty in the source file!")
+
+    # Construct the JS code
+    if incremental:
+        js_code = render_incremental_script(settings, compress)
+    else:
+        js_code = render_full_script(settings)
+
     with open(output_path, 'w', encoding='utf-8') as f:
         f.write(js_code)
-    
-    print(f"Generated {output_path}")
+
+    print(f"Generated {output_path} ({len(js_code.encode('utf-8')) / 1024:.1f} KB)")
+
 
 if __name__ == "__main__":
-    generate_script()
+    parser = argparse.ArgumentParser(description="Generate the Playwright settings injection script")
+    parser.add_argument('--settings', default=None, help="Path to localGenSettings.json (default: next to this script)")
+    parser.add_argument('--output', default=None, help="Output path (default: injection_script.js next to this script)")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Emit a minified, content-hashed payload that only rewrites changed profiles")
+    parser.add_argument('--compress', action='store_true', help="With --incremental, gzip each profile payload")
+    args = parser.parse_args()
+    if args.compress and not args.incremental:
+        parser.error("--compress requires --incremental")
+    generate_script(args.settings, args.output, args.incremental, args.compress)
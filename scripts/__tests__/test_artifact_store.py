@@ -0,0 +1,107 @@
+"""Tests for scripts/frames/artifact_store.py"""
+import os
+import shutil
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "frames"))
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "comfyui_nodes"))
+
+import artifact_store  # noqa: E402
+from artifact_store import ArtifactStore, completed_prefixes  # noqa: E402
+from write_done_marker import write_done_marker  # noqa: E402
+
+PREFIX = "gemdirect1_scene-001"
+
+
+def _scene(out: Path, frames: int = 4, seed: bytes = b"a") -> list:
+    out.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for i in range(1, frames + 1):
+        path = out / f"{PREFIX}_{i:05d}_.png"
+        path.write_bytes(seed * 1000 + bytes([i]))
+        paths.append(path)
+    (out / f"{PREFIX}_00001.mp4").write_bytes(seed * 5000)
+    return paths
+
+
+def test_ingest_dedups_across_runs_with_hardlinks(tmp_path, monkeypatch):
+    output = tmp_path / "output"
+    _scene(output)
+    (output / f"{PREFIX}_00002_.png").write_bytes((output / f"{PREFIX}_00001_.png").read_bytes())  # a repeated frame
+    hashed = []
+    real_hash = artifact_store._file_sha256
+    monkeypatch.setattr(artifact_store, "_file_sha256", lambda p: hashed.append(p) or real_hash(p))
+
+    with ArtifactStore(tmp_path / "store") as store:
+        assert store.ingest_scene(output, PREFIX, tmp_path / "run-a") is None  # no done marker yet
+        write_done_marker(str(output), PREFIX, frame_count=4)
+        assert completed_prefixes(output) == [PREFIX]
+
+        first = store.ingest_scene(output, PREFIX, tmp_path / "run-a")
+        assert (first.files, first.new_blobs, first.deduplicated) == (5, 4, 1)
+        second = store.ingest_scene(output, PREFIX, tmp_path / "run-b")
+        assert (second.new_blobs, second.deduplicated, second.methods["hardlink"]) == (0, 5, 5)
+        assert len(hashed) == 5  # the second run hit the hash cache
+        frames_only = store.ingest_scene(output, PREFIX, tmp_path / "run-c", frames_only=True)
+        assert frames_only.files == 4
+
+        for name in os.listdir(output):
+            if name.endswith(".png") or name.endswith(".mp4"):
+                a, b = tmp_path / "run-a" / name, tmp_path / "run-b" / name
+                assert a.read_bytes() == (output / name).read_bytes()
+                assert os.path.samefile(a, b)
+        assert os.stat(tmp_path / "run-a" / f"{PREFIX}_00001.mp4").st_mode & 0o222 == 0  # blobs are read-only
+
+        stats = store.stats()
+        assert (stats["runs"], stats["blobs"], stats["refs"]) == (3, 4, 14)
+        assert (stats["logical_bytes"], stats["stored_bytes"]) == (2 * (4 * 1001 + 5000) + 4 * 1001, 3 * 1001 + 5000)
+
+
+def test_gc_follows_deleted_and_replaced_run_files(tmp_path):
+    output = tmp_path / "output"
+    _scene(output)
+    write_done_marker(str(output), PREFIX)
+    with ArtifactStore(tmp_path / "store") as store:
+        store.ingest_scene(output, PREFIX, tmp_path / "run-a")
+        store.ingest_scene(output, PREFIX, tmp_path / "run-b")
+        assert store.gc(grace_s=0) == {"refs_dropped": 0, "blobs_deleted": 0, "bytes_freed": 0,
+                                       "strays_deleted": 0, "dry_run": False}
+
+        shutil.rmtree(tmp_path / "run-a")  # e.g. cleanup-runs.ts
+        assert store.gc(grace_s=0)["blobs_deleted"] == 0  # run-b still references every blob
+        assert store.stats()["runs"] == 1
+
+        # Rewriting a run file (new file renamed over the link) releases that blob
+        replacement = tmp_path / "run-b" / "new.tmp"
+        replacement.write_bytes(b"edited")
+        os.replace(replacement, tmp_path / "run-b" / f"{PREFIX}_00001.mp4")
+        assert store.gc(grace_s=0, dry_run=True)["blobs_deleted"] == 1
+        assert store.gc(grace_s=0)["bytes_freed"] == 5000
+        assert (tmp_path / "run-b" / f"{PREFIX}_00001.mp4").read_bytes() == b"edited"
+
+        # Unreferenced blobs inside the grace period survive (an ingest may still be linking them)
+        assert store.release(tmp_path / "run-b") == 4
+        assert store.gc(grace_s=3600)["blobs_deleted"] == 0
+        assert store.gc(grace_s=0)["blobs_deleted"] == 4
+        assert store.stats()["blobs"] == 0 and list(store.objects.iterdir()) == []
+        assert (tmp_path / "run-b" / f"{PREFIX}_00001_.png").exists()  # release leaves run files alone
+
+
+def test_falls_back_to_copies_across_filesystems(tmp_path, monkeypatch):
+    output = tmp_path / "output"
+    paths = _scene(output, frames=2)
+    write_done_marker(str(output), PREFIX)
+
+    def cross_device(*_):
+        raise OSError(18, "Invalid cross-device link")
+
+    monkeypatch.setattr(os, "link", cross_device)
+    monkeypatch.setattr(artifact_store, "_reflink", lambda src, dest: False)
+    with ArtifactStore(tmp_path / "store") as store:
+        result = store.ingest_scene(output, PREFIX, tmp_path / "run-a")
+        assert result.methods == {"copy": 3}
+        copied = tmp_path / "run-a" / paths[0].name
+        assert copied.read_bytes() == paths[0].read_bytes()
+        copied.write_bytes(b"changed in place")  # copies are private to the run
+        assert store.gc(grace_s=0)["refs_dropped"] == 1
@@ -0,0 +1,116 @@
+"""Tests for scripts/quality-checks/check_history.py"""
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+from pathlib import Path
+
+CHECKS_DIR = Path(__file__).resolve().parents[1] / "quality-checks"
+sys.path.insert(0, str(CHECKS_DIR))
+
+from check_history import CheckHistory, default_history_path, report_rows  # noqa: E402
+
+
+def _similarity_report(run: str, scores) -> dict:
+    return {
+        "check_name": "similarity",
+        "timestamp": run,
+        "scenes": [{"scene_id": f"scene-{i:03d}", "similarity": s, "prompt_preview": "..."} for i, s in enumerate(scores)],
+        "aggregate_alignment": round(sum(scores) / len(scores), 3),
+        "meets_threshold": sum(scores) / len(scores) >= 0.75,
+    }
+
+
+def test_report_rows_flatten_scene_and_run_metrics():
+    report = {
+        "check_name": "video_quality",
+        "flicker_threshold": 40.0,
+        "meets_threshold": True,
+        "scenes": [{"scene_id": "s1", "frame_count": 25, "start_bookend": {"ssim": 0.8, "psnr": float("inf")},
+                    "source": "png"}],
+    }
+    rows = set(report_rows(report))
+    assert rows == {("", "flicker_threshold", 40.0), ("", "meets_threshold", 1.0),
+                    ("s1", "frame_count", 25.0), ("s1", "start_bookend.ssim", 0.8)}
+
+
+def test_trend_orders_runs_and_rerecord_replaces(tmp_path):
+    with CheckHistory(tmp_path / "history.sqlite") as history:
+        history.record(_similarity_report("20251102-090000", [0.9, 0.7]), "20251102-090000")
+        history.record(_similarity_report("20251101-090000", [0.5, 0.6, 0.7]), "20251101-090000")
+        history.record(_similarity_report("20251103-090000", [0.8]), "20251103-090000")
+        # Re-running a check on a run replaces its rows (scene-002 disappears)
+        history.record(_similarity_report("20251101-090000", [0.6, 0.6]), "20251101-090000")
+
+        trend = history.trend("similarity", "aggregate_alignment")
+        assert [(run, value) for run, _, value in trend] == [
+            ("20251101-090000", 0.6), ("20251102-090000", 0.8), ("20251103-090000", 0.8)]
+        assert [run for run, _, _ in history.trend("similarity", "aggregate_alignment", limit=2)] == [
+            "20251102-090000", "20251103-090000"]
+        assert [v for _, _, v in history.trend("similarity", "similarity", scene_id="scene-001")] == [0.6, 0.7]
+        assert history.trend("similarity", "similarity", scene_id="scene-002") == []
+
+        daily = history.daily("similarity", "similarity")
+        assert [(d["day"], d["samples"]) for d in daily] == [("2025-11-01", 2), ("2025-11-02", 2), ("2025-11-03", 1)]
+        assert history.pass_rate("similarity") == (2, 3)
+
+
+def test_import_logs_is_incremental(tmp_path):
+    logs = tmp_path / "logs"
+    for run, scores in [("20251101-090000", [0.9]), ("20251102-090000", [0.5])]:
+        (logs / run).mkdir(parents=True)
+        (logs / run / "similarity-check-report.json").write_text(json.dumps(_similarity_report(run, scores)))
+
+    with CheckHistory(tmp_path / "history.sqlite") as history:
+        first = history.import_logs(logs)
+        second = history.import_logs(logs)
+        report = logs / "20251102-090000" / "similarity-check-report.json"
+        report.write_text(json.dumps(_similarity_report("20251102-090000", [0.95])))
+        os.utime(report, (report.stat().st_atime, report.stat().st_mtime + 5))
+        third = history.import_logs(logs)
+        values = [v for _, _, v in history.trend("similarity", "aggregate_alignment")]
+
+    assert (first.recorded, second.recorded, second.skipped, third.recorded) == (2, 0, 2, 1)
+    assert values == [0.9, 0.95]
+
+
+def test_checks_record_into_logs_history(tmp_path):
+    run_dir = tmp_path / "logs" / "20251101-000000"
+    run_dir.mkdir(parents=True)
+    metadata = {"Scenes": [{"SceneId": "scene-001", "Prompt": "A chase across rooftops"},
+                           {"SceneId": "scene-002", "Prompt": "They talk and laugh"}]}
+    (run_dir / "artifact-metadata.json").write_text(json.dumps(metadata))
+    env = {k: v for k, v in os.environ.items() if k != "GEMDIRECT_CHECK_HISTORY"}
+    subprocess.run([sys.executable, str(CHECKS_DIR / "diversity-check.py"), str(run_dir)],
+                   env=env, capture_output=True, check=False)
+
+    with CheckHistory(tmp_path / "logs" / "check-history.sqlite") as history:
+        assert [run for run, _, _ in history.trend("diversity", "entropy")] == ["20251101-000000"]
+        assert history.trend("diversity", "theme_distribution.action")[0][2] == 1.0
+
+
+def test_default_store_stays_out_of_non_logs_parents(tmp_path, monkeypatch):
+    monkeypatch.delenv("GEMDIRECT_CHECK_HISTORY", raising=False)
+    assert default_history_path(tmp_path / "logs" / "my-run") == tmp_path / "logs" / "check-history.sqlite"
+    assert default_history_path(tmp_path / "20251101-000000") == tmp_path / "check-history.sqlite"
+    # e.g. temp-validate-run at the repo root: never write into the repo root
+    ad_hoc = tmp_path / "temp-validate-run"
+    assert default_history_path(ad_hoc) == ad_hoc / "check-history.sqlite"
+    monkeypatch.setenv("GEMDIRECT_CHECK_HISTORY", "off")
+    assert default_history_path(tmp_path / "logs" / "my-run") is None
+
+
+def test_schema_mismatch_moves_the_old_store_aside(tmp_path, capsys):
+    path = tmp_path / "logs" / "check-history.sqlite"
+    with CheckHistory(path) as history:
+        history.record(_similarity_report("20251101-090000", [0.8]), "20251101-090000")
+        history._db.execute("UPDATE meta SET value = '0' WHERE key = 'version'")
+        history._db.commit()
+
+    with CheckHistory(path) as history:
+        assert history.trend("similarity", "aggregate_alignment") == []
+    assert "moved it to" in capsys.readouterr().out
+    old = sqlite3.connect(str(tmp_path / "logs" / "check-history.v0.sqlite"))
+    assert old.execute("SELECT COUNT(*) FROM runs").fetchone()[0] == 1  # the trend history is kept, not deleted
+    old.close()
@@ -0,0 +1,94 @@
+"""Tests for scripts/quality-checks/doc_cache.py and its use in coherence-check.py"""
+import importlib.util
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+spacy = pytest.importorskip("spacy")
+
+CHECKS_DIR = Path(__file__).resolve().parents[1] / "quality-checks"
+sys.path.insert(0, str(CHECKS_DIR))
+sys.path.insert(0, str(CHECKS_DIR.parent / "tracing"))
+
+from doc_cache import DocCache  # noqa: E402
+
+PROMPTS = [
+    "Maria meets John at the harbor. She hands him the letter.",
+    "John reads it twice and then he burns it.",
+    "The storm reaches the harbor at night.",
+]
+
+
+def _nlp(extra_pipe=None):
+    """Offline pipeline with PERSON entities (en_core_web_sm is not needed)."""
+    nlp = spacy.blank("en")
+    ruler = nlp.add_pipe("entity_ruler")
+    ruler.add_patterns([{"label": "PERSON", "pattern": name} for name in ("Maria", "John")])
+    if extra_pipe:
+        nlp.add_pipe(extra_pipe)
+    return nlp
+
+
+def test_cached_docs_match_fresh_parse_and_key_on_pipeline(tmp_path):
+    nlp = _nlp()
+    with DocCache(tmp_path / "docs.sqlite") as cache:
+        first = cache.parse(nlp, PROMPTS + PROMPTS[:1])
+        assert (cache.hits, cache.misses) == (0, 3)  # the repeated prompt is parsed once
+    with DocCache(tmp_path / "docs.sqlite") as cache:
+        second = cache.parse(nlp, PROMPTS)
+        assert cache.stats()["hit_rate"] == 1.0
+        # Another component set is another pipeline: its Docs are parsed anew
+        cache.parse(_nlp("sentencizer"), PROMPTS[:1])
+        assert cache.misses == 1 and cache.stats()["entries"] == 4
+    for a, b in zip(first, second):
+        assert [t.text for t in a] == [t.text for t in b]
+        assert [(e.text, e.label_) for e in a.ents] == [(e.text, e.label_) for e in b.ents]
+
+
+def test_size_budget_evicts_least_recently_used(tmp_path):
+    nlp = _nlp()
+    texts = [f"Scene {i}: Maria waits for John by the pier." for i in range(10)]
+    with DocCache(tmp_path / "docs.sqlite", max_bytes=10**9) as cache:
+        cache.parse(nlp, texts[:5])
+        per_doc = cache.total_bytes() / 5
+    with DocCache(tmp_path / "docs.sqlite", max_bytes=int(per_doc * 6.5)) as cache:
+        cache.parse(nlp, texts[:1])  # touch scene 0: now the most recent of the first five
+        cache.parse(nlp, texts[5:8])  # 8 Docs > 6.5: evict down to 90% of the budget
+        assert cache.evictions == 3 and cache.total_bytes() <= per_doc * 6.5 * 0.9 + 1
+        cache.parse(nlp, texts[:1])
+        assert (cache.hits, cache.misses) == (2, 3)  # scene 0 survived
+        cache.parse(nlp, texts[1:5])
+        assert (cache.hits, cache.misses) == (3, 6)  # three of the untouched scenes 1-4 were evicted
+
+
+def _load_check():
+    spec = importlib.util.spec_from_file_location("coherence_check", CHECKS_DIR / "coherence-check.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_coherence_report_includes_cache_hit_rate(tmp_path, monkeypatch):
+    check = _load_check()
+    monkeypatch.setattr(check, "load_nlp", _nlp)
+    monkeypatch.setenv("GEMDIRECT_DOC_CACHE", str(tmp_path / "docs.sqlite"))
+    monkeypatch.setenv("GEMDIRECT_CHECK_HISTORY", "0")
+    run_dir = tmp_path / "20251101-000000"
+    run_dir.mkdir()
+    scenes = [{"SceneId": f"s{i}", "Prompt": p} for i, p in enumerate(PROMPTS)]
+    (run_dir / "artifact-metadata.json").write_text(json.dumps({"Scenes": scenes}))
+
+    reports = []
+    for _ in range(2):
+        monkeypatch.setattr(sys, "argv", ["coherence-check.py", str(run_dir)])
+        with pytest.raises(SystemExit):
+            check.main()
+        reports.append(json.loads((run_dir / "coherence-check-report.json").read_text()))
+
+    cold, warm = (r["doc_cache"] for r in reports)
+    assert (cold["hits"], cold["misses"], cold["hit_rate"]) == (0, 3, 0.0)
+    assert (warm["hits"], warm["misses"], warm["hit_rate"]) == (3, 0, 1.0)
+    assert reports[0]["scenes"] == reports[1]["scenes"]
+    assert reports[0]["scenes"][0]["entity_count"] == 2
@@ -0,0 +1,114 @@
+"""Tests for scripts/comfyui-tools/comfyui_client.py (event routing, no live server)"""
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("requests")
+pytest.importorskip("websocket")
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "comfyui-tools"))
+
+from comfyui_client import ComfyUIClient, ComfyUIError, PromptHandle  # noqa: E402
+
+
+@pytest.fixture()
+def client(monkeypatch):
+    client = ComfyUIClient("http://127.0.0.1:1")
+    history = {}
+    monkeypatch.setattr(client, "history", lambda prompt_id=None: {k: v for k, v in history.items() if k == prompt_id})
+    client.fake_history = history
+    yield client
+    client.close()
+
+
+def _register(client, prompt_id):
+    handle = PromptHandle(prompt_id)
+    client._pending[prompt_id] = handle
+    return handle
+
+
+def test_events_are_routed_per_prompt(client):
+    a, b = _register(client, "a"), _register(client, "b")
+    seen = []
+    a.add_listener(lambda event, data: seen.append(event))
+    client.fake_history["a"] = {"outputs": {"9": {"images": [{"filename": "x.png"}]}}, "status": {"completed": True}}
+
+    client._dispatch({"type": "executing", "data": {"node": "3", "prompt_id": "a"}})
+    client._dispatch({"type": "progress", "data": {"value": 4, "max": 20, "prompt_id": "b"}})
+    client._dispatch({"type": "executing", "data": {"node": None, "prompt_id": "a"}})
+
+    assert a.result(5).outputs == {"9": {"images": [{"filename": "x.png"}]}}
+    assert seen == ["executing", "executing"]
+    assert not b.done() and b.progress == (4, 20)
+
+    client._dispatch({"type": "execution_error", "data": {"prompt_id": "b", "exception_message": "OOM"}})
+    with pytest.raises(ComfyUIError, match="OOM"):
+        b.result(0)
+    assert client._pending == {}
+
+
+def test_events_before_registration_are_replayed(client):
+    client._dispatch({"type": "execution_start", "data": {"prompt_id": "early"}})
+    client._dispatch({"type": "executing", "data": {"node": None, "prompt_id": "early"}})
+    assert "early" in client._orphans
+
+    handle = _register(client, "early")
+    for message in client._orphans.pop("early"):
+        client._dispatch(message)
+    assert handle.result(5).status == "success"
+
+
+def test_completes_only_after_history_is_stored(client):
+    handle = _register(client, "p")
+    # execution_success arrives before ComfyUI's task_done() writes the /history entry
+    client._dispatch({"type": "execution_success", "data": {"prompt_id": "p"}})
+    assert not handle.done()
+
+    client.fake_history["p"] = {"outputs": {"9": {"images": [{"filename": "p.png"}]}}, "status": {"completed": True}}
+    client._dispatch({"type": "executing", "data": {"node": None, "prompt_id": "p"}})
+    assert handle.result(5).outputs == {"9": {"images": [{"filename": "p.png"}]}}
+
+    failed = _register(client, "f")
+    client._dispatch({"type": "execution_error", "data": {"prompt_id": "f", "exception_message": "OOM"}})
+    client._dispatch({"type": "executing", "data": {"node": None, "prompt_id": "f"}})
+    client._dispatch({"type": "progress", "data": {"value": 1, "max": 2, "prompt_id": "p"}})
+    assert failed.done() and client._orphans == {}  # late events for finished prompts are dropped
+
+
+def test_slow_history_lookup_does_not_hold_up_other_prompts(client, monkeypatch):
+    slow, fast = _register(client, "slow"), _register(client, "fast")
+    release = threading.Event()
+
+    def history(prompt_id=None):
+        if prompt_id == "slow":
+            release.wait(5)
+        return {prompt_id: {"outputs": {}, "status": {"completed": True}}}
+
+    monkeypatch.setattr(client, "history", history)
+    client._dispatch({"type": "executing", "data": {"node": None, "prompt_id": "slow"}})
+    client._dispatch({"type": "executing", "data": {"node": None, "prompt_id": "fast"}})
+    assert fast.result(2).status == "success" and not slow.done()
+    release.set()
+    assert slow.result(5).status == "success"
+
+
+def test_resume_pending_resolves_from_history(client):
+    done, failed, running = _register(client, "done"), _register(client, "failed"), _register(client, "running")
+    client.fake_history["done"] = {"outputs": {}, "status": {"completed": True, "status_str": "success"}}
+    client.fake_history["failed"] = {"outputs": {}, "status": {"completed": False, "status_str": "error"}}
+
+    assert client.resume_pending() == 2
+    assert done.result(0).status == "success"
+    with pytest.raises(ComfyUIError):
+        failed.result(0)
+    assert not running.done()
+
+
+def test_wait_all_reports_timeouts_and_errors(client):
+    ok, bad, slow = _register(client, "ok"), _register(client, "bad"), _register(client, "slow")
+    client._complete(ok, {"outputs": {}})
+    client._fail(bad, "boom", None)
+    results = client.wait_all([ok, bad, slow], timeout=0.01)
+    assert [(r.status, r.error) for r in results] == [("success", None), ("error", "boom"), ("error", "timeout")]
@@ -0,0 +1,95 @@
+"""Tests for scripts/fastvideo/conditioning_cache.py"""
+import base64
+import io
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "fastvideo"))
+
+from conditioning_cache import KeyframeCache, LRUCache, content_key  # noqa: E402
+from scheduler import CostModel  # noqa: E402
+
+
+def _keyframe(size, color):
+    buf = io.BytesIO()
+    Image.new("RGB", size, color).save(buf, format="PNG")
+    return "data:image/png;base64," + base64.b64encode(buf.getvalue()).decode("ascii")
+
+
+def test_content_key_is_stable_and_unambiguous():
+    assert content_key("prompt", 1280, 544) == content_key("prompt", 1280, 544)
+    assert content_key("ab", "c") != content_key("a", "bc")
+    assert content_key(b"x") == content_key("x")
+
+
+def test_lru_evicts_least_recently_used_by_count_and_bytes():
+    cache = LRUCache(max_entries=3, max_bytes=10, sizeof=len)
+    for key in "abc":
+        cache.put(key, key * 3)
+    assert cache.get("a") == "aaa"  # a is now most recent
+    cache.put("d", "ddd")  # 4 entries > 3: evicts b
+    assert cache.get("b") is None
+    cache.put("e", "eeeeeee")  # bytes 3+3+3+7 > 10: evicts c, then a
+    assert [k for k in "acde" if cache.get(k) is not None] == ["d", "e"]
+    stats = cache.stats()
+    assert stats["entries"] == 2 and stats["bytes"] == 10 and stats["evictions"] == 3
+
+    calls = []
+    value, hit = cache.get_or_create("f", lambda: calls.append(1) or "f")
+    assert (value, hit) == ("f", False)
+    assert cache.get_or_create("f", lambda: calls.append(1) or "f") == ("f", True)
+    assert calls == [1]
+
+
+def test_keyframe_cache_shares_decoded_resized_image():
+    cache = KeyframeCache(max_entries=2)
+    payload = _keyframe((640, 360), (200, 10, 10))
+    first, original, hit = cache.prepare(payload, (320, 192))
+    assert (original, first.size, hit) == ((640, 360), (320, 192), False)
+    second, _, hit = cache.prepare(payload, (320, 192))
+    assert hit and second is first
+    # Same bytes at another size, or another keyframe, are separate entries
+    assert cache.prepare(payload, (640, 360))[2] is False
+    assert cache.prepare(_keyframe((640, 360), (0, 0, 200)), (320, 192))[2] is False
+    assert cache.stats()["entries"] == 2
+    assert cache.stats()["hitRate"] == 0.25
+
+    # The resample filter is part of the key
+    cache = KeyframeCache()
+    lanczos, _, _ = cache.prepare(payload, (320, 192))
+    bilinear, _, hit = cache.prepare(payload, (320, 192), Image.Resampling.BILINEAR)
+    assert not hit and bilinear is not lanczos
+
+
+def test_concurrent_misses_share_one_build():
+    cache = LRUCache()
+    calls = []
+    started = threading.Barrier(4)
+
+    def build():
+        calls.append(threading.get_ident())
+        time.sleep(0.1)
+        return "value"
+
+    def lookup(_):
+        started.wait()
+        return cache.get_or_create("k", build)
+
+    with ThreadPoolExecutor(4) as pool:
+        results = list(pool.map(lookup, range(4)))
+    assert len(calls) == 1
+    assert sorted(hit for _, hit in results) == [False, True, True, True]
+    assert cache.stats()["hits"] == 3 and cache.stats()["misses"] == 1
+
+
+def test_variant_estimate_scales_time_not_memory():
+    model = CostModel()
+    single, four = model.estimate(1280, 544, 121), model.estimate(1280, 544, 121, repeats=4)
+    assert four.memory_mb == single.memory_mb
+    assert four.seconds - model.overhead_s == pytest.approx(4 * (single.seconds - model.overhead_s))
@@ -0,0 +1,86 @@
+"""Tests for scripts/frames/deflicker.py"""
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+pytest.importorskip("PIL")
+from PIL import Image  # noqa: E402
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "frames"))
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "comfyui_nodes"))
+
+from deflicker import DeflickerConfig, deflicker_frames, pending_prefixes, run  # noqa: E402
+from write_done_marker import write_done_marker  # noqa: E402
+
+PREFIX = "gemdirect1_scene-001"
+
+
+def _flickering(count: int = 10) -> np.ndarray:
+    rng = np.random.default_rng(0)
+    base = rng.integers(40, 200, size=(16, 20, 3)).astype(np.int16)
+    gains = np.where(np.arange(count) % 2, 30, -30)
+    return np.stack([np.clip(base + g, 0, 255) for g in gains]).astype(np.uint8)
+
+
+@pytest.mark.parametrize("window", [1, 2, 3, 5])
+def test_temporal_blend_matches_centred_window(window):
+    frames = _flickering(9)
+    config = DeflickerConfig(strength=0.5, window_size=window)
+    out = np.stack(list(deflicker_frames(iter(frames), config)))
+    assert out.shape == frames.shape
+
+    half = (window - 1) // 2
+    for t in range(len(frames)):
+        lo, hi = max(0, t - half), min(len(frames), t + window - half)
+        mean = frames[lo:hi].astype(np.float32).mean(axis=0)
+        expected = np.clip(frames[t] * 0.5 + mean * 0.5 + 0.5, 0, 255).astype(np.uint8)
+        assert np.abs(out[t].astype(int) - expected.astype(int)).max() <= 1, t
+
+
+def test_streaming_keeps_window_resident():
+    consumed = []
+
+    def source():
+        for i, frame in enumerate(_flickering(20)):
+            consumed.append(i)
+            yield frame
+
+    outputs = deflicker_frames(source(), DeflickerConfig(window_size=5))
+    next(outputs)
+    # The first frame needs only its lookahead (2 frames) before it is emitted
+    assert len(consumed) == 3
+
+
+def test_histogram_match_reduces_flicker():
+    frames = _flickering(8)
+    out = np.stack(list(deflicker_frames(iter(frames), DeflickerConfig(strength=1.0, window_size=3,
+                                                                          method="histogram_match"))))
+    before = np.abs(np.diff(frames.reshape(8, -1).mean(axis=1))).mean()
+    after = np.abs(np.diff(out.reshape(8, -1).mean(axis=1))).mean()
+    assert after < before * 0.6
+
+
+def test_from_settings_and_validation():
+    config = DeflickerConfig.from_settings({"featureFlags": {"deflickerStrength": 0.6, "deflickerWindowSize": 5}})
+    assert (config.strength, config.window_size, config.method) == (0.6, 5, "temporal_blend")
+    with pytest.raises(ValueError):
+        DeflickerConfig(method="optical_flow").validate()
+
+
+def test_run_publishes_with_done_marker(tmp_path):
+    for i, frame in enumerate(_flickering(6), start=1):
+        Image.fromarray(frame).save(tmp_path / f"{PREFIX}_{i:05d}_.png")
+    assert pending_prefixes(str(tmp_path)) == []
+    write_done_marker(str(tmp_path), PREFIX, frame_count=6)
+    assert pending_prefixes(str(tmp_path)) == [PREFIX]
+
+    [result] = run(str(tmp_path), [PREFIX], DeflickerConfig(strength=0.8), jobs=1)
+    assert result["success"] and result["originalFrameCount"] == 6
+    assert result["flickerReduction"] > 50
+    marker = json.loads((tmp_path / f"{PREFIX}_deflicker.done").read_text())
+    assert marker["FrameCount"] == 6
+    assert len(list(tmp_path.glob(f"{PREFIX}_deflicker_*_.png"))) == 6
+    assert pending_prefixes(str(tmp_path)) == []
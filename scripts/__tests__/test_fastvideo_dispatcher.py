@@ -0,0 +1,148 @@
+"""Tests for scripts/fastvideo/dispatcher.py against CPU stand-in workers (scripts/fastvideo/standin.py)"""
+import signal
+import socket
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")
+pytest.importorskip("imageio_ffmpeg")
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "fastvideo"))
+
+from dispatcher import Dispatcher, create_app, spawn_standins  # noqa: E402
+
+SMALL = {"prompt": "a lighthouse at dusk", "width": 256, "height": 256, "numFrames": 8, "fps": 8}
+
+
+def _free_port_block(count):
+    """First of `count` consecutive free ports."""
+    for _ in range(50):
+        with socket.socket() as s:
+            s.bind(("127.0.0.1", 0))
+            base = s.getsockname()[1]
+        if base + count > 65535:
+            continue
+        try:
+            for port in range(base, base + count):
+                with socket.socket() as s:
+                    s.bind(("127.0.0.1", port))
+            return base
+        except OSError:
+            continue
+    raise RuntimeError("no free port block")
+
+
+def _wait_until(predicate, timeout=90.0, interval=0.2):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        value = predicate()
+        if value:
+            return value
+        time.sleep(interval)
+    raise AssertionError("timed out")
+
+
+@pytest.fixture
+def cluster(tmp_path, request):
+    model_ids, env = request.param
+    env = {**env, "FASTVIDEO_JOURNAL": "0"}
+    processes, urls = spawn_standins(len(model_ids), _free_port_block(len(model_ids)), model_ids, env)
+    dispatcher = Dispatcher(urls, health_interval_s=0.25, wait_s=5.0)
+    try:
+        with TestClient(create_app(dispatcher)) as client:
+            _wait_until(lambda: all(w["healthy"] for w in client.get("/health").json()["workers"]))
+            yield client, dispatcher, processes, tmp_path
+    finally:
+        for process in processes:
+            process.kill()
+            process.wait()
+
+
+@pytest.mark.parametrize("cluster", [(["model-a", "model-b", "model-a"], {})], indirect=True)
+def test_routes_by_model_and_proxies_videos(cluster):
+    client, dispatcher, _, tmp_path = cluster
+    body = {**SMALL, "outputDir": str(tmp_path)}
+
+    result = client.post("/generate", json={**body, "modelId": "model-b"}).json()
+    assert result["status"] == "complete" and result["worker"] == "w1"
+    assert result["videoUrl"].startswith("/workers/w1/videos/")
+
+    video = client.get(result["videoUrl"])
+    assert video.status_code == 200 and video.headers["content-type"] == "video/mp4"
+    part = client.get(result["videoUrl"], headers={"Range": "bytes=10-19"})
+    assert part.status_code == 206 and part.content == video.content[10:20]
+    assert client.get(result["posterUrl"]).headers["content-type"] == "image/jpeg"
+
+    # model-a requests stay on model-a workers, and on the one that has it loaded
+    workers = {client.post("/generate", json={**body, "modelId": "model-a"}).json()["worker"] for _ in range(4)}
+    assert workers == {"w0"}
+    assert [w.model_loaded for w in dispatcher.candidates("model-a")] == [True, False]
+
+    variants = client.post("/generate/variants", json={**body, "modelId": "model-b", "count": 2}).json()
+    assert variants["worker"] == "w1"
+    assert all(v["videoUrl"].startswith("/workers/w1/") for v in variants["variants"])
+
+    assert client.post("/generate", json={**body, "modelId": "model-z"}).status_code == 404
+    health = client.get("/health").json()
+    assert health["status"] == "ok" and health["modelId"] == "model-a,model-b"
+
+
+@pytest.mark.parametrize("cluster", [(["model-a", "model-a"], {"FASTVIDEO_STANDIN_MS_PER_FRAME": "150"})],
+                         indirect=True)
+def test_job_is_requeued_when_its_worker_dies(cluster):
+    client, _, processes, tmp_path = cluster
+    job = client.post("/jobs", json={**SMALL, "numFrames": 24, "outputDir": str(tmp_path)}).json()
+
+    first = _wait_until(lambda: client.get(f"/jobs/{job['jobId']}").json()["worker"])
+    time.sleep(0.5)  # let the worker start rendering
+    processes[int(first[1:])].kill()
+
+    def finished():
+        status = client.get(f"/jobs/{job['jobId']}").json()
+        return status if status["status"] in ("complete", "error") else None
+
+    done = _wait_until(finished)
+    assert done["status"] == "complete", done["error"]
+    assert done["attempts"] == 2 and done["worker"] != first
+    assert Path(done["result"]["outputVideoPath"]).exists()
+
+    workers = {w["name"]: w for w in client.get("/health").json()["workers"]}
+    assert not workers[first]["healthy"] and workers[first]["requeued"] == 1
+
+
+@pytest.mark.parametrize("cluster", [(["model-a", "model-a"], {"FASTVIDEO_STANDIN_MS_PER_FRAME": "100"})],
+                         indirect=True)
+def test_queued_jobs_move_off_a_draining_worker(cluster):
+    client, _, processes, tmp_path = cluster
+    jobs = [client.post("/jobs", json={**SMALL, "numFrames": 16, "seed": seed, "outputDir": str(tmp_path)}).json()
+            for seed in range(4)]
+    # One job running and one queued on each worker (one job at a time per adapter)
+    _wait_until(lambda: all(w["running"] == 1 and w["queued"] == 1 for w in client.get("/health").json()["workers"]))
+    processes[0].send_signal(signal.SIGTERM)
+
+    def finished():
+        statuses = [client.get(f"/jobs/{job['jobId']}").json() for job in jobs]
+        return statuses if all(s["status"] in ("complete", "error") for s in statuses) else None
+
+    done = _wait_until(finished)
+    assert all(s["status"] == "complete" for s in done), [s["error"] for s in done]
+    assert [s["worker"] for s in done].count("w1") == 3  # w0 finished its running job only
+    assert sorted(s["attempts"] for s in done) == [1, 1, 1, 2]
+    w0 = client.get("/health").json()["workers"][0]
+    assert w0["draining"] and not w0["healthy"] and w0["requeued"] == 1
+
+
+@pytest.mark.parametrize("cluster", [(["model-a", "model-a"], {"FASTVIDEO_STANDIN_LOAD_MS": "8000"})],
+                         indirect=True)
+def test_cold_worker_keeps_answering_health_while_loading(cluster):
+    client, dispatcher, _, tmp_path = cluster
+    # An 8 s load outlasts the 3 missed health checks (2 s timeout each) after which a worker is given up
+    result = client.post("/generate", json={**SMALL, "outputDir": str(tmp_path)}).json()
+    assert result["status"] == "complete" and result["attempts"] == 1
+    assert [w.requeued for w in dispatcher.workers] == [0, 0]
@@ -0,0 +1,132 @@
+"""Tests for scripts/fastvideo/job_journal.py and the adapter's restart/drain behaviour"""
+import signal
+import socket
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "fastvideo"))
+
+from job_journal import JobJournal  # noqa: E402
+
+
+def _estimate():
+    return {"lane": "interactive", "estimated_ms": 1200, "estimated_memory_mb": 9000}
+
+
+def test_journal_lifecycle_survives_reopen(tmp_path):
+    db = tmp_path / "jobs.sqlite"
+    video = tmp_path / "a.mp4"
+    video.write_bytes(b"mp4")
+    now = [1000.0]
+    with JobJournal(db, clock=lambda: now[0]) as journal:
+        journal.submitted("a", "generate", "h1", {"prompt": "x", "seed": 1}, **_estimate())
+        journal.submitted("b", "variants", "h2", {"prompt": "y", "seeds": [1, 2]}, **_estimate())
+        journal.transition("a", "running")
+        journal.transition("a", "complete", result={"status": "complete", "outputVideoPath": str(video)})
+
+    now[0] = 2000.0
+    with JobJournal(db, clock=lambda: now[0]) as journal:
+        done = journal.find("h1")
+        assert done.state == "complete" and done.request is None  # request body dropped once finished
+        assert done.output_paths() == [str(video)] and done.outputs_exist()
+        assert [e["state"] for e in journal.events("a")] == ["queued", "running", "complete"]
+
+        (pending,) = journal.unfinished()
+        assert pending.id == "b" and pending.request == {"prompt": "y", "seeds": [1, 2]}
+        journal.transition("b", "requeued")
+        journal.transition("b", "error", error="CUDA OOM")
+        assert journal.get("b").recoveries == 1
+        assert journal.find("h2") is None  # failed jobs are not reused
+        assert journal.stats() == {"complete": 1, "error": 1}
+
+        video.unlink()
+        assert not journal.find("h1").outputs_exist()
+        now[0] += 31 * 86400
+        assert journal.prune() == 2 and journal.events("a") == []
+
+
+pytest.importorskip("httpx")
+pytest.importorskip("imageio_ffmpeg")
+
+import httpx  # noqa: E402
+
+from dispatcher import spawn_standins  # noqa: E402
+
+BODY = {"prompt": "harbor at night", "width": 256, "height": 256, "numFrames": 24, "fps": 8, "seed": 11}
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_until(predicate, timeout=90.0, interval=0.1):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            value = predicate()
+        except httpx.TransportError:
+            value = None
+        if value:
+            return value
+        time.sleep(interval)
+    raise AssertionError("timed out")
+
+
+def _finished(url, job_id):
+    status = httpx.get(f"{url}/jobs/{job_id}").json()
+    return status if status["status"] == "complete" else None
+
+
+def _start(port, journal):
+    (process,), (url,) = spawn_standins(1, port, env={"FASTVIDEO_JOURNAL": str(journal),
+                                                      "FASTVIDEO_STANDIN_MS_PER_FRAME": "100",
+                                                      "FASTVIDEO_MAX_CONCURRENT": "1"})
+    _wait_until(lambda: httpx.get(f"{url}/health").status_code == 200)
+    return process, url
+
+
+def test_adapter_requeues_after_crash_and_drains_on_sigterm(tmp_path):
+    port, journal = _free_port(), tmp_path / "jobs.sqlite"
+    body = {**BODY, "outputDir": str(tmp_path / "out")}
+    process, url = _start(port, journal)
+    try:
+        job_id = httpx.post(f"{url}/jobs", json=body).json()["jobId"]
+        _wait_until(lambda: httpx.get(f"{url}/jobs/{job_id}").json()["status"] == "running")
+        process.kill()  # crash mid-generation
+        process.wait()
+
+        process, url = _start(port, journal)
+        done = _wait_until(lambda: _finished(url, job_id))
+        video = Path(done["result"]["outputVideoPath"])
+        assert video.exists()
+
+        # Re-running the story skips the finished scene
+        again = httpx.post(f"{url}/generate", json=body, timeout=30).json()
+        assert again["fromJournal"] and again["outputVideoPath"] == str(video)
+        assert httpx.get(f"{url}{again['videoUrl']}").status_code == 200
+
+        # SIGTERM waits for the running job. The queued /jobs submission is left for the next start;
+        # the queued /generate request is turned away, and its caller retries elsewhere
+        running = httpx.post(f"{url}/jobs", json={**body, "seed": 12}).json()["jobId"]
+        queued = httpx.post(f"{url}/jobs", json={**body, "seed": 13}).json()["jobId"]
+        with ThreadPoolExecutor(1) as pool:
+            waiter = pool.submit(httpx.post, f"{url}/generate", json={**body, "seed": 14}, timeout=60)
+            _wait_until(lambda: httpx.get(f"{url}/health").json()["queued"] == 2)
+            process.send_signal(signal.SIGTERM)
+            assert waiter.result().status_code == 503
+        process.wait(timeout=60)  # uvicorn re-raises SIGTERM after its graceful shutdown
+    finally:
+        process.kill()
+        process.wait()
+
+    with JobJournal(journal) as j:
+        assert [e["state"] for e in j.events(job_id)] == ["queued", "running", "requeued", "running", "complete"]
+        assert j.get(running).state == "complete"
+        assert [entry.id for entry in j.unfinished()] == [queued]
+        assert j.stats()["error"] == 1  # the abandoned /generate job
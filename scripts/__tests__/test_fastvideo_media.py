@@ -0,0 +1,79 @@
+"""Tests for scripts/fastvideo/media.py and the video_io derivatives"""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+from PIL import Image
+
+pytest.importorskip("fastapi")
+pytest.importorskip("imageio_ffmpeg")
+
+from fastapi import FastAPI  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "fastvideo"))
+
+import media  # noqa: E402
+from media import MediaRegistry, create_media_router, media_urls  # noqa: E402
+from video_io import PREVIEW_WIDTH, derivative_paths, read_video_frames, write_video  # noqa: E402
+
+
+def _frames(count=24, size=(640, 352)):
+    return [np.full((size[1], size[0], 3), i * 10, np.uint8) for i in range(count)]
+
+
+def _client(registry):
+    app = FastAPI()
+    app.include_router(create_media_router(registry))
+    return TestClient(app)
+
+
+def test_video_supports_range_requests_and_unknown_ids_404(tmp_path):
+    video = tmp_path / "clip.mp4"
+    write_video(_frames(), video, 16)
+    registry = MediaRegistry()
+    urls = media_urls(registry.register(video, _frames(), 16))
+    client = _client(registry)
+
+    full = client.get(urls["videoUrl"])
+    assert full.status_code == 200 and full.content == video.read_bytes()
+    assert "immutable" in full.headers["cache-control"]
+    assert full.headers["accept-ranges"] == "bytes"
+
+    part = client.get(urls["videoUrl"], headers={"Range": "bytes=100-199"})
+    assert part.status_code == 206
+    assert part.headers["content-range"] == f"bytes 100-199/{video.stat().st_size}"
+    assert part.content == video.read_bytes()[100:200]
+
+    assert client.get("/videos/0123456789abcdef").status_code == 404
+
+
+def test_derivatives_written_from_frames(tmp_path):
+    video = tmp_path / "clip.mp4"
+    write_video(_frames(), video, 24)
+    MediaRegistry().register(video, _frames(), 24)
+
+    preview, poster = derivative_paths(video)
+    frames, fps = read_video_frames(preview)
+    assert frames[0].shape[1] == PREVIEW_WIDTH and fps == 12
+    assert len(frames) == 12  # every other frame, same duration
+    with Image.open(poster) as image:
+        assert image.format == "JPEG" and image.size == (640, 352)
+
+
+def test_missing_derivatives_built_once_on_request(tmp_path, monkeypatch):
+    video = tmp_path / "saved_by_fastvideo.mp4"
+    write_video(_frames(), video, 16)
+    registry = MediaRegistry()
+    urls = media_urls(registry.register(video))
+    decodes = []
+    real_read = media.read_video_frames
+    monkeypatch.setattr(media, "read_video_frames", lambda path: decodes.append(path) or real_read(path))
+    client = _client(registry)
+
+    poster = client.get(urls["posterUrl"])
+    assert poster.status_code == 200 and poster.headers["content-type"] == "image/jpeg"
+    preview = client.get(urls["previewUrl"], headers={"Range": "bytes=0-9"})
+    assert preview.status_code == 206 and len(preview.content) == 10
+    assert len(decodes) == 1
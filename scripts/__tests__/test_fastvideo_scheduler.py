@@ -0,0 +1,215 @@
+"""Tests for scripts/fastvideo/scheduler.py"""
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "fastvideo"))
+
+from scheduler import (  # noqa: E402
+    BATCH, DEFAULT_SECONDS_PER_UNIT, INTERACTIVE, CostModel, Scheduler, SchedulerDraining,
+)
+
+PREVIEW = (256, 256, 8)
+FINAL = (1920, 1080, 300)
+
+
+class Gate:
+    """A job body that records when it starts and runs until released."""
+
+    def __init__(self, name, log):
+        self.name = name
+        self.log = log
+        self.release = asyncio.Event()
+
+    async def __call__(self, job):
+        self.log.append(self.name)
+        await self.release.wait()
+        return self.name
+
+
+async def _settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_cost_model_scales_with_work_and_calibrates(tmp_path):
+    model = CostModel()
+    preview, final = model.estimate(*PREVIEW), model.estimate(*FINAL)
+    assert final.seconds > 50 * preview.seconds
+    assert final.memory_mb > preview.memory_mb
+
+    # A GPU twice as slow as the prior with a 4 s setup cost, observed across sizes
+    for i in range(30):
+        size = (1280, 544, 16 * (1 + i % 8))
+        est = model.estimate(*size)
+        model.observe(est.work, 4.0 + 2 * DEFAULT_SECONDS_PER_UNIT * est.work, peak_memory_mb=est.memory_mb)
+    for frames in (32, 128):
+        est = model.estimate(1280, 544, frames)
+        assert est.seconds == pytest.approx(4.0 + 2 * DEFAULT_SECONDS_PER_UNIT * est.work, rel=0.05)
+
+    # Runs shorter than the prior overhead must not collapse the rate to zero
+    fast = CostModel()
+    for _ in range(20):
+        fast.observe(preview.work, 0.5)
+    assert fast.estimate(*PREVIEW).seconds < 2.0
+    assert fast.estimate(*FINAL).seconds > 10 * fast.estimate(*PREVIEW).seconds
+
+    model.save(tmp_path / "cost.json")
+    restored = CostModel.load(tmp_path / "cost.json")
+    assert restored.to_dict() == model.to_dict()
+    assert CostModel.load(tmp_path / "missing.json").observations == 0
+
+
+def test_one_job_at_a_time_unless_opted_in(monkeypatch):
+    async def scenario():
+        log = []
+        scheduler = Scheduler(memory_budget_mb=1e9)
+        gates = [Gate(f"job{i}", log) for i in range(2)]
+        for gate in gates:
+            scheduler.submit(gate, *PREVIEW)
+        await _settle()
+        assert log == ["job0"]  # the shared generator is never entered from two threads
+        gates[0].release.set()
+        await _settle()
+        assert log == ["job0", "job1"]
+        gates[1].release.set()
+        await scheduler.wait_idle(timeout=1)
+
+    asyncio.run(scenario())
+    monkeypatch.setenv("FASTVIDEO_MEMORY_BUDGET_MB", "20000")
+    assert Scheduler.from_env().max_concurrent == 1
+    monkeypatch.setenv("FASTVIDEO_MAX_CONCURRENT", "2")
+    assert Scheduler.from_env().max_concurrent == 2
+
+
+def test_interactive_lane_first_then_shortest_job_first():
+    async def scenario():
+        log = []
+        scheduler = Scheduler(max_concurrent=1)
+        blocker = Gate("blocker", log)
+        scheduler.submit(blocker, *FINAL, lane=BATCH)
+        gates = {name: Gate(name, log) for name in ("batch-long", "batch-short", "preview")}
+        scheduler.submit(gates["batch-long"], *FINAL, lane=BATCH)
+        scheduler.submit(gates["batch-short"], 1280, 544, 64, lane=BATCH)
+        preview = scheduler.submit(gates["preview"], *PREVIEW)
+        await _settle()
+
+        assert preview.lane == INTERACTIVE
+        assert [j.id for j in scheduler.order()][0] == preview.id
+        queued = {scheduler.status(j)["position"]: j for j in scheduler.order()}
+        assert sorted(queued) == [0, 1, 2]
+
+        blocker.release.set()
+        for gate in gates.values():
+            gate.release.set()
+        await scheduler.wait(preview)
+        await asyncio.gather(*(scheduler.wait(j) for j in list(scheduler.jobs.values())))
+        return log
+
+    assert asyncio.run(scenario()) == ["blocker", "preview", "batch-short", "batch-long"]
+
+
+def test_memory_budget_gates_concurrency():
+    async def scenario(budget):
+        log = []
+        scheduler = Scheduler(memory_budget_mb=budget, max_concurrent=4)
+        gates = [Gate(f"job{i}", log) for i in range(2)]
+        jobs = [scheduler.submit(g, 1280, 720, 121, lane=BATCH) for g in gates]
+        await _settle()
+        running = len(scheduler.running)
+        for g in gates:
+            g.release.set()
+        await asyncio.gather(*(scheduler.wait(j) for j in jobs))
+        return running, jobs[0].estimate.memory_mb
+
+    running, per_job = asyncio.run(scenario(1e9))
+    assert running == 2
+    assert asyncio.run(scenario(per_job * 1.5))[0] == 1
+    # An idle GPU always admits the head job, even over budget
+    assert asyncio.run(scenario(per_job / 2))[0] == 1
+
+
+def test_positions_and_etas_follow_dispatch_order():
+    async def scenario():
+        now = [0.0]
+        scheduler = Scheduler(max_concurrent=1, clock=lambda: now[0])
+        gates = [Gate(str(i), []) for i in range(4)]
+        jobs = [scheduler.submit(g, 1280, 544, 32 * (i + 1), lane=BATCH) for i, g in enumerate(gates)]
+        await _settle()
+        now[0] = 5.0
+        running = scheduler.status(jobs[0])
+        statuses = [scheduler.status(j) for j in jobs[1:]]
+        snapshot = scheduler.snapshot()
+        for g in gates:
+            g.release.set()
+        await asyncio.gather(*(scheduler.wait(j) for j in jobs))
+        return jobs, running, statuses, snapshot
+
+    jobs, running, statuses, snapshot = asyncio.run(scenario())
+    assert running["status"] == "running" and running["position"] is None
+    assert running["etaMs"] == int((jobs[0].estimate.seconds - 5.0) * 1000)
+    assert [s["position"] for s in statuses] == [0, 1, 2]
+    etas = [s["etaMs"] for s in statuses]
+    assert etas == sorted(etas)
+    expected = jobs[0].estimate.seconds - 5.0 + jobs[1].estimate.seconds
+    assert etas[0] == pytest.approx(expected * 1000, abs=1)
+    assert [q["jobId"] for q in snapshot["queued"]] == [j.id for j in jobs[1:]]
+
+
+def test_aged_batch_job_is_promoted_and_failures_surface():
+    async def scenario():
+        now = [0.0]
+        log = []
+        scheduler = Scheduler(max_concurrent=1, batch_aging_s=60, clock=lambda: now[0])
+        blocker = Gate("blocker", log)
+        scheduler.submit(blocker, *PREVIEW, lane=INTERACTIVE)
+        old_batch = Gate("old-batch", log)
+        batch_job = scheduler.submit(old_batch, *FINAL, lane=BATCH)
+        now[0] = 120.0
+        fresh = Gate("fresh-preview", log)
+        scheduler.submit(fresh, *PREVIEW, lane=INTERACTIVE)
+        await _settle()
+        assert scheduler.order()[0] is batch_job  # aged past batch_aging_s: ahead of the newer preview
+
+        async def boom(job):
+            raise RuntimeError("CUDA out of memory")
+
+        failing = scheduler.submit(boom, *PREVIEW, lane=BATCH)
+        for gate in (blocker, old_batch, fresh):
+            gate.release.set()
+        with pytest.raises(RuntimeError):
+            await scheduler.wait(failing)
+        while scheduler.running or scheduler.queued:
+            await asyncio.sleep(0)
+        return log, failing, scheduler
+
+    log, failing, scheduler = asyncio.run(scenario())
+    assert log[:2] == ["blocker", "old-batch"]
+    assert failing.status == "error" and "out of memory" in failing.error
+    assert scheduler.cost_model.observations == 3  # the failed job does not calibrate
+
+
+def test_drain_finishes_running_jobs_and_starts_no_more():
+    async def scenario():
+        log = []
+        scheduler = Scheduler(max_concurrent=1)
+        running, waiting = Gate("running", log), Gate("waiting", log)
+        first = scheduler.submit(running, *PREVIEW, job_id="resumed-id")
+        second = scheduler.submit(waiting, *PREVIEW)
+        await _settle()
+        scheduler.drain()
+        with pytest.raises(SchedulerDraining):
+            await scheduler.wait(second)
+        with pytest.raises(SchedulerDraining):
+            scheduler.submit(Gate("late", log), *PREVIEW)
+        assert not await scheduler.wait_idle(timeout=0.01)
+        running.release.set()
+        assert await scheduler.wait_idle(timeout=1)
+        return log, first, second
+
+    log, first, second = asyncio.run(scenario())
+    assert log == ["running"]
+    assert first.id == "resumed-id" and first.status == "complete"
+    assert second.status == "queued"
@@ -0,0 +1,124 @@
+"""Tests for scripts/frames/frame_hash.py and quality-checks/duplicate-frame-check.py"""
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+pytest.importorskip("PIL")
+from PIL import Image  # noqa: E402
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "frames"))
+
+from frame_hash import (  # noqa: E402
+    HashHistory, MultiIndexHashTable, frozen_segments, hamming, hash_frames, save_run_hashes, to_hex,
+)
+
+CHECK_PATH = Path(__file__).resolve().parents[1] / "quality-checks" / "duplicate-frame-check.py"
+
+
+def _clip(seed: int, count: int = 12) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    base = rng.integers(0, 255, size=(16, 16, 3), dtype=np.uint8)
+    base = np.asarray(Image.fromarray(base).resize((96, 64), Image.BILINEAR))
+    return np.stack([np.roll(base, 3 * i, axis=1) for i in range(count)])
+
+
+def test_multi_index_matches_brute_force():
+    rng = np.random.default_rng(0)
+    hashes = rng.integers(0, 2**63, size=20000, dtype=np.int64).astype(np.uint64)
+    # Plant near neighbours of a query
+    query = hashes[123]
+    hashes[500] = query ^ np.uint64(0b1011)
+    hashes[900] = query ^ np.uint64(1 << 40)
+    table = MultiIndexHashTable(hashes, radius=6)
+    rows, dists = table.query(int(query))
+    expected = np.flatnonzero(hamming(hashes, np.full(len(hashes), query)) <= 6)
+    assert sorted(rows.tolist()) == sorted(expected.tolist())
+    assert {123, 500, 900} <= set(rows.tolist())
+    assert dists[rows.tolist().index(500)] == 3
+
+
+def test_frozen_segments():
+    frames = _clip(1)
+    frames[4:9] = frames[4]
+    phashes, dhashes = hash_frames(frames)
+    segments = frozen_segments(phashes, dhashes, max_distance=0, min_length=4)
+    assert [(s.start, s.end) for s in segments] == [(4, 8)]
+
+
+def test_history_is_incremental(tmp_path):
+    for run, seed in (("run-a", 1), ("run-b", 2)):
+        phashes, dhashes = hash_frames(_clip(seed))
+        (tmp_path / run).mkdir()
+        save_run_hashes(tmp_path / run, {"version": 1, "scenes": {
+            "scene-001": {"phash": to_hex(phashes), "dhash": to_hex(dhashes)}}})
+    history = HashHistory(tmp_path).load()
+    assert len(history) == 24 and history.loaded_runs == 2
+    again = HashHistory(tmp_path).load()
+    assert len(again) == 24 and again.loaded_runs == 0
+    assert again.describe(13) == ("run-b", "scene-001", 1)
+
+
+def _write_run(run_dir: Path, clip: np.ndarray) -> None:
+    (run_dir / "frames").mkdir(parents=True)
+    for i, frame in enumerate(clip, start=1):
+        Image.fromarray(frame).save(run_dir / "frames" / f"gemdirect1_scene-001_{i:05d}_.png")
+    (run_dir / "artifact-metadata.json").write_text(json.dumps({"Scenes": [{
+        "SceneId": "scene-001", "FramePrefix": "gemdirect1_scene-001", "GeneratedFramesDir": "frames"}]}))
+
+
+def test_cli_flags_cross_run_duplicate(tmp_path):
+    clip = _clip(3)
+    for run in ("20250101-000000", "20250102-000000"):
+        _write_run(tmp_path / run, clip)
+
+    first = subprocess.run([sys.executable, str(CHECK_PATH), str(tmp_path / "20250101-000000")],
+                           capture_output=True, text=True)
+    assert first.returncode == 0, first.stdout + first.stderr
+    second = subprocess.run([sys.executable, str(CHECK_PATH), str(tmp_path / "20250102-000000")],
+                            capture_output=True, text=True)
+    assert second.returncode == 1, second.stdout + second.stderr
+    report = json.loads((tmp_path / "20250102-000000" / "duplicate-frame-check-report.json").read_text())
+    duplicates = report["scenes"][0]["duplicates"]
+    assert duplicates[0]["run"] == "20250101-000000"
+    assert duplicates[0]["matched_fraction"] == 1.0
+
+
+def test_cli_keeps_ad_hoc_runs_out_of_their_parent(tmp_path):
+    repo = tmp_path / "repo"
+    clip = _clip(3)
+    _write_run(repo / "logs" / "20250101-000000", clip)
+    subprocess.run([sys.executable, str(CHECK_PATH), str(repo / "logs" / "20250101-000000")], capture_output=True)
+    _write_run(repo / "temp-validate-run", clip)
+
+    result = subprocess.run([sys.executable, str(CHECK_PATH), str(repo / "temp-validate-run")],
+                            capture_output=True, text=True)
+    assert result.returncode == 0, result.stdout + result.stderr
+    report = json.loads((repo / "temp-validate-run" / "duplicate-frame-check-report.json").read_text())
+    assert report["history_runs"] == 0  # the repo's subdirectories are not runs
+    assert not (repo / "frame-hash-history.npz").exists()
+    assert (repo / "logs" / "frame-hash-history.npz").exists()
+
+
+def test_cli_does_not_flag_slow_pans_as_frozen(tmp_path):
+    rng = np.random.default_rng(0)
+    landscape = np.asarray(Image.fromarray(rng.integers(0, 255, size=(6, 8, 3), dtype=np.uint8))
+                           .resize((400, 200), Image.BICUBIC))
+    run_dir = tmp_path / "20250101-000000"
+    (run_dir / "frames").mkdir(parents=True)
+    for i in range(12):  # one pixel per frame
+        frame = Image.fromarray(landscape[40:104, 40 + i:136 + i])
+        frame.save(run_dir / "frames" / f"gemdirect1_scene-001_{i + 1:05d}_.png")
+    (run_dir / "artifact-metadata.json").write_text(json.dumps({"Scenes": [{
+        "SceneId": "scene-001", "FramePrefix": "gemdirect1_scene-001", "GeneratedFramesDir": "frames"}]}))
+
+    def frozen(*args):
+        subprocess.run([sys.executable, str(CHECK_PATH), str(run_dir), *args], capture_output=True, check=False)
+        report = json.loads((run_dir / "duplicate-frame-check-report.json").read_text())
+        return report["scenes"][0]["frozen_segments"]
+
+    assert frozen() == []
+    assert frozen("--frozen-distance", "2")  # the old default called this pan frozen
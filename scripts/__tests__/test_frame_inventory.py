@@ -0,0 +1,96 @@
+"""Tests for scripts/comfyui-tools/frame_inventory.py"""
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "comfyui-tools"))
+
+from frame_inventory import FrameInventory, find_gaps  # noqa: E402
+
+
+def _touch(path: Path, size: int = 4) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"x" * size)
+
+
+def _bump_mtime(path: Path) -> None:
+    # Coarse filesystem timestamps can hide back-to-back changes
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+
+def _age(*paths: Path) -> None:
+    # Directories modified within the racy window are always rescanned
+    old_ns = time.time_ns() - 60 * 10**9
+    for path in paths:
+        os.utime(path, ns=(old_ns, old_ns))
+
+
+def test_find_gaps():
+    assert find_gaps([1, 2, 3]) == []
+    assert find_gaps([1, 4, 5, 9]) == [(2, 3), (6, 8)]
+
+
+def test_query_prefix_bytes_and_gaps(tmp_path):
+    out = tmp_path / "output"
+    for n in (1, 2, 3, 6):
+        _touch(out / f"gemdirect1_shot_{n:05d}_.png", size=10)
+    _touch(out / "gemdirect1_scene-001_00001_.png")
+    _touch(out / "notes.txt")
+
+    with FrameInventory(str(out), tmp_path / "index.sqlite") as inventory:
+        stats = inventory.refresh()
+        assert stats.added == 5
+        summary = inventory.query("gemdirect1_shot")
+        assert summary.frame_count == 4
+        assert summary.total_bytes == 40
+        assert (summary.first, summary.last) == (1, 6)
+        assert summary.gaps == [(4, 5)]
+        assert [p for p, _, _ in inventory.prefixes("gemdirect1_s")] == ["gemdirect1_scene-001", "gemdirect1_shot"]
+        assert inventory.prefixes("gemdirect1%") == []
+
+
+def test_incremental_refresh(tmp_path):
+    out = tmp_path / "output"
+    _touch(out / "run_00001_.png")
+    _touch(out / "video" / "clip_00001_.png")
+    index = tmp_path / "index.sqlite"
+    _age(out, out / "video")
+
+    with FrameInventory(str(out), index) as inventory:
+        assert inventory.refresh().added == 2
+
+    with FrameInventory(str(out), index) as inventory:
+        unchanged = inventory.refresh()
+        assert (unchanged.dirs_scanned, unchanged.added) == (0, 0)
+        assert unchanged.dirs_skipped == 2
+
+        _touch(out / "run_00002_.png")
+        (out / "run_00001_.png").unlink()
+        _bump_mtime(out)
+        changed = inventory.refresh()
+        assert (changed.dirs_scanned, changed.added, changed.removed) == (1, 1, 1)
+        assert inventory.query("run").first == 2
+        assert inventory.query(os.path.join("video", "clip")).frame_count == 1
+
+
+def test_recent_directories_are_rescanned(tmp_path):
+    out = tmp_path / "output"
+    _touch(out / "shot_00001_.png", size=10)
+    with FrameInventory(str(out), tmp_path / "index.sqlite") as inventory:
+        inventory.refresh()
+        scanned_mtime = os.stat(out).st_mtime_ns
+
+        # A frame created in the same timestamp tick leaves the directory mtime unchanged
+        _touch(out / "shot_00002_.png", size=10)
+        os.utime(out, ns=(scanned_mtime, scanned_mtime))
+        # and one that was still being written has grown since
+        _touch(out / "shot_00001_.png", size=100)
+        stats = inventory.refresh()
+        assert (stats.dirs_scanned, stats.added, stats.updated) == (1, 1, 1)
+        assert inventory.query("shot").total_bytes == 110
+
+        _age(out)
+        inventory.refresh()
+        assert inventory.refresh().dirs_skipped == 1
@@ -0,0 +1,72 @@
+"""Tests for scripts/frames/frame_store.py"""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+pytest.importorskip("PIL")
+from PIL import Image  # noqa: E402
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "frames"))
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "comfyui_nodes"))
+
+from frame_io import iter_source_chunks  # noqa: E402
+from frame_store import FrameStore, completed_prefixes, pack_scene  # noqa: E402
+from write_done_marker import write_done_marker  # noqa: E402
+
+PREFIX = "gemdirect1_scene-001"
+
+
+def _write_frames(out: Path, count: int = 5, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    frames = rng.integers(0, 255, size=(count, 24, 32, 3), dtype=np.uint8)
+    out.mkdir(parents=True, exist_ok=True)
+    for i, frame in enumerate(frames, start=1):
+        Image.fromarray(frame).save(out / f"{PREFIX}_{i:05d}_.png")
+    return frames
+
+
+def test_pack_requires_done_marker(tmp_path):
+    _write_frames(tmp_path)
+    assert pack_scene(tmp_path, PREFIX) is None
+    assert completed_prefixes(tmp_path) == []
+
+    write_done_marker(str(tmp_path), PREFIX, frame_count=5)
+    assert completed_prefixes(tmp_path) == [PREFIX]
+    assert pack_scene(tmp_path, PREFIX) == tmp_path / f"{PREFIX}.frames"
+
+
+def test_store_round_trip_is_zero_copy(tmp_path):
+    frames = _write_frames(tmp_path)
+    write_done_marker(str(tmp_path), PREFIX, frame_count=5)
+    path = pack_scene(tmp_path, PREFIX, fps=16)
+
+    with FrameStore(path) as store:
+        assert store.shape == (5, 24, 32, 3)
+        assert store.fps == 16
+        assert store.header["marker"]["FrameCount"] == 5
+        assert len(store.header["sha256"]) == 5
+        assert isinstance(store.frames, np.memmap)
+        np.testing.assert_array_equal(store[2], frames[2])
+        np.testing.assert_array_equal(np.concatenate(list(store.iter_chunks(2))), frames)
+        frame = store[1]
+    # Views outlive the store; closing it must not unmap them
+    assert int(frame.sum()) == int(frames[1].sum())
+
+
+def test_stale_store_is_repacked_and_ignored_by_readers(tmp_path):
+    _write_frames(tmp_path, count=4)
+    write_done_marker(str(tmp_path), PREFIX)
+    pack_scene(tmp_path, PREFIX)
+    kind, _ = iter_source_chunks(tmp_path, PREFIX)
+    assert kind == "store"
+
+    frames = _write_frames(tmp_path, count=6, seed=1)
+    kind, chunks = iter_source_chunks(tmp_path, PREFIX)
+    assert kind == "png"
+    assert sum(len(c) for c in chunks) == 6
+
+    with FrameStore(pack_scene(tmp_path, PREFIX)) as store:
+        assert len(store) == 6
+        np.testing.assert_array_equal(store[5], frames[5])
@@ -0,0 +1,115 @@
+"""Tests for generate_injection_script.py --incremental/--compress (the script runs in node against a fake IndexedDB)"""
+import base64
+import gzip
+import json
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from generate_injection_script import HASHES_KEY, build_incremental_payload, render_incremental_script  # noqa: E402
+
+STORE_KEY = "gemDirect-settings-store"
+
+# Just enough of IndexedDB for the injection script; the object store is loaded from and saved to a JSON file
+FAKE_INDEXEDDB = r"""
+const fs = require('fs');
+const [scriptPath, statePath] = process.argv.slice(2);
+const data = fs.existsSync(statePath) ? JSON.parse(fs.readFileSync(statePath, 'utf8')) : {};
+const request = (result) => {
+    const r = { result };
+    setTimeout(() => r.onsuccess && r.onsuccess({ target: r }));
+    return r;
+};
+const store = {
+    get: (key) => request(structuredClone(data[key])),
+    put: (value, key) => { data[key] = structuredClone(value); return request(key); },
+};
+const db = {
+    objectStoreNames: { contains: (name) => name === 'misc' },
+    transaction: () => {
+        const t = { objectStore: () => store };
+        setTimeout(() => t.oncomplete && t.oncomplete());
+        return t;
+    },
+};
+globalThis.indexedDB = { open: () => request(db) };
+eval(fs.readFileSync(scriptPath, 'utf8'))().then((message) => {
+    fs.writeFileSync(statePath, JSON.stringify(data));
+    console.log(message);
+});
+"""
+
+
+def _settings(seed=1):
+    workflow = {"3": {"class_type": "KSampler", "inputs": {"seed": seed, "cfg": 1.0}}}
+    return {
+        "comfyUIUrl": "http://127.0.0.1:8188",
+        "workflowProfiles": {
+            "wan-t2i": {"id": "wan-t2i", "label": "WAN T2I", "workflowJson": json.dumps(workflow, indent=2)},
+            "wan-i2v": {"id": "wan-i2v", "label": "WAN I2V", "workflowJson": json.dumps({"1": {}}, indent=2)},
+        },
+    }
+
+
+@pytest.fixture
+def inject(tmp_path):
+    node = shutil.which("node")
+    if node is None:
+        pytest.skip("node is not installed")
+    harness = tmp_path / "fake-indexeddb.js"
+    harness.write_text(FAKE_INDEXEDDB)
+
+    def run(settings, state, compress=False):
+        script = tmp_path / "injection_script.js"
+        script.write_text(render_incremental_script(settings, compress), encoding="utf-8")
+        result = subprocess.run([node, str(harness), str(script), str(state)],
+                                capture_output=True, text=True, timeout=60)
+        assert result.returncode == 0, result.stderr
+        return result.stdout.strip(), json.loads(state.read_text())
+
+    return run
+
+
+def test_payload_is_minified_hashed_and_optionally_gzipped():
+    _, plain = build_incremental_payload(_settings())
+    base, packed = build_incremental_payload(_settings(), compress=True)
+    assert base == {"comfyUIUrl": "http://127.0.0.1:8188"}
+    minified = '{"3":{"class_type":"KSampler","inputs":{"seed":1,"cfg":1.0}}}'
+    assert plain["wan-t2i"]["profile"]["workflowJson"] == minified
+    assert {k: e["hash"] for k, e in plain.items()} == {k: e["hash"] for k, e in packed.items()}
+    assert json.loads(gzip.decompress(base64.b64decode(packed["wan-t2i"]["gz"]))) == plain["wan-t2i"]["profile"]
+    # Same workflowJson length, different content
+    _, reseeded = build_incremental_payload(_settings(seed=2))
+    assert reseeded["wan-t2i"]["hash"] != plain["wan-t2i"]["hash"]
+    assert reseeded["wan-i2v"]["hash"] == plain["wan-i2v"]["hash"]
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_unchanged_profiles_are_reused_and_edited_ones_rewritten(inject, tmp_path, compress):
+    state = tmp_path / "idb.json"
+    message, first = inject(_settings(), state, compress)
+    assert message == "Injection successful (2/2 profiles updated)"
+    _, expected = build_incremental_payload(_settings())
+    assert first[STORE_KEY]["state"]["workflowProfiles"] == {k: e["profile"] for k, e in expected.items()}
+    assert first[STORE_KEY]["state"]["comfyUIUrl"] == "http://127.0.0.1:8188"
+    assert set(first[HASHES_KEY]) == {"wan-t2i", "wan-i2v"}
+
+    message, again = inject(_settings(), state, compress)
+    assert message == "Injection successful (0/2 profiles updated)" and again == first
+
+    # The app edits a profile without changing its workflowJson length
+    stored = json.loads(state.read_text())
+    edited = stored[STORE_KEY]["state"]["workflowProfiles"]["wan-t2i"]
+    edited["workflowJson"] = edited["workflowJson"].replace('"seed":1', '"seed":7')
+    state.write_text(json.dumps(stored))
+    message, restored = inject(_settings(), state, compress)
+    assert message == "Injection successful (1/2 profiles updated)" and restored == first
+
+    message, reseeded = inject(_settings(seed=2), state, compress)
+    assert message == "Injection successful (1/2 profiles updated)"
+    assert '"seed":2' in reseeded[STORE_KEY]["state"]["workflowProfiles"]["wan-t2i"]["workflowJson"]
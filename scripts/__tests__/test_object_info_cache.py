@@ -0,0 +1,113 @@
+"""Tests for scripts/comfyui-tools/object_info_cache.py"""
+import json
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "comfyui-tools"))
+
+from object_info_cache import NodeSchemaIndex, ObjectInfoCache  # noqa: E402
+
+OBJECT_INFO = {
+    "LoadImage": {
+        "input": {"required": {"image": [["a.png", "b.png"], {"image_upload": True}]}},
+        "output": ["IMAGE", "MASK"],
+        "output_name": ["IMAGE", "MASK"],
+        "category": "image",
+    },
+    "VAEDecode": {
+        "input": {"required": {"samples": ["LATENT"], "vae": ["VAE"]}},
+        "output": ["IMAGE"],
+        "category": "latent",
+    },
+    "CreateVideo": {
+        "input": {"required": {"images": ["IMAGE"], "fps": ["FLOAT", {"default": 30.0}]}, "optional": {"audio": ["AUDIO"]}},
+        "output": ["VIDEO"],
+        "category": "image/video",
+    },
+    "SaveVideo": {
+        "input": {"required": {"video": ["VIDEO"], "format": ["COMBO", {"options": ["auto", "mp4"]}]}},
+        "output": [],
+        "output_node": True,
+    },
+}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    requests_seen = []
+    body = json.dumps(OBJECT_INFO).encode("utf-8")
+
+    def do_GET(self):
+        type(self).requests_seen.append(self.headers.get("If-None-Match"))
+        if self.headers.get("If-None-Match") == '"v1"':
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("ETag", '"v1"')
+        self.send_header("Content-Length", str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture()
+def server():
+    _Handler.requests_seen = []
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+
+
+def test_index_by_return_and_input_type():
+    index = NodeSchemaIndex.from_object_info(OBJECT_INFO)
+    assert index.producers("VIDEO") == ["CreateVideo"]
+    assert index.producers("IMAGE") == ["LoadImage", "VAEDecode"]
+    assert index.consumers("IMAGE") == ["CreateVideo"]
+    assert index.get("LoadImage").inputs["image"].type == "COMBO"
+    assert index.get("SaveVideo").inputs["format"].options == ("auto", "mp4")
+    assert index.missing(["SaveVideo", "TemporalSmoothing"]) == ["TemporalSmoothing"]
+
+
+def test_check_workflow_reports_missing_nodes_and_inputs():
+    index = NodeSchemaIndex.from_object_info(OBJECT_INFO)
+    workflow = {
+        "1": {"class_type": "LoadImage", "inputs": {"image": "a.png"}},
+        "2": {"class_type": "CreateVideo", "inputs": {"images": ["1", 0]}},
+        "3": {"class_type": "VHS_VideoCombine", "inputs": {}},
+    }
+    result = index.check_workflow(workflow)
+    assert not result.satisfiable
+    assert result.missing_nodes == ["VHS_VideoCombine"]
+    assert result.missing_inputs == ["2:CreateVideo.fps"]
+
+
+def test_cache_persists_and_revalidates_with_etag(server, tmp_path):
+    cache = ObjectInfoCache(server, cache_dir=tmp_path)
+    assert cache.index().producers("VIDEO") == ["CreateVideo"]
+    assert cache.meta["etag"] == '"v1"'
+    assert _Handler.requests_seen == [None]
+
+    # A fresh instance within the TTL is served from disk without a request
+    warm = ObjectInfoCache(server, cache_dir=tmp_path)
+    assert "SaveVideo" in warm.index()
+    assert _Handler.requests_seen == [None]
+
+    # Forced refresh sends If-None-Match and keeps the cached index on 304
+    assert len(warm.index(refresh=True)) == len(OBJECT_INFO)
+    assert _Handler.requests_seen == [None, '"v1"']
+
+
+def test_stale_cache_is_used_when_server_is_down(server, tmp_path):
+    ObjectInfoCache(server, cache_dir=tmp_path).index()
+    offline = ObjectInfoCache(server, cache_dir=tmp_path, ttl=0)
+    offline.base_url = "http://127.0.0.1:9"
+    assert offline.index().producers("VIDEO") == ["CreateVideo"]
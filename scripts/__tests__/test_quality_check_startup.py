@@ -0,0 +1,83 @@
+"""Import-time regression tests for the quality-check CLIs (--help and error paths stay fast)."""
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+CHECKS_DIR = Path(__file__).resolve().parents[1] / "quality-checks"
+CHECKS = [
+    "similarity-check.py",
+    "coherence-check.py",
+    "diversity-check.py",
+    "video-quality-check.py",
+    "duplicate-frame-check.py",
+]
+HEAVY_MODULES = ["numpy", "PIL", "imageio", "torch", "sentence_transformers", "spacy", "onnxruntime", "tokenizers"]
+STARTUP_BUDGET_S = 0.2
+
+# Runs a check as __main__ and reports which heavy modules were actually executed
+# (LazyLoader placeholders in sys.modules don't count).
+_PROBE = """
+import json, runpy, sys
+sys.argv = [sys.argv[1], *sys.argv[2:]]
+try:
+    runpy.run_path(sys.argv[0], run_name="__main__")
+except SystemExit as e:
+    code = e.code
+else:
+    code = 0
+heavy = {heavy!r}
+loaded = [m for m in heavy if m in sys.modules and type(sys.modules[m]).__name__ != "_LazyModule"]
+sys.stderr.write(json.dumps({{"code": code, "loaded": loaded}}) + "\\n")
+"""
+
+
+def _probe(script: str, *args: str) -> dict:
+    proc = subprocess.run(
+        [sys.executable, "-c", _PROBE.format(heavy=HEAVY_MODULES), str(CHECKS_DIR / script), *args],
+        capture_output=True, text=True, check=False,
+    )
+    return json.loads(proc.stderr.strip().splitlines()[-1])
+
+
+def _best_wall_time(args, runs: int = 3) -> float:
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(args, capture_output=True, check=False)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+@pytest.mark.parametrize("script", CHECKS)
+def test_help_imports_no_heavy_modules(script):
+    result = _probe(script, "--help")
+    assert result == {"code": 0, "loaded": []}
+
+
+@pytest.mark.parametrize("script", CHECKS)
+def test_missing_metadata_fails_without_heavy_imports(script, tmp_path):
+    result = _probe(script, str(tmp_path / "no-such-run"))
+    assert result["code"] == 2
+    assert result["loaded"] == []
+
+
+def test_run_without_scenes_skips_model_load(tmp_path):
+    run_dir = tmp_path / "20251101-000000"
+    run_dir.mkdir()
+    (run_dir / "artifact-metadata.json").write_text(json.dumps({"Scenes": [{"SceneId": "s1", "Prompt": "p"}]}))
+    result = _probe("similarity-check.py", str(run_dir))
+    assert result["code"] == 1
+    assert not {"torch", "sentence_transformers"} & set(result["loaded"])
+    report = json.loads((run_dir / "similarity-check-report.json").read_text())
+    assert report["meets_threshold"] is False
+
+
+@pytest.mark.parametrize("script", CHECKS)
+def test_help_starts_within_budget(script):
+    interpreter = _best_wall_time([sys.executable, "-c", "pass"])
+    elapsed = _best_wall_time([sys.executable, str(CHECKS_DIR / script), "--help"])
+    assert elapsed - interpreter < STARTUP_BUDGET_S, f"{script} --help took {elapsed * 1000:.0f} ms"
@@ -0,0 +1,119 @@
+"""Parity tests for the ONNX int8 similarity backend (scripts/quality-checks/onnx_embedder.py)"""
+import json
+import os
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+for _module in ("onnxruntime", "tokenizers", "sentence_transformers", "transformers"):
+    pytest.importorskip(_module)
+
+CHECKS_DIR = Path(__file__).resolve().parents[1] / "quality-checks"
+sys.path.insert(0, str(CHECKS_DIR))
+
+import onnx_embedder  # noqa: E402
+
+SCORE_TOLERANCE = 0.02
+
+CORPUS = onnx_embedder.PAIRS + [
+    ("Close-up of a candle flickering out", "A flame gutters and dies in a dark room"),
+    ("A robot learns to paint a sunset over the ocean, " * 4,
+     "A machine holds a brush; orange and violet streaks cover the canvas"),
+]
+
+
+def _tiny_model(root: Path) -> Path:
+    """A randomly initialised two-layer BERT sentence-transformer, built offline."""
+    import re
+
+    import torch
+    from sentence_transformers import SentenceTransformer, models
+    from transformers import BertConfig, BertModel, BertTokenizerFast
+
+    words = sorted({w for pair in CORPUS for text in pair for w in re.findall(r"[a-z]+", text.lower())})
+    hf_dir = root / "hf"
+    hf_dir.mkdir(parents=True)
+    (hf_dir / "vocab.txt").write_text("\n".join(["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]", *words]))
+    torch.manual_seed(0)
+    config = BertConfig(vocab_size=len(words) + 5, hidden_size=64, num_hidden_layers=2, num_attention_heads=4,
+                        intermediate_size=128, max_position_embeddings=128)
+    BertModel(config).save_pretrained(hf_dir)
+    BertTokenizerFast(str(hf_dir / "vocab.txt")).save_pretrained(hf_dir)
+    transformer = models.Transformer(str(hf_dir), max_seq_length=64)
+    model = SentenceTransformer(modules=[transformer, models.Pooling(64, "mean"), models.Normalize()])
+    model.save(str(root / "tiny-minilm"))
+    return root / "tiny-minilm"
+
+
+@pytest.fixture(scope="module")
+def exported(tmp_path_factory):
+    root = tmp_path_factory.mktemp("onnx")
+    source = _tiny_model(root)
+    return source, onnx_embedder.export_model(str(source), root / "cache")
+
+
+def _scores(model) -> np.ndarray:
+    a = model.encode([p for p, _ in CORPUS], convert_to_numpy=True)
+    b = model.encode([d for _, d in CORPUS], convert_to_numpy=True)
+    return (a * b).sum(axis=1) / (np.linalg.norm(a, axis=1) * np.linalg.norm(b, axis=1))
+
+
+def test_onnx_int8_scores_match_torch(exported):
+    from sentence_transformers import SentenceTransformer
+
+    source, path = exported
+    onnx_model = onnx_embedder.OnnxEmbedder(path)
+    torch_model = SentenceTransformer(str(source), device="cpu")
+
+    assert json.loads((path / onnx_embedder.POOLING_FILE).read_text())["quantized"] is True
+    assert (path / onnx_embedder.MODEL_FILE).stat().st_size < (path / onnx_embedder.FP32_MODEL_FILE).stat().st_size
+    np.testing.assert_allclose(_scores(onnx_model), _scores(torch_model), atol=SCORE_TOLERANCE)
+    # Single strings come back as one vector, like SentenceTransformer.encode
+    single = onnx_model.encode(CORPUS[0][0])
+    np.testing.assert_allclose(single, onnx_model.encode([CORPUS[0][0]])[0], atol=1e-5)
+
+
+def test_real_model_parity_when_cached(tmp_path, monkeypatch):
+    """Same check against all-MiniLM-L6-v2 itself, if it is already in the local Hugging Face cache."""
+    from sentence_transformers import SentenceTransformer
+
+    monkeypatch.setenv("HF_HUB_OFFLINE", "1")
+    try:
+        torch_model = SentenceTransformer(onnx_embedder.DEFAULT_MODEL, device="cpu")
+    except OSError:
+        pytest.skip(f"{onnx_embedder.DEFAULT_MODEL} not in the local model cache")
+    path = onnx_embedder.export_model(onnx_embedder.DEFAULT_MODEL, tmp_path)
+    np.testing.assert_allclose(_scores(onnx_embedder.OnnxEmbedder(path)), _scores(torch_model), atol=SCORE_TOLERANCE)
+
+
+def test_similarity_check_onnx_backend_skips_torch(exported, tmp_path):
+    _, path = exported
+    cache = tmp_path / "cache"
+    shutil.copytree(path, cache / onnx_embedder.DEFAULT_MODEL)
+    run_dir = tmp_path / "20251101-000000"
+    run_dir.mkdir()
+    scenes = [{"SceneId": f"scene-{i}", "Prompt": p, "GeneratedDescription": d} for i, (p, d) in enumerate(CORPUS)]
+    (run_dir / "artifact-metadata.json").write_text(json.dumps({"Scenes": scenes}))
+
+    probe = (
+        "import runpy, sys\n"
+        "sys.argv = sys.argv[1:]\n"
+        "try:\n"
+        "    runpy.run_path(sys.argv[0], run_name='__main__')\n"
+        "except SystemExit:\n"
+        "    pass\n"
+        "print('TORCH_LOADED' if 'torch' in sys.modules else 'TORCH_SKIPPED')\n"
+    )
+    env = {**os.environ, onnx_embedder.ENV_CACHE_DIR: str(cache)}
+    proc = subprocess.run(
+        [sys.executable, "-c", probe, str(CHECKS_DIR / "similarity-check.py"), str(run_dir), "--backend", "onnx"],
+        capture_output=True, text=True, env=env, check=False,
+    )
+    assert "TORCH_SKIPPED" in proc.stdout, proc.stdout + proc.stderr
+    report = json.loads((run_dir / "similarity-check-report.json").read_text())
+    assert report["backend"] == "onnx"
+    assert len(report["scenes"]) == len(CORPUS)
@@ -0,0 +1,67 @@
+"""Tests for the synthetic run generator in create_test_image.py"""
+import hashlib
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("PIL")
+pytest.importorskip("numpy")
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+GENERATOR = REPO_ROOT / "create_test_image.py"
+DUPLICATE_CHECK = REPO_ROOT / "scripts" / "quality-checks" / "duplicate-frame-check.py"
+ARGS = ["--runs", "2", "--scenes", "3", "--frames", "12", "--width", "64", "--height", "96",
+        "--anomaly-rate", "0.5", "--seed", "3", "--jobs", "1"]
+
+
+def _generate(logs_dir: Path, *extra: str) -> dict:
+    subprocess.run([sys.executable, str(GENERATOR), "--logs-dir", str(logs_dir), *ARGS, *extra],
+                   check=True, capture_output=True)
+    return json.loads((logs_dir / "fixtures-manifest.json").read_text())
+
+
+def _digest(root: Path) -> dict:
+    return {str(p.relative_to(root)): hashlib.sha256(p.read_bytes()).hexdigest()
+            for p in sorted(root.rglob("*.png"))}
+
+
+def test_fixtures_are_deterministic(tmp_path):
+    first = _generate(tmp_path / "a")
+    second = _generate(tmp_path / "b")
+    assert first == second
+    assert _digest(tmp_path / "a") == _digest(tmp_path / "b")
+
+    runs = sorted(p for p in (tmp_path / "a").iterdir() if p.is_dir())
+    assert len(runs) == 2
+    metadata = json.loads((runs[0] / "artifact-metadata.json").read_text())
+    scene = metadata["Scenes"][0]
+    assert scene["FrameCount"] == 12
+    frames = list((runs[0] / scene["GeneratedFramesDir"]).glob(f"{scene['FramePrefix']}_*_.png"))
+    assert len(frames) == 12
+    assert (runs[0] / scene["KeyframeSource"]).exists()
+    assert (runs[0] / scene["GeneratedFramesDir"] / f"{scene['FramePrefix']}.done").exists()
+
+
+def test_injected_duplicates_are_detected(tmp_path):
+    manifest = _generate(tmp_path)
+    duplicates = [a for a in manifest["anomalies"] if a["anomaly"] == "duplicate"]
+    assert duplicates, "seed 3 should inject at least one duplicate scene"
+    for run in sorted({a["run"] for a in duplicates}):
+        # Hash every earlier run first so the history is complete
+        for earlier in sorted(p.name for p in tmp_path.iterdir() if p.is_dir() and p.name <= run):
+            subprocess.run([sys.executable, str(DUPLICATE_CHECK), str(tmp_path / earlier)], capture_output=True)
+        report = json.loads((tmp_path / run / "duplicate-frame-check-report.json").read_text())
+        flagged = {s["scene_id"]: {f"{d['run']}/{d['scene_id']}" for d in s["duplicates"]} for s in report["scenes"]}
+        for anomaly in duplicates:
+            if anomaly["run"] == run:
+                assert anomaly["duplicate_of"] in flagged[anomaly["scene_id"]]
+
+
+def test_metadata_only_mode(tmp_path):
+    _generate(tmp_path, "--frames", "0")
+    run = next(p for p in tmp_path.iterdir() if p.is_dir())
+    assert (run / "artifact-metadata.json").exists()
+    assert not list(run.rglob("*.png"))
@@ -0,0 +1,159 @@
+"""Tests for scripts/quality-checks/theme_clusters.py and diversity-check.py --mode clusters"""
+import hashlib
+import importlib.util
+import json
+import re
+import sys
+from pathlib import Path
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+CHECKS_DIR = Path(__file__).resolve().parents[1] / "quality-checks"
+sys.path.insert(0, str(CHECKS_DIR))
+sys.path.insert(0, str(CHECKS_DIR.parent / "tracing"))
+
+import theme_clusters  # noqa: E402
+from theme_clusters import ThemeClusters  # noqa: E402
+
+THEMES = {
+    "chase": "a detective chases the thief across wet rooftops at night",
+    "romance": "two lovers share a quiet embrace on the pier at dawn",
+    "heist": "the crew cracks the vault while the guard sleeps upstairs",
+    "comedy": "a clown slips on a banana and the whole crowd laughs",
+}
+
+
+class WordEmbedder:
+    """Offline stand-in for the MiniLM model: hashed bag of words. Counts the prompts it encodes."""
+
+    def __init__(self, dim: int = 64):
+        self.dim = dim
+        self.encoded = 0
+
+    def encode(self, sentences, convert_to_numpy: bool = True, **_):
+        self.encoded += len(sentences)
+        out = np.zeros((len(sentences), self.dim), dtype=np.float32)
+        for row, text in enumerate(sentences):
+            for token in re.findall(r"\w+", text.lower()):
+                h = int.from_bytes(hashlib.blake2b(token.encode(), digest_size=8).digest(), "little")
+                out[row, h % self.dim] += 1.0 if (h >> 32) & 1 else -1.0
+        return out
+
+
+def _run(themes, offset=0):
+    return [(f"scene-{i:03d}", f"{THEMES[t]} take {offset + i}") for i, t in enumerate(themes)]
+
+
+def test_runs_are_scored_against_history_and_only_new_scenes_update_it(tmp_path):
+    embedder = WordEmbedder()
+    with ThemeClusters(tmp_path / "clusters.sqlite", model="words", k=3) as store:
+        history = [t for t in ("chase", "romance", "heist") for _ in range(12)]
+        summary, _ = store.add_run("20250101-000000", _run(history), embedder.encode)
+        assert summary["warming_up"] and summary["history_scenes"] == 36 and store.warm
+
+        mixed, per_scene = store.add_run("20250102-000000", _run(["chase", "romance", "heist"] * 2, 100),
+                                         embedder.encode)
+        narrow, _ = store.add_run("20250103-000000", _run(["chase"] * 6, 200), embedder.encode)
+        assert not mixed["warming_up"] and mixed["clusters_used"] == 3 and narrow["clusters_used"] == 1
+        assert mixed["entropy"] == pytest.approx(np.log2(3), abs=1e-3) and narrow["entropy"] == 0.0
+        assert len({s["cluster"] for s in per_scene[:3]}) == 3  # one cluster per theme
+
+        # A theme the history has never seen is far from every centroid
+        novel, _ = store.add_run("20250104-000000", _run(["comedy"] * 6, 300), embedder.encode)
+        assert novel["novelty"] > 2 * mixed["novelty"]
+
+        # Re-checking a run rescores it without re-encoding or refitting
+        counts, encoded = store.counts.copy(), embedder.encoded
+        again, _ = store.add_run("20250103-000000", _run(["chase"] * 6, 200), embedder.encode)
+        assert (again["new_scenes"], again["encoded"], embedder.encoded) == (0, 0, encoded)
+        assert np.array_equal(store.counts, counts) and store.stats()["scenes"] == 54
+
+    with ThemeClusters(tmp_path / "clusters.sqlite") as store:  # reopened: model and k come from the store
+        assert (store.model, store.k, store.fitted) == ("words", 3, 54)
+        with pytest.raises(ValueError, match="rebuild"):
+            ThemeClusters(tmp_path / "clusters.sqlite", k=5)
+
+
+def test_incremental_batches_match_a_single_pass_and_rebuild(tmp_path):
+    rng = np.random.default_rng(7)
+    vectors = np.eye(32, dtype=np.float32)[rng.integers(4, size=3000)] + 0.02 * rng.standard_normal((3000, 32))
+    vectors = (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+    with ThemeClusters(tmp_path / "one.sqlite", model="synthetic", k=4) as one, \
+            ThemeClusters(tmp_path / "many.sqlite", model="synthetic", k=4) as many:
+        one.partial_fit(vectors[:64])  # same seeds for both
+        many.partial_fit(vectors[:64])
+        one.partial_fit(vectors[64:], batch_size=4096)
+        for start in range(64, len(vectors), 37):
+            many.partial_fit(vectors[start:start + 37], batch_size=37)
+        # Well separated themes: each centroid is the running mean of its members whatever the batching
+        assert np.allclose(one._means, many._means, atol=1e-5) and np.array_equal(one.counts, many.counts)
+        assert sorted(one.counts) == sorted(np.bincount(one.assign(vectors)[0]))
+
+    rows = [(f"run-{i // 30}", f"s{i % 30}", f"{i:032x}", 0.0, v.astype(np.float16).tobytes())
+            for i, v in enumerate(vectors)]
+    with ThemeClusters(tmp_path / "rebuilt.sqlite", model="synthetic", k=2) as store:
+        store._db.executemany("INSERT INTO scenes VALUES (?, ?, ?, ?, ?)", rows)
+        store._db.commit()
+        stats = store.rebuild(k=4)
+        assert (stats["k"], stats["centroids"], stats["fitted"], stats["runs"]) == (4, 4, 3000, 100)
+        assert sorted(stats["cluster_sizes"]) == sorted(one.counts)
+
+
+def _load_check():
+    spec = importlib.util.spec_from_file_location("diversity_check", CHECKS_DIR / "diversity-check.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_diversity_cluster_mode_reports_history_scores(tmp_path, monkeypatch):
+    check = _load_check()
+    embedder = WordEmbedder()
+    monkeypatch.setattr(theme_clusters, "load_model", lambda backend: embedder)
+    monkeypatch.setenv("GEMDIRECT_CHECK_HISTORY", "0")
+    monkeypatch.delenv(theme_clusters.ENV_BACKEND, raising=False)
+    logs = tmp_path / "logs"
+
+    def run(name, themes, *args):
+        run_dir = logs / name
+        run_dir.mkdir(parents=True)
+        scenes = [{"SceneId": sid, "Prompt": prompt} for sid, prompt in _run(themes, len(list(logs.iterdir())) * 50)]
+        (run_dir / "artifact-metadata.json").write_text(json.dumps({"Scenes": scenes}))
+        monkeypatch.setattr(sys, "argv", ["diversity-check.py", str(run_dir), "--mode", "clusters",
+                                          "--clusters", "4", *args])
+        with pytest.raises(SystemExit) as exit_info:
+            check.main()
+        return exit_info.value.code, json.loads((run_dir / "diversity-check-report.json").read_text())
+
+    code, cold = run("20250101-000000", ["chase", "romance", "heist", "comedy"] * 10)
+    assert cold["clusters"]["warming_up"] and code == 0  # gated on keyword entropy while warming up
+    code, warm = run("20250102-000000", ["chase", "romance", "heist", "comedy"])
+    assert not warm["clusters"]["warming_up"] and warm["clusters"]["entropy"] == 2.0 and code == 0
+    code, narrow = run("20250103-000000", ["romance"] * 4)
+    assert code == 1 and narrow["clusters"]["entropy"] == 0.0 and narrow["clusters"]["history_scenes"] == 48
+    assert {"cluster", "novelty", "themes"} <= set(narrow["scenes"][0])
+    assert narrow["mode"] == "clusters"
+    assert (logs / "theme-clusters.sqlite").exists()
+
+    # ONNX (int8) embeddings don't join the torch centroids: the torch store is moved aside
+    code, onnx = run("20250104-000000", ["chase", "romance"], "--backend", "onnx")
+    assert onnx["clusters"]["warming_up"] and onnx["clusters"]["history_scenes"] == 2  # its own scenes only
+    assert [p.name for p in logs.glob("theme-clusters.*.sqlite")] == [
+        f"theme-clusters.{theme_clusters.MODEL_NAME}-torch.sqlite"]
+
+
+def test_store_for_another_model_is_moved_aside(tmp_path, monkeypatch, capsys):
+    monkeypatch.delenv(theme_clusters.ENV_THEME_CLUSTERS, raising=False)
+    assert theme_clusters.default_store_path(tmp_path / "logs" / "run") == tmp_path / "logs" / "theme-clusters.sqlite"
+    assert theme_clusters.default_store_path(tmp_path / "adhoc") == tmp_path / "adhoc" / "theme-clusters.sqlite"
+
+    db = tmp_path / "clusters.sqlite"
+    with ThemeClusters(db, model="org/words", k=3) as store:
+        store.add_run("20250101-000000", _run(["chase", "romance"] * 6), WordEmbedder().encode)
+    with ThemeClusters(db, model="other") as store:
+        assert store.stats()["scenes"] == 0 and store.model == "other"
+    assert "moved it to" in capsys.readouterr().out
+    with ThemeClusters(tmp_path / "clusters.org-words.sqlite") as old:
+        assert (old.model, old.k, old.stats()["scenes"]) == ("org/words", 3, 12)
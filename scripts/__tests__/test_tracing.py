@@ -0,0 +1,100 @@
+"""Tests for scripts/tracing/tracing.py"""
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "tracing"))
+
+import tracing  # noqa: E402
+
+DIVERSITY_CHECK = Path(__file__).resolve().parents[1] / "quality-checks" / "diversity-check.py"
+
+
+def test_disabled_spans_are_shared_noops(monkeypatch):
+    monkeypatch.delenv(tracing.ENV_ENABLE, raising=False)
+    assert tracing.start("unit") is None
+    assert tracing.span("a") is tracing.span("b", x=1)
+
+    @tracing.traced
+    def add(a, b):
+        return a + b
+
+    assert add(2, 3) == 5
+    assert tracing.finish(".") is None
+
+
+def test_nested_spans_write_chrome_trace(tmp_path, monkeypatch):
+    monkeypatch.delenv(tracing.ENV_DIR, raising=False)
+    tracing.start("unit", enabled=True, run="r1")
+
+    @tracing.traced("work")
+    def work():
+        with tracing.span("inner", size=3) as span:
+            time.sleep(0.002)
+            span.set(result=7)
+
+    with tracing.span("outer"):
+        work()
+    try:
+        with tracing.span("fails"):
+            raise ValueError("boom")
+    except ValueError:
+        pass
+    tracing.mark("done", scenes=1)
+    path = tracing.finish(tmp_path)
+
+    assert path == tmp_path / "unit.trace.json"
+    trace = json.loads(path.read_text())
+    spans = {e["name"]: e for e in trace["traceEvents"] if e["ph"] == "X"}
+    assert set(spans) == {"outer", "work", "inner", "fails"}
+    outer, inner = spans["outer"], spans["inner"]
+    assert outer["ts"] <= inner["ts"] and inner["ts"] + inner["dur"] <= outer["ts"] + outer["dur"]
+    assert inner["dur"] >= 2000  # microseconds
+    assert inner["args"] == {"size": 3, "result": 7}
+    assert spans["fails"]["args"]["error"] == "ValueError"
+    assert any(e["ph"] == "i" and e["name"] == "done" for e in trace["traceEvents"])
+    assert trace["otherData"]["run"] == "r1"
+    assert trace["otherData"]["summary"]["work"]["count"] == 1
+    assert tracing.current() is None
+
+
+def test_trace_request_is_scoped_and_profiles(tmp_path):
+    @tracing.traced("step")
+    async def step():
+        deadline = time.perf_counter() + 0.05
+        while time.perf_counter() < deadline:
+            sum(range(1000))
+
+    async def handle():
+        with tracing.trace_request("req", tmp_path, enabled=True, profile=True) as tracer:
+            await step()
+        return tracer
+
+    tracer = asyncio.run(handle())
+    assert tracing.current() is None
+    trace = json.loads(tracer.path.read_text())
+    names = [e["name"] for e in trace["traceEvents"] if e["ph"] == "X"]
+    assert names == ["step", "req"]
+    assert trace["otherData"]["profile"]["samples"] > 0
+    folded = tracer.path.with_name(tracer.path.name.replace(".trace.json", ".folded"))
+    assert "step" in folded.read_text()
+
+
+def test_quality_check_writes_trace_next_to_metadata(tmp_path):
+    run_dir = tmp_path / "20251101-000000"
+    run_dir.mkdir()
+    metadata = {"Scenes": [{"SceneId": "scene-001", "Prompt": "A chase across rooftops"},
+                           {"SceneId": "scene-002", "Prompt": "They talk and laugh"}]}
+    (run_dir / "artifact-metadata.json").write_text(json.dumps(metadata))
+
+    env = {**os.environ, tracing.ENV_ENABLE: "1"}
+    subprocess.run([sys.executable, str(DIVERSITY_CHECK), str(run_dir)], env=env, capture_output=True, check=False)
+
+    trace = json.loads((run_dir / "diversity-check.trace.json").read_text())
+    summary = trace["otherData"]["summary"]
+    assert summary["extract_themes"]["count"] == 2
+    assert summary["calculate_entropy"]["count"] == 1
@@ -0,0 +1,70 @@
+"""Tests for scripts/quality-checks/video-quality-check.py"""
+import importlib.util
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+pytest.importorskip("PIL")
+from PIL import Image  # noqa: E402
+
+CHECK_PATH = Path(__file__).resolve().parents[1] / "quality-checks" / "video-quality-check.py"
+_spec = importlib.util.spec_from_file_location("video_quality_check", CHECK_PATH)
+vqc = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(vqc)
+
+
+def _frames(count: int, flicker_at=None) -> np.ndarray:
+    rng = np.random.default_rng(0)
+    base = rng.integers(0, 200, size=(48, 64, 3), dtype=np.uint8)
+    frames = np.stack([np.roll(base, i, axis=1) for i in range(count)])
+    if flicker_at is not None:
+        frames[flicker_at] = np.clip(frames[flicker_at].astype(np.int16) + 55, 0, 255).astype(np.uint8)
+    return frames
+
+
+def test_ssim_and_psnr_identity():
+    img = _frames(1)[0]
+    luma = vqc.frame_io.to_luma(img[None])[0]
+    assert vqc.ssim(luma, luma) == pytest.approx(1.0)
+    assert vqc.psnr(img, img) == float("inf")
+    noisy = np.clip(luma + np.random.default_rng(1).normal(0, 20, luma.shape), 0, 255)
+    assert vqc.ssim(luma, noisy) < 0.9
+
+
+def test_metrics_independent_of_chunking():
+    frames = _frames(20, flicker_at=7)
+    whole = vqc.analyze_frames([frames])
+    chunked = vqc.analyze_frames(frames[i:i + 3] for i in range(0, 20, 3))
+    for key in ("frame_count", "brightness_variance", "max_brightness_jump", "flicker_frame_count",
+                "jitter_score", "motion_energy"):
+        assert whole[key] == chunked[key]
+    # One bright frame produces a jump up and a jump back down
+    assert whole["flicker_frame_count"] == 2
+
+
+def test_cli_reads_run_metadata(tmp_path):
+    frames = _frames(6)
+    frames_dir = tmp_path / "frames"
+    frames_dir.mkdir()
+    for i, frame in enumerate(frames, start=1):
+        Image.fromarray(frame).save(frames_dir / f"gemdirect1_scene-001_{i:05d}_.png")
+    Image.fromarray(frames[0]).save(tmp_path / "keyframe.png")
+    metadata = {"Scenes": [{
+        "SceneId": "scene-001",
+        "FramePrefix": "gemdirect1_scene-001",
+        "GeneratedFramesDir": "frames",
+        "KeyframeSource": "keyframe.png",
+    }]}
+    (tmp_path / "artifact-metadata.json").write_text(json.dumps(metadata))
+
+    proc = subprocess.run([sys.executable, str(CHECK_PATH), str(tmp_path)], capture_output=True, text=True)
+    assert proc.returncode == 0, proc.stdout + proc.stderr
+    report = json.loads((tmp_path / "video-quality-check-report.json").read_text())
+    scene = report["scenes"][0]
+    assert scene["frame_count"] == 6
+    assert scene["source"] == "png"
+    assert scene["start_bookend"]["ssim"] == pytest.approx(1.0)
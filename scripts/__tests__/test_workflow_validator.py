@@ -0,0 +1,113 @@
+"""Tests for scripts/comfyui-tools/workflow_validator.py"""
+import json
+import sys
+import urllib.request
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "comfyui-tools"))
+
+from object_info_cache import NodeSchemaIndex  # noqa: E402
+from workflow_validator import (  # noqa: E402
+    ValidationCache,
+    collect_sources,
+    load_schema,
+    validate_sources,
+    validate_workflow,
+)
+
+SCHEMA = NodeSchemaIndex.from_object_info({
+    "LoadImage": {"input": {"required": {"image": [["a.png"]]}}, "output": ["IMAGE", "MASK"]},
+    "VAELoader": {"input": {"required": {"vae_name": [["v.safetensors"]]}}, "output": ["VAE"]},
+    "VAEEncode": {"input": {"required": {"pixels": ["IMAGE"], "vae": ["VAE"]}}, "output": ["LATENT"]},
+    "VAEDecode": {"input": {"required": {"samples": ["LATENT"], "vae": ["VAE"]}}, "output": ["IMAGE"]},
+    "SaveImage": {"input": {"required": {"images": ["IMAGE"]}}, "output": [], "output_node": True},
+})
+
+VALID = {
+    "1": {"class_type": "LoadImage", "inputs": {"image": "a.png"}},
+    "2": {"class_type": "VAELoader", "inputs": {"vae_name": "v.safetensors"}},
+    "3": {"class_type": "VAEEncode", "inputs": {"pixels": ["1", 0], "vae": ["2", 0]}},
+    "4": {"class_type": "VAEDecode", "inputs": {"samples": ["3", 0], "vae": ["2", 0]}},
+    "10": {"class_type": "SaveImage", "inputs": {"images": ["4", 0]}},
+}
+
+
+def test_valid_workflow_execution_order():
+    report = validate_workflow(VALID, SCHEMA)
+    assert report.ok, report.errors
+    assert report.execution_order == ["1", "2", "3", "4", "10"]
+    assert report.warnings == []
+
+
+def test_type_mismatch_and_bad_slot():
+    workflow = json.loads(json.dumps(VALID))
+    workflow["4"]["inputs"]["samples"] = ["1", 0]   # IMAGE into LATENT
+    workflow["10"]["inputs"]["images"] = ["2", 3]   # VAELoader has one output
+    errors = validate_workflow(workflow, SCHEMA).errors
+    assert any("expects LATENT, got IMAGE" in e for e in errors)
+    assert any("output slot 3" in e for e in errors)
+
+
+def test_cycle_unknown_class_and_dead_nodes():
+    workflow = json.loads(json.dumps(VALID))
+    workflow["3"]["inputs"]["pixels"] = ["4", 0]
+    workflow["5"] = {"class_type": "TemporalSmoothing", "inputs": {}}
+    workflow["6"] = {"class_type": "LoadImage", "inputs": {"image": "a.png"}}
+    report = validate_workflow(workflow, SCHEMA)
+    assert "Node 5: class 'TemporalSmoothing' is not installed" in report.errors
+    assert any(e.startswith("Cycle detected among nodes: 3, 4") for e in report.errors)
+    assert any("never executed" in w and "6" in w for w in report.warnings)
+
+
+def test_ui_format_rewires_bypassed_nodes():
+    workflow = {
+        "nodes": [
+            {"id": 1, "type": "LoadImage", "mode": 0, "inputs": []},
+            {"id": 2, "type": "ImageBlur", "mode": 4, "inputs": [{"name": "image", "type": "IMAGE", "link": 1}]},
+            {"id": 3, "type": "SaveImage", "mode": 0, "inputs": [{"name": "images", "type": "IMAGE", "link": 2}]},
+            {"id": 4, "type": "Note", "mode": 0, "inputs": []},
+        ],
+        "links": [[1, 1, 0, 2, 0, "IMAGE"], [2, 2, 0, 3, 0, "IMAGE"]],
+    }
+    report = validate_workflow(workflow, SCHEMA)
+    assert report.format == "ui"
+    assert report.ok, report.errors
+    assert report.execution_order == ["1", "3"]
+
+
+def test_sources_are_cached_by_hash(tmp_path):
+    (tmp_path / "a.json").write_text(json.dumps(VALID))
+    (tmp_path / "b.json").write_text(json.dumps({"1": {"class_type": "SaveImage", "inputs": {"images": ["9", 0]}}}))
+    settings = tmp_path / "settings.json"
+    settings.write_text(json.dumps({"workflowProfiles": {"p": {"workflowJson": json.dumps(VALID)}}}))
+
+    sources = collect_sources([tmp_path / "a.json", tmp_path / "b.json"], settings)
+    cache = ValidationCache(tmp_path / "cache.json")
+    first = validate_sources(sources, SCHEMA, "schema-1", cache, jobs=1)
+    assert [r.ok for r in first] == [True, False, True]
+    assert not any(r.cached for r in first)
+    cache.save()
+
+    second = validate_sources(sources, SCHEMA, "schema-1", ValidationCache(tmp_path / "cache.json"), jobs=1)
+    assert all(r.cached for r in second)
+    assert second[2].source.endswith("settings.json#p")
+    assert [r.errors for r in second] == [r.errors for r in first]
+
+    # A different schema hash invalidates the cached reports
+    third = validate_sources(sources, SCHEMA, "schema-2", ValidationCache(tmp_path / "cache.json"), jobs=1)
+    assert not any(r.cached for r in third)
+
+
+def test_parallel_matches_serial(tmp_path):
+    sources = [(f"wf{i}", json.dumps(VALID).encode()) for i in range(10)]
+    serial = validate_sources(sources, SCHEMA, jobs=1)
+    parallel = validate_sources(sources, SCHEMA, jobs=2)
+    assert [r.execution_order for r in parallel] == [r.execution_order for r in serial]
+
+
+def test_schema_is_not_fetched_unless_asked(tmp_path, monkeypatch):
+    def no_network(*args, **kwargs):
+        raise AssertionError("fetched /object_info without --refresh-schema")
+
+    monkeypatch.setattr(urllib.request, "urlopen", no_network)
+    assert load_schema("http://127.0.0.1:9", None, tmp_path, refresh=False) == (None, "none")
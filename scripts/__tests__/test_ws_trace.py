@@ -0,0 +1,97 @@
+"""Tests for scripts/comfyui-tools/ws_trace.py (record, replay, determinism)"""
+import json
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+import pytest
+
+requests = pytest.importorskip("requests")
+websocket = pytest.importorskip("websocket")
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "comfyui-tools"))
+
+from comfyui_client import ComfyUIClient  # noqa: E402
+from ws_trace import ReplayServer, TraceRecorder, read_trace, synthesize_trace, write_trace  # noqa: E402
+
+
+def _comparable(trace):
+    """Socket-side records minus timing and the per-connection client id."""
+    out = []
+    for r in trace.records:
+        if r.kind in ("prompt", "history"):
+            continue  # HTTP responses race the reader thread; compared separately
+        data = r.data
+        if r.kind == "ws" and "sid" in data["data"]:
+            data = {**data, "data": {**data["data"], "sid": None}}
+        out.append((r.kind, r.prompt_id, data))
+    return out
+
+
+def _history(trace):
+    return [(r.prompt_id, json.dumps(r.data, sort_keys=True)) for r in trace.records if r.kind == "history"]
+
+
+def test_replay_is_deterministic_and_rerecords_identically(tmp_path):
+    original = synthesize_trace(prompts=3, nodes=5, steps=300, step_ms=2, preview_bytes=64, disconnect_at=0.4)
+    write_trace(original, tmp_path / "storm.jsonl.gz")
+    trace = read_trace(tmp_path / "storm.jsonl.gz")
+    assert trace.summary()["messageTypes"]["progress"] == 900 and trace.summary()["disconnects"] == 1
+
+    for attempt in range(2):
+        recorder = TraceRecorder(tmp_path / f"replayed-{attempt}.jsonl")
+        with ReplayServer(trace, speed=0) as server:
+            with ComfyUIClient(server.url, trace=recorder) as client:
+                handles = [client.queue_prompt({}) for _ in trace.prompt_responses]
+                results = client.wait_all(handles, timeout=30)
+                assert server.wait_finished(10)
+                deadline = time.monotonic() + 10
+                while recorder.counts != Counter(r.kind for r in trace.records) and time.monotonic() < deadline:
+                    time.sleep(0.01)  # let the reader drain the socket
+                assert client.reconnects == 1
+        recorder.close()
+
+        assert [r.status for r in results] == ["success"] * 3
+        assert results[2].outputs == {"5": {"images": [{"filename": "gemdirect1_shot_00002_.png",
+                                                         "subfolder": "", "type": "output"}]}}
+        # The client saw exactly what was recorded, in the same order, disconnect included
+        replayed = read_trace(recorder.path)
+        assert _comparable(replayed) == _comparable(trace)
+        assert replayed.prompt_responses == trace.prompt_responses
+        assert sorted(_history(replayed)) == sorted(_history(trace))  # /history resume included
+
+
+def test_playback_waits_for_the_first_prompt_and_honours_speed(tmp_path):
+    trace = synthesize_trace(prompts=1, nodes=3, steps=20, step_ms=20)
+    prompt_id = trace.prompt_responses[0]["prompt_id"]
+    with ReplayServer(trace, speed=2) as server:
+        ws = websocket.create_connection(f"ws://127.0.0.1:{server.port}/ws?clientId=me", timeout=0.3)
+        status = json.loads(ws.recv())
+        assert status["type"] == "status" and status["data"]["sid"] == "me"
+        with pytest.raises(websocket.WebSocketTimeoutException):
+            ws.recv()  # nothing else until a prompt is queued
+        assert requests.get(f"{server.url}/history/{prompt_id}").json() == {}
+
+        start = time.monotonic()
+        assert requests.post(f"{server.url}/prompt", json={"prompt": {}}).json()["prompt_id"] == prompt_id
+        ws.settimeout(5)
+        messages = []
+        while not messages or messages[-1] != {"type": "executing", "data": {
+                "node": None, "display_node": None, "prompt_id": prompt_id}}:
+            messages.append(json.loads(ws.recv()))
+        types = [m["type"] for m in messages]
+        elapsed = time.monotonic() - start
+        assert types.count("progress") == 20
+        assert elapsed >= (22 * 0.020) / 2 * 0.9  # recorded ~0.44s, played at 2x
+        entry = requests.get(f"{server.url}/history/{prompt_id}").json()[prompt_id]
+        assert entry["status"]["completed"]
+        assert requests.post(f"{server.url}/prompt", json={"prompt": {}}).status_code == 400  # trace exhausted
+        ws.close()
+
+
+def test_read_trace_rejects_other_files(tmp_path):
+    path = tmp_path / "not-a-trace.jsonl"
+    path.write_text('{"type": "status"}\n')
+    with pytest.raises(ValueError, match="not a ComfyUI trace"):
+        read_trace(path)
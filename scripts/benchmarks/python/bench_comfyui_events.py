@@ -0,0 +1,50 @@
+"""ComfyUI event handling: parsing and routing recorded WebSocket event storms."""
+import json
+import sys
+
+import pytest
+
+from conftest import REPO_ROOT, quiet
+
+pytest.importorskip("requests")
+pytest.importorskip("websocket")
+
+# Imported as modules (not load_script) so ws_trace's dataclasses resolve and it can import the client
+sys.path.insert(0, str(REPO_ROOT / "scripts" / "comfyui-tools"))
+import comfyui_client  # noqa: E402
+import ws_trace  # noqa: E402
+
+
+@pytest.mark.parametrize("steps", [100, 1000])
+def bench_parse_and_dispatch(benchmark, steps):
+    """Reader-thread work per message (json.loads + _dispatch), without sockets."""
+    trace = ws_trace.synthesize_trace(prompts=4, nodes=8, steps=steps, step_ms=1)
+    payloads = [json.dumps(r.data) for r in trace.records if r.kind == "ws"]
+    entries = {r.prompt_id: r.data for r in trace.records if r.kind == "history" and r.data}
+
+    def run():
+        client = comfyui_client.ComfyUIClient("http://127.0.0.1:1")
+        client.history = lambda prompt_id=None: {prompt_id: entries[prompt_id]}
+        handles = []
+        for response in trace.prompt_responses:
+            handle = comfyui_client.PromptHandle(response["prompt_id"])
+            handle.add_listener(lambda event, data: None)
+            client._pending[handle.prompt_id] = handle
+            handles.append(handle)
+        for payload in payloads:
+            client._dispatch(json.loads(payload))
+        client.session.close()
+        return handles
+
+    handles = benchmark(run)
+    assert all(h.done() for h in handles)
+
+
+def bench_replay_storm(benchmark):
+    """End to end over loopback: replayer at speed 0 -> ComfyUIClient, with one disconnect."""
+    trace = ws_trace.synthesize_trace(prompts=4, nodes=8, steps=500, step_ms=1, preview_bytes=1024,
+                                      disconnect_at=0.5)
+    with quiet():
+        result = benchmark.pedantic(ws_trace.run_benchmark, args=(trace, 0.0), rounds=3, iterations=1)
+    benchmark.extra_info["messagesPerSec"] = result["messagesPerSec"]
+    assert result["resolved"] == 4 and result["reconnects"] == 1
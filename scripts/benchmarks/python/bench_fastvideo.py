@@ -0,0 +1,100 @@
+"""FastVideo adapter hot paths: keyframe decode/resize (cold and cached) and MP4 writing."""
+import asyncio
+import base64
+import io
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from conftest import load_script
+
+video_io = load_script("scripts/fastvideo/video_io.py", "video_io")
+conditioning_cache = load_script("scripts/fastvideo/conditioning_cache.py", "conditioning_cache")
+
+KEYFRAME_SIZES = [(576, 1024), (1280, 720), (1920, 1080)]
+TARGET_SIZE = (1280, 544)  # GenerateVideoRequest defaults
+
+
+def _keyframe_base64(size, rng, fmt="PNG"):
+    w, h = size
+    small = rng.integers(0, 255, size=(h // 16, w // 16, 3), dtype=np.uint8)
+    img = Image.fromarray(small).resize(size, Image.BILINEAR)
+    buf = io.BytesIO()
+    img.save(buf, format=fmt)
+    return "data:image/png;base64," + base64.b64encode(buf.getvalue()).decode("ascii")
+
+
+@pytest.mark.parametrize("size", KEYFRAME_SIZES, ids=lambda s: f"{s[0]}x{s[1]}")
+def bench_decode_base64_image(benchmark, rng, size):
+    payload = _keyframe_base64(size, rng)
+    image = benchmark(video_io.decode_base64_image, payload)
+    assert image.size == size
+
+
+@pytest.mark.parametrize("size", KEYFRAME_SIZES, ids=lambda s: f"{s[0]}x{s[1]}")
+def bench_decode_and_resize_keyframe(benchmark, rng, size):
+    payload = _keyframe_base64(size, rng)
+
+    def run():
+        return video_io.resize_keyframe(video_io.decode_base64_image(payload), TARGET_SIZE)
+
+    assert benchmark(run).size == TARGET_SIZE
+
+
+@pytest.mark.parametrize("size", KEYFRAME_SIZES, ids=lambda s: f"{s[0]}x{s[1]}")
+def bench_cached_keyframe_prepare(benchmark, rng, size):
+    """Per-variant keyframe cost in a seed sweep: hash lookup instead of decode + resize."""
+    payload = _keyframe_base64(size, rng)
+    cache = conditioning_cache.KeyframeCache()
+    cache.prepare(payload, TARGET_SIZE)
+    image, _, hit = benchmark(cache.prepare, payload, TARGET_SIZE)
+    assert hit and image.size == TARGET_SIZE
+
+
+@pytest.mark.parametrize("mode", ["inline", "pool"])
+def bench_event_loop_lag_during_keyframe_prepare(benchmark, rng, mode):
+    """Longest event-loop stall while a cold 1080p keyframe is prepared on the loop vs in the preprocess pool."""
+    payload = _keyframe_base64((1920, 1080), rng)
+    pool = ThreadPoolExecutor(1)
+
+    async def scenario():
+        cache = conditioning_cache.KeyframeCache()
+        lag = 0.0
+        done = False
+
+        async def ticker():
+            nonlocal lag
+            last = time.perf_counter()
+            while not done:
+                await asyncio.sleep(0.001)
+                now = time.perf_counter()
+                lag, last = max(lag, now - last), now
+
+        tick = asyncio.create_task(ticker())
+        await asyncio.sleep(0.005)
+        if mode == "inline":
+            cache.prepare(payload, TARGET_SIZE)
+        else:
+            await asyncio.get_running_loop().run_in_executor(pool, cache.prepare, payload, TARGET_SIZE)
+        done = True
+        await tick
+        return lag
+
+    lags = []
+    benchmark.pedantic(lambda: lags.append(asyncio.run(scenario())), rounds=3, iterations=1)
+    pool.shutdown()
+    benchmark.extra_info["maxLoopLagMs"] = round(max(lags) * 1000, 1)
+
+
+@pytest.mark.parametrize("frames,size", [(33, (320, 192)), (121, (640, 272))], ids=["33f-320x192", "121f-640x272"])
+def bench_write_video(benchmark, rng, tmp_path, frames, size):
+    pytest.importorskip("imageio_ffmpeg", reason="MP4 writing needs imageio-ffmpeg")
+    w, h = size
+    base = rng.integers(0, 255, size=(h, w, 3), dtype=np.uint8)
+    video = [np.roll(base, i * 3, axis=1) for i in range(frames)]
+    out = tmp_path / "bench.mp4"
+    benchmark.pedantic(video_io.write_video, args=(video, out, 16), rounds=3, iterations=1)
+    assert out.stat().st_size > 0
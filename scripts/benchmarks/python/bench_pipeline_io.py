@@ -0,0 +1,45 @@
+"""Pipeline I/O hot paths: done markers and workflow graph verification."""
+import pytest
+
+from conftest import load_script, quiet
+
+done_marker = load_script("comfyui_nodes/write_done_marker.py", "write_done_marker")
+test_workflow = load_script("test_workflow.py", "test_workflow")
+
+
+@pytest.mark.parametrize("markers", [1, 100])
+def bench_write_done_marker(benchmark, tmp_path, markers):
+    def run():
+        with quiet():
+            for i in range(markers):
+                done_marker.write_done_marker(str(tmp_path), f"gemdirect1_scene-{i:03d}", frame_count=121)
+
+    benchmark(run)
+    assert len(list(tmp_path.glob("*.done"))) == markers
+
+
+def _layered_workflow(nodes: int, width: int = 8) -> dict:
+    """API-format DAG: a loader, then layers of `width` nodes each wired to two nodes of the previous layer."""
+    workflow = {"1": {"class_type": "LoadImage", "inputs": {"image": "test_keyframe.jpg"}}}
+    previous = ["1"]
+    node_id = 1
+    while node_id < nodes - 1:
+        layer = []
+        for i in range(min(width, nodes - 1 - node_id)):
+            node_id += 1
+            a, b = previous[i % len(previous)], previous[(i + 1) % len(previous)]
+            workflow[str(node_id)] = {"class_type": "ImageBlend",
+                                      "inputs": {"image1": [a, 0], "image2": [b, 0], "blend_factor": 0.5}}
+            layer.append(str(node_id))
+        previous = layer
+    for i, src in enumerate(previous):
+        workflow[str(nodes + i)] = {"class_type": "SaveImage", "inputs": {"images": [src, 0], "filename_prefix": "x"}}
+    return workflow
+
+
+@pytest.mark.parametrize("nodes", [50, 500, 5000])
+def bench_verify_workflow_connections(benchmark, nodes):
+    workflow = _layered_workflow(nodes)
+    with quiet():
+        ok = benchmark(test_workflow.verify_workflow_connections, workflow)
+    assert ok
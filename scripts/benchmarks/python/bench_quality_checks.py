@@ -0,0 +1,88 @@
+"""Quality-check hot paths: theme extraction/entropy, theme clustering, coherence, embeddings and cosine similarity."""
+import numpy as np
+import pytest
+
+from conftest import load_script, quiet
+
+diversity = load_script("scripts/quality-checks/diversity-check.py", "diversity_check")
+coherence = load_script("scripts/quality-checks/coherence-check.py", "coherence_check")
+similarity = load_script("scripts/quality-checks/similarity-check.py", "similarity_check")
+import theme_clusters  # noqa: E402  (on sys.path via load_script; imported by diversity-check.py)
+
+SCENE_COUNTS = [10, 100, 1000]
+
+PROMPTS = [
+    "A detective chases a thief across rooftops while rain hides every clue",
+    "Two lovers share a quiet embrace at dawn, her heart full of affection",
+    "The captain explains the plan and reveals the secret map to the crew",
+    "A street musician laughs at a clumsy joke, the crowd amused and warm",
+    "In the dark hallway danger waits; they fear the unknown threat ahead",
+    "Maria talks with John about the conflict; she asks and he answers softly",
+]
+
+
+def _prompts(count):
+    return [f"{PROMPTS[i % len(PROMPTS)]} (shot {i})" for i in range(count)]
+
+
+@pytest.mark.parametrize("scenes", SCENE_COUNTS)
+def bench_extract_themes(benchmark, scenes):
+    prompts = _prompts(scenes)
+    themes = benchmark(lambda: [diversity.extract_themes(p) for p in prompts])
+    assert len(themes) == scenes
+
+
+@pytest.mark.parametrize("tags", [100, 10_000, 100_000])
+def bench_calculate_entropy(benchmark, tags):
+    names = ["action", "romance", "mystery", "dialogue", "exposition", "suspense", "comedy", "drama", "other"]
+    themes = [names[i % 7 + (i % 3 == 0)] for i in range(tags)]
+    assert benchmark(diversity.calculate_entropy, themes) > 2.0
+
+
+@pytest.mark.parametrize("sentences", [5, 50, 500])
+def bench_analyze_coherence(benchmark, stand_in_spacy, sentences):
+    text = " ".join(
+        f"{name} walks into the room. She looks at him and they talk about it."
+        for name in (["Maria", "John", "Ava"] * sentences)[:sentences]
+    )
+    with quiet():
+        result = benchmark(coherence.analyze_coherence, text)
+    assert result["pronoun_count"] >= sentences
+
+
+@pytest.mark.parametrize("scenes", SCENE_COUNTS)
+def bench_embed_scenes(benchmark, embedder, scenes):
+    prompts = _prompts(scenes)
+    vectors = benchmark(embedder.encode, prompts, convert_to_numpy=True)
+    assert vectors.shape == (scenes, 384)
+
+
+@pytest.mark.parametrize("pairs", SCENE_COUNTS)
+def bench_cosine_similarity(benchmark, rng, pairs):
+    a = rng.normal(size=(pairs, 384)).astype(np.float32)
+    b = rng.normal(size=(pairs, 384)).astype(np.float32)
+    sims = benchmark(lambda: [similarity.cosine_similarity(x, y) for x, y in zip(a, b)])
+    assert len(sims) == pairs
+
+
+@pytest.mark.parametrize("scenes", [10_000, 100_000])
+def bench_theme_cluster_partial_fit(benchmark, tmp_path, scenes):
+    """Folding history into the diversity check's mini-batch k-means (k=24, 384 dims)."""
+    vectors = theme_clusters.synthetic_embeddings(scenes)
+
+    def run():
+        with theme_clusters.ThemeClusters(tmp_path / f"fit-{scenes}.sqlite", model="synthetic", k=24) as store:
+            store.partial_fit(vectors)
+            return store.fitted
+
+    assert benchmark.pedantic(run, rounds=3, iterations=1) == scenes
+
+
+def bench_theme_cluster_add_run(benchmark, tmp_path, embedder):
+    """Scoring one 20-scene run against a 100k-scene history and folding it in."""
+    prompts = [(f"scene-{i:03d}", p) for i, p in enumerate(_prompts(20))]
+    with theme_clusters.ThemeClusters(tmp_path / "history.sqlite", model="stand-in", k=24) as store:
+        store.partial_fit(theme_clusters.synthetic_embeddings(100_000))
+        runs = iter(range(10**6))
+        summary, _ = benchmark(lambda: store.add_run(f"run-{next(runs)}", prompts, embedder.encode))
+    assert not summary["warming_up"] and summary["new_scenes"] == 20
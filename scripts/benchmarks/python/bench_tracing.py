@@ -0,0 +1,34 @@
+"""Tracing overhead: disabled spans must stay near-free on hot paths."""
+import pytest
+
+from conftest import load_script
+
+tracing = load_script("scripts/tracing/tracing.py", "tracing")
+
+CALLS = 10_000
+
+
+def _loop():
+    for _ in range(CALLS):
+        with tracing.span("hot", scene_id="scene-001"):
+            pass
+
+
+@pytest.mark.parametrize("enabled", [False, True], ids=["disabled", "enabled"])
+def bench_span_10k(benchmark, enabled):
+    if enabled:
+        tracing.start("bench", enabled=True)
+    try:
+        benchmark(_loop)
+    finally:
+        tracer = tracing.current()
+        tracing._process_tracer = None
+    assert (tracer is not None) == enabled
+
+
+def bench_traced_call_disabled_10k(benchmark):
+    @tracing.traced
+    def f(x):
+        return x
+
+    benchmark(lambda: [f(i) for i in range(CALLS)])
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Save and compare Python benchmark baselines.
+
+Reads the JSON written by `pytest --benchmark-json=<file>` and keeps a
+compact baseline (median/min/mean/stddev in seconds per benchmark, plus the
+machine it ran on). `compare` fails when any benchmark's median slows past
+the threshold relative to the baseline.
+
+Usage:
+    python compare_baselines.py save    data/benchmarks/python-latest.json
+    python compare_baselines.py compare data/benchmarks/python-latest.json --threshold 0.25
+    python compare_baselines.py compare latest.json --threshold 0.25 --override "bench_write_video*=0.5"
+
+Exit codes:
+- 0: No regressions (or baseline saved)
+- 1: One or more benchmarks regressed past the threshold
+- 2: Missing or unreadable input
+"""
+import argparse
+import fnmatch
+import json
+from pathlib import Path
+from typing import Dict, List, Optional
+
+REPO_ROOT = Path(__file__).resolve().parents[3]
+DEFAULT_BASELINE = REPO_ROOT / "data" / "benchmarks" / "python-baseline.json"
+BASELINE_VERSION = 1
+# Benchmarks faster than this are dominated by timer noise; compare them with extra slack
+NOISE_FLOOR_S = 50e-6
+
+
+def load_results(path: Path) -> Dict[str, dict]:
+    """Condense pytest-benchmark JSON to {fullname: stats}."""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    results = {}
+    for bench in data.get("benchmarks", []):
+        stats = bench["stats"]
+        results[bench["fullname"].split("::", 1)[-1]] = {
+            "median": stats["median"],
+            "min": stats["min"],
+            "mean": stats["mean"],
+            "stddev": stats["stddev"],
+            "rounds": stats["rounds"],
+        }
+    return results
+
+
+def machine_summary(path: Path) -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        info = json.load(f).get("machine_info", {})
+    cpu = info.get("cpu", {})
+    return {
+        "node": info.get("node"),
+        "cpu": cpu.get("brand_raw"),
+        "python": info.get("python_version"),
+    }
+
+
+def save_baseline(results_path: Path, baseline_path: Path) -> dict:
+    baseline = {
+        "version": BASELINE_VERSION,
+        "machine": machine_summary(results_path),
+        "benchmarks": load_results(results_path),
+    }
+    baseline_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(baseline_path, "w", encoding="utf-8") as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+    return baseline
+
+
+def threshold_for(name: str, default: float, overrides: Dict[str, float]) -> float:
+    for pattern, value in overrides.items():
+        if fnmatch.fnmatch(name, pattern):
+            return value
+    return default
+
+
+def compare(
+    current: Dict[str, dict],
+    baseline: Dict[str, dict],
+    threshold: float,
+    overrides: Optional[Dict[str, float]] = None,
+) -> List[dict]:
+    """One row per benchmark present in both; `regressed` marks medians past the threshold."""
+    rows = []
+    for name in sorted(set(current) & set(baseline)):
+        base, now = baseline[name]["median"], current[name]["median"]
+        limit = threshold_for(name, threshold, overrides or {})
+        if base < NOISE_FLOOR_S:
+            limit = max(limit, 1.0)
+        change = (now - base) / base if base > 0 else 0.0
+        rows.append({
+            "name": name,
+            "baseline_ms": base * 1000,
+            "current_ms": now * 1000,
+            "change": change,
+            "threshold": limit,
+            "regressed": change > limit,
+        })
+    return rows
+
+
+def _parse_overrides(values: List[str]) -> Dict[str, float]:
+    overrides = {}
+    for value in values:
+        pattern, _, limit = value.partition("=")
+        overrides[pattern] = float(limit)
+    return overrides
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Save/compare Python benchmark baselines")
+    parser.add_argument("command", choices=["save", "compare"])
+    parser.add_argument("results", help="JSON from pytest --benchmark-json")
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE))
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed median slowdown (0.25 = +25%%)")
+    parser.add_argument("--override", action="append", default=[],
+                        help="Per-benchmark threshold, e.g. 'bench_write_video*=0.5' (repeatable)")
+    args = parser.parse_args(argv)
+
+    results_path, baseline_path = Path(args.results), Path(args.baseline)
+    if not results_path.exists():
+        print(f"[ERROR] Benchmark results not found: {results_path}")
+        return 2
+
+    if args.command == "save":
+        baseline = save_baseline(results_path, baseline_path)
+        print(f"[OK] Saved {len(baseline['benchmarks'])} benchmarks to {baseline_path}")
+        return 0
+
+    if not baseline_path.exists():
+        print(f"[ERROR] Baseline not found: {baseline_path} (create one with 'save')")
+        return 2
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    machine = machine_summary(results_path)
+    if baseline.get("machine", {}).get("cpu") != machine.get("cpu"):
+        print(f"[WARN] Baseline recorded on '{baseline.get('machine', {}).get('cpu')}', "
+              f"current run on '{machine.get('cpu')}'; timings may not be comparable")
+
+    current = load_results(results_path)
+    rows = compare(current, baseline["benchmarks"], args.threshold, _parse_overrides(args.override))
+    for row in rows:
+        status = "FAIL" if row["regressed"] else "OK"
+        print(f"[{status}] {row['name']}: {row['baseline_ms']:.3f} ms -> {row['current_ms']:.3f} ms "
+              f"({row['change']:+.1%}, limit +{row['threshold']:.0%})")
+    for name in sorted(set(baseline["benchmarks"]) - set(current)):
+        print(f"[WARN] {name}: in baseline but not in this run")
+    for name in sorted(set(current) - set(baseline["benchmarks"])):
+        print(f"[INFO] {name}: new benchmark (no baseline)")
+
+    regressions = [r for r in rows if r["regressed"]]
+    print(f"\n[RESULT] {len(rows)} compared, {len(regressions)} regressed (threshold +{args.threshold:.0%})")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
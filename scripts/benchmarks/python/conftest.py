@@ -0,0 +1,119 @@
+"""
+Shared fixtures for the Python hot-path benchmarks.
+
+Everything runs offline: the sentence-transformers model and the spaCy
+pipeline are replaced by deterministic stand-ins with the same call
+surface, so the benchmarks measure our code paths rather than model
+inference.
+"""
+import contextlib
+import hashlib
+import importlib.util
+import io
+import re
+import sys
+import types
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+REPO_ROOT = Path(__file__).resolve().parents[3]
+EMBEDDING_DIM = 384  # all-MiniLM-L6-v2
+
+
+def load_script(relative_path: str, module_name: str):
+    """Import a repo script (hyphenated names included) as a module."""
+    path = REPO_ROOT / relative_path
+    spec = importlib.util.spec_from_file_location(module_name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.path.insert(0, str(path.parent))
+    with quiet():
+        spec.loader.exec_module(module)
+    return module
+
+
+@contextlib.contextmanager
+def quiet():
+    """Swallow the [OK]/[INFO] prints of the code under benchmark."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+class StandInEmbedder:
+    """SentenceTransformer stand-in: hashed bag of words projected to 384 dims."""
+
+    def __init__(self, dim: int = EMBEDDING_DIM):
+        self.dim = dim
+
+    def _embed(self, text: str) -> np.ndarray:
+        vec = np.zeros(self.dim, dtype=np.float32)
+        for token in re.findall(r"\w+", text.lower()):
+            h = int.from_bytes(hashlib.blake2b(token.encode(), digest_size=8).digest(), "little")
+            vec[h % self.dim] += 1.0 if (h >> 32) & 1 else -1.0
+        return vec
+
+    def encode(self, sentences, convert_to_numpy: bool = True, **_):
+        if isinstance(sentences, str):
+            return self._embed(sentences)
+        return np.stack([self._embed(s) for s in sentences])
+
+
+class _Token:
+    __slots__ = ("text", "head", "ent_type_")
+
+    def __init__(self, text: str, ent_type: str = ""):
+        self.text = text
+        self.head = self
+        self.ent_type_ = ent_type
+
+
+class _Span:
+    __slots__ = ("text", "label_")
+
+    def __init__(self, text: str, label: str):
+        self.text = text
+        self.label_ = label
+
+
+class _Doc(list):
+    ents = ()
+
+
+def _stand_in_nlp(text: str) -> _Doc:
+    """Tokenise, tag capitalised words as PERSON and attach each pronoun to the previous name."""
+    doc = _Doc()
+    ents = []
+    last_entity = None
+    for word in re.findall(r"[A-Za-z']+|[^\sA-Za-z]", text):
+        is_name = word[:1].isupper() and len(word) > 1
+        token = _Token(word, "PERSON" if is_name else "")
+        if is_name:
+            ents.append(_Span(word, "PERSON"))
+            last_entity = token
+        elif last_entity is not None:
+            token.head = last_entity
+        doc.append(token)
+    doc.ents = ents
+    return doc
+
+
+@pytest.fixture
+def stand_in_spacy(monkeypatch):
+    """Install a `spacy` module whose load() returns the stand-in pipeline."""
+    module = types.ModuleType("spacy")
+    module.load = lambda name: _stand_in_nlp
+    monkeypatch.setitem(sys.modules, "spacy", module)
+    return module
+
+
+@pytest.fixture
+def embedder():
+    return StandInEmbedder()
+
+
+@pytest.fixture(scope="session")
+def rng():
+    return np.random.default_rng(1234)
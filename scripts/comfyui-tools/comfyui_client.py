@@ -0,0 +1,473 @@
+#!/usr/bin/env python3
+"""
+Reusable ComfyUI client: pooled HTTP session + one multiplexed WebSocket.
+
+Python tooling used to open a new HTTP connection per endpoint and a new
+WebSocket per prompt, busy-looping on recv() without heartbeats. This client
+keeps a single `requests.Session` (keep-alive connection pool) and a single
+`/ws?clientId=...` connection per client id. A background reader thread
+routes events by `prompt_id` to per-prompt handles whose `future` resolves
+with the prompt's `/history` entry (fetched on a small thread pool, so a slow
+lookup never holds up other prompts' events), so many prompts can be awaited
+concurrently without socket churn.
+
+If the WebSocket drops, the reader reconnects with backoff under the same
+client id and resumes every pending prompt by checking `/history`, so prompts
+that finished while disconnected still resolve.
+
+Pass `trace=TraceRecorder(path)` (ws_trace.py) to record the WebSocket
+messages and /history responses the client sees, for offline replay.
+
+Usage:
+    with ComfyUIClient("http://127.0.0.1:8188") as client:
+        handles = [client.queue_prompt(wf) for wf in workflows]
+        results = client.wait_all(handles, timeout=600)
+
+    python scripts/comfyui-tools/comfyui_client.py workflows/text-to-video.json --count 3
+    python scripts/comfyui-tools/comfyui_client.py workflows/text-to-video.json --record run.trace.jsonl.gz
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import requests
+import websocket
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+DEFAULT_COMFYUI_URL = os.environ.get("COMFYUI_URL", "http://127.0.0.1:8188")
+# Terminal WebSocket event types
+_ERROR_EVENTS = {"execution_error", "execution_interrupted"}
+# Events seen for a prompt before queue_prompt() registered its handle
+_MAX_ORPHAN_PROMPTS = 256
+# Recently finished prompt ids whose late events are dropped rather than buffered
+_MAX_FINISHED_PROMPTS = 256
+# Threads fetching /history for finished prompts, off the WebSocket reader
+_HISTORY_WORKERS = 4
+
+
+class ComfyUIError(RuntimeError):
+    """Raised when a prompt is rejected or fails to execute."""
+
+    def __init__(self, message: str, prompt_id: Optional[str] = None, details: Any = None):
+        super().__init__(message)
+        self.prompt_id = prompt_id
+        self.details = details
+
+
+@dataclass
+class PromptResult:
+    prompt_id: str
+    status: str                      # "success" | "error"
+    outputs: Dict[str, Any] = field(default_factory=dict)
+    history: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+    duration_s: float = 0.0
+
+
+class PromptHandle:
+    """Tracks one queued prompt; `future` resolves to a PromptResult."""
+
+    def __init__(self, prompt_id: str, number: Optional[int] = None):
+        self.prompt_id = prompt_id
+        self.number = number
+        self.future: "Future[PromptResult]" = Future()
+        self.current_node: Optional[str] = None
+        self.progress: tuple = (0, 0)
+        self.cached_nodes: List[str] = []
+        self.queued_at = time.time()
+        self._listeners: List[Callable[[str, dict], None]] = []
+
+    def add_listener(self, callback: Callable[[str, dict], None]) -> None:
+        """Call `callback(event_type, data)` for every event of this prompt."""
+        self._listeners.append(callback)
+
+    def done(self) -> bool:
+        return self.future.done()
+
+    def result(self, timeout: Optional[float] = None) -> PromptResult:
+        return self.future.result(timeout)
+
+    def _emit(self, event_type: str, data: dict) -> None:
+        for callback in list(self._listeners):
+            try:
+                callback(event_type, data)
+            except Exception as exc:  # listeners must not kill the reader thread
+                print(f"[WARN] Prompt {self.prompt_id} listener failed: {exc}")
+
+
+class ComfyUIClient:
+    def __init__(
+        self,
+        base_url: str = DEFAULT_COMFYUI_URL,
+        client_id: Optional[str] = None,
+        pool_size: int = 16,
+        timeout: float = 10.0,
+        heartbeat_interval: float = 20.0,
+        max_reconnect_delay: float = 30.0,
+        trace: Optional[Any] = None,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.client_id = client_id or str(uuid.uuid4())
+        self.timeout = timeout
+        self.heartbeat_interval = heartbeat_interval
+        self.max_reconnect_delay = max_reconnect_delay
+        self.trace = trace  # ws_trace.TraceRecorder
+
+        self.session = requests.Session()
+        retry = Retry(total=3, backoff_factor=0.3, status_forcelist=(502, 503, 504), allowed_methods=("GET",))
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self.queue_remaining: Optional[int] = None
+        self.reconnects = 0
+        self._pending: Dict[str, PromptHandle] = {}
+        self._orphans: "OrderedDict[str, List[dict]]" = OrderedDict()
+        self._finished: "OrderedDict[str, None]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._ws: Optional[websocket.WebSocket] = None
+        self._ws_lock = threading.Lock()
+        self._reader: Optional[threading.Thread] = None
+        self._closed = threading.Event()
+        # Threads start on first use
+        self._history_pool = ThreadPoolExecutor(_HISTORY_WORKERS,
+                                                thread_name_prefix=f"comfyui-history-{self.client_id[:8]}")
+
+    # --- HTTP -----------------------------------------------------------------
+
+    @property
+    def ws_url(self) -> str:
+        scheme = "wss" if self.base_url.startswith("https") else "ws"
+        host = self.base_url.split("://", 1)[-1]
+        return f"{scheme}://{host}/ws?clientId={self.client_id}"
+
+    def get_json(self, path: str, timeout: Optional[float] = None) -> Any:
+        response = self.session.get(f"{self.base_url}{path}", timeout=timeout or self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def system_stats(self) -> dict:
+        return self.get_json("/system_stats")
+
+    def object_info(self) -> dict:
+        return self.get_json("/object_info", timeout=max(self.timeout, 30.0))
+
+    def history(self, prompt_id: Optional[str] = None) -> dict:
+        history = self.get_json(f"/history/{prompt_id}" if prompt_id else "/history")
+        if self.trace is not None and prompt_id:
+            self.trace.history(prompt_id, history.get(prompt_id, {}))
+        return history
+
+    def queue(self) -> dict:
+        return self.get_json("/queue")
+
+    def queue_prompt(self, workflow: dict, extra_data: Optional[dict] = None) -> PromptHandle:
+        """POST /prompt and return a handle whose future resolves on completion."""
+        self.connect()
+        payload: Dict[str, Any] = {"prompt": workflow, "client_id": self.client_id}
+        if extra_data:
+            payload["extra_data"] = extra_data
+        response = self.session.post(f"{self.base_url}/prompt", json=payload, timeout=self.timeout)
+        if response.status_code != 200:
+            try:
+                details = response.json()
+            except ValueError:
+                details = response.text
+            raise ComfyUIError(f"Failed to queue prompt: HTTP {response.status_code}", details=details)
+        data = response.json()
+        if self.trace is not None:
+            self.trace.prompt(data)
+        prompt_id = data["prompt_id"]
+        handle = PromptHandle(prompt_id, data.get("number"))
+        if data.get("node_errors"):
+            handle.future.set_exception(ComfyUIError("Prompt has node errors", prompt_id, data["node_errors"]))
+            return handle
+
+        with self._lock:
+            self._pending[prompt_id] = handle
+            early_events = self._orphans.pop(prompt_id, [])
+        for message in early_events:
+            self._dispatch(message)
+        return handle
+
+    def interrupt(self) -> None:
+        self.session.post(f"{self.base_url}/interrupt", timeout=self.timeout)
+
+    # --- Waiting --------------------------------------------------------------
+
+    def wait_all(self, handles: Iterable[PromptHandle], timeout: Optional[float] = None) -> List[PromptResult]:
+        """
+        Wait for every handle. Failed prompts resolve to PromptResult(status="error")
+        rather than raising, so one bad scene does not hide the others.
+        """
+        handles = list(handles)
+        done, not_done = wait([h.future for h in handles], timeout=timeout)
+        results = []
+        for handle in handles:
+            if handle.future in not_done:
+                results.append(PromptResult(handle.prompt_id, "error", error="timeout"))
+                continue
+            try:
+                results.append(handle.future.result())
+            except ComfyUIError as exc:
+                results.append(PromptResult(handle.prompt_id, "error", error=str(exc)))
+        return results
+
+    def run(self, workflow: dict, timeout: Optional[float] = None) -> PromptResult:
+        """Queue one prompt and block until it finishes."""
+        handle = self.queue_prompt(workflow)
+        try:
+            return handle.result(timeout)
+        except FutureTimeoutError:
+            raise ComfyUIError(f"Timed out after {timeout}s waiting for prompt", handle.prompt_id)
+
+    # --- WebSocket ------------------------------------------------------------
+
+    def connect(self) -> None:
+        """Open the shared WebSocket (idempotent) and start the reader thread."""
+        if self._reader is not None and self._reader.is_alive():
+            return
+        self._closed.clear()
+        self._open_ws()
+        self._reader = threading.Thread(target=self._read_loop, name=f"comfyui-ws-{self.client_id[:8]}", daemon=True)
+        self._reader.start()
+
+    def close(self) -> None:
+        self._closed.set()
+        with self._ws_lock:
+            if self._ws is not None:
+                try:
+                    self._ws.close()
+                except Exception:
+                    pass
+                self._ws = None
+        if self._reader is not None and self._reader is not threading.current_thread():
+            self._reader.join(timeout=2)
+        self._history_pool.shutdown(wait=False, cancel_futures=True)
+        self.session.close()
+
+    def __enter__(self) -> "ComfyUIClient":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _open_ws(self) -> None:
+        ws = websocket.create_connection(self.ws_url, timeout=self.heartbeat_interval)
+        with self._ws_lock:
+            self._ws = ws
+
+    def _read_loop(self) -> None:
+        delay = 0.5
+        while not self._closed.is_set():
+            ws = self._ws
+            try:
+                if ws is None:
+                    raise websocket.WebSocketConnectionClosedException("not connected")
+                opcode, payload = ws.recv_data(control_frame=False)
+                delay = 0.5
+            except websocket.WebSocketTimeoutException:
+                # Idle for a heartbeat interval: ping so dead peers surface as errors
+                try:
+                    ws.ping()
+                except Exception:
+                    self._reconnect_after_failure(delay)
+                    delay = min(delay * 2, self.max_reconnect_delay)
+                continue
+            except Exception:
+                if self._closed.is_set():
+                    break
+                self._reconnect_after_failure(delay)
+                delay = min(delay * 2, self.max_reconnect_delay)
+                continue
+
+            if opcode == websocket.ABNF.OPCODE_CLOSE:
+                if self._closed.is_set():
+                    break
+                self._reconnect_after_failure(delay)
+                continue
+            if opcode != websocket.ABNF.OPCODE_TEXT:
+                if self.trace is not None:
+                    self.trace.binary(len(payload))
+                continue  # binary preview frames are not routed
+            try:
+                message = json.loads(payload)
+            except ValueError:
+                continue
+            if self.trace is not None:
+                self.trace.ws(message)
+            self._dispatch(message)
+
+    def _reconnect_after_failure(self, delay: float) -> None:
+        with self._ws_lock:
+            if self._ws is not None:
+                if self.trace is not None:
+                    self.trace.disconnect()
+                try:
+                    self._ws.close()
+                except Exception:
+                    pass
+                self._ws = None
+        if self._closed.wait(delay):
+            return
+        try:
+            self._open_ws()
+        except Exception as exc:
+            print(f"[WARN] ComfyUI WebSocket reconnect failed: {exc}")
+            return
+        self.reconnects += 1
+        self.resume_pending()
+
+    def resume_pending(self) -> int:
+        """Resolve pending prompts that finished while events could not be seen."""
+        with self._lock:
+            pending = list(self._pending.values())
+        resolved = 0
+        for handle in pending:
+            try:
+                history = self.history(handle.prompt_id)
+            except requests.RequestException:
+                continue
+            entry = history.get(handle.prompt_id)
+            if not entry:
+                continue
+            status = entry.get("status", {})
+            if status.get("status_str") == "error":
+                self._fail(handle, "Execution failed (recovered from /history)", entry)
+            elif status.get("completed", True):
+                self._complete(handle, entry)
+            else:
+                continue
+            resolved += 1
+        return resolved
+
+    # --- Event routing --------------------------------------------------------
+
+    def _dispatch(self, message: dict) -> None:
+        event_type = message.get("type")
+        data = message.get("data") or {}
+        if event_type == "status":
+            self.queue_remaining = data.get("status", {}).get("exec_info", {}).get("queue_remaining")
+            return
+
+        prompt_id = data.get("prompt_id")
+        if not prompt_id:
+            return
+        with self._lock:
+            handle = self._pending.get(prompt_id)
+            if handle is None:
+                if prompt_id in self._finished:
+                    return  # e.g. the executing/None that follows an execution_error
+                self._orphans.setdefault(prompt_id, []).append(message)
+                while len(self._orphans) > _MAX_ORPHAN_PROMPTS:
+                    self._orphans.popitem(last=False)
+                return
+
+        if event_type == "executing":
+            handle.current_node = data.get("node")
+        elif event_type == "progress":
+            handle.progress = (data.get("value", 0), data.get("max", 0))
+        elif event_type == "execution_cached":
+            handle.cached_nodes = list(data.get("nodes") or [])
+        handle._emit(event_type, data)
+
+        if event_type in _ERROR_EVENTS:
+            error = data.get("exception_message") or event_type
+            self._fail(handle, error, data)
+        elif event_type == "executing" and data.get("node") is None:
+            # Not on execution_success: ComfyUI sends that from inside the executor,
+            # before task_done() stores the /history entry; executing/None comes after.
+            # The lookup runs off the reader thread so other prompts' events keep flowing.
+            try:
+                self._history_pool.submit(self._finish_from_history, handle)
+            except RuntimeError:  # closed
+                pass
+
+    def _finish_from_history(self, handle: PromptHandle) -> None:
+        try:
+            entry = self.history(handle.prompt_id).get(handle.prompt_id, {})
+        except requests.RequestException as exc:
+            entry = {"status": {"messages": [str(exc)]}}
+        self._complete(handle, entry)
+
+    def _mark_finished(self, prompt_id: str) -> bool:
+        """Move a prompt from pending to finished (call with the lock held); False if it was not pending."""
+        if self._pending.pop(prompt_id, None) is None:
+            return False
+        self._finished[prompt_id] = None
+        while len(self._finished) > _MAX_FINISHED_PROMPTS:
+            self._finished.popitem(last=False)
+        return True
+
+    def _complete(self, handle: PromptHandle, entry: dict) -> None:
+        with self._lock:
+            if not self._mark_finished(handle.prompt_id):
+                return
+        handle.future.set_result(PromptResult(
+            prompt_id=handle.prompt_id,
+            status="success",
+            outputs=entry.get("outputs", {}),
+            history=entry,
+            duration_s=time.time() - handle.queued_at,
+        ))
+
+    def _fail(self, handle: PromptHandle, error: str, details: Any) -> None:
+        with self._lock:
+            if not self._mark_finished(handle.prompt_id):
+                return
+        handle.future.set_exception(ComfyUIError(error, handle.prompt_id, details))
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Queue API-format workflows and wait for them over one WebSocket")
+    parser.add_argument("workflows", nargs="+", help="API-format workflow JSON files")
+    parser.add_argument("--url", default=DEFAULT_COMFYUI_URL, help=f"ComfyUI base URL (default: {DEFAULT_COMFYUI_URL})")
+    parser.add_argument("--count", type=int, default=1, help="Queue each workflow this many times")
+    parser.add_argument("--timeout", type=float, default=600, help="Overall timeout in seconds")
+    parser.add_argument("--record", metavar="TRACE", help="Record /ws and /history traffic to TRACE (ws_trace.py)")
+    args = parser.parse_args(argv)
+
+    workflows = []
+    for path in args.workflows:
+        with open(path, "r", encoding="utf-8") as f:
+            workflows.append((path, json.load(f)))
+
+    trace = None
+    if args.record:
+        from ws_trace import TraceRecorder
+        trace = TraceRecorder(args.record, args.url)
+
+    with ComfyUIClient(args.url, trace=trace) as client:
+        handles = []
+        for path, workflow in workflows:
+            for _ in range(args.count):
+                handle = client.queue_prompt(workflow)
+                print(f"[INFO] Queued {path} as {handle.prompt_id}")
+                handles.append(handle)
+        results = client.wait_all(handles, timeout=args.timeout)
+    if trace is not None:
+        trace.close()
+        print(f"[INFO] Recorded {sum(trace.counts.values())} records to {args.record}")
+
+    failed = 0
+    for result in results:
+        if result.status == "success":
+            print(f"[OK] {result.prompt_id}: {len(result.outputs)} output node(s) in {result.duration_s:.1f}s")
+        else:
+            failed += 1
+            print(f"[FAIL] {result.prompt_id}: {result.error}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
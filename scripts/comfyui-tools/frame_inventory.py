@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+"""
+Incremental frame inventory for the ComfyUI output directory.
+
+`verify_output()` used to glob `gemdirect1_shot_*.png` over the whole output
+directory and stat every match. With hundreds of thousands of frames across
+runs that takes seconds and keeps growing. This tool keeps a persistent
+SQLite index of `<prefix>_<number>_.<ext>` frames, refreshed incrementally:
+
+- a directory whose mtime has not changed since the last scan is skipped
+  entirely (no listing, no stats)
+- otherwise it is listed with os.scandir and every frame is stat'ed, so
+  frames that were still being written get their final size; names that
+  disappeared are dropped
+- each directory's mtime is persisted as the scan cursor, unless it is within
+  RACY_WINDOW_S of the scan: a file created later in the same timestamp tick
+  would not change it, so such a directory is listed again next time
+
+Queries ("frames for prefix X, total bytes, gaps in numbering") are single
+indexed SELECTs and take milliseconds regardless of directory size.
+
+The index lives outside the output directory (default
+~/.cache/gemdirect1/comfyui/frame-index/) so writing it never bumps the
+output directory's mtime.
+
+Usage:
+    python scripts/comfyui-tools/frame_inventory.py --output-dir C:/ComfyUI/.../output --prefix gemdirect1_shot
+    python scripts/comfyui-tools/frame_inventory.py --output-dir ./output --list-prefixes gemdirect1_
+    python scripts/comfyui-tools/frame_inventory.py --benchmark 100000
+
+Exit codes:
+- 0: Query succeeded (frames found for the prefix, when one was given)
+- 1: No frames found for the requested prefix
+- 2: Output directory missing
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from object_info_cache import default_cache_dir  # noqa: E402
+
+# ComfyUI SaveImage names frames "<filename_prefix>_<counter:05>_.png"
+FRAME_PATTERN = re.compile(r"^(?P<prefix>.+?)_(?P<number>\d+)_?\.(?P<ext>png|jpe?g|webp)$", re.IGNORECASE)
+SCHEMA_VERSION = 1
+# Directory mtimes this close to the scan time are not trusted as cursors (coarse timestamps)
+RACY_WINDOW_S = 2.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS frames (
+    name     TEXT PRIMARY KEY,
+    dir      TEXT NOT NULL,
+    prefix   TEXT NOT NULL,
+    number   INTEGER NOT NULL,
+    size     INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS frames_prefix ON frames(prefix, number);
+CREATE INDEX IF NOT EXISTS frames_dir ON frames(dir);
+CREATE TABLE IF NOT EXISTS dirs (
+    dir      TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+@dataclass
+class RefreshStats:
+    dirs_scanned: int = 0
+    dirs_skipped: int = 0
+    added: int = 0
+    updated: int = 0
+    removed: int = 0
+    duration_ms: float = 0.0
+
+
+@dataclass
+class PrefixSummary:
+    prefix: str
+    frame_count: int = 0
+    total_bytes: int = 0
+    first: Optional[int] = None
+    last: Optional[int] = None
+    gaps: List[Tuple[int, int]] = field(default_factory=list)   # inclusive missing ranges
+    frames: List[Tuple[int, str, int]] = field(default_factory=list)  # (number, relative name, size)
+
+    def to_dict(self, include_frames: bool = False) -> dict:
+        data = {
+            "prefix": self.prefix,
+            "frameCount": self.frame_count,
+            "totalBytes": self.total_bytes,
+            "first": self.first,
+            "last": self.last,
+            "gaps": [list(g) for g in self.gaps],
+        }
+        if include_frames:
+            data["frames"] = [{"number": n, "name": name, "size": size} for n, name, size in self.frames]
+        return data
+
+
+def find_gaps(numbers: List[int]) -> List[Tuple[int, int]]:
+    """Inclusive ranges missing between consecutive sorted frame numbers."""
+    gaps = []
+    for previous, current in zip(numbers, numbers[1:]):
+        if current > previous + 1:
+            gaps.append((previous + 1, current - 1))
+    return gaps
+
+
+class FrameInventory:
+    def __init__(self, output_dir: str, index_path: Optional[Path] = None, recursive: bool = True):
+        self.output_dir = os.path.abspath(output_dir)
+        if index_path is None:
+            digest = hashlib.sha1(os.path.normcase(self.output_dir).encode("utf-8")).hexdigest()[:16]
+            index_path = default_cache_dir() / "frame-index" / f"{digest}.sqlite"
+        self.index_path = Path(index_path)
+        self.recursive = recursive
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.index_path))
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        version = self._db.execute("SELECT value FROM meta WHERE key='version'").fetchone()
+        if version is None or int(version[0]) != SCHEMA_VERSION:
+            self._db.executescript("DELETE FROM frames; DELETE FROM dirs;")
+            self._db.execute("INSERT OR REPLACE INTO meta VALUES ('version', ?)", (str(SCHEMA_VERSION),))
+            self._db.commit()
+
+    def close(self) -> None:
+        self._db.close()
+
+    def __enter__(self) -> "FrameInventory":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def refresh(self, full: bool = False) -> RefreshStats:
+        """Bring the index up to date with the directory tree."""
+        start = time.perf_counter()
+        stats = RefreshStats()
+        cursors = dict(self._db.execute("SELECT dir, mtime_ns FROM dirs"))
+        seen_dirs = set()
+        racy_after_ns = time.time_ns() - int(RACY_WINDOW_S * 1e9)
+
+        pending = [""]
+        while pending:
+            rel_dir = pending.pop()
+            abs_dir = os.path.join(self.output_dir, rel_dir) if rel_dir else self.output_dir
+            try:
+                dir_mtime = os.stat(abs_dir).st_mtime_ns
+            except FileNotFoundError:
+                continue
+            seen_dirs.add(rel_dir)
+
+            if not full and cursors.get(rel_dir) == dir_mtime:
+                stats.dirs_skipped += 1
+                if self.recursive:
+                    pending.extend(self._known_subdirs(rel_dir, cursors))
+                continue
+
+            stats.dirs_scanned += 1
+            known = {} if full else {
+                name: (size, mtime_ns) for name, size, mtime_ns in
+                self._db.execute("SELECT name, size, mtime_ns FROM frames WHERE dir = ?", (rel_dir,))
+            }
+            present = set()
+            rows = []
+            with os.scandir(abs_dir) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        if self.recursive and not entry.name.startswith("."):
+                            pending.append(os.path.join(rel_dir, entry.name) if rel_dir else entry.name)
+                        continue
+                    name = os.path.join(rel_dir, entry.name) if rel_dir else entry.name
+                    match = FRAME_PATTERN.match(entry.name)
+                    if match is None:
+                        continue
+                    present.add(name)
+                    st = entry.stat(follow_symlinks=False)
+                    if name in known:
+                        if known[name] == (st.st_size, st.st_mtime_ns):
+                            continue
+                        stats.updated += 1
+                    else:
+                        stats.added += 1
+                    prefix = os.path.join(rel_dir, match["prefix"]) if rel_dir else match["prefix"]
+                    rows.append((name, rel_dir, prefix, int(match["number"]), st.st_size, st.st_mtime_ns))
+
+            removed = [(name,) for name in known.keys() - present]
+            if full:
+                self._db.execute("DELETE FROM frames WHERE dir = ?", (rel_dir,))
+            self._db.executemany("INSERT OR REPLACE INTO frames VALUES (?, ?, ?, ?, ?, ?)", rows)
+            self._db.executemany("DELETE FROM frames WHERE name = ?", removed)
+            cursor = dir_mtime if dir_mtime < racy_after_ns else -1
+            self._db.execute("INSERT OR REPLACE INTO dirs VALUES (?, ?)", (rel_dir, cursor))
+            stats.removed += len(removed)
+
+        for rel_dir in set(cursors) - seen_dirs:
+            cur = self._db.execute("DELETE FROM frames WHERE dir = ?", (rel_dir,))
+            stats.removed += cur.rowcount
+            self._db.execute("DELETE FROM dirs WHERE dir = ?", (rel_dir,))
+        self._db.commit()
+        stats.duration_ms = round((time.perf_counter() - start) * 1000, 2)
+        return stats
+
+    @staticmethod
+    def _known_subdirs(rel_dir: str, cursors: Dict[str, int]) -> List[str]:
+        # An unchanged directory has the same children, so recurse via the cursors
+        depth = rel_dir.count(os.sep) + 1 if rel_dir else 0
+        return [
+            d for d in cursors
+            if d and os.path.dirname(d) == rel_dir and d.count(os.sep) == depth
+        ]
+
+    def query(self, prefix: str, include_frames: bool = True) -> PrefixSummary:
+        """Frames, byte total and numbering gaps for one ComfyUI filename prefix."""
+        summary = PrefixSummary(prefix)
+        rows = self._db.execute(
+            "SELECT number, name, size FROM frames WHERE prefix = ? ORDER BY number", (prefix,)
+        ).fetchall()
+        if not rows:
+            return summary
+        numbers = [row[0] for row in rows]
+        summary.frame_count = len(rows)
+        summary.total_bytes = sum(row[2] for row in rows)
+        summary.first, summary.last = numbers[0], numbers[-1]
+        summary.gaps = find_gaps(numbers)
+        if include_frames:
+            summary.frames = [tuple(row) for row in rows]
+        return summary
+
+    def prefixes(self, starts_with: str = "") -> List[Tuple[str, int, int]]:
+        """(prefix, frame_count, total_bytes) for every prefix starting with `starts_with`."""
+        escaped = starts_with.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        return self._db.execute(
+            "SELECT prefix, COUNT(*), SUM(size) FROM frames WHERE prefix LIKE ? ESCAPE '\\' "
+            "GROUP BY prefix ORDER BY prefix",
+            (escaped + "%",),
+        ).fetchall()
+
+    def frame_count(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM frames").fetchone()[0]
+
+
+def run_benchmark(file_count: int, prefixes: int = 200) -> dict:
+    """Time cold scan, no-change refresh, incremental add and prefix query vs. glob+stat."""
+    workdir = Path(tempfile.mkdtemp(prefix="frame-inventory-bench-"))
+    try:
+        output_dir = workdir / "output"
+        output_dir.mkdir()
+        per_prefix = max(1, file_count // prefixes)
+        for p in range(prefixes):
+            for n in range(1, per_prefix + 1):
+                (output_dir / f"gemdirect1_scene-{p:04d}_{n:05d}_.png").write_bytes(b"\x89PNG")
+        total = prefixes * per_prefix
+        target = "gemdirect1_scene-0042"
+        # As if written by an earlier run, outside the racy window
+        old_ns = time.time_ns() - 60 * 10**9
+        os.utime(output_dir, ns=(old_ns, old_ns))
+
+        start = time.perf_counter()
+        matches = list(output_dir.glob(f"{target}_*.png"))
+        sum(f.stat().st_size for f in matches)
+        glob_ms = (time.perf_counter() - start) * 1000
+
+        with FrameInventory(str(output_dir), workdir / "index.sqlite") as inventory:
+            cold = inventory.refresh()
+            warm = inventory.refresh()
+            for n in range(per_prefix + 1, per_prefix + 101):
+                (output_dir / f"{target}_{n:05d}_.png").write_bytes(b"\x89PNG")
+            incremental = inventory.refresh()
+            start = time.perf_counter()
+            summary = inventory.query(target)
+            query_ms = (time.perf_counter() - start) * 1000
+
+        return {
+            "files": total,
+            "globStatMs": round(glob_ms, 2),
+            "coldScanMs": cold.duration_ms,
+            "noChangeRefreshMs": warm.duration_ms,
+            "incrementalRefreshMs": incremental.duration_ms,
+            "incrementalAdded": incremental.added,
+            "queryMs": round(query_ms, 3),
+            "queryFrames": summary.frame_count,
+        }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Incremental prefix -> frames index over the ComfyUI output directory")
+    parser.add_argument("--output-dir", help="ComfyUI output directory")
+    parser.add_argument("--prefix", help="Report frames, bytes and numbering gaps for this filename prefix")
+    parser.add_argument("--list-prefixes", metavar="START", nargs="?", const="", help="List indexed prefixes (optionally filtered)")
+    parser.add_argument("--index", type=Path, default=None, help="Index file (default: ~/.cache/gemdirect1/comfyui/frame-index/)")
+    parser.add_argument("--full", action="store_true", help="Re-stat every file instead of refreshing incrementally")
+    parser.add_argument("--no-recursive", action="store_true", help="Do not index subdirectories")
+    parser.add_argument("--json", action="store_true", help="Emit machine-readable JSON")
+    parser.add_argument("--benchmark", type=int, metavar="FILES", help="Run a synthetic benchmark with this many files")
+    args = parser.parse_args(argv)
+
+    if args.benchmark:
+        print(json.dumps(run_benchmark(args.benchmark), indent=2))
+        return 0
+
+    if not args.output_dir or not os.path.isdir(args.output_dir):
+        print(f"[ERROR] Output directory not found: {args.output_dir}", file=sys.stderr)
+        return 2
+
+    with FrameInventory(args.output_dir, args.index, recursive=not args.no_recursive) as inventory:
+        stats = inventory.refresh(full=args.full)
+        result: Dict[str, object] = {
+            "outputDir": inventory.output_dir,
+            "indexedFrames": inventory.frame_count(),
+            "refresh": stats.__dict__,
+        }
+        exit_code = 0
+        if args.list_prefixes is not None:
+            result["prefixes"] = [
+                {"prefix": p, "frameCount": c, "totalBytes": b} for p, c, b in inventory.prefixes(args.list_prefixes)
+            ]
+        if args.prefix:
+            summary = inventory.query(args.prefix, include_frames=args.json)
+            result["query"] = summary.to_dict(include_frames=args.json)
+            exit_code = 0 if summary.frame_count else 1
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return exit_code
+
+    print(f"[INFO] {result['indexedFrames']} frames indexed "
+          f"(scanned {stats.dirs_scanned} dir(s), skipped {stats.dirs_skipped}, "
+          f"+{stats.added}/~{stats.updated}/-{stats.removed}) in {stats.duration_ms} ms")
+    for entry in result.get("prefixes", []):
+        print(f"  - {entry['prefix']}: {entry['frameCount']} frames, {entry['totalBytes'] / 1024:.1f} KB")
+    if args.prefix:
+        query = result["query"]
+        if query["frameCount"]:
+            print(f"[OK] {args.prefix}: {query['frameCount']} frames #{query['first']}..#{query['last']}, "
+                  f"{query['totalBytes'] / 1024:.1f} KB")
+            for first, last in query["gaps"]:
+                print(f"[WARN] Missing frames {first}..{last}")
+        else:
+            print(f"[WARN] No frames found for prefix {args.prefix}")
+    return exit_code
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,442 @@
+#!/usr/bin/env python3
+"""
+ComfyUI node schema cache: fetch /object_info once, persist it, and index it.
+
+The raw /object_info payload is several MB on a typical install and every
+probe (debug_api.py, deflicker availability, preflight) used to re-download
+and linearly scan it. This module stores the payload on disk together with
+its ETag and SHA-256, and builds a compact index keyed by node class, input
+type and return type so questions like "which installed nodes produce VIDEO"
+or "is this workflow satisfiable" are answered from memory.
+
+Cache layout (default: ~/.cache/gemdirect1/comfyui, override with
+GEMDIRECT_CACHE_DIR or --cache-dir):
+
+    object_info-<host>.json        raw payload as returned by ComfyUI
+    object_info-<host>.index.json  compact index + ETag/hash/fetch metadata
+
+Usage:
+    python scripts/comfyui-tools/object_info_cache.py --produces VIDEO
+    python scripts/comfyui-tools/object_info_cache.py --has TemporalSmoothing VHS_VideoCombine
+    python scripts/comfyui-tools/object_info_cache.py --check-workflow workflows/video_wan2_2_5B_ti2v.json
+    python scripts/comfyui-tools/object_info_cache.py --refresh --json
+
+Exit codes:
+- 0: Query succeeded (and all requested nodes / workflows are satisfiable)
+- 1: Some requested nodes are missing or a workflow is not satisfiable
+- 2: Schema could not be fetched and no cached copy exists
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+import urllib.error
+import urllib.request
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+DEFAULT_COMFYUI_URL = os.environ.get("COMFYUI_URL", "http://127.0.0.1:8188")
+# Matches the TTL used by getInstalledNodes() in services/comfyUIService.ts
+DEFAULT_TTL_SECONDS = 5 * 60
+INDEX_VERSION = 1
+
+
+def default_cache_dir() -> Path:
+    """Root directory for persisted ComfyUI metadata."""
+    root = os.environ.get("GEMDIRECT_CACHE_DIR")
+    if root:
+        return Path(root) / "comfyui"
+    return Path.home() / ".cache" / "gemdirect1" / "comfyui"
+
+
+def _cache_stem(base_url: str) -> str:
+    # One cache file per server so switching between a local and a remote
+    # ComfyUI does not thrash a single entry.
+    host = re.sub(r"^[a-z]+://", "", base_url.rstrip("/").lower())
+    return "object_info-" + re.sub(r"[^a-z0-9._-]+", "_", host)
+
+
+def _input_type(spec: Any) -> Tuple[str, Optional[List[Any]]]:
+    """Normalize an object_info input spec to (type, combo_options)."""
+    if not isinstance(spec, (list, tuple)) or not spec:
+        return "*", None
+    head = spec[0]
+    if isinstance(head, list):
+        # Legacy combo: [["euler", "dpmpp_2m", ...], {...}]
+        return "COMBO", head
+    if head == "COMBO" and len(spec) > 1 and isinstance(spec[1], dict):
+        return "COMBO", spec[1].get("options")
+    return str(head), None
+
+
+@dataclass(frozen=True)
+class InputSpec:
+    name: str
+    type: str
+    required: bool
+    options: Optional[Tuple[Any, ...]] = None
+
+
+@dataclass
+class NodeSchema:
+    name: str
+    category: str = ""
+    inputs: Dict[str, InputSpec] = field(default_factory=dict)
+    outputs: Tuple[str, ...] = ()
+    output_names: Tuple[str, ...] = ()
+    output_node: bool = False
+
+    @property
+    def required_inputs(self) -> List[InputSpec]:
+        return [spec for spec in self.inputs.values() if spec.required]
+
+    def to_dict(self) -> dict:
+        return {
+            "category": self.category,
+            "inputs": {
+                name: [spec.type, spec.required] + ([list(spec.options)] if spec.options is not None else [])
+                for name, spec in self.inputs.items()
+            },
+            "outputs": list(self.outputs),
+            "output_names": list(self.output_names),
+            "output_node": self.output_node,
+        }
+
+    @classmethod
+    def from_dict(cls, name: str, data: dict) -> "NodeSchema":
+        inputs = {}
+        for input_name, packed in data.get("inputs", {}).items():
+            options = tuple(packed[2]) if len(packed) > 2 and packed[2] is not None else None
+            inputs[input_name] = InputSpec(input_name, packed[0], bool(packed[1]), options)
+        return cls(
+            name=name,
+            category=data.get("category", ""),
+            inputs=inputs,
+            outputs=tuple(data.get("outputs", ())),
+            output_names=tuple(data.get("output_names", ())),
+            output_node=bool(data.get("output_node", False)),
+        )
+
+    @classmethod
+    def from_object_info(cls, name: str, info: dict) -> "NodeSchema":
+        inputs: Dict[str, InputSpec] = {}
+        sections = info.get("input", {}) or {}
+        for section, required in (("required", True), ("optional", False)):
+            for input_name, spec in (sections.get(section) or {}).items():
+                input_type, options = _input_type(spec)
+                inputs[input_name] = InputSpec(
+                    input_name, input_type, required, tuple(options) if options is not None else None
+                )
+        outputs = tuple(str(t) if not isinstance(t, list) else "COMBO" for t in info.get("output", []) or [])
+        return cls(
+            name=name,
+            category=info.get("category", "") or "",
+            inputs=inputs,
+            outputs=outputs,
+            output_names=tuple(info.get("output_name", []) or outputs),
+            output_node=bool(info.get("output_node", False)),
+        )
+
+
+@dataclass
+class SatisfiabilityResult:
+    satisfiable: bool
+    missing_nodes: List[str] = field(default_factory=list)
+    missing_inputs: List[str] = field(default_factory=list)
+
+    def to_dict(self) -> dict:
+        return {
+            "satisfiable": self.satisfiable,
+            "missing_nodes": self.missing_nodes,
+            "missing_inputs": self.missing_inputs,
+        }
+
+
+class NodeSchemaIndex:
+    """In-memory index over installed node classes."""
+
+    def __init__(self, nodes: Dict[str, NodeSchema]):
+        self.nodes = nodes
+        self.by_input_type: Dict[str, Set[str]] = {}
+        self.by_return_type: Dict[str, Set[str]] = {}
+        for name, node in nodes.items():
+            for spec in node.inputs.values():
+                self.by_input_type.setdefault(spec.type, set()).add(name)
+            for output_type in node.outputs:
+                self.by_return_type.setdefault(output_type, set()).add(name)
+
+    @classmethod
+    def from_object_info(cls, object_info: dict) -> "NodeSchemaIndex":
+        return cls({
+            name: NodeSchema.from_object_info(name, info)
+            for name, info in object_info.items()
+            if isinstance(info, dict)
+        })
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "NodeSchemaIndex":
+        return cls({name: NodeSchema.from_dict(name, node) for name, node in data.items()})
+
+    def to_dict(self) -> dict:
+        return {name: node.to_dict() for name, node in self.nodes.items()}
+
+    def __contains__(self, class_type: str) -> bool:
+        return class_type in self.nodes
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def get(self, class_type: str) -> Optional[NodeSchema]:
+        return self.nodes.get(class_type)
+
+    def producers(self, output_type: str) -> List[str]:
+        """Node classes with at least one output of the given type."""
+        return sorted(self.by_return_type.get(output_type, ()))
+
+    def consumers(self, input_type: str) -> List[str]:
+        """Node classes accepting an input of the given type."""
+        return sorted(self.by_input_type.get(input_type, ()))
+
+    def missing(self, class_types: Iterable[str]) -> List[str]:
+        return sorted({c for c in class_types if c not in self.nodes})
+
+    def search(self, pattern: str) -> List[str]:
+        """Case-insensitive substring match on class names."""
+        needle = pattern.lower()
+        return sorted(name for name in self.nodes if needle in name.lower())
+
+    def check_workflow(self, workflow: dict) -> SatisfiabilityResult:
+        """
+        Check an API-format workflow ({node_id: {class_type, inputs}}) against
+        the installed nodes: every class must exist and every required input
+        must be provided either as a literal or a link.
+        """
+        missing_nodes: Set[str] = set()
+        missing_inputs: List[str] = []
+        for node_id, node in workflow.items():
+            if not isinstance(node, dict) or "class_type" not in node:
+                continue
+            schema = self.nodes.get(node["class_type"])
+            if schema is None:
+                missing_nodes.add(node["class_type"])
+                continue
+            provided = node.get("inputs", {}) or {}
+            for spec in schema.required_inputs:
+                if spec.name not in provided:
+                    missing_inputs.append(f"{node_id}:{schema.name}.{spec.name}")
+        return SatisfiabilityResult(
+            satisfiable=not missing_nodes and not missing_inputs,
+            missing_nodes=sorted(missing_nodes),
+            missing_inputs=missing_inputs,
+        )
+
+
+class ObjectInfoCache:
+    """
+    Disk-backed cache of a ComfyUI server's /object_info.
+
+    `index()` returns the persisted index when it is younger than `ttl`;
+    otherwise it revalidates with If-None-Match (when the server sent an
+    ETag) and only re-parses the payload when its SHA-256 changed.
+    """
+
+    def __init__(
+        self,
+        base_url: str = DEFAULT_COMFYUI_URL,
+        cache_dir: Optional[Path] = None,
+        ttl: float = DEFAULT_TTL_SECONDS,
+        timeout: float = 10.0,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.cache_dir = Path(cache_dir) if cache_dir else default_cache_dir()
+        self.ttl = ttl
+        self.timeout = timeout
+        stem = _cache_stem(self.base_url)
+        self.payload_path = self.cache_dir / f"{stem}.json"
+        self.index_path = self.cache_dir / f"{stem}.index.json"
+        self._index: Optional[NodeSchemaIndex] = None
+        self._meta: Dict[str, Any] = {}
+
+    @property
+    def meta(self) -> Dict[str, Any]:
+        """ETag, SHA-256, fetch time and source of the loaded index."""
+        return dict(self._meta)
+
+    def index(self, refresh: bool = False) -> NodeSchemaIndex:
+        if self._index is not None and not refresh and not self._expired():
+            return self._index
+
+        if not refresh and self._index is None:
+            self._load_persisted()
+            if self._index is not None and not self._expired():
+                return self._index
+
+        try:
+            self._revalidate()
+        except (urllib.error.URLError, OSError, ValueError) as exc:
+            if self._index is None:
+                self._load_persisted()
+            if self._index is None:
+                raise RuntimeError(f"Failed to fetch {self.base_url}/object_info and no cached copy: {exc}") from exc
+            print(f"[WARN] Using stale node schema cache ({exc})", file=sys.stderr)
+        return self._index
+
+    def invalidate(self) -> None:
+        """Drop the persisted cache (call after installing custom nodes)."""
+        self._index = None
+        self._meta = {}
+        for path in (self.payload_path, self.index_path):
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+
+    def _expired(self) -> bool:
+        fetched_at = self._meta.get("fetched_at", 0)
+        return (time.time() - fetched_at) >= self.ttl
+
+    def _load_persisted(self) -> None:
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("version") != INDEX_VERSION:
+            return
+        self._meta = data.get("meta", {})
+        self._index = NodeSchemaIndex.from_dict(data.get("nodes", {}))
+
+    def _revalidate(self) -> None:
+        if self._index is None:
+            self._load_persisted()
+        request = urllib.request.Request(
+            f"{self.base_url}/object_info", headers={"Accept": "application/json"}
+        )
+        etag = self._meta.get("etag")
+        if etag and self.payload_path.exists():
+            request.add_header("If-None-Match", etag)
+
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                body = response.read()
+                etag = response.headers.get("ETag")
+        except urllib.error.HTTPError as exc:
+            if exc.code != 304:
+                raise
+            self._meta["fetched_at"] = time.time()
+            self._write_index()
+            return
+
+        digest = hashlib.sha256(body).hexdigest()
+        if self._index is None or digest != self._meta.get("sha256"):
+            self._index = NodeSchemaIndex.from_object_info(json.loads(body))
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            _atomic_write_bytes(self.payload_path, body)
+
+        self._meta = {
+            "url": f"{self.base_url}/object_info",
+            "etag": etag,
+            "sha256": digest,
+            "bytes": len(body),
+            "fetched_at": time.time(),
+        }
+        self._write_index()
+
+    def _write_index(self) -> None:
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        payload = {"version": INDEX_VERSION, "meta": self._meta, "nodes": self._index.to_dict()}
+        _atomic_write_bytes(self.index_path, json.dumps(payload, separators=(",", ":")).encode("utf-8"))
+
+
+def _atomic_write_bytes(path: Path, data: bytes) -> None:
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def load_index(
+    base_url: str = DEFAULT_COMFYUI_URL,
+    cache_dir: Optional[Path] = None,
+    refresh: bool = False,
+    object_info_path: Optional[Path] = None,
+) -> NodeSchemaIndex:
+    """
+    Convenience loader. `object_info_path` builds the index from a saved
+    /object_info dump instead of contacting a server (offline preflight).
+    """
+    if object_info_path is not None:
+        with open(object_info_path, "r", encoding="utf-8") as f:
+            return NodeSchemaIndex.from_object_info(json.load(f))
+    return ObjectInfoCache(base_url, cache_dir).index(refresh=refresh)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Query a cached, indexed ComfyUI node schema (/object_info)")
+    parser.add_argument("--url", default=DEFAULT_COMFYUI_URL, help=f"ComfyUI base URL (default: {DEFAULT_COMFYUI_URL})")
+    parser.add_argument("--cache-dir", type=Path, default=None, help="Cache directory (default: ~/.cache/gemdirect1/comfyui)")
+    parser.add_argument("--object-info", type=Path, default=None, help="Use a saved /object_info JSON dump instead of the server")
+    parser.add_argument("--refresh", action="store_true", help="Revalidate against the server even if the cache is fresh")
+    parser.add_argument("--produces", metavar="TYPE", help="List installed nodes with an output of TYPE (e.g. VIDEO, IMAGE)")
+    parser.add_argument("--consumes", metavar="TYPE", help="List installed nodes with an input of TYPE")
+    parser.add_argument("--search", metavar="TEXT", help="List installed nodes whose class name contains TEXT")
+    parser.add_argument("--has", nargs="+", metavar="CLASS", help="Check that the given node classes are installed")
+    parser.add_argument("--check-workflow", nargs="+", type=Path, metavar="FILE", help="Check API-format workflow JSON files")
+    parser.add_argument("--json", action="store_true", help="Emit machine-readable JSON")
+    args = parser.parse_args(argv)
+
+    try:
+        index = load_index(args.url, args.cache_dir, args.refresh, args.object_info)
+    except (RuntimeError, OSError, ValueError) as exc:
+        print(f"[ERROR] {exc}", file=sys.stderr)
+        return 2
+
+    output: Dict[str, Any] = {"node_count": len(index)}
+    ok = True
+    if args.produces:
+        output["produces"] = {args.produces: index.producers(args.produces)}
+    if args.consumes:
+        output["consumes"] = {args.consumes: index.consumers(args.consumes)}
+    if args.search:
+        output["search"] = {args.search: index.search(args.search)}
+    if args.has:
+        missing = index.missing(args.has)
+        output["missing"] = missing
+        ok = ok and not missing
+    if args.check_workflow:
+        output["workflows"] = {}
+        for path in args.check_workflow:
+            with open(path, "r", encoding="utf-8") as f:
+                result = index.check_workflow(json.load(f))
+            output["workflows"][str(path)] = result.to_dict()
+            ok = ok and result.satisfiable
+
+    if args.json:
+        print(json.dumps(output, indent=2))
+        return 0 if ok else 1
+
+    print(f"[INFO] {len(index)} installed node classes")
+    for key in ("produces", "consumes", "search"):
+        for query, names in output.get(key, {}).items():
+            print(f"[INFO] {key} {query}: {len(names)}")
+            for name in names:
+                print(f"  - {name}")
+    if args.has:
+        for name in args.has:
+            print(f"[{'MISSING' if name in output['missing'] else 'OK'}] {name}")
+    for path, result in output.get("workflows", {}).items():
+        if result["satisfiable"]:
+            print(f"[OK] {path}: satisfiable")
+        else:
+            print(f"[FAIL] {path}: missing nodes={result['missing_nodes']} missing inputs={result['missing_inputs']}")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
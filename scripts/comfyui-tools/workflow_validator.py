@@ -0,0 +1,506 @@
+#!/usr/bin/env python3
+"""
+Static ComfyUI workflow graph validator.
+
+Checks workflow JSON without queueing anything on a ComfyUI server:
+- dangling links (references to node ids that do not exist)
+- link type compatibility against the cached node schema (object_info_cache.py)
+- unknown node classes and missing required inputs (API format)
+- cycles, nodes that cannot reach any output node, workflows with no output
+- topological execution order
+
+Sources: `workflows/*.json` (API and UI/litegraph formats) and the
+`workflowProfiles[*].workflowJson` strings inside `localGenSettings.json`.
+Results are cached by content hash (plus the schema hash), and a directory of
+uncached workflows is validated in parallel worker processes.
+
+Usage:
+    python scripts/comfyui-tools/workflow_validator.py
+    python scripts/comfyui-tools/workflow_validator.py workflows/video_wan2_2_5B_ti2v.json --json
+    python scripts/comfyui-tools/workflow_validator.py --settings localGenSettings.json --object-info object_info.json
+
+Exit codes:
+- 0: No errors (warnings allowed)
+- 1: At least one workflow has errors
+- 2: Setup failed (no inputs found, unreadable settings, ...)
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import heapq
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from object_info_cache import (  # noqa: E402
+    DEFAULT_COMFYUI_URL,
+    NodeSchemaIndex,
+    ObjectInfoCache,
+    default_cache_dir,
+)
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+VALIDATOR_VERSION = 1
+# Below this many uncached workflows, process start-up costs more than it saves
+PARALLEL_THRESHOLD = 8
+
+# Litegraph-only nodes that never reach the ComfyUI executor
+VIRTUAL_NODES = {"Note", "MarkdownNote", "Reroute", "PrimitiveNode"}
+# Used when no schema is available to say which classes terminate a graph
+KNOWN_OUTPUT_NODES = {
+    "SaveImage", "PreviewImage", "SaveVideo", "SaveAnimatedWEBP", "SaveAnimatedPNG",
+    "VHS_VideoCombine", "WriteDoneMarker", "SaveLatent", "PreviewAny",
+}
+# Litegraph node modes: 2 = muted ("never"), 4 = bypassed
+INACTIVE_MODES = {2, 4}
+
+
+@dataclass
+class Link:
+    src: str
+    src_slot: int
+    dst: str
+    input_name: str
+    declared_type: Optional[str] = None
+
+
+@dataclass
+class WorkflowGraph:
+    format: str
+    nodes: Dict[str, str]                      # node id -> class_type
+    inputs: Dict[str, dict] = field(default_factory=dict)  # API-format raw inputs
+    links: List[Link] = field(default_factory=list)
+    skipped: int = 0
+
+
+@dataclass
+class WorkflowReport:
+    source: str
+    sha256: str
+    format: str = "unknown"
+    node_count: int = 0
+    errors: List[str] = field(default_factory=list)
+    warnings: List[str] = field(default_factory=list)
+    execution_order: List[str] = field(default_factory=list)
+    cached: bool = False
+    duration_ms: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data["ok"] = self.ok
+        return data
+
+
+def _is_link(value) -> bool:
+    return (
+        isinstance(value, list)
+        and len(value) == 2
+        and isinstance(value[0], (str, int))
+        and not isinstance(value[0], bool)
+        and isinstance(value[1], int)
+    )
+
+
+def parse_workflow(workflow: dict) -> WorkflowGraph:
+    """Normalize API, litegraph (UI) and hybrid workflow JSON into one graph."""
+    nodes_field = workflow.get("nodes")
+
+    if isinstance(nodes_field, list):
+        # Litegraph export: node.inputs[i].link -> links[i] = [id, src, src_slot, dst, dst_slot, type]
+        nodes: Dict[str, str] = {}
+        inactive: Dict[str, int] = {}
+        slot_names: Dict[Tuple[str, int], str] = {}
+        for node in nodes_field:
+            node_id = str(node.get("id"))
+            if node.get("type") in VIRTUAL_NODES or node.get("mode") in INACTIVE_MODES:
+                inactive[node_id] = node.get("mode", 0)
+                continue
+            nodes[node_id] = node.get("type", "")
+            for slot, spec in enumerate(node.get("inputs") or []):
+                slot_names[(node_id, slot)] = spec.get("name", str(slot))
+
+        raw_links = [(list(raw) + [None] * 6)[:6] for raw in workflow.get("links") or []]
+        # A bypassed node forwards its first input of the same type to each output
+        bypass_inputs: Dict[Tuple[str, Optional[str]], Tuple[str, int]] = {}
+        for _, src, src_slot, dst, _, link_type in raw_links:
+            if inactive.get(str(dst)) == 4:
+                bypass_inputs.setdefault((str(dst), link_type), (str(src), int(src_slot)))
+
+        links = []
+        for _, src, src_slot, dst, dst_slot, link_type in raw_links:
+            src, dst, src_slot = str(src), str(dst), int(src_slot)
+            if dst not in nodes:
+                continue
+            seen = set()
+            while inactive.get(src) == 4 and src not in seen:
+                seen.add(src)
+                src, src_slot = bypass_inputs.get((src, link_type), (None, 0))
+            if src is None or src in inactive:
+                continue
+            links.append(Link(src, src_slot, dst, slot_names.get((dst, dst_slot), str(dst_slot)), link_type))
+        return WorkflowGraph("ui", nodes, links=links, skipped=len(inactive))
+
+    if isinstance(nodes_field, dict):
+        # Hybrid export: API-style node map under "nodes" (links array is redundant)
+        workflow = nodes_field
+
+    nodes = {}
+    inputs = {}
+    links = []
+    for node_id, node in workflow.items():
+        if not isinstance(node, dict) or "class_type" not in node:
+            continue
+        node_id = str(node_id)
+        nodes[node_id] = node["class_type"]
+        inputs[node_id] = node.get("inputs", {}) or {}
+        for input_name, value in inputs[node_id].items():
+            if _is_link(value):
+                links.append(Link(str(value[0]), value[1], node_id, input_name))
+    return WorkflowGraph("api" if nodes_field is None else "hybrid", nodes, inputs, links)
+
+
+def _types_compatible(output_type: str, input_type: str) -> bool:
+    if "*" in (output_type, input_type) or output_type == input_type:
+        return True
+    # ComfyUI accepts comma-separated unions such as "IMAGE,MASK"
+    return bool(set(output_type.split(",")) & set(input_type.split(",")))
+
+
+def _is_output_node(class_type: str, schema: Optional[NodeSchemaIndex]) -> bool:
+    if schema is not None and class_type in schema:
+        return schema.get(class_type).output_node
+    return class_type in KNOWN_OUTPUT_NODES or class_type.startswith(("Save", "Preview"))
+
+
+def topological_order(nodes: Iterable[str], links: Iterable[Link]) -> Tuple[List[str], List[str]]:
+    """Kahn's algorithm; returns (order, nodes_left_in_cycles). Ties break by node id."""
+    node_set = set(nodes)
+    indegree = {node_id: 0 for node_id in node_set}
+    children: Dict[str, List[str]] = {node_id: [] for node_id in node_set}
+    for link in links:
+        if link.src in node_set and link.dst in node_set:
+            children[link.src].append(link.dst)
+            indegree[link.dst] += 1
+
+    def sort_key(node_id: str):
+        return (0, int(node_id), node_id) if node_id.isdigit() else (1, 0, node_id)
+
+    ready = [(sort_key(n), n) for n, degree in indegree.items() if degree == 0]
+    heapq.heapify(ready)
+    order = []
+    while ready:
+        _, node_id = heapq.heappop(ready)
+        order.append(node_id)
+        for child in children[node_id]:
+            indegree[child] -= 1
+            if indegree[child] == 0:
+                heapq.heappush(ready, (sort_key(child), child))
+    cyclic = sorted((n for n, degree in indegree.items() if degree > 0), key=sort_key)
+    return order, cyclic
+
+
+def validate_workflow(
+    workflow: dict,
+    schema: Optional[NodeSchemaIndex] = None,
+    source: str = "<memory>",
+    sha256: str = "",
+) -> WorkflowReport:
+    """Validate one parsed workflow dict. `schema` enables class/type checks."""
+    start = time.perf_counter()
+    graph = parse_workflow(workflow)
+    report = WorkflowReport(source=source, sha256=sha256, format=graph.format, node_count=len(graph.nodes))
+    if graph.skipped:
+        report.warnings.append(f"{graph.skipped} note/muted/bypassed node(s) excluded from analysis")
+    if not graph.nodes:
+        report.errors.append("No executable nodes found")
+        return report
+
+    for link in graph.links:
+        if link.src not in graph.nodes:
+            report.errors.append(f"Node {link.dst}: input '{link.input_name}' references non-existent node {link.src}")
+
+    if schema is not None:
+        for node_id, class_type in graph.nodes.items():
+            node_schema = schema.get(class_type)
+            if node_schema is None:
+                report.errors.append(f"Node {node_id}: class '{class_type}' is not installed")
+                continue
+            if graph.format != "ui":
+                provided = graph.inputs.get(node_id, {})
+                for spec in node_schema.required_inputs:
+                    if spec.name not in provided:
+                        report.errors.append(f"Node {node_id} ({class_type}): missing required input '{spec.name}'")
+
+        for link in graph.links:
+            src_schema = schema.get(graph.nodes.get(link.src, ""))
+            dst_schema = schema.get(graph.nodes[link.dst])
+            if src_schema is None or dst_schema is None:
+                continue
+            if not 0 <= link.src_slot < len(src_schema.outputs):
+                report.errors.append(
+                    f"Node {link.dst}: input '{link.input_name}' uses output slot {link.src_slot} "
+                    f"of {src_schema.name}, which has {len(src_schema.outputs)} output(s)"
+                )
+                continue
+            output_type = src_schema.outputs[link.src_slot]
+            input_spec = dst_schema.inputs.get(link.input_name)
+            if input_spec is None:
+                report.warnings.append(f"Node {link.dst} ({dst_schema.name}): unknown input '{link.input_name}'")
+            elif not _types_compatible(output_type, input_spec.type):
+                report.errors.append(
+                    f"Node {link.dst} ({dst_schema.name}): input '{link.input_name}' expects {input_spec.type}, "
+                    f"got {output_type} from node {link.src} ({src_schema.name})"
+                )
+
+    order, cyclic = topological_order(graph.nodes, graph.links)
+    if cyclic:
+        report.errors.append(f"Cycle detected among nodes: {', '.join(cyclic)}")
+    report.execution_order = order
+
+    outputs = [n for n, class_type in graph.nodes.items() if _is_output_node(class_type, schema)]
+    if not outputs:
+        report.errors.append("Workflow has no output node; nothing would execute")
+    else:
+        parents: Dict[str, List[str]] = {}
+        for link in graph.links:
+            parents.setdefault(link.dst, []).append(link.src)
+        reachable = set()
+        stack = list(outputs)
+        while stack:
+            node_id = stack.pop()
+            if node_id in reachable:
+                continue
+            reachable.add(node_id)
+            stack.extend(parents.get(node_id, ()))
+        dead = [n for n in order if n not in reachable]
+        if dead:
+            report.warnings.append(f"Nodes not connected to any output (never executed): {', '.join(dead)}")
+
+    report.duration_ms = round((time.perf_counter() - start) * 1000, 3)
+    return report
+
+
+def collect_sources(paths: List[Path], settings_path: Optional[Path]) -> List[Tuple[str, bytes]]:
+    """Expand files/directories and settings profiles into (label, raw JSON bytes)."""
+    sources: List[Tuple[str, bytes]] = []
+    for path in paths:
+        files = sorted(path.glob("*.json")) if path.is_dir() else [path]
+        for file in files:
+            sources.append((str(file), file.read_bytes()))
+    if settings_path is not None:
+        with open(settings_path, "r", encoding="utf-8") as f:
+            settings = json.load(f)
+        for profile_id, profile in sorted((settings.get("workflowProfiles") or {}).items()):
+            workflow_json = profile.get("workflowJson") if isinstance(profile, dict) else None
+            if workflow_json:
+                sources.append((f"{settings_path}#{profile_id}", workflow_json.encode("utf-8")))
+    return sources
+
+
+class ValidationCache:
+    """Report cache keyed by sha256(workflow) + schema hash + validator version."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.entries: Dict[str, dict] = {}
+        self.dirty = False
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == VALIDATOR_VERSION:
+                self.entries = data.get("entries", {})
+        except (OSError, ValueError):
+            pass
+
+    @staticmethod
+    def key(sha256: str, schema_hash: str) -> str:
+        return f"{sha256}:{schema_hash}"
+
+    def get(self, key: str) -> Optional[dict]:
+        return self.entries.get(key)
+
+    def put(self, key: str, report: dict) -> None:
+        self.entries[key] = report
+        self.dirty = True
+
+    def save(self) -> None:
+        if not self.dirty:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": VALIDATOR_VERSION, "entries": self.entries}, f, separators=(",", ":"))
+        os.replace(tmp_path, self.path)
+
+
+# Worker-process state for parallel validation
+_worker_schema: Optional[NodeSchemaIndex] = None
+
+
+def _init_worker(schema_dict: Optional[dict]) -> None:
+    global _worker_schema
+    _worker_schema = NodeSchemaIndex.from_dict(schema_dict) if schema_dict is not None else None
+
+
+def _validate_source(label: str, raw: bytes, sha256: str, schema: Optional[NodeSchemaIndex]) -> dict:
+    try:
+        workflow = json.loads(raw)
+    except ValueError as exc:
+        report = WorkflowReport(source=label, sha256=sha256, errors=[f"Invalid JSON: {exc}"])
+    else:
+        if not isinstance(workflow, dict):
+            report = WorkflowReport(source=label, sha256=sha256, errors=["Workflow JSON is not an object"])
+        else:
+            report = validate_workflow(workflow, schema, label, sha256)
+    return report.to_dict()
+
+
+def _validate_in_worker(args: Tuple[str, bytes, str]) -> dict:
+    return _validate_source(*args, _worker_schema)
+
+
+def validate_sources(
+    sources: List[Tuple[str, bytes]],
+    schema: Optional[NodeSchemaIndex] = None,
+    schema_hash: str = "none",
+    cache: Optional[ValidationCache] = None,
+    jobs: Optional[int] = None,
+) -> List[WorkflowReport]:
+    """Validate many workflows, reusing cached reports and fanning out misses."""
+    results: Dict[int, dict] = {}
+    pending: List[Tuple[int, str, bytes, str]] = []
+    for position, (label, raw) in enumerate(sources):
+        sha256 = hashlib.sha256(raw).hexdigest()
+        hit = cache.get(ValidationCache.key(sha256, schema_hash)) if cache else None
+        if hit is not None:
+            results[position] = dict(hit, source=label, cached=True)
+        else:
+            pending.append((position, label, raw, sha256))
+
+    workers = jobs if jobs is not None else (os.cpu_count() or 1)
+    if len(pending) >= PARALLEL_THRESHOLD and workers > 1:
+        schema_dict = schema.to_dict() if schema is not None else None
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(schema_dict,)) as pool:
+            chunksize = max(1, len(pending) // (workers * 4))
+            reports = pool.map(_validate_in_worker, [(l, r, s) for _, l, r, s in pending], chunksize=chunksize)
+            for (position, *_), report in zip(pending, reports):
+                results[position] = report
+    else:
+        for position, label, raw, sha256 in pending:
+            results[position] = _validate_source(label, raw, sha256, schema)
+
+    if cache is not None:
+        for position, *_ in pending:
+            cache.put(ValidationCache.key(results[position]["sha256"], schema_hash), results[position])
+
+    reports = []
+    for position in range(len(sources)):
+        data = dict(results[position])
+        data.pop("ok", None)
+        reports.append(WorkflowReport(**data))
+    return reports
+
+
+def load_schema(
+    url: str,
+    object_info_path: Optional[Path],
+    cache_dir: Optional[Path],
+    refresh: bool,
+) -> Tuple[Optional[NodeSchemaIndex], str]:
+    """
+    Resolve the node schema without touching the network unless `refresh`:
+    a saved dump, then the persisted object_info cache (even if past its TTL).
+    With neither, the schema is unavailable and type checks are skipped.
+    """
+    if object_info_path is not None:
+        raw = object_info_path.read_bytes()
+        return NodeSchemaIndex.from_object_info(json.loads(raw)), hashlib.sha256(raw).hexdigest()
+    cache = ObjectInfoCache(url, cache_dir, ttl=0 if refresh else float("inf"))
+    if not refresh and not cache.index_path.exists():
+        return None, "none"
+    try:
+        index = cache.index(refresh=refresh)
+    except RuntimeError:
+        return None, "none"
+    return index, cache.meta.get("sha256", "unknown")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Statically validate ComfyUI workflow graphs")
+    parser.add_argument("paths", nargs="*", type=Path, help="Workflow files or directories (default: workflows/)")
+    parser.add_argument("--settings", type=Path, default=None,
+                        help="localGenSettings.json whose workflowProfiles to validate (default: repo copy when no paths given)")
+    parser.add_argument("--url", default=DEFAULT_COMFYUI_URL, help="ComfyUI URL whose cached schema to use")
+    parser.add_argument("--object-info", type=Path, default=None, help="Saved /object_info JSON dump to use as schema")
+    parser.add_argument("--refresh-schema", action="store_true", help="Fetch the node schema from the server (default: cache only)")
+    parser.add_argument("--cache-dir", type=Path, default=None, help="Cache directory (default: ~/.cache/gemdirect1/comfyui)")
+    parser.add_argument("--no-cache", action="store_true", help="Ignore and do not update cached validation results")
+    parser.add_argument("--jobs", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--json", action="store_true", help="Emit machine-readable JSON")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    paths = args.paths
+    settings_path = args.settings
+    if not paths and settings_path is None:
+        paths = [REPO_ROOT / "workflows"]
+        settings_path = REPO_ROOT / "localGenSettings.json"
+
+    try:
+        sources = collect_sources(paths, settings_path)
+    except (OSError, ValueError) as exc:
+        print(f"[ERROR] Failed to read workflows: {exc}", file=sys.stderr)
+        return 2
+    if not sources:
+        print("[ERROR] No workflows found", file=sys.stderr)
+        return 2
+
+    schema, schema_hash = load_schema(args.url, args.object_info, args.cache_dir, args.refresh_schema)
+    cache = None if args.no_cache else ValidationCache((args.cache_dir or default_cache_dir()) / "workflow-validation.json")
+    reports = validate_sources(sources, schema, schema_hash, cache, args.jobs)
+    if cache is not None:
+        cache.save()
+
+    elapsed_ms = round((time.perf_counter() - start) * 1000, 1)
+    failed = [r for r in reports if not r.ok]
+
+    if args.json:
+        print(json.dumps({
+            "schemaAvailable": schema is not None,
+            "schemaHash": schema_hash,
+            "durationMs": elapsed_ms,
+            "total": len(reports),
+            "failed": len(failed),
+            "cached": sum(1 for r in reports if r.cached),
+            "workflows": [r.to_dict() for r in reports],
+        }, indent=2))
+        return 1 if failed else 0
+
+    if schema is None:
+        print("[WARN] No cached node schema; rerun with --refresh-schema while ComfyUI is up for type checks")
+    for report in reports:
+        status = "OK" if report.ok else "FAIL"
+        suffix = " (cached)" if report.cached else ""
+        print(f"[{status}] {report.source}: {report.node_count} nodes, {report.format} format{suffix}")
+        for error in report.errors:
+            print(f"   - {error}")
+        for warning in report.warnings:
+            print(f"   ~ {warning}")
+    print(f"\n[RESULT] {len(reports) - len(failed)}/{len(reports)} workflows valid in {elapsed_ms} ms")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,690 @@
+#!/usr/bin/env python3
+"""
+Record and replay ComfyUI `/ws` and `/history` traffic.
+
+`comfyui_client.py` and the TypeScript event manager were only ever exercised
+against a live ComfyUI, so their handling of event storms (thousands of
+`progress` messages, prompts queued back to back, dropped sockets) could be
+neither reproduced nor benchmarked. A `TraceRecorder` attached to a
+`ComfyUIClient` now captures what the client saw during a real run:
+
+- every WebSocket text message
+- the length of every binary preview frame
+- the `POST /prompt` and `GET /history/<id>` responses
+- each disconnect
+
+Each record is timestamped relative to the start of the recording.
+
+A `ReplayServer` plays a trace back to any client: the `/ws?clientId=...`
+endpoint pushes the recorded messages at their recorded offsets, divided by
+`speed` (0 sends as fast as the client reads). `POST /prompt` returns the
+recorded prompt ids in order, and `GET /history/<id>` returns the entry the
+client got at that point of the recording. Recorded disconnects close the
+socket. Playback pauses until the client reconnects, so every run delivers
+the same messages in the same order.
+
+Trace format: JSON Lines, gzip-compressed when the name ends in `.gz`. A
+header line is followed by one record per line:
+
+    {"trace": "comfyui", "version": 1, "url": "...", "recorded": "..."}
+    {"t": 0.512, "k": "ws", "d": {"type": "progress", "data": {...}}}
+    {"t": 0.513, "k": "bin", "d": 48213}
+    {"t": 0.020, "k": "prompt", "d": {"prompt_id": "...", "number": 3, "node_errors": {}}}
+    {"t": 9.871, "k": "history", "id": "<prompt_id>", "d": {...}}
+    {"t": 4.200, "k": "disconnect"}
+
+Standard library only; the `bench` command also needs comfyui_client.py's
+dependencies.
+
+Usage:
+    COMFYUI_TRACE=logs/run.trace.jsonl.gz python test_workflow.py
+    python scripts/comfyui-tools/comfyui_client.py workflows/text-to-video.json --record run.trace.jsonl.gz
+    python scripts/comfyui-tools/ws_trace.py info run.trace.jsonl.gz
+    python scripts/comfyui-tools/ws_trace.py replay run.trace.jsonl.gz --port 8188 --speed 10
+    python scripts/comfyui-tools/ws_trace.py synth storm.trace.jsonl.gz --prompts 8 --steps 500
+    python scripts/comfyui-tools/ws_trace.py bench storm.trace.jsonl.gz --speed 0
+
+Exit codes:
+- 0: Command succeeded
+- 1: bench: some prompts did not resolve
+- 2: The trace could not be read
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import base64
+import gzip
+import hashlib
+import json
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+from urllib.parse import parse_qs
+
+TRACE_VERSION = 1
+# Records pushed to the socket; "prompt" and "history" records are HTTP responses
+_DELIVERED = {"ws", "bin", "disconnect"}
+_WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found"}
+
+
+def _open_text(path: Path, mode: str):
+    if path.suffix == ".gz":
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+# --- Recording -----------------------------------------------------------------
+
+
+class TraceRecorder:
+    """Appends timestamped client traffic to a trace file; safe to call from the reader thread."""
+
+    def __init__(self, path: Union[str, Path], url: Optional[str] = None, clock=time.perf_counter):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.clock = clock
+        self.counts: Counter = Counter()
+        self._start = clock()
+        self._lock = threading.Lock()
+        self._file = _open_text(self.path, "w")
+        self._file.write(json.dumps({
+            "trace": "comfyui",
+            "version": TRACE_VERSION,
+            "url": url,
+            "recorded": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        }) + "\n")
+
+    def _write(self, kind: str, data: Any = None, prompt_id: Optional[str] = None) -> None:
+        record: Dict[str, Any] = {"t": round(self.clock() - self._start, 6), "k": kind}
+        if prompt_id is not None:
+            record["id"] = prompt_id
+        if data is not None:
+            record["d"] = data
+        line = json.dumps(record, separators=(",", ":")) + "\n"
+        with self._lock:
+            if not self._file.closed:
+                self._file.write(line)
+                self.counts[kind] += 1
+
+    def ws(self, message: dict) -> None:
+        self._write("ws", message)
+
+    def binary(self, size: int) -> None:
+        self._write("bin", size)
+
+    def prompt(self, response: dict) -> None:
+        self._write("prompt", response)
+
+    def history(self, prompt_id: str, entry: dict) -> None:
+        self._write("history", entry, prompt_id)
+
+    def disconnect(self) -> None:
+        self._write("disconnect")
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+    def __enter__(self) -> "TraceRecorder":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+# --- Reading -------------------------------------------------------------------
+
+
+@dataclass
+class TraceRecord:
+    t: float
+    kind: str                        # "ws" | "bin" | "prompt" | "history" | "disconnect"
+    data: Any = None
+    prompt_id: Optional[str] = None
+
+    @property
+    def ws_prompt_id(self) -> Optional[str]:
+        if self.kind != "ws":
+            return None
+        return (self.data.get("data") or {}).get("prompt_id")
+
+
+@dataclass
+class Trace:
+    header: Dict[str, Any]
+    records: List[TraceRecord] = field(default_factory=list)
+
+    @property
+    def prompt_responses(self) -> List[dict]:
+        return [r.data for r in self.records if r.kind == "prompt"]
+
+    def summary(self) -> Dict[str, Any]:
+        kinds = Counter(r.kind for r in self.records)
+        types = Counter(r.data.get("type") for r in self.records if r.kind == "ws")
+        return {
+            "url": self.header.get("url"),
+            "recorded": self.header.get("recorded"),
+            "records": len(self.records),
+            "durationS": round(self.records[-1].t - self.records[0].t, 3) if self.records else 0.0,
+            "prompts": kinds["prompt"],
+            "messages": kinds["ws"],
+            "messageTypes": dict(types.most_common()),
+            "binaryFrames": kinds["bin"],
+            "binaryBytes": sum(r.data for r in self.records if r.kind == "bin"),
+            "historyResponses": kinds["history"],
+            "disconnects": kinds["disconnect"],
+        }
+
+
+def read_trace(path: Union[str, Path]) -> Trace:
+    """Load a trace; raises ValueError if the file is not a ComfyUI trace."""
+    path = Path(path)
+    with _open_text(path, "r") as f:
+        header = json.loads(f.readline() or "{}")
+        if header.get("trace") != "comfyui":
+            raise ValueError(f"{path} is not a ComfyUI trace")
+        if header.get("version") != TRACE_VERSION:
+            raise ValueError(f"{path} has trace version {header.get('version')}, expected {TRACE_VERSION}")
+        records = []
+        for line in f:
+            if line.strip():
+                raw = json.loads(line)
+                records.append(TraceRecord(raw["t"], raw["k"], raw.get("d"), raw.get("id")))
+    records.sort(key=lambda r: r.t)
+    return Trace(header, records)
+
+
+def write_trace(trace: Trace, path: Union[str, Path]) -> None:
+    with _open_text(Path(path), "w") as f:
+        f.write(json.dumps(trace.header) + "\n")
+        for record in trace.records:
+            raw: Dict[str, Any] = {"t": record.t, "k": record.kind}
+            if record.prompt_id is not None:
+                raw["id"] = record.prompt_id
+            if record.data is not None:
+                raw["d"] = record.data
+            f.write(json.dumps(raw, separators=(",", ":")) + "\n")
+
+
+def synthesize_trace(prompts: int = 4, nodes: int = 8, steps: int = 200, step_ms: float = 5.0,
+                     preview_bytes: int = 0, disconnect_at: Optional[float] = None) -> Trace:
+    """
+    Trace in the shape of a real run without a GPU: `prompts` prompts queued at
+    once and executed one after another, each running `nodes` nodes, a sampler
+    reporting `steps` progress events (plus one preview frame per step when
+    `preview_bytes` is set), and a history lookup on completion. With
+    `disconnect_at` (fraction of the run) the socket drops once; the client's
+    /history resume and the new status message follow it.
+    """
+    records: List[TraceRecord] = []
+    t = 0.0
+    sid = "recorded-client"
+
+    def ws(event_type: str, **data):
+        records.append(TraceRecord(round(t, 6), "ws", {"type": event_type, "data": data}))
+
+    def status(remaining: int):
+        ws("status", status={"exec_info": {"queue_remaining": remaining}}, sid=sid)
+
+    status(0)
+    ids = [str(uuid.UUID(int=i + 1)) for i in range(prompts)]
+    for number, prompt_id in enumerate(ids):
+        t += 0.002
+        records.append(TraceRecord(round(t, 6), "prompt", {"prompt_id": prompt_id, "number": number,
+                                                           "node_errors": {}}))
+        status(number + 1)
+
+    total = prompts * (nodes - 1 + max(steps, 1)) * step_ms / 1000
+    drop_at = total * disconnect_at if disconnect_at is not None else None
+    sampler = str(nodes // 2 + 1)
+    for number, prompt_id in enumerate(ids):
+        ws("execution_start", prompt_id=prompt_id, timestamp=int(t * 1000))
+        ws("execution_cached", nodes=[], prompt_id=prompt_id, timestamp=int(t * 1000))
+        for node in range(1, nodes + 1):
+            ws("executing", node=str(node), display_node=str(node), prompt_id=prompt_id)
+            for step in range(1, (steps if str(node) == sampler else 1) + 1):
+                t += step_ms / 1000
+                if drop_at is not None and t >= drop_at:
+                    records.append(TraceRecord(round(t, 6), "disconnect"))
+                    t += 0.5  # reconnect backoff
+                    for pending in ids[number:]:
+                        records.append(TraceRecord(round(t, 6), "history", {}, pending))
+                    status(prompts - number)
+                    drop_at = None
+                if str(node) == sampler:
+                    ws("progress", value=step, max=steps, prompt_id=prompt_id, node=sampler)
+                    if preview_bytes:
+                        records.append(TraceRecord(round(t, 6), "bin", preview_bytes))
+        outputs = {str(nodes): {"images": [{"filename": f"gemdirect1_shot_{number:05d}_.png",
+                                             "subfolder": "", "type": "output"}]}}
+        ws("executed", node=str(nodes), display_node=str(nodes), output=outputs[str(nodes)], prompt_id=prompt_id)
+        ws("execution_success", prompt_id=prompt_id, timestamp=int(t * 1000))
+        t += 0.003
+        entry = {"prompt": [number, prompt_id, {}, {}, [str(nodes)]], "outputs": outputs,
+                 "status": {"status_str": "success", "completed": True, "messages": []}}
+        ws("executing", node=None, display_node=None, prompt_id=prompt_id)
+        records.append(TraceRecord(round(t, 6), "history", entry, prompt_id))
+        status(prompts - number - 1)
+    header = {"trace": "comfyui", "version": TRACE_VERSION, "url": None, "recorded": None, "synthetic": True}
+    return Trace(header, records)
+
+
+# --- Replay --------------------------------------------------------------------
+
+
+def _ws_frame(opcode: int, payload: bytes) -> bytes:
+    """Unmasked server-to-client frame (RFC 6455)."""
+    size = len(payload)
+    if size < 126:
+        header = bytes([0x80 | opcode, size])
+    elif size < 1 << 16:
+        header = bytes([0x80 | opcode, 126]) + size.to_bytes(2, "big")
+    else:
+        header = bytes([0x80 | opcode, 127]) + size.to_bytes(8, "big")
+    return header + payload
+
+
+class _Peer:
+    def __init__(self, writer: asyncio.StreamWriter, client_id: str):
+        self.writer = writer
+        self.client_id = client_id
+
+    async def send(self, frame: bytes) -> None:
+        self.writer.write(frame)
+        await self.writer.drain()
+
+    def close(self) -> None:
+        try:
+            self.writer.write(_ws_frame(0x8, (1001).to_bytes(2, "big")))
+        except (ConnectionError, RuntimeError):
+            pass
+        self.writer.close()
+
+
+class ReplayServer:
+    """
+    Serves a trace over HTTP + WebSocket like ComfyUI does.
+
+    Playback starts with the first `POST /prompt` (`start="prompt"`), after
+    the leading status messages are sent to the connecting client. With
+    `start="connect"` it starts as soon as a WebSocket connects.
+    """
+
+    def __init__(self, trace: Trace, host: str = "127.0.0.1", port: int = 0, speed: float = 1.0,
+                 start: str = "prompt"):
+        if start not in ("prompt", "connect"):
+            raise ValueError(f"start must be 'prompt' or 'connect', not {start!r}")
+        self.trace = trace
+        self.host = host
+        self.port = port
+        self.speed = speed
+        self.start_on = start
+        self.sent = Counter()
+        self.finished = threading.Event()
+        self.elapsed_s: Optional[float] = None
+
+        records = trace.records
+        self._frames: List[Optional[bytes]] = [self._encode(r) for r in records]
+        self._prompts = deque(trace.prompt_responses)
+        # /history/<id> responses per prompt as (record index, entry), and how many each client was served
+        self._responses: Dict[str, List[tuple]] = {}
+        for index, record in enumerate(records):
+            if record.kind == "history":
+                self._responses.setdefault(record.prompt_id, []).append((index, record.data))
+        self._served: Dict[str, int] = {}
+        self._history: Dict[str, dict] = {}
+        self._frontier = -1
+        self._peers: List[_Peer] = []
+        self._writers: set = set()
+        self._cursor = 0
+        if start == "prompt":
+            while self._cursor < len(records) and records[self._cursor].kind in ("ws", "bin") \
+                    and not records[self._cursor].ws_prompt_id:
+                self._cursor += 1
+        self._preamble = self._cursor
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    @staticmethod
+    def _encode(record: TraceRecord) -> Optional[bytes]:
+        if record.kind == "bin":
+            return _ws_frame(0x2, bytes(record.data))
+        if record.kind == "ws" and "sid" not in (record.data.get("data") or {}):
+            return _ws_frame(0x1, json.dumps(record.data).encode("utf-8"))
+        return None
+
+    # --- Lifecycle ---
+
+    async def _open(self) -> None:
+        self._started = asyncio.Event()
+        self._connected = asyncio.Event()
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._player = asyncio.ensure_future(self._play())
+
+    async def serve_forever(self) -> None:
+        await self._open()
+        async with self._server:
+            await self._server.serve_forever()
+
+    def start(self) -> str:
+        """Serve from a background thread (tests, benchmarks); returns the base URL."""
+        ready = threading.Event()
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            self._loop.run_until_complete(self._open())
+            ready.set()
+            self._loop.run_forever()
+            self._loop.run_until_complete(self._shutdown())
+            self._loop.close()
+
+        self._thread = threading.Thread(target=run, name="comfyui-replay", daemon=True)
+        self._thread.start()
+        ready.wait()
+        return self.url
+
+    async def _shutdown(self) -> None:
+        """Close every connection so the handlers return, then stop playback."""
+        self._server.close()
+        for writer in list(self._writers):
+            writer.close()
+        self._player.cancel()
+        pending = asyncio.all_tasks() - {asyncio.current_task()}
+        if pending:
+            await asyncio.wait(pending, timeout=2)
+
+    def stop(self) -> None:
+        if self._loop is not None and self._thread is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout=5)
+
+    def __enter__(self) -> "ReplayServer":
+        self.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    # --- Playback ---
+
+    def _reach(self, index: int) -> None:
+        """Make the /history responses recorded up to the next pushed record available."""
+        records = self.trace.records
+        while index < len(records) and records[index].kind not in _DELIVERED:
+            if records[index].kind == "history":
+                self._history[records[index].prompt_id] = records[index].data
+            self._frontier = max(self._frontier, index)
+            index += 1
+
+    def _history_entry(self, prompt_id: str) -> dict:
+        """
+        The n-th request for a prompt gets the n-th recorded response once
+        playback has reached it, and the last one reached before it otherwise.
+        A client that polls like the recorded one sees the same answers however
+        far playback runs ahead of it (e.g. while it resumes after a
+        disconnect); one that polls more often is not shown the result early.
+        """
+        responses = self._responses.get(prompt_id, [])
+        served = self._served.get(prompt_id, 0)
+        if served < len(responses) and responses[served][0] <= self._frontier:
+            self._served[prompt_id] = served + 1
+            return responses[served][1]
+        if served:
+            return responses[served - 1][1]
+        return {}
+
+    async def _deliver(self, index: int) -> None:
+        record = self.trace.records[index]
+        if record.kind == "disconnect":
+            peers, self._peers = self._peers, []
+            self._connected.clear()
+            for peer in peers:
+                peer.close()
+        else:
+            for peer in list(self._peers):
+                frame = self._frames[index]
+                if frame is None:  # status message carrying the recorded client id
+                    message = {**record.data, "data": {**record.data["data"], "sid": peer.client_id}}
+                    frame = _ws_frame(0x1, json.dumps(message).encode("utf-8"))
+                try:
+                    await peer.send(frame)
+                except (ConnectionError, RuntimeError):
+                    self._drop(peer)
+        self.sent[record.kind] += 1
+        self._reach(index + 1)
+
+    async def _play(self) -> None:
+        await self._started.wait()
+        records = self.trace.records
+        loop = asyncio.get_running_loop()
+        began = loop.time()
+        t0 = records[self._cursor].t if self._cursor < len(records) else 0.0
+        paused = 0.0
+        while self._cursor < len(records):
+            record = records[self._cursor]
+            if record.kind in _DELIVERED:
+                if self.speed > 0:
+                    delay = began + paused + (record.t - t0) / self.speed - loop.time()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                if not self._peers:
+                    waited = loop.time()
+                    await self._connected.wait()
+                    paused += loop.time() - waited
+                await self._deliver(self._cursor)
+            else:
+                self._reach(self._cursor)
+            self._cursor += 1
+        self.elapsed_s = loop.time() - began
+        self.finished.set()
+        print(f"[OK] Replay finished: {sum(self.sent.values())} records in {self.elapsed_s:.2f}s")
+
+    def wait_finished(self, timeout: Optional[float] = None) -> bool:
+        return self.finished.wait(timeout)
+
+    # --- HTTP ---
+
+    def _route(self, method: str, path: str) -> tuple:
+        if method == "POST" and path == "/prompt":
+            if not self._prompts:
+                return 400, {"error": {"type": "replay_exhausted", "message": "No more prompts in the trace",
+                                       "details": "", "extra_info": {}}, "node_errors": {}}
+            if self.start_on == "prompt":
+                self._started.set()
+            return 200, self._prompts.popleft()
+        if method == "GET" and path == "/history":
+            return 200, dict(self._history)
+        if method == "GET" and path.startswith("/history/"):
+            prompt_id = path[len("/history/"):]
+            entry = self._history_entry(prompt_id)
+            return 200, {prompt_id: entry} if entry else {}
+        if method == "GET" and path == "/queue":
+            return 200, {"queue_running": [], "queue_pending": []}
+        if method == "GET" and path == "/system_stats":
+            return 200, {"system": {"comfyui_version": "replay", "trace": self.trace.header.get("url")},
+                         "devices": []}
+        if method == "POST" and path == "/interrupt":
+            return 200, {}
+        return 404, {"error": f"{method} {path} is not served by the replayer"}
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self._writers.add(writer)
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                method, target, _ = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                await reader.readexactly(int(headers.get("content-length") or 0))
+                path, _, query = target.partition("?")
+
+                if path == "/ws" and headers.get("upgrade", "").lower() == "websocket":
+                    client_id = parse_qs(query).get("clientId", [""])[0] or str(uuid.uuid4())
+                    await self._websocket(reader, writer, headers, client_id)
+                    return
+                status, payload = self._route(method, path)
+                body = json.dumps(payload).encode("utf-8")
+                writer.write(f"HTTP/1.1 {status} {_REASONS[status]}\r\nContent-Type: application/json\r\n"
+                             f"Content-Length: {len(body)}\r\n\r\n".encode("latin-1") + body)
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+    # --- WebSocket ---
+
+    def _drop(self, peer: _Peer) -> None:
+        if peer in self._peers:
+            self._peers.remove(peer)
+        if not self._peers:
+            self._connected.clear()
+
+    async def _websocket(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                         headers: Dict[str, str], client_id: str) -> None:
+        accept = base64.b64encode(hashlib.sha1((headers["sec-websocket-key"] + _WS_GUID).encode()).digest())
+        writer.write(b"HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                     b"Sec-WebSocket-Accept: " + accept + b"\r\n\r\n")
+        peer = _Peer(writer, client_id)
+        if not self._started.is_set():
+            for index in range(self._preamble):
+                record = self.trace.records[index]
+                if record.kind == "ws" and self._frames[index] is None:
+                    message = {**record.data, "data": {**record.data["data"], "sid": client_id}}
+                    await peer.send(_ws_frame(0x1, json.dumps(message).encode("utf-8")))
+                elif self._frames[index] is not None:
+                    await peer.send(self._frames[index])
+            if self.start_on == "connect":
+                self._started.set()
+        self._peers.append(peer)
+        self._connected.set()
+        try:
+            while True:
+                head = await reader.readexactly(2)
+                opcode, size = head[0] & 0x0F, head[1] & 0x7F
+                if size == 126:
+                    size = int.from_bytes(await reader.readexactly(2), "big")
+                elif size == 127:
+                    size = int.from_bytes(await reader.readexactly(8), "big")
+                mask = await reader.readexactly(4) if head[1] & 0x80 else b"\0\0\0\0"
+                payload = bytes(b ^ mask[i % 4] for i, b in enumerate(await reader.readexactly(size)))
+                if opcode == 0x8:
+                    break
+                if opcode == 0x9:
+                    await peer.send(_ws_frame(0xA, payload))
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._drop(peer)
+
+
+# --- Benchmark -----------------------------------------------------------------
+
+
+def run_benchmark(trace: Trace, speed: float = 0.0, timeout: float = 600.0) -> dict:
+    """Replay `trace` to a ComfyUIClient and measure how fast it parses and routes the events."""
+    from comfyui_client import ComfyUIClient
+
+    with ReplayServer(trace, speed=speed) as server:
+        with ComfyUIClient(server.url) as client:
+            start = time.perf_counter()
+            handles = [client.queue_prompt({}) for _ in trace.prompt_responses]
+            results = client.wait_all(handles, timeout=timeout)
+            server.wait_finished(timeout)
+            elapsed = time.perf_counter() - start
+            reconnects = client.reconnects
+    messages = server.sent["ws"] + server.sent["bin"]
+    return {
+        "speed": speed,
+        "prompts": len(handles),
+        "resolved": sum(r.status == "success" for r in results),
+        "failed": [r.prompt_id for r in results if r.status != "success"],
+        "messages": messages,
+        "reconnects": reconnects,
+        "elapsedMs": round(elapsed * 1000, 1),
+        "messagesPerSec": round(messages / elapsed) if elapsed else None,
+        "traceDurationS": trace.summary()["durationS"],
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Record/replay ComfyUI /ws and /history traffic")
+    sub = parser.add_subparsers(dest="command", required=True)
+    info = sub.add_parser("info", help="Summarize a trace")
+    info.add_argument("trace")
+    replay = sub.add_parser("replay", help="Serve a trace as a stand-in ComfyUI")
+    replay.add_argument("trace")
+    replay.add_argument("--host", default="127.0.0.1")
+    replay.add_argument("--port", type=int, default=8188)
+    replay.add_argument("--speed", type=float, default=1.0, help="Playback speed; 0 = as fast as clients read")
+    replay.add_argument("--start", choices=["prompt", "connect"], default="prompt",
+                        help="Start playback on the first POST /prompt (default) or on WebSocket connect")
+    synth = sub.add_parser("synth", help="Write a synthetic event-storm trace")
+    synth.add_argument("out")
+    synth.add_argument("--prompts", type=int, default=4)
+    synth.add_argument("--nodes", type=int, default=8)
+    synth.add_argument("--steps", type=int, default=200)
+    synth.add_argument("--step-ms", type=float, default=5.0)
+    synth.add_argument("--preview-bytes", type=int, default=0, help="Binary preview frame per step")
+    synth.add_argument("--disconnect-at", type=float, help="Drop the socket once, at this fraction of the run")
+    bench = sub.add_parser("bench", help="Replay a trace to comfyui_client.py and report its throughput")
+    bench.add_argument("trace")
+    bench.add_argument("--speed", type=float, default=0.0)
+    args = parser.parse_args(argv)
+
+    if args.command == "synth":
+        trace = synthesize_trace(args.prompts, args.nodes, args.steps, args.step_ms, args.preview_bytes,
+                                 args.disconnect_at)
+        write_trace(trace, args.out)
+        print(json.dumps(trace.summary(), indent=2))
+        return 0
+
+    try:
+        trace = read_trace(args.trace)
+    except (OSError, ValueError) as e:
+        print(f"[ERROR] {e}")
+        return 2
+    if args.command == "info":
+        print(json.dumps(trace.summary(), indent=2))
+        return 0
+    if args.command == "bench":
+        result = run_benchmark(trace, args.speed)
+        print(json.dumps(result, indent=2))
+        return 1 if result["failed"] else 0
+
+    server = ReplayServer(trace, args.host, args.port, args.speed, args.start)
+    print(f"[INFO] Replaying {args.trace} at {args.speed}x on http://{args.host}:{args.port} "
+          f"({len(trace.prompt_responses)} prompt(s), start on {args.start})")
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,136 @@
+"""
+Content-addressed LRU caches for seed-independent work in the FastVideo adapter.
+
+Parameter sweeps send the same prompt and keyframe many times and change only
+the seed, and chained scenes resize the same keyframe again and again. The
+decoded and resized keyframe depends only on the keyframe bytes, the target
+size and the resample filter, so it is cached under a hash of those. Entries
+are evicted least-recently-used once the cache exceeds its entry or byte
+budget. Concurrent misses on one key share a single build.
+
+Kept free of FastVideo/FastAPI imports so it can be tested without a GPU stack.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from PIL import Image
+
+from video_io import decode_base64_image, resize_keyframe
+
+
+def content_key(*parts: Any) -> str:
+    """Stable hex digest of `parts` (str, bytes or anything with a repr), length-prefixed so parts can't run together."""
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        data = part if isinstance(part, bytes) else str(part).encode("utf-8")
+        digest.update(len(data).to_bytes(8, "little"))
+        digest.update(data)
+    return digest.hexdigest()
+
+
+class LRUCache:
+    """Thread-safe LRU mapping bounded by entry count and by total size from `sizeof`."""
+
+    def __init__(self, max_entries: int = 64, max_bytes: Optional[int] = None,
+                 sizeof: Callable[[Any], int] = lambda value: 0):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bytes = 0
+        self._entries: "OrderedDict[Hashable, Tuple[Any, int]]" = OrderedDict()
+        self._building: Dict[Hashable, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        size = self.sizeof(value)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old[1]
+            self._entries[key] = (value, size)
+            self.bytes += size
+            while self._entries and (len(self._entries) > self.max_entries
+                                     or (self.max_bytes is not None and self.bytes > self.max_bytes)):
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.bytes -= evicted
+                self.evictions += 1
+
+    def get_or_create(self, key: Hashable, factory: Callable[[], Any]) -> Tuple[Any, bool]:
+        """(value, hit). On a miss `factory` runs outside the cache lock; concurrent misses on `key` wait for it."""
+        value = self.get(key)
+        if value is not None:
+            return value, True
+        with self._lock:
+            build_lock = self._building.setdefault(key, threading.Lock())
+        try:
+            with build_lock:
+                with self._lock:
+                    entry = self._entries.get(key)
+                    if entry is not None:
+                        # Built by the caller we waited on: count it as a hit
+                        self._entries.move_to_end(key)
+                        self.misses -= 1
+                        self.hits += 1
+                        return entry[0], True
+                value = factory()
+                self.put(key, value)
+                return value, False
+        finally:
+            with self._lock:
+                self._building.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hitRate": round(self.hits / lookups, 3) if lookups else None,
+        }
+
+
+def image_nbytes(image: Image.Image) -> int:
+    return image.width * image.height * len(image.getbands())
+
+
+class KeyframeCache(LRUCache):
+    """Decoded, resized keyframes keyed by (payload hash, target size, resample filter)."""
+
+    def __init__(self, max_entries: int = 32, max_bytes: Optional[int] = 256 * 1024 * 1024):
+        super().__init__(max_entries, max_bytes, sizeof=lambda entry: image_nbytes(entry[0]))
+
+    def prepare(self, keyframe_base64: str, size: Tuple[int, int],
+                resample: Image.Resampling = Image.Resampling.LANCZOS) -> Tuple[Image.Image, Tuple[int, int], bool]:
+        """
+        (image at `size`, original size, cache hit) for a base64 keyframe.
+
+        The returned image is shared between requests; callers must not
+        modify it in place.
+        """
+        def build():
+            image = decode_base64_image(keyframe_base64)
+            return resize_keyframe(image, size, resample), image.size
+
+        key = content_key(keyframe_base64, *size, int(resample))
+        (image, original_size), hit = self.get_or_create(key, build)
+        return image, original_size, hit
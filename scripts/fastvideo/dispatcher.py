@@ -0,0 +1,449 @@
+"""
+Dispatcher that fronts several FastVideo adapter workers.
+
+One adapter process owns one generator, so a host renders one video at a
+time. The dispatcher exposes the adapter's API (/health, /generate,
+/generate/variants, /jobs, /videos) on a single endpoint and forwards each
+request to one of several workers. A worker is a normal fastvideo_server.py,
+local or on another host.
+
+- Health-aware: every worker's /health is polled. Requests go only to
+  healthy workers, least loaded first (queued + running).
+- Sticky by model id: a request with `modelId` goes only to workers serving
+  that model. Workers with the model already loaded are preferred, so warm
+  models stay on the workers that loaded them.
+- Requeue on worker death: if the connection fails, or the worker stops
+  answering health checks while a request is in flight, the worker is marked
+  down and the request is retried on another worker. Errors the worker
+  returns itself (OOM, bad keyframe) are passed through, not retried.
+- Draining workers are skipped: a worker that got SIGTERM reports
+  `status: "draining"` and answers queued requests with 503; those requests
+  are retried on another worker.
+
+Video URLs in responses are rewritten to /workers/{name}/videos/..., and the
+dispatcher proxies them, Range headers included.
+
+Usage:
+    python scripts/fastvideo/dispatcher.py --worker http://gpu1:8055 --worker http://gpu2:8055
+    FASTVIDEO_WORKERS=http://gpu1:8055,http://gpu2:8055 python scripts/fastvideo/fastvideo_server.py
+    python scripts/fastvideo/dispatcher.py --standins 3   # CPU stand-in workers on this box
+
+Exit codes:
+    0 - Server stopped
+    2 - No workers given
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+import uuid
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import httpx
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+
+HEALTH_INTERVAL_S = 2.0
+HEALTH_TIMEOUT_S = 2.0
+DEAD_AFTER = 3  # consecutive failed health checks before in-flight requests are requeued
+DEFAULT_WAIT_S = 30.0
+DEFAULT_MAX_ATTEMPTS = 3
+MEDIA_KEYS = ("videoUrl", "previewUrl", "posterUrl")
+PROXY_REQUEST_HEADERS = ("range", "if-none-match", "if-modified-since", "if-range")
+PROXY_RESPONSE_HEADERS = ("content-type", "content-length", "content-range", "accept-ranges",
+                          "etag", "last-modified", "cache-control")
+SERVER_SCRIPT = Path(__file__).resolve().parent / "fastvideo_server.py"
+
+
+class WorkerDied(Exception):
+    """The worker went away while handling a request."""
+
+
+class WorkerDraining(Exception):
+    """The worker is shutting down and turned the request away (503)."""
+
+
+@dataclass
+class Worker:
+    name: str
+    url: str
+    healthy: bool = False
+    draining: bool = False
+    model_id: Optional[str] = None
+    model_loaded: bool = False
+    attention_backend: Optional[str] = None
+    queued: int = 0
+    running: int = 0
+    in_flight: int = 0
+    served: int = 0
+    requeued: int = 0
+    health_failures: int = 0
+    last_error: Optional[str] = None
+    last_seen: Optional[float] = None
+
+    def load(self) -> int:
+        # /health lags; our own in-flight count is a lower bound on its queue
+        return max(self.queued + self.running, self.in_flight)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "url": self.url,
+            "healthy": self.healthy,
+            "draining": self.draining,
+            "modelId": self.model_id,
+            "modelLoaded": self.model_loaded,
+            "queued": self.queued,
+            "running": self.running,
+            "inFlight": self.in_flight,
+            "served": self.served,
+            "requeued": self.requeued,
+            "lastError": self.last_error,
+        }
+
+
+@dataclass
+class DispatchJob:
+    id: str
+    path: str
+    body: Dict[str, Any]
+    submitted: float
+    status: str = "queued"  # queued | running | complete | error
+    worker: Optional[str] = None
+    attempts: int = 0
+    finished: Optional[float] = None
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    status_code: Optional[int] = None
+    task: Optional[asyncio.Task] = field(default=None, repr=False)
+
+
+class Dispatcher:
+    def __init__(self, urls: Sequence[str], client: Optional[httpx.AsyncClient] = None,
+                 health_interval_s: float = HEALTH_INTERVAL_S, wait_s: float = DEFAULT_WAIT_S,
+                 max_attempts: int = DEFAULT_MAX_ATTEMPTS, clock=time.monotonic):
+        self.workers = [Worker(name=f"w{i}", url=url.rstrip("/")) for i, url in enumerate(urls)]
+        self.client = client
+        self.health_interval_s = health_interval_s
+        self.wait_s = wait_s
+        self.max_attempts = max_attempts
+        self.clock = clock
+        self.jobs: Dict[str, DispatchJob] = {}
+        self._health_task: Optional[asyncio.Task] = None
+
+    # --- Health ---
+
+    async def start(self) -> None:
+        if self.client is None:
+            # No read timeout: a generation can take many minutes; worker death is caught by health checks
+            self.client = httpx.AsyncClient(timeout=httpx.Timeout(None, connect=5.0))
+        await self.refresh()
+        self._health_task = asyncio.create_task(self._health_loop())
+
+    async def stop(self) -> None:
+        if self._health_task:
+            self._health_task.cancel()
+        if self.client:
+            await self.client.aclose()
+
+    async def _health_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.health_interval_s)
+            await self.refresh()
+
+    async def refresh(self) -> None:
+        await asyncio.gather(*(self._check(w) for w in self.workers))
+
+    async def _check(self, worker: Worker) -> None:
+        try:
+            response = await self.client.get(f"{worker.url}/health", timeout=HEALTH_TIMEOUT_S)
+            response.raise_for_status()
+            health = response.json()
+        except Exception as e:
+            worker.health_failures += 1
+            self._mark_down(worker, e)
+            return
+        worker.healthy = health.get("status") == "ok"
+        worker.draining = health.get("status") == "draining"
+        worker.health_failures = 0
+        worker.model_id = health.get("modelId")
+        worker.model_loaded = bool(health.get("modelLoaded"))
+        worker.attention_backend = health.get("attentionBackend")
+        worker.queued = int(health.get("queued") or 0)
+        worker.running = int(health.get("running") or 0)
+        worker.last_seen = self.clock()
+
+    def _mark_down(self, worker: Worker, error: BaseException) -> None:
+        if worker.healthy:
+            print(f"Worker {worker.name} ({worker.url}) is down: {error}")
+        worker.healthy = False
+        worker.last_error = str(error) or type(error).__name__
+
+    # --- Routing ---
+
+    def candidates(self, model_id: Optional[str] = None) -> List[Worker]:
+        """Healthy workers for `model_id`, in routing order: model loaded, then least loaded."""
+        healthy = [w for w in self.workers if w.healthy and (model_id is None or w.model_id == model_id)]
+        return sorted(healthy, key=lambda w: (not w.model_loaded, w.load(), w.served))
+
+    async def _acquire(self, model_id: Optional[str]) -> Worker:
+        deadline = self.clock() + self.wait_s
+        while True:
+            candidates = self.candidates(model_id)
+            if candidates:
+                return candidates[0]
+            known = {w.model_id for w in self.workers if w.model_id}
+            if model_id is not None and known and model_id not in known \
+                    and all(w.last_seen is not None for w in self.workers):
+                raise HTTPException(status_code=404, detail=f"No worker serves model {model_id}")
+            if self.clock() >= deadline:
+                raise HTTPException(status_code=503, detail="No healthy FastVideo worker available")
+            await asyncio.sleep(self.health_interval_s)
+            await self.refresh()
+
+    async def _post(self, worker: Worker, path: str, body: Dict[str, Any], headers: Dict[str, str]) -> httpx.Response:
+        request = asyncio.ensure_future(self.client.post(worker.url + path, json=body, headers=headers))
+        try:
+            while True:
+                done, _ = await asyncio.wait({request}, timeout=self.health_interval_s)
+                if done:
+                    try:
+                        response = request.result()
+                    except httpx.TransportError as e:
+                        raise WorkerDied(str(e) or type(e).__name__) from e
+                    if response.status_code == 503:
+                        raise WorkerDraining(response.headers.get("retry-after") or "")
+                    return response
+                # A draining worker closes its listener but finishes running jobs; only a lost connection counts
+                if worker.health_failures >= DEAD_AFTER and not worker.draining:
+                    raise WorkerDied(f"no health response for {worker.health_failures} checks")
+        finally:
+            request.cancel()
+
+    async def forward(self, path: str, body: Dict[str, Any], headers: Optional[Dict[str, str]] = None,
+                      job: Optional[DispatchJob] = None) -> Tuple[Worker, httpx.Response, int]:
+        """POST to a worker, requeueing on worker death or drain. Returns (worker, response, attempts)."""
+        attempts = 0
+        while True:
+            worker = await self._acquire(body.get("modelId"))
+            attempts += 1
+            if job is not None:
+                job.status, job.worker, job.attempts = "running", worker.name, attempts
+            worker.in_flight += 1
+            try:
+                response = await self._post(worker, path, body, headers or {})
+            except WorkerDied as e:
+                worker.requeued += 1
+                self._mark_down(worker, e)
+                if attempts >= self.max_attempts:
+                    raise HTTPException(status_code=502, detail=f"Gave up after {attempts} worker failures; last: {e}")
+                print(f"Requeueing {path} from {worker.name} after worker failure: {e}")
+                continue
+            except WorkerDraining:
+                # Out of rotation until its /health says otherwise
+                worker.healthy, worker.draining = False, True
+                worker.requeued += 1
+                if attempts >= self.max_attempts:
+                    raise HTTPException(status_code=503, detail=f"Gave up after {attempts} attempts; workers draining")
+                print(f"Requeueing {path} from {worker.name}: worker is draining")
+                continue
+            finally:
+                worker.in_flight -= 1
+            worker.served += 1
+            return worker, response, attempts
+
+    async def generate(self, path: str, body: Dict[str, Any], headers: Optional[Dict[str, str]] = None,
+                       job: Optional[DispatchJob] = None) -> Dict[str, Any]:
+        worker, response, attempts = await self.forward(path, body, headers, job)
+        if response.status_code >= 400:
+            try:
+                detail = response.json().get("detail", response.text)
+            except ValueError:
+                detail = response.text
+            raise HTTPException(status_code=response.status_code, detail=detail)
+        result = response.json()
+        for item in [result, *result.get("variants", [])]:
+            for key in MEDIA_KEYS:
+                if item.get(key):
+                    item[key] = f"/workers/{worker.name}{item[key]}"
+        result["worker"], result["attempts"] = worker.name, attempts
+        return result
+
+    # --- Jobs ---
+
+    def submit(self, body: Dict[str, Any], headers: Optional[Dict[str, str]] = None) -> DispatchJob:
+        job = DispatchJob(id=uuid.uuid4().hex[:12], path="/generate", body=body, submitted=self.clock())
+
+        async def run():
+            try:
+                job.result = await self.generate(job.path, body, headers, job)
+                job.status = job.result.get("status", "complete")
+            except HTTPException as e:
+                job.status, job.error, job.status_code = "error", str(e.detail), e.status_code
+            except Exception as e:
+                job.status, job.error = "error", str(e)
+            job.finished = self.clock()
+
+        self.jobs[job.id] = job
+        job.task = asyncio.create_task(run())
+        return job
+
+    def status(self, job: DispatchJob) -> Dict[str, Any]:
+        return {
+            "jobId": job.id,
+            "status": job.status,
+            "worker": job.worker,
+            "attempts": job.attempts,
+            "durationMs": int((job.finished - job.submitted) * 1000) if job.finished else None,
+            "error": job.error,
+            "result": job.result,
+        }
+
+    def health(self) -> Dict[str, Any]:
+        healthy = [w for w in self.workers if w.healthy]
+        return {
+            "status": "ok" if healthy else "unavailable",
+            "service": "fastvideo-dispatcher",
+            "modelId": ",".join(sorted({w.model_id for w in healthy if w.model_id})),
+            "modelLoaded": any(w.model_loaded for w in healthy),
+            "attentionBackend": next((w.attention_backend for w in healthy if w.attention_backend), ""),
+            "queued": sum(w.queued for w in healthy),
+            "running": sum(w.running for w in healthy),
+            "workers": [w.to_dict() for w in self.workers],
+        }
+
+    def worker(self, name: str) -> Worker:
+        for worker in self.workers:
+            if worker.name == name:
+                return worker
+        raise HTTPException(status_code=404, detail=f"Unknown worker: {name}")
+
+
+def _forward_headers(request: Request) -> Dict[str, str]:
+    trace = request.headers.get("x-gemdirect-trace")
+    return {"X-Gemdirect-Trace": trace} if trace else {}
+
+
+def create_app(dispatcher: Dispatcher) -> FastAPI:
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        await dispatcher.start()
+        try:
+            yield
+        finally:
+            await dispatcher.stop()
+
+    app = FastAPI(
+        title="FastVideo Dispatcher for gemDirect1",
+        description="Routes FastVideo adapter requests across worker processes",
+        version="1.0.0",
+        lifespan=lifespan,
+    )
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["http://localhost:3000", "http://127.0.0.1:3000"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    @app.get("/health")
+    async def health_check():
+        """Aggregate health; per-worker state under `workers`"""
+        return dispatcher.health()
+
+    @app.post("/generate")
+    async def generate_video(request: Request):
+        """Forward to a worker; blocks until the video is written"""
+        return await dispatcher.generate("/generate", await request.json(), _forward_headers(request))
+
+    @app.post("/generate/variants")
+    async def generate_variants(request: Request):
+        """Forward to a worker; the whole seed set runs on one worker"""
+        return await dispatcher.generate("/generate/variants", await request.json(), _forward_headers(request))
+
+    @app.post("/jobs", status_code=202)
+    async def submit_job(request: Request):
+        """Queue a generation and return immediately; poll GET /jobs/{jobId}"""
+        return dispatcher.status(dispatcher.submit(await request.json(), _forward_headers(request)))
+
+    @app.get("/jobs/{job_id}")
+    async def job_status(job_id: str):
+        job = dispatcher.jobs.get(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+        return dispatcher.status(job)
+
+    @app.get("/workers/{name}/videos/{path:path}")
+    async def proxy_video(name: str, path: str, request: Request):
+        """Stream a worker's /videos response, passing Range through"""
+        worker = dispatcher.worker(name)
+        headers = {k: v for k, v in request.headers.items() if k.lower() in PROXY_REQUEST_HEADERS}
+        try:
+            upstream = await dispatcher.client.send(
+                dispatcher.client.build_request("GET", f"{worker.url}/videos/{path}", headers=headers), stream=True)
+        except httpx.TransportError as e:
+            raise HTTPException(status_code=502, detail=f"Worker {name} unreachable: {e}")
+        return StreamingResponse(
+            upstream.aiter_raw(),
+            status_code=upstream.status_code,
+            headers={k: v for k, v in upstream.headers.items() if k.lower() in PROXY_RESPONSE_HEADERS},
+            background=BackgroundTask(upstream.aclose),
+        )
+
+    return app
+
+
+def spawn_standins(count: int, base_port: int, model_ids: Optional[Sequence[str]] = None,
+                   env: Optional[Dict[str, str]] = None) -> Tuple[List[subprocess.Popen], List[str]]:
+    """Start `count` CPU stand-in workers on consecutive ports; returns (processes, URLs)."""
+    processes, urls = [], []
+    for i in range(count):
+        port = base_port + i
+        worker_env = {**os.environ, **(env or {}), "FASTVIDEO_STANDIN": "1",
+                      "FASTVIDEO_HOST": "127.0.0.1", "FASTVIDEO_PORT": str(port)}
+        worker_env.pop("FASTVIDEO_WORKERS", None)
+        if model_ids:
+            worker_env["FASTVIDEO_MODEL_ID"] = model_ids[i % len(model_ids)]
+        processes.append(subprocess.Popen([sys.executable, str(SERVER_SCRIPT)], env=worker_env,
+                                          stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL))
+        urls.append(f"http://127.0.0.1:{port}")
+    return processes, urls
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Route FastVideo adapter requests across workers")
+    parser.add_argument("--worker", action="append", default=[], help="Worker adapter URL (repeatable)")
+    parser.add_argument("--standins", type=int, default=0, help="Also start N local CPU stand-in workers")
+    parser.add_argument("--standin-port", type=int, default=8056, help="First port for stand-in workers")
+    parser.add_argument("--host", default=os.environ.get("FASTVIDEO_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.environ.get("FASTVIDEO_PORT", "8055")))
+    args = parser.parse_args(argv)
+
+    import uvicorn
+
+    urls = args.worker or [u for u in os.environ.get("FASTVIDEO_WORKERS", "").split(",") if u.strip()]
+    processes, standin_urls = spawn_standins(args.standins, args.standin_port) if args.standins else ([], [])
+    urls = urls + standin_urls
+    if not urls:
+        print("ERROR: no workers; pass --worker URL, --standins N or set FASTVIDEO_WORKERS")
+        return 2
+
+    print(f"FastVideo dispatcher on http://{args.host}:{args.port} -> {', '.join(urls)}")
+    try:
+        uvicorn.run(create_app(Dispatcher(urls)), host=args.host, port=args.port, log_level="info")
+    finally:
+        for process in processes:
+            process.terminate()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,39 +2,53 @@
 FastVideo Local Video Generation Adapter
 HTTP service wrapping FastVideo/FastWan2.2-TI2V-5B for gemDirect1 integration
 """
+import asyncio
 import os
+import random
 import sys
 import json
-import base64
 import time
 import traceback
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
 from pathlib import Path
-from typing import Optional, Dict, Any
-from io import BytesIO
+from typing import Literal, Optional, Dict, Any, Union
 
-from fastapi import FastAPI, HTTPException, Request
+from fastapi import FastAPI, Header, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel, Field
 import uvicorn
 
-# PIL for image handling
-try:
-    from PIL import Image
-except ImportError:
-    print("ERROR: PIL/Pillow not installed. Run: pip install pillow")
-    sys.exit(1)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "tracing"))
+from video_io import write_video
+from conditioning_cache import KeyframeCache, content_key
+from job_journal import MAX_RECOVERIES, JobJournal, JournalEntry
+from media import MediaRegistry, create_media_router, media_urls
+from scheduler import Job, Scheduler, SchedulerDraining
+import tracing
 
-# FastVideo imports
+# Dispatcher mode: front the worker adapters in FASTVIDEO_WORKERS instead of loading a model here
+if __name__ == "__main__" and os.environ.get("FASTVIDEO_WORKERS"):
+    import dispatcher
+    sys.exit(dispatcher.main())
+
+# FastVideo imports (FASTVIDEO_STANDIN=1: CPU stand-ins, see standin.py)
 try:
-    from fastvideo import VideoGenerator, SamplingParam
-    from fastvideo.fastvideo_args import FastVideoArgs
-    from fastvideo.worker.multiproc_executor import MultiprocExecutor
+    if os.environ.get("FASTVIDEO_STANDIN") == "1":
+        from standin import VideoGenerator, SamplingParam, FastVideoArgs, MultiprocExecutor
+    else:
+        from fastvideo import VideoGenerator, SamplingParam
+        from fastvideo.fastvideo_args import FastVideoArgs
+        from fastvideo.worker.multiproc_executor import MultiprocExecutor
 except ImportError:
     print("ERROR: FastVideo not installed. Run: pip install fastvideo")
     sys.exit(1)
 
 # --- Request/Response Models ---
+MAX_VARIANTS = 16
+
 class GenerateVideoRequest(BaseModel):
     prompt: str = Field(..., description="Human-readable text prompt for video generation")
     negativePrompt: Optional[str] = Field(None, description="Negative prompt to avoid certain features")
@@ -45,6 +59,9 @@ class GenerateVideoRequest(BaseModel):
     height: int = Field(544, ge=256, le=1080, description="Video height")
     seed: Optional[int] = Field(None, description="Random seed for reproducibility")
     outputDir: str = Field("artifacts/fastvideo", description="Output directory for generated videos")
+    lane: Optional[Literal["interactive", "batch"]] = Field(
+        None, description="Scheduling lane (default: interactive if the estimated run is short, else batch)")
+    modelId: Optional[str] = Field(None, description="Routing hint for the dispatcher; a single adapter ignores it")
 
 class GenerateVideoResponse(BaseModel):
     status: str
@@ -54,14 +71,81 @@ class GenerateVideoResponse(BaseModel):
     seed: Optional[int] = None
     warnings: list[str] = []
     error: Optional[str] = None
+    tracePath: Optional[str] = None
+    jobId: Optional[str] = None
+    lane: Optional[str] = None
+    queueWaitMs: Optional[int] = None
+    estimatedMs: Optional[int] = None
+    preprocessMs: Optional[int] = None  # keyframe decode + resize, or cache lookup
+    keyframeCacheHit: Optional[bool] = None
+    fromJournal: Optional[bool] = None  # answered from the job journal, not re-rendered
+    videoId: Optional[str] = None
+    videoUrl: Optional[str] = None  # relative to the adapter; Range requests supported
+    previewUrl: Optional[str] = None
+    posterUrl: Optional[str] = None
+
+class GenerateVariantsRequest(GenerateVideoRequest):
+    seeds: Optional[list[int]] = Field(None, description=f"Explicit seeds, one video each (at most {MAX_VARIANTS})")
+    count: int = Field(4, ge=1, le=MAX_VARIANTS, description="Variants when seeds is omitted: seed, seed+1, ...")
+
+class GenerateVariantsResponse(BaseModel):
+    status: str  # complete | partial | error
+    variants: list[GenerateVideoResponse] = []
+    durationMs: Optional[int] = None
+    sharedMs: Optional[int] = None  # seed-independent setup paid once for all variants
+    preprocessMs: Optional[int] = None
+    keyframeCacheHit: Optional[bool] = None
+    fromJournal: Optional[bool] = None
+    warnings: list[str] = []
+    error: Optional[str] = None
+    tracePath: Optional[str] = None
+    jobId: Optional[str] = None
+    lane: Optional[str] = None
+    queueWaitMs: Optional[int] = None
+    estimatedMs: Optional[int] = None
+
+class JobStatusResponse(BaseModel):
+    jobId: str
+    status: str
+    lane: str
+    position: Optional[int] = None
+    etaMs: Optional[int] = None
+    estimatedMs: int
+    estimatedMemoryMb: int
+    queueWaitMs: Optional[int] = None
+    durationMs: Optional[int] = None
+    error: Optional[str] = None
+    result: Optional[Union[GenerateVideoResponse, GenerateVariantsResponse]] = None
 
 # --- Application Setup ---
+@asynccontextmanager
+async def _lifespan(app: FastAPI):
+    global _journal
+    _journal = _open_journal()
+    if _journal:
+        _journal.prune(float(os.environ.get("FASTVIDEO_JOURNAL_RETENTION_DAYS", "30")) * 86400)
+        _recover_jobs()
+    yield
+    # SIGTERM: uvicorn has stopped accepting requests; let running jobs finish
+    _scheduler.drain()
+    if not await _scheduler.wait_idle(timeout=float(os.environ.get("FASTVIDEO_DRAIN_TIMEOUT_S", "300"))):
+        print("WARNING: Drain timed out; unfinished jobs will be requeued on the next start")
+    journal, _journal = _journal, None
+    if journal:
+        journal.close()
+
 app = FastAPI(
     title="FastVideo Adapter for gemDirect1",
     description="HTTP adapter for local FastVideo (FastWan2.2-TI2V-5B) video generation",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=_lifespan,
 )
 
+@app.exception_handler(SchedulerDraining)
+async def _draining(request: Request, exc: SchedulerDraining):
+    # The job stays in the journal and resumes after the restart; resubmitting attaches to it
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "30"})
+
 # CORS for local dev (React on port 3000, adapter on 8055)
 app.add_middleware(
     CORSMiddleware,
@@ -73,8 +157,40 @@ app.add_middleware(
 
 # Global generator instance (lazy-loaded)
 _generator: Optional[VideoGenerator] = None
+# One load at a time; the load runs in a thread so /health keeps answering (the dispatcher treats silence as death)
+_generator_lock = asyncio.Lock()
 _model_id: str = os.environ.get("FASTVIDEO_MODEL_ID", "hao-ai-lab/FastHunyuan-diffusers")
 
+# Admission control: jobs are costed from width x height x numFrames and run
+# interactive lane first, shortest job first, within the GPU memory budget
+_scheduler = Scheduler.from_env()
+
+# Decoded/resized keyframes by content hash, so seed sweeps over one keyframe decode it once
+_keyframe_cache = KeyframeCache(max_bytes=int(os.environ.get("FASTVIDEO_KEYFRAME_CACHE_MB", "256")) * 1024 * 1024)
+
+# Keyframe decode/resize runs here, not on the event loop. Threads rather than processes:
+# Pillow releases the GIL while decoding and resampling, and cached images stay shareable
+_preprocess_pool = ThreadPoolExecutor(
+    max_workers=int(os.environ.get("FASTVIDEO_PREPROCESS_WORKERS", "2")), thread_name_prefix="keyframe")
+
+# Generated videos served over HTTP (/videos/{id}, /preview, /poster) with Range support
+_media = MediaRegistry()
+_media_tasks: set = set()
+app.include_router(create_media_router(_media))
+
+# Durable record of every job (job_journal.py); opened at startup
+_journal: Optional[JobJournal] = None
+
+def _open_journal() -> Optional[JobJournal]:
+    """FASTVIDEO_JOURNAL: journal path (default artifacts/fastvideo/jobs-<port>.sqlite); 0 disables it"""
+    # One journal per adapter: workers sharing a host must not recover each other's jobs
+    default = f"artifacts/fastvideo/jobs-{os.environ.get('FASTVIDEO_PORT', '8055')}.sqlite"
+    path = os.environ.get("FASTVIDEO_JOURNAL", default).strip()
+    if path.lower() in ("0", "off", "false", "no"):
+        return None
+    return JobJournal(path)
+
+@tracing.traced("load_generator")
 def get_generator() -> VideoGenerator:
     """Lazy-load the VideoGenerator (expensive operation)"""
     global _generator
@@ -98,33 +214,366 @@ def get_generator() -> VideoGenerator:
         print(f"Model loaded in {elapsed:.2f}s")
     return _generator
 
-def decode_base64_image(base64_str: str) -> Image.Image:
-    """Decode base64 string to PIL Image (strips data URL prefix if present)"""
-    if base64_str.startswith("data:"):
-        base64_str = base64_str.split(",", 1)[1]
-    
-    image_data = base64.b64decode(base64_str)
-    return Image.open(BytesIO(image_data)).convert("RGB")
-
 # --- Health Check ---
 @app.get("/health")
 async def health_check():
-    """Quick health probe (doesn't load model)"""
+    """Quick health probe (doesn't load model); status is "draining" once SIGTERM is received"""
     return {
-        "status": "ok",
+        "status": "draining" if _scheduler.draining else "ok",
         "service": "fastvideo-adapter",
         "modelId": _model_id,
         "modelLoaded": _generator is not None,
-        "attentionBackend": os.environ.get("FASTVIDEO_ATTENTION_BACKEND", "VIDEO_SPARSE_ATTN")
+        "attentionBackend": os.environ.get("FASTVIDEO_ATTENTION_BACKEND", "VIDEO_SPARSE_ATTN"),
+        "queued": len(_scheduler.queued),
+        "running": len(_scheduler.running),
+        "keyframeCache": _keyframe_cache.stats(),
+        "journal": _journal.stats() if _journal else None,
+        "draining": _scheduler.draining,
+    }
+
+# --- Queue ---
+@app.get("/queue")
+async def queue_status():
+    """Running and queued jobs in dispatch order, with positions, ETAs and the cost model"""
+    return _scheduler.snapshot()
+
+@app.post("/jobs", response_model=JobStatusResponse, status_code=202)
+async def submit_job(
+    request: GenerateVideoRequest,
+    x_gemdirect_trace: Optional[str] = Header(None),
+):
+    """Queue a generation and return immediately with its position and ETA; poll GET /jobs/{jobId}"""
+    found = _reuse("generate", request)
+    if isinstance(found, JournalEntry):
+        return _journal_status(found)
+    job = found or _submit(request, x_gemdirect_trace)
+    job.detached = True
+    return _scheduler.status(job)
+
+@app.get("/jobs/{job_id}", response_model=JobStatusResponse)
+async def job_status(job_id: str):
+    """Queue position and ETA while waiting; the GenerateVideoResponse once finished"""
+    job = _scheduler.jobs.get(job_id)
+    if job is None:
+        # Finished before this process started (or aged out of the scheduler)
+        entry = _journal.get(job_id) if _journal else None
+        if entry is None:
+            raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+        return _journal_status(entry)
+    status = _scheduler.status(job)
+    if job.status == "complete":
+        status["result"] = job.result
+    return status
+
+def _submit(request: GenerateVideoRequest, trace_header: Optional[str], kind: str = "generate",
+            job_id: Optional[str] = None) -> Job:
+    """Queue a generate or variants job and journal it; `job_id` resubmits a journaled job."""
+    variants = kind == "variants"
+    generate = _generate_variants if variants else _generate_video
+
+    async def run(job: Job):
+        _journal_transition(job.id, "running")
+        # The first job also pays for model loading; don't calibrate on it
+        job.calibrate = _generator is not None
+        try:
+            response = await _traced_generate(request, trace_header, generate)
+        except HTTPException as e:
+            _journal_transition(job.id, "error", error=str(e.detail))
+            raise
+        except Exception as e:
+            _journal_transition(job.id, "error", error=str(e))
+            raise
+        if response.status != "complete":
+            job.calibrate = False
+        response.jobId, response.lane = job.id, job.lane
+        response.queueWaitMs = int((job.started - job.submitted) * 1000)
+        response.estimatedMs = int(job.estimate.seconds * 1000)
+        _journal_transition(job.id, "error" if response.status == "error" else "complete",
+                            result=response.model_dump(), error=response.error)
+        return response
+
+    job = _scheduler.submit(run, request.width, request.height, request.numFrames, lane=request.lane,
+                            repeats=len(request.seeds) if variants else 1, job_id=job_id)
+    # A recovered job's submitter polls GET /jobs/{jobId}, if anyone still does
+    job.detached = job_id is not None
+    if _journal and job_id is None:
+        _journal.submitted(job.id, kind, _params_hash(kind, request), request.model_dump(), job.lane,
+                           int(job.estimate.seconds * 1000), int(job.estimate.memory_mb))
+    return job
+
+async def _wait(job: Job):
+    """
+    Await a job for a synchronous request. If a drain turns the request away
+    before the job starts, the caller retries elsewhere (the dispatcher does),
+    so the job is closed in the journal rather than re-rendered on the next
+    start, unless a /jobs submitter is still polling for it.
+    """
+    try:
+        return await _scheduler.wait(job)
+    except SchedulerDraining:
+        if not job.detached and job.status == "queued":
+            job.status, job.error = "error", "Abandoned: adapter shut down before the job started"
+            _journal_transition(job.id, "error", error=job.error)
+        raise
+
+def _journal_transition(job_id: str, state: str, **kwargs) -> None:
+    if _journal:
+        _journal.transition(job_id, state, **kwargs)
+
+def _params_hash(kind: str, request: GenerateVideoRequest) -> Optional[str]:
+    """Journal key for a deterministic request; None without a seed (a repeat should render anew)"""
+    if request.seed is None and not getattr(request, "seeds", None):
+        return None
+    params = request.model_dump(exclude={"lane", "modelId"})
+    return content_key(kind, _model_id, json.dumps(params, sort_keys=True))
+
+def _reuse(kind: str, request: GenerateVideoRequest) -> Union[Job, JournalEntry, None]:
+    """
+    An identical earlier request: the live Job if it is still queued or running,
+    or its journal entry if it completed and its videos are still on disk.
+    """
+    params_hash = _params_hash(kind, request) if _journal else None
+    entry = _journal.find(params_hash) if params_hash else None
+    if entry is None:
+        return None
+    live = _scheduler.jobs.get(entry.id)
+    if live is not None and live.status in ("queued", "running"):
+        return live
+    if entry.state == "complete" and (entry.result or {}).get("status") == "complete" and entry.outputs_exist():
+        for path in entry.output_paths():
+            _media.register(path)  # same id as before the restart: derived from path and mtime
+        return entry
+    return None
+
+def _journal_response(entry: JournalEntry) -> Union[GenerateVideoResponse, GenerateVariantsResponse]:
+    model = GenerateVariantsResponse if entry.kind == "variants" else GenerateVideoResponse
+    return model(**{**entry.result, "fromJournal": True})
+
+def _journal_status(entry: JournalEntry) -> dict:
+    return {
+        "jobId": entry.id,
+        "status": entry.state,
+        "lane": entry.lane,
+        "estimatedMs": entry.estimated_ms,
+        "estimatedMemoryMb": entry.estimated_memory_mb,
+        "error": entry.error,
+        "result": _journal_response(entry) if entry.state == "complete" and entry.result else None,
     }
 
+def _recover_jobs() -> None:
+    """Resubmit jobs the previous process journaled but never finished, under their original ids"""
+    for entry in _journal.unfinished():
+        if entry.request is None or entry.recoveries >= MAX_RECOVERIES:
+            _journal.transition(entry.id, "error", error=f"Interrupted {entry.recoveries + 1} times; not requeued")
+            continue
+        model = GenerateVariantsRequest if entry.kind == "variants" else GenerateVideoRequest
+        _journal.transition(entry.id, "requeued")
+        _submit(model(**entry.request), None, kind=entry.kind, job_id=entry.id)
+        print(f"Requeued interrupted job {entry.id} ({entry.kind})")
+
 # --- Generate Video Endpoint ---
 @app.post("/generate", response_model=GenerateVideoResponse)
-async def generate_video(request: GenerateVideoRequest):
+async def generate_video(
+    request: GenerateVideoRequest,
+    x_gemdirect_trace: Optional[str] = Header(None),
+):
     """
     Generate video from text prompt (and optional keyframe image)
     Returns MP4 path and metadata
+
+    Waits in the scheduler queue first (see scheduler.py); use POST /jobs
+    to get the queue position and ETA without holding the connection.
+
+    Traced when GEMDIRECT_TRACE=1 or per request with the header
+    `X-Gemdirect-Trace: 1` (`profile` also samples the request's stack).
+    The trace is written next to the video and returned as tracePath.
+
+    A repeat of a seeded request that already completed is answered from the
+    job journal (fromJournal) while its video still exists.
+    """
+    found = _reuse("generate", request)
+    if isinstance(found, JournalEntry):
+        return _journal_response(found)
+    return await _wait(found or _submit(request, x_gemdirect_trace))
+
+@app.post("/generate/variants", response_model=GenerateVariantsResponse)
+async def generate_variants(
+    request: GenerateVariantsRequest,
+    x_gemdirect_trace: Optional[str] = Header(None),
+):
     """
+    Generate one video per seed for the same prompt/keyframe/settings.
+
+    Seeds come from `seeds`, or are `seed, seed+1, ...` (`count` of them).
+    The keyframe is decoded and resized once and the whole set is admitted
+    as a single scheduler job, so variants run back to back on the loaded
+    model instead of re-queueing per seed.
+    """
+    if request.seeds is None:
+        base = request.seed if request.seed is not None else random.randrange(2**31)
+        request.seeds = [base + i for i in range(request.count)]
+    if not 1 <= len(request.seeds) <= MAX_VARIANTS:
+        raise HTTPException(status_code=422, detail=f"seeds must list 1-{MAX_VARIANTS} values")
+    found = _reuse("variants", request)
+    if isinstance(found, JournalEntry):
+        return _journal_response(found)
+    return await _wait(found or _submit(request, x_gemdirect_trace, kind="variants"))
+
+async def _traced_generate(request: GenerateVideoRequest, trace_header: Optional[str], generate):
+    header = (trace_header or "").strip().lower()
+    enabled = True if header in ("1", "true", "profile") else None
+    profile = True if header == "profile" else None
+    with tracing.trace_request(
+        "fastvideo", request.outputDir, enabled=enabled, profile=profile,
+        modelId=_model_id, numFrames=request.numFrames, fps=request.fps,
+        width=request.width, height=request.height, keyframe=bool(request.keyframeBase64),
+        variants=len(getattr(request, "seeds", None) or [1]),
+    ) as tracer:
+        response = await generate(request)
+    if tracer is not None:
+        response.tracePath = str(tracer.path)
+    return response
+
+async def _prepare_conditioning(request: GenerateVideoRequest, warnings: list) -> tuple:
+    """
+    Seed-independent inputs: (keyframe at the target size or None, combined prompt,
+    keyframe response fields: preprocessMs and keyframeCacheHit)
+    """
+    # Handle keyframe image if provided (TI2V mode); cached by content hash + size + filter
+    start_image = None
+    keyframe_stats = {}
+    if request.keyframeBase64:
+        size = (request.width, request.height)
+        try:
+            with tracing.span("prepare_keyframe", chars=len(request.keyframeBase64)) as span:
+                started = time.perf_counter()
+                start_image, original_size, hit = await asyncio.get_running_loop().run_in_executor(
+                    _preprocess_pool, _keyframe_cache.prepare, request.keyframeBase64, size)
+                keyframe_stats = {"preprocessMs": int((time.perf_counter() - started) * 1000),
+                                  "keyframeCacheHit": hit}
+                span.set(cacheHit=hit)
+        except Exception as e:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Failed to decode keyframe image: {str(e)}"
+            )
+        if original_size != size:
+            warnings.append(f"Keyframe resized from {original_size} to {size}")
+
+    # Build full prompt (combine positive + negative)
+    full_prompt = request.prompt
+    if request.negativePrompt:
+        full_prompt += f"\n\nNegative: {request.negativePrompt}"
+    return start_image, full_prompt, keyframe_stats
+
+async def _load_generator() -> VideoGenerator:
+    if _generator is not None:
+        return _generator
+    try:
+        async with _generator_lock:
+            return await asyncio.to_thread(get_generator)
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to load FastVideo model: {str(e)}"
+        )
+
+async def _render(generator: VideoGenerator, request: GenerateVideoRequest, seed: Optional[int],
+                  start_image, full_prompt: str, output_dir: Path) -> tuple:
+    """Run one generation and return (MP4 path, media id); maps generator failures to HTTP errors."""
+    print(f"Generating video: {request.numFrames} frames @ {request.fps} FPS, {request.width}x{request.height}")
+    print(f"Prompt: {full_prompt[:100]}...")
+
+    try:
+        # Build sampling parameters
+        sampling_param = SamplingParam(
+            prompt=full_prompt,
+            num_frames=request.numFrames,
+            fps=request.fps,
+            width=request.width,
+            height=request.height,
+            seed=seed if seed is not None else -1,
+            negative_prompt=request.negativePrompt if request.negativePrompt else "",
+            image=start_image  # For I2V mode
+        )
+
+        # Off the event loop so /queue and /jobs stay responsive during generation
+        with tracing.span("generate", frames=request.numFrames, seed=sampling_param.seed):
+            result = await asyncio.to_thread(generator.generate_video, sampling_param=sampling_param)
+
+        if not result:
+            raise Exception("Generator returned empty results")
+    except Exception as e:
+        error_msg = str(e)
+        if "CUDA out of memory" in error_msg or "OutOfMemoryError" in error_msg:
+            raise HTTPException(
+                status_code=507,  # Insufficient Storage (closest HTTP code)
+                detail="CUDA OOM: Try reducing numFrames, resolution, or closing other GPU processes"
+            )
+        elif "No such file" in error_msg or "model" in error_msg.lower():
+            raise HTTPException(
+                status_code=500,
+                detail=f"Model not found or corrupted: {error_msg}"
+            )
+        else:
+            raise HTTPException(status_code=500, detail=f"Generation failed: {error_msg}")
+
+    # FastVideo result is a dict with 'save_path' or video data
+    output_path = None
+    frames = None
+
+    if isinstance(result, dict):
+        # Result dict should contain save_path or output_video_path
+        output_path = result.get('save_path') or result.get('output_video_path')
+
+        if not output_path:
+            # Video data returned, need to save manually
+            timestamp = int(time.time() * 1000)
+            output_filename = f"fastvideo_{timestamp}.mp4"
+            output_path = str(output_dir / output_filename)
+
+            if 'video' in result:
+                # Save video frames
+                frames = result['video']
+                with tracing.span("write_video", frames=len(frames)):
+                    await asyncio.to_thread(write_video, frames, output_path, request.fps)
+            else:
+                raise Exception(f"Result dict missing save_path and video data: {result.keys()}")
+
+    elif isinstance(result, list):
+        # List of video frames
+        timestamp = int(time.time() * 1000)
+        output_filename = f"fastvideo_{timestamp}.mp4"
+        output_path = str(output_dir / output_filename)
+
+        frames = result
+        with tracing.span("write_video", frames=len(frames)):
+            # Off the event loop so /health keeps answering (the dispatcher treats silence as death)
+            await asyncio.to_thread(write_video, frames, output_path, request.fps)
+
+    else:
+        raise Exception(f"Unexpected result type: {type(result)}")
+
+    if not Path(output_path).exists():
+        raise HTTPException(
+            status_code=500,
+            detail=f"Video generation succeeded but output file not created: {output_path}"
+        )
+    return str(output_path), await _register_media(output_path, frames, request.fps)
+
+async def _register_media(output_path: str, frames, fps: int) -> str:
+    """Register a video for /videos; preview and poster come from the frames when we have them."""
+    if frames is not None:
+        with tracing.span("write_derivatives", frames=len(frames)):
+            return await asyncio.to_thread(_media.register, output_path, frames, fps)
+    media_id = _media.register(output_path)
+    # FastVideo wrote the file itself: decode it once in the background rather than delay the response
+    task = asyncio.create_task(asyncio.to_thread(_media.ensure_derivatives, media_id))
+    _media_tasks.add(task)
+    task.add_done_callback(_media_tasks.discard)
+    return media_id
+
+async def _generate_video(request: GenerateVideoRequest) -> GenerateVideoResponse:
     start_time = time.time()
     warnings = []
     
@@ -134,121 +583,23 @@ async def generate_video(request: GenerateVideoRequest):
         output_dir.mkdir(parents=True, exist_ok=True)
         
         # Load generator (lazy)
-        try:
-            generator = get_generator()
-        except Exception as e:
-            raise HTTPException(
-                status_code=500,
-                detail=f"Failed to load FastVideo model: {str(e)}"
-            )
-        
-        # Handle keyframe image if provided (TI2V mode)
-        start_image = None
-        if request.keyframeBase64:
-            try:
-                start_image = decode_base64_image(request.keyframeBase64)
-                # Resize if needed to match target resolution
-                if start_image.size != (request.width, request.height):
-                    warnings.append(f"Keyframe resized from {start_image.size} to ({request.width}, {request.height})")
-                    start_image = start_image.resize((request.width, request.height), Image.Resampling.LANCZOS)
-            except Exception as e:
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"Failed to decode keyframe image: {str(e)}"
-                )
-        
-        # Build full prompt (combine positive + negative)
-        full_prompt = request.prompt
-        if request.negativePrompt:
-            full_prompt += f"\n\nNegative: {request.negativePrompt}"
-        
-        # Generate video
-        print(f"Generating video: {request.numFrames} frames @ {request.fps} FPS, {request.width}x{request.height}")
-        print(f"Prompt: {full_prompt[:100]}...")
-        
-        try:
-            # Build sampling parameters
-            sampling_param = SamplingParam(
-                prompt=full_prompt,
-                num_frames=request.numFrames,
-                fps=request.fps,
-                width=request.width,
-                height=request.height,
-                seed=request.seed if request.seed is not None else -1,
-                negative_prompt=request.negativePrompt if request.negativePrompt else "",
-                image=start_image  # For I2V mode
-            )
-            
-            # Generate video (returns dict or list)
-            result = generator.generate_video(sampling_param=sampling_param)
-            
-            if not result:
-                raise Exception("Generator returned empty results")
-        except Exception as e:
-            error_msg = str(e)
-            if "CUDA out of memory" in error_msg or "OutOfMemoryError" in error_msg:
-                raise HTTPException(
-                    status_code=507,  # Insufficient Storage (closest HTTP code)
-                    detail="CUDA OOM: Try reducing numFrames, resolution, or closing other GPU processes"
-                )
-            elif "No such file" in error_msg or "model" in error_msg.lower():
-                raise HTTPException(
-                    status_code=500,
-                    detail=f"Model not found or corrupted: {error_msg}"
-                )
-            else:
-                raise HTTPException(status_code=500, detail=f"Generation failed: {error_msg}")
+        generator = await _load_generator()
+        start_image, full_prompt, keyframe_stats = await _prepare_conditioning(request, warnings)
+        output_path, media_id = await _render(generator, request, request.seed, start_image, full_prompt, output_dir)
         
         duration_ms = int((time.time() - start_time) * 1000)
-        
-        # FastVideo result is a dict with 'save_path' or video data
-        output_path = None
-        
-        if isinstance(result, dict):
-            # Result dict should contain save_path or output_video_path
-            output_path = result.get('save_path') or result.get('output_video_path')
-            
-            if not output_path:
-                # Video data returned, need to save manually
-                timestamp = int(time.time() * 1000)
-                output_filename = f"fastvideo_{timestamp}.mp4"
-                output_path = str(output_dir / output_filename)
-                
-                if 'video' in result:
-                    # Save video frames
-                    import imageio
-                    video_frames = result['video']
-                    imageio.mimsave(output_path, video_frames, fps=request.fps)
-                else:
-                    raise Exception(f"Result dict missing save_path and video data: {result.keys()}")
-        
-        elif isinstance(result, list):
-            # List of video frames
-            timestamp = int(time.time() * 1000)
-            output_filename = f"fastvideo_{timestamp}.mp4"
-            output_path = str(output_dir / output_filename)
-            
-            import imageio
-            imageio.mimsave(output_path, result, fps=request.fps)
-        
-        else:
-            raise Exception(f"Unexpected result type: {type(result)}")
-        
-        if not Path(output_path).exists():
-            raise HTTPException(
-                status_code=500,
-                detail=f"Video generation succeeded but output file not created: {output_path}"
-            )
-        
         print(f"Video generated: {output_path} ({duration_ms}ms)")
         
         return GenerateVideoResponse(
             status="complete",
-            outputVideoPath=str(output_path),
+            outputVideoPath=output_path,
             frames=request.numFrames,
             durationMs=duration_ms,
             seed=request.seed,
-            warnings=warnings
+            warnings=warnings,
+            videoId=media_id,
+            **media_urls(media_id),
+            **keyframe_stats,
         )
         
     except HTTPException:
@@ -261,6 +612,54 @@ async def generate_video(request: GenerateVideoRequest):
             warnings=warnings
         )
 
+async def _generate_variants(request: GenerateVariantsRequest) -> GenerateVariantsResponse:
+    start_time = time.time()
+    warnings = []
+
+    try:
+        output_dir = Path(request.outputDir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        generator = await _load_generator()
+        start_image, full_prompt, keyframe_stats = await _prepare_conditioning(request, warnings)
+        shared_ms = int((time.time() - start_time) * 1000)
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"ERROR: {traceback.format_exc()}")
+        return GenerateVariantsResponse(status="error", error=str(e), warnings=warnings)
+
+    variants = []
+    for seed in request.seeds:
+        variant_start = time.time()
+        try:
+            output_path, media_id = await _render(generator, request, seed, start_image, full_prompt, output_dir)
+        except HTTPException as e:
+            # OOM and model failures will hit every remaining seed too
+            if e.status_code == 507 or not variants:
+                raise
+            variants.append(GenerateVideoResponse(status="error", seed=seed, error=str(e.detail)))
+            continue
+        except Exception as e:
+            print(f"ERROR: {traceback.format_exc()}")
+            variants.append(GenerateVideoResponse(status="error", seed=seed, error=str(e)))
+            continue
+        variant_ms = int((time.time() - variant_start) * 1000)
+        print(f"Variant seed={seed}: {output_path} ({variant_ms}ms)")
+        variants.append(GenerateVideoResponse(
+            status="complete", outputVideoPath=output_path, frames=request.numFrames,
+            durationMs=variant_ms, seed=seed, videoId=media_id, **media_urls(media_id),
+        ))
+
+    completed = sum(1 for v in variants if v.status == "complete")
+    return GenerateVariantsResponse(
+        status="complete" if completed == len(variants) else ("partial" if completed else "error"),
+        variants=variants,
+        durationMs=int((time.time() - start_time) * 1000),
+        sharedMs=shared_ms,
+        warnings=warnings,
+        **keyframe_stats,
+    )
+
 # --- Server Entry Point ---
 if __name__ == "__main__":
     port = int(os.environ.get("FASTVIDEO_PORT", "8055"))
@@ -275,9 +674,15 @@ if __name__ == "__main__":
 ╚══════════════════════════════════════════════════════════════╝
 """)
     
-    uvicorn.run(
+    class DrainingServer(uvicorn.Server):
+        def handle_exit(self, sig, frame):
+            # SIGTERM/SIGINT: start no new jobs; running ones finish before the lifespan exits
+            _scheduler.drain()
+            super().handle_exit(sig, frame)
+
+    DrainingServer(uvicorn.Config(
         app,
         host=host,
         port=port,
         log_level="info"
-    )
+    )).run()
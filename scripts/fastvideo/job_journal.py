@@ -0,0 +1,212 @@
+"""
+Restart-safe job journal for the FastVideo adapter.
+
+Jobs used to live only in memory, so when the adapter restarted or crashed
+mid-story every in-flight and finished request was forgotten and the client
+re-submitted the whole story. Every job now leaves a record in a SQLite
+store (WAL mode, so a crash loses at most the last transaction). A job row
+holds its kind, a hash of its parameters, the request (needed to requeue
+it), its current state and, once finished, the response and output path.
+The events table is an append-only log of state transitions:
+
+    queued -> running -> complete | error
+    queued | running -> requeued -> running -> ...   (after a restart)
+
+On startup, jobs journaled as queued or running were interrupted, and they
+are submitted again under the same job id. A job interrupted MAX_RECOVERIES
+times is marked as an error instead, so a request that crashes the process
+cannot crash-loop it. A finished job drops its request body (which may carry
+a multi-megabyte keyframe), and finished jobs older than the retention
+period are pruned on startup.
+
+Requests with an explicit seed are deterministic. A repeat with the same
+parameters hash is answered from the journal while the output file still
+exists, or attached to the identical job already queued or running. Re-runs
+after a crash therefore skip scenes that had already finished.
+
+Kept free of FastVideo/FastAPI imports so it can be tested without a GPU stack.
+"""
+import json
+import sqlite3
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+SCHEMA_VERSION = 1
+ACTIVE_STATES = ("queued", "running", "requeued")
+FINISHED_STATES = ("complete", "error")
+MAX_RECOVERIES = 3
+DEFAULT_RETENTION_S = 30 * 24 * 3600
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id                  TEXT PRIMARY KEY,
+    kind                TEXT NOT NULL,
+    params_hash         TEXT,
+    state               TEXT NOT NULL,
+    lane                TEXT NOT NULL,
+    estimated_ms        INTEGER NOT NULL,
+    estimated_memory_mb INTEGER NOT NULL,
+    request             TEXT,
+    result              TEXT,
+    error               TEXT,
+    output_path         TEXT,
+    recoveries          INTEGER NOT NULL DEFAULT 0,
+    submitted           REAL NOT NULL,
+    updated             REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_params ON jobs(params_hash, submitted);
+CREATE INDEX IF NOT EXISTS jobs_state ON jobs(state, submitted);
+CREATE TABLE IF NOT EXISTS events (
+    job_id TEXT NOT NULL,
+    state  TEXT NOT NULL,
+    at     REAL NOT NULL,
+    detail TEXT
+);
+CREATE INDEX IF NOT EXISTS events_job ON events(job_id, at);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+@dataclass
+class JournalEntry:
+    id: str
+    kind: str
+    params_hash: Optional[str]
+    state: str
+    lane: str
+    estimated_ms: int
+    estimated_memory_mb: int
+    request: Optional[Dict[str, Any]]
+    result: Optional[Dict[str, Any]]
+    error: Optional[str]
+    output_path: Optional[str]
+    recoveries: int
+    submitted: float
+    updated: float
+
+    @classmethod
+    def from_row(cls, row: sqlite3.Row) -> "JournalEntry":
+        values = dict(row)
+        for key in ("request", "result"):
+            values[key] = json.loads(values[key]) if values[key] else None
+        return cls(**values)
+
+    def output_paths(self) -> List[str]:
+        """Every video the job wrote (one per variant for variant jobs)."""
+        return [p for p in (self.output_path or "").split("\n") if p]
+
+    def outputs_exist(self) -> bool:
+        paths = self.output_paths()
+        return bool(paths) and all(Path(p).exists() for p in paths)
+
+
+def result_output_paths(result: Dict[str, Any]) -> List[str]:
+    items = [result, *result.get("variants", [])]
+    return [item["outputVideoPath"] for item in items if item.get("outputVideoPath")]
+
+
+class JobJournal:
+    def __init__(self, db_path: Union[str, Path], clock=time.time):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.clock = clock
+        self._db = sqlite3.connect(str(self.db_path), timeout=30)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        version = self._db.execute("SELECT value FROM meta WHERE key='version'").fetchone()
+        if version is None:
+            self._db.execute("INSERT INTO meta VALUES ('version', ?)", (str(SCHEMA_VERSION),))
+            self._db.commit()
+        elif int(version[0]) != SCHEMA_VERSION:
+            raise RuntimeError(f"{self.db_path} has journal schema {version[0]}, expected {SCHEMA_VERSION}")
+
+    def close(self) -> None:
+        self._db.close()
+
+    def __enter__(self) -> "JobJournal":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _event(self, job_id: str, state: str, now: float, detail: Optional[str] = None) -> None:
+        self._db.execute("INSERT INTO events VALUES (?, ?, ?, ?)", (job_id, state, now, detail))
+
+    # --- Writes ---
+
+    def submitted(self, job_id: str, kind: str, params_hash: Optional[str], request: Dict[str, Any],
+                  lane: str, estimated_ms: int, estimated_memory_mb: int) -> None:
+        now = self.clock()
+        self._db.execute(
+            "INSERT INTO jobs (id, kind, params_hash, state, lane, estimated_ms, estimated_memory_mb, request,"
+            " submitted, updated) VALUES (?, ?, ?, 'queued', ?, ?, ?, ?, ?, ?)",
+            (job_id, kind, params_hash, lane, estimated_ms, estimated_memory_mb,
+             json.dumps(request, separators=(",", ":")), now, now),
+        )
+        self._event(job_id, "queued", now)
+        self._db.commit()
+
+    def transition(self, job_id: str, state: str, result: Optional[Dict[str, Any]] = None,
+                   error: Optional[str] = None) -> None:
+        """Record a state change; finishing stores the response and drops the request body."""
+        now = self.clock()
+        if state in FINISHED_STATES:
+            output = "\n".join(result_output_paths(result)) if result else None
+            self._db.execute(
+                "UPDATE jobs SET state = ?, result = ?, error = ?, output_path = ?, request = NULL, updated = ?"
+                " WHERE id = ?",
+                (state, json.dumps(result, separators=(",", ":")) if result else None, error, output, now, job_id),
+            )
+        elif state == "requeued":
+            self._db.execute("UPDATE jobs SET state = ?, recoveries = recoveries + 1, updated = ? WHERE id = ?",
+                             (state, now, job_id))
+        else:
+            self._db.execute("UPDATE jobs SET state = ?, updated = ? WHERE id = ?", (state, now, job_id))
+        self._event(job_id, state, now, error)
+        self._db.commit()
+
+    def prune(self, max_age_s: float = DEFAULT_RETENTION_S) -> int:
+        """Delete finished jobs (and their events) last updated over `max_age_s` ago."""
+        cutoff = self.clock() - max_age_s
+        ids = [r[0] for r in self._db.execute(
+            "SELECT id FROM jobs WHERE state IN ('complete', 'error') AND updated < ?", (cutoff,))]
+        self._db.executemany("DELETE FROM events WHERE job_id = ?", [(i,) for i in ids])
+        self._db.executemany("DELETE FROM jobs WHERE id = ?", [(i,) for i in ids])
+        self._db.commit()
+        return len(ids)
+
+    # --- Reads ---
+
+    def get(self, job_id: str) -> Optional[JournalEntry]:
+        row = self._db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return JournalEntry.from_row(row) if row else None
+
+    def find(self, params_hash: str) -> Optional[JournalEntry]:
+        """Most recent job with these parameters that is unfinished or completed."""
+        row = self._db.execute(
+            "SELECT * FROM jobs WHERE params_hash = ? AND state != 'error' ORDER BY submitted DESC LIMIT 1",
+            (params_hash,),
+        ).fetchone()
+        return JournalEntry.from_row(row) if row else None
+
+    def unfinished(self) -> List[JournalEntry]:
+        """Jobs a previous process queued or started but never finished, oldest first."""
+        rows = self._db.execute(
+            f"SELECT * FROM jobs WHERE state IN ({', '.join('?' * len(ACTIVE_STATES))}) ORDER BY submitted",
+            ACTIVE_STATES,
+        ).fetchall()
+        return [JournalEntry.from_row(r) for r in rows]
+
+    def events(self, job_id: str) -> List[Dict[str, Any]]:
+        return [dict(r) for r in self._db.execute(
+            "SELECT state, at, detail FROM events WHERE job_id = ? ORDER BY rowid", (job_id,))]
+
+    def stats(self) -> Dict[str, int]:
+        return {state: n for state, n in self._db.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state")}
@@ -0,0 +1,148 @@
+"""
+HTTP delivery of generated videos for the FastVideo adapter.
+
+`outputVideoPath` is a path on the adapter's filesystem, so browsers and
+remote orchestrators could only read results through a shared disk. Every
+video the adapter writes is now registered under an opaque id and served from
+
+    GET /videos/{id}           the MP4
+    GET /videos/{id}/preview   low-res clip (video_io.PREVIEW_WIDTH wide)
+    GET /videos/{id}/poster    first-frame JPEG
+
+The responses are Starlette FileResponses. They honour `Range` (206 partial
+content, so players can seek and start before the whole file is read), send
+ETag/Last-Modified, and stream from disk in chunks. Under servers that
+implement the ASGI pathsend extension the file is handed to the server to
+send directly. The files never change once written, so they are marked
+immutable for caches.
+
+The preview and poster are written next to the MP4. When the adapter encoded
+the frames itself they are written straight from the frames in memory.
+Otherwise (FastVideo saved the file) they are built once, from a single
+decode, in the background after generation or on first request.
+
+Only registered ids are served, so the endpoints never read arbitrary paths.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Sequence, Union
+
+from fastapi import APIRouter, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse
+
+from video_io import derivative_paths, read_video_frames, write_derivatives
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+
+class MediaEntry:
+    __slots__ = ("video", "preview", "poster", "lock")
+
+    def __init__(self, video: Path):
+        self.video = video
+        self.preview, self.poster = derivative_paths(video)
+        self.lock = threading.Lock()
+
+    def has_derivatives(self) -> bool:
+        return self.preview.exists() and self.poster.exists()
+
+
+class MediaRegistry:
+    """Opaque ids for generated videos; bounded, most recently registered kept."""
+
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, MediaEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def media_id(video_path: Union[str, Path]) -> str:
+        path = Path(video_path).resolve()
+        stamp = path.stat().st_mtime_ns if path.exists() else 0
+        return hashlib.blake2b(f"{path}|{stamp}".encode("utf-8"), digest_size=9).hexdigest()
+
+    def register(self, video_path: Union[str, Path], frames: Optional[Sequence] = None,
+                 fps: Optional[int] = None) -> str:
+        """
+        Register an MP4 and return its id.
+
+        Pass the frames it was encoded from to write the preview and poster
+        now, without decoding the file again.
+        """
+        entry = MediaEntry(Path(video_path).resolve())
+        media_id = self.media_id(entry.video)
+        with self._lock:
+            self._entries[media_id] = entry
+            self._entries.move_to_end(media_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        if frames is not None and fps:
+            with entry.lock:
+                write_derivatives(frames, entry.video, fps)
+        return media_id
+
+    def get(self, media_id: str) -> Optional[MediaEntry]:
+        with self._lock:
+            return self._entries.get(media_id)
+
+    def ensure_derivatives(self, media_id: str) -> MediaEntry:
+        """Build the preview and poster if missing; concurrent callers wait for one build."""
+        entry = self.get(media_id)
+        if entry is None:
+            raise KeyError(media_id)
+        if not entry.has_derivatives():
+            with entry.lock:
+                if not entry.has_derivatives():
+                    frames, fps = read_video_frames(entry.video)
+                    write_derivatives(frames, entry.video, fps)
+        return entry
+
+
+def media_urls(media_id: str, prefix: str = "/videos") -> Dict[str, str]:
+    return {
+        "videoUrl": f"{prefix}/{media_id}",
+        "previewUrl": f"{prefix}/{media_id}/preview",
+        "posterUrl": f"{prefix}/{media_id}/poster",
+    }
+
+
+def create_media_router(registry: MediaRegistry) -> APIRouter:
+    router = APIRouter()
+
+    def _entry(media_id: str) -> MediaEntry:
+        entry = registry.get(media_id)
+        if entry is None or not entry.video.exists():
+            raise HTTPException(status_code=404, detail=f"Unknown video: {media_id}")
+        return entry
+
+    async def _derived(media_id: str) -> MediaEntry:
+        entry = _entry(media_id)
+        if not entry.has_derivatives():
+            try:
+                await run_in_threadpool(registry.ensure_derivatives, media_id)
+            except Exception as e:
+                raise HTTPException(status_code=500, detail=f"Failed to build preview: {e}")
+        return entry
+
+    @router.get("/videos/{media_id}")
+    async def get_video(media_id: str):
+        """The MP4; supports Range requests for seeking and progressive playback"""
+        entry = _entry(media_id)
+        return FileResponse(entry.video, media_type="video/mp4", headers={"Cache-Control": IMMUTABLE})
+
+    @router.get("/videos/{media_id}/preview")
+    async def get_preview(media_id: str):
+        """Low-res preview clip; supports Range requests"""
+        entry = await _derived(media_id)
+        return FileResponse(entry.preview, media_type="video/mp4", headers={"Cache-Control": IMMUTABLE})
+
+    @router.get("/videos/{media_id}/poster")
+    async def get_poster(media_id: str):
+        """First-frame JPEG thumbnail"""
+        entry = await _derived(media_id)
+        return FileResponse(entry.poster, media_type="image/jpeg", headers={"Cache-Control": IMMUTABLE})
+
+    return router
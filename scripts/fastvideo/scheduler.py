@@ -0,0 +1,522 @@
+"""
+Cost-aware admission control for the FastVideo adapter.
+
+A 256x256x8 preview and a 1920x1080x300 final render cost very different
+amounts of GPU time and memory. Every job is costed from its work, defined as
+width x height x numFrames in megapixel-frames, with a linear model
+(seconds = overhead + rate * work, memory = base + per-unit * work). Both
+lines start from priors and are refitted by least squares to observed
+durations and peak GPU memory.
+
+Jobs wait in two lanes. The interactive lane always dispatches before the
+batch lane, and each lane runs shortest-job-first. A batch job that has
+waited longer than `batch_aging_s` moves ahead of both lanes so it cannot
+starve. A job starts only if its estimated memory fits in the budget next to
+the jobs already running. Dispatch is strictly in order, so a large job at the
+head is never overtaken by smaller ones that happen to fit. The only exception
+is an idle GPU, which always admits the head job even when it exceeds the
+budget on its own.
+
+One job runs at a time by default. The server calls a single global
+VideoGenerator from worker threads, and nothing guarantees that the generator
+or its executor is safe to call from two threads at once.
+FASTVIDEO_MAX_CONCURRENT > 1 is an opt-in for pipelines known to be
+re-entrant. The memory budget still applies to each job that starts.
+
+`drain()` (on SIGTERM) stops new jobs from starting. Running jobs finish,
+and anyone waiting on a queued job gets SchedulerDraining, so the server can
+shut down without abandoning work mid-generation.
+
+Kept free of FastVideo/FastAPI imports so it can be tested without a GPU stack.
+"""
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import json
+import os
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
+
+INTERACTIVE = "interactive"
+BATCH = "batch"
+LANES = (INTERACTIVE, BATCH)
+LANE_PRIORITY = {INTERACTIVE: 0, BATCH: 1}
+
+# Priors for FastWan2.2-TI2V-5B with CPU offload on a 24 GB card (README:
+# 3-8 minutes and 14-16 GB for 1280x544x121, i.e. ~84 megapixel-frames)
+DEFAULT_OVERHEAD_S = 10.0
+DEFAULT_SECONDS_PER_UNIT = 3.0
+DEFAULT_BASE_MEMORY_MB = 9000.0
+DEFAULT_MEMORY_PER_UNIT_MB = 75.0
+DEFAULT_MEMORY_BUDGET_MB = 22000.0
+DEFAULT_INTERACTIVE_MAX_S = 60.0
+DEFAULT_BATCH_AGING_S = 600.0
+# generate_video on the shared VideoGenerator is not known to be thread-safe
+DEFAULT_MAX_CONCURRENT = 1
+
+
+def work_units(width: int, height: int, frames: int) -> float:
+    """Work of a job in megapixel-frames."""
+    return width * height * frames / 1e6
+
+
+@dataclass
+class CostEstimate:
+    work: float
+    seconds: float
+    memory_mb: float
+    # Sequential generations in one job (variants): time scales with it, memory doesn't
+    repeats: int = 1
+
+
+class LinearFit:
+    """
+    y = intercept + slope * x by least squares over decayed observations.
+
+    Two light pseudo-points on the prior line (at x = 1 and x = 100, weight
+    `prior_weight` each) are always part of the fit. They keep it well-posed
+    while all observations share one size, and hold the prior for sizes
+    that have never been run.
+    Observations decay by `decay` per new point, so the fit tracks drift
+    (driver updates, offload settings).
+    """
+
+    PRIOR_POINTS = (1.0, 100.0)
+
+    def __init__(self, intercept: float, slope: float, decay: float = 0.95, prior_weight: float = 0.1,
+                 observed: Optional[List[float]] = None):
+        self.decay = decay
+        self.prior = [0.0] * 5  # weight, sum x, sum x^2, sum y, sum xy
+        for x in self.PRIOR_POINTS:
+            self._accumulate(self.prior, x, intercept + slope * x, prior_weight)
+        self.observed = list(observed) if observed else [0.0] * 5
+        self.intercept, self.slope = intercept, slope
+        self._solve()
+
+    @staticmethod
+    def _accumulate(sums: List[float], x: float, y: float, weight: float = 1.0) -> None:
+        sums[0] += weight
+        sums[1] += weight * x
+        sums[2] += weight * x * x
+        sums[3] += weight * y
+        sums[4] += weight * x * y
+
+    def add(self, x: float, y: float) -> None:
+        self.observed = [v * self.decay for v in self.observed]
+        self._accumulate(self.observed, x, y)
+        self._solve()
+
+    def _solve(self) -> None:
+        n, sx, sxx, sy, sxy = (p + o for p, o in zip(self.prior, self.observed))
+        det = n * sxx - sx * sx
+        if det <= 0:
+            return
+        slope = (n * sxy - sx * sy) / det
+        intercept = (sy - slope * sx) / n
+        if slope < 0:  # bigger jobs can't be cheaper: treat as constant cost
+            slope, intercept = 0.0, sy / n
+        elif intercept < 0:  # refit through the origin
+            slope, intercept = sxy / sxx, 0.0
+        self.intercept, self.slope = intercept, slope
+
+
+class CostModel:
+    """Linear time/memory model in megapixel-frames, fitted to observed durations and memory peaks."""
+
+    def __init__(self, overhead_s: float = DEFAULT_OVERHEAD_S, seconds_per_unit: float = DEFAULT_SECONDS_PER_UNIT,
+                 base_memory_mb: float = DEFAULT_BASE_MEMORY_MB,
+                 memory_per_unit_mb: float = DEFAULT_MEMORY_PER_UNIT_MB,
+                 decay: float = 0.95, observations: int = 0):
+        self.time_fit = LinearFit(overhead_s, seconds_per_unit, decay)
+        self.memory_fit = LinearFit(base_memory_mb, memory_per_unit_mb, decay)
+        self.observations = observations
+
+    @property
+    def overhead_s(self) -> float:
+        return self.time_fit.intercept
+
+    @property
+    def seconds_per_unit(self) -> float:
+        return self.time_fit.slope
+
+    @property
+    def base_memory_mb(self) -> float:
+        return self.memory_fit.intercept
+
+    @property
+    def memory_per_unit_mb(self) -> float:
+        return self.memory_fit.slope
+
+    def estimate(self, width: int, height: int, frames: int, repeats: int = 1) -> CostEstimate:
+        work = work_units(width, height, frames)
+        return CostEstimate(
+            work=work,
+            seconds=self.overhead_s + self.seconds_per_unit * work * repeats,
+            memory_mb=self.base_memory_mb + self.memory_per_unit_mb * work,
+            repeats=repeats,
+        )
+
+    def observe(self, work: float, seconds: float, peak_memory_mb: Optional[float] = None,
+                repeats: int = 1) -> None:
+        """Fold one completed job into the fits (memory only when a peak was measured)."""
+        if work <= 0:
+            return
+        self.time_fit.add(work * repeats, seconds)
+        if peak_memory_mb is not None:
+            self.memory_fit.add(work, peak_memory_mb)
+        self.observations += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "overheadS": self.overhead_s,
+            "secondsPerUnit": self.seconds_per_unit,
+            "baseMemoryMb": self.base_memory_mb,
+            "memoryPerUnitMb": self.memory_per_unit_mb,
+            "observations": self.observations,
+            "timeFit": self.time_fit.observed,
+            "memoryFit": self.memory_fit.observed,
+        }
+
+    @classmethod
+    def load(cls, path: Union[str, Path, None]) -> "CostModel":
+        """Load a saved calibration; missing or unreadable files give the priors."""
+        if path is None or not Path(path).exists():
+            return cls()
+        try:
+            data = json.loads(Path(path).read_text())
+            model = cls(observations=int(data.get("observations", 0)))
+            for fit, key in ((model.time_fit, "timeFit"), (model.memory_fit, "memoryFit")):
+                fit.observed = [float(v) for v in data[key]]
+                fit._solve()
+            return model
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"WARNING: Ignoring cost model {path}: {e}")
+            return cls()
+
+    def save(self, path: Union[str, Path]) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        tmp.write_text(json.dumps(self.to_dict(), indent=2))
+        os.replace(tmp, path)
+
+
+def gpu_memory_used_mb() -> Optional[float]:
+    """Device-wide GPU memory in use (all processes), or None without CUDA."""
+    try:
+        import torch
+
+        if not torch.cuda.is_available():
+            return None
+        free, total = torch.cuda.mem_get_info()
+        return (total - free) / (1024 * 1024)
+    except Exception:
+        return None
+
+
+def gpu_memory_total_mb() -> Optional[float]:
+    try:
+        import torch
+
+        if not torch.cuda.is_available():
+            return None
+        return torch.cuda.mem_get_info()[1] / (1024 * 1024)
+    except Exception:
+        return None
+
+
+class PeakSampler:
+    """Poll a memory probe on a background thread and keep the peak."""
+
+    def __init__(self, probe: Callable[[], Optional[float]], interval_s: float = 0.5):
+        self.probe = probe
+        self.interval_s = interval_s
+        self.peak: Optional[float] = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="fastvideo-mem-sampler", daemon=True)
+
+    def _run(self) -> None:
+        while True:
+            value = self.probe()
+            if value is not None and (self.peak is None or value > self.peak):
+                self.peak = value
+            if self._stop.wait(self.interval_s):
+                return
+
+    def __enter__(self) -> "PeakSampler":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+
+
+class SchedulerDraining(RuntimeError):
+    """The scheduler is shutting down and will not start this job."""
+
+
+@dataclass(eq=False)
+class Job:
+    id: str
+    lane: str
+    estimate: CostEstimate
+    submitted: float
+    seq: int
+    run: Callable[["Job"], Awaitable[Any]] = field(repr=False)
+    status: str = "queued"  # queued | running | complete | error
+    started: Optional[float] = None
+    finished: Optional[float] = None
+    # False once another job overlapped this one (its memory peak is then shared)
+    solo: bool = True
+    # Set False by the job itself when its duration should not calibrate the model
+    calibrate: bool = True
+    # Set by the submitter when someone polls for the result rather than awaiting it
+    detached: bool = False
+    result: Any = None
+    error: Optional[str] = None
+    future: Optional[asyncio.Future] = field(default=None, repr=False)
+
+
+class Scheduler:
+    """Two-lane, shortest-job-first, memory-budgeted job queue for one GPU."""
+
+    def __init__(self, cost_model: Optional[CostModel] = None,
+                 memory_budget_mb: float = DEFAULT_MEMORY_BUDGET_MB,
+                 max_concurrent: int = DEFAULT_MAX_CONCURRENT,
+                 interactive_max_s: float = DEFAULT_INTERACTIVE_MAX_S,
+                 batch_aging_s: float = DEFAULT_BATCH_AGING_S,
+                 memory_probe: Optional[Callable[[], Optional[float]]] = None,
+                 cost_model_path: Union[str, Path, None] = None,
+                 clock: Callable[[], float] = time.monotonic, keep_finished: int = 256):
+        self.cost_model = cost_model or CostModel()
+        self.memory_budget_mb = memory_budget_mb
+        self.max_concurrent = max_concurrent
+        self.interactive_max_s = interactive_max_s
+        self.batch_aging_s = batch_aging_s
+        self.memory_probe = memory_probe
+        self.cost_model_path = cost_model_path
+        self.clock = clock
+        self.keep_finished = keep_finished
+        self.queued: List[Job] = []
+        self.running: List[Job] = []
+        self.jobs: Dict[str, Job] = {}
+        self._seq = itertools.count()
+        self._finished: List[str] = []
+        self.draining = False
+        # The event loop only keeps weak references to tasks
+        self._tasks: set = set()
+
+    @classmethod
+    def from_env(cls) -> "Scheduler":
+        """
+        FASTVIDEO_MEMORY_BUDGET_MB (default: 90% of the GPU), FASTVIDEO_MAX_CONCURRENT
+        (default 1), FASTVIDEO_COST_MODEL.
+        """
+        budget = os.environ.get("FASTVIDEO_MEMORY_BUDGET_MB")
+        total = None if budget else gpu_memory_total_mb()
+        path = os.environ.get("FASTVIDEO_COST_MODEL")
+        return cls(
+            CostModel.load(path),
+            memory_budget_mb=float(budget) if budget else (total * 0.9 if total else DEFAULT_MEMORY_BUDGET_MB),
+            max_concurrent=int(os.environ.get("FASTVIDEO_MAX_CONCURRENT", str(DEFAULT_MAX_CONCURRENT))),
+            memory_probe=gpu_memory_used_mb,
+            cost_model_path=path,
+        )
+
+    # --- Submission ---
+
+    def submit(self, run: Callable[[Job], Awaitable[Any]], width: int, height: int, frames: int,
+               lane: Optional[str] = None, repeats: int = 1, job_id: Optional[str] = None) -> Job:
+        """
+        Queue `run(job)`; lane defaults to interactive for jobs estimated under interactive_max_s.
+
+        `repeats` is the number of generations `run` performs one after another.
+        `job_id` keeps a job's id when it is resubmitted after a restart.
+        """
+        if self.draining:
+            raise SchedulerDraining("Scheduler is draining; not accepting jobs")
+        estimate = self.cost_model.estimate(width, height, frames, repeats)
+        if lane is None:
+            lane = INTERACTIVE if estimate.seconds <= self.interactive_max_s else BATCH
+        if lane not in LANES:
+            raise ValueError(f"Unknown lane {lane!r}; expected one of {LANES}")
+        job = Job(id=job_id or uuid.uuid4().hex[:12], lane=lane, estimate=estimate, submitted=self.clock(),
+                  seq=next(self._seq), run=run, future=asyncio.get_running_loop().create_future())
+        # Fire-and-forget submissions (POST /jobs) read the outcome from the job, not the future
+        job.future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self.jobs[job.id] = job
+        self.queued.append(job)
+        self._dispatch()
+        return job
+
+    async def wait(self, job: Job) -> Any:
+        """Result of `run(job)`; exceptions it raised are re-raised here."""
+        return await asyncio.shield(job.future)
+
+    # --- Ordering and admission ---
+
+    def _effective_lane(self, job: Job, now: float) -> int:
+        if job.lane == BATCH and now - job.submitted >= self.batch_aging_s:
+            return LANE_PRIORITY[INTERACTIVE] - 1
+        return LANE_PRIORITY[job.lane]
+
+    def order(self) -> List[Job]:
+        """Queued jobs in dispatch order."""
+        now = self.clock()
+        return sorted(self.queued, key=lambda j: (self._effective_lane(j, now), j.estimate.seconds, j.seq))
+
+    def _memory_in_use(self) -> float:
+        return sum(j.estimate.memory_mb for j in self.running)
+
+    def _fits(self, job: Job) -> bool:
+        if not self.running:
+            return True
+        return (len(self.running) < self.max_concurrent
+                and self._memory_in_use() + job.estimate.memory_mb <= self.memory_budget_mb)
+
+    def _dispatch(self) -> None:
+        if self.draining:
+            return
+        for job in self.order():
+            if not self._fits(job):
+                break
+            self.queued.remove(job)
+            if self.running:
+                job.solo = False
+                for other in self.running:
+                    other.solo = False
+            job.status = "running"
+            job.started = self.clock()
+            self.running.append(job)
+            task = asyncio.get_running_loop().create_task(self._execute(job))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _execute(self, job: Job) -> None:
+        sampler = PeakSampler(self.memory_probe) if self.memory_probe and job.solo else None
+        try:
+            if sampler:
+                sampler.__enter__()
+            result = await job.run(job)
+        except asyncio.CancelledError:
+            job.status, job.error = "error", "cancelled"
+            job.future.cancel()
+            raise
+        except Exception as e:  # handed to the waiter
+            job.status, job.error = "error", str(getattr(e, "detail", "") or e) or type(e).__name__
+            job.future.set_exception(e)
+        else:
+            job.status, job.result = "complete", result
+            job.future.set_result(result)
+        finally:
+            if sampler:
+                sampler.__exit__(None, None, None)
+            job.finished = self.clock()
+            self.running.remove(job)
+            self._retire(job, sampler.peak if sampler else None)
+            self._dispatch()
+
+    def _retire(self, job: Job, peak_mb: Optional[float]) -> None:
+        if job.status == "complete" and job.calibrate:
+            self.cost_model.observe(job.estimate.work, job.finished - job.started, peak_mb if job.solo else None,
+                                    job.estimate.repeats)
+            if self.cost_model_path:
+                try:
+                    self.cost_model.save(self.cost_model_path)
+                except OSError as e:
+                    print(f"WARNING: Could not save cost model: {e}")
+        self._finished.append(job.id)
+        while len(self._finished) > self.keep_finished:
+            self.jobs.pop(self._finished.pop(0), None)
+
+    # --- Shutdown ---
+
+    def drain(self) -> None:
+        """Start no more jobs; waiters on queued jobs get SchedulerDraining. Safe to call from a signal handler."""
+        if self.draining:
+            return
+        self.draining = True
+        for job in self.queued:
+            if not job.future.done():
+                job.future.get_loop().call_soon_threadsafe(
+                    lambda f=job.future: f.done() or f.set_exception(SchedulerDraining("Adapter is shutting down")))
+
+    async def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """Wait for running jobs to finish; False if some were still running at `timeout`."""
+        running = [j.future for j in self.running]
+        if not running:
+            return True
+        _, pending = await asyncio.wait(running, timeout=timeout)
+        return not pending
+
+    # --- Introspection ---
+
+    def forecast(self) -> Dict[str, float]:
+        """
+        Estimated seconds from now until each queued job starts.
+
+        Replays the dispatch rules against the running jobs' remaining
+        estimates: in order, each job starts once enough earlier jobs have
+        finished for it to fit.
+        """
+        now = self.clock()
+        finishing = [(max(j.estimate.seconds - (now - j.started), 0.0), j.seq, j.estimate.memory_mb)
+                     for j in self.running]
+        heapq.heapify(finishing)
+        memory = sum(m for _, _, m in finishing)
+        t = 0.0
+        starts = {}
+        for job in self.order():
+            while finishing and (len(finishing) >= self.max_concurrent
+                                 or memory + job.estimate.memory_mb > self.memory_budget_mb):
+                done, _, mem = heapq.heappop(finishing)
+                t = max(t, done)
+                memory -= mem
+            starts[job.id] = t
+            heapq.heappush(finishing, (t + job.estimate.seconds, job.seq, job.estimate.memory_mb))
+            memory += job.estimate.memory_mb
+        return starts
+
+    def status(self, job: Job, forecast: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+        """Client-facing view: queue position (0 = next), ETA to completion and timings in ms."""
+        now = self.clock()
+        info: Dict[str, Any] = {
+            "jobId": job.id,
+            "status": job.status,
+            "lane": job.lane,
+            "estimatedMs": int(job.estimate.seconds * 1000),
+            "estimatedMemoryMb": int(job.estimate.memory_mb),
+            "position": None,
+            "etaMs": None,
+        }
+        if job.status == "queued":
+            forecast = self.forecast() if forecast is None else forecast
+            info["position"] = [j.id for j in self.order()].index(job.id)
+            info["etaMs"] = int((forecast[job.id] + job.estimate.seconds) * 1000)
+        elif job.status == "running":
+            info["etaMs"] = int(max(job.estimate.seconds - (now - job.started), 0.0) * 1000)
+        if job.started is not None:
+            info["queueWaitMs"] = int((job.started - job.submitted) * 1000)
+        if job.finished is not None:
+            info["durationMs"] = int((job.finished - job.started) * 1000)
+        if job.error:
+            info["error"] = job.error
+        return info
+
+    def snapshot(self) -> Dict[str, Any]:
+        forecast = self.forecast()
+        return {
+            "memoryBudgetMb": int(self.memory_budget_mb),
+            "memoryReservedMb": int(self._memory_in_use()),
+            "maxConcurrent": self.max_concurrent,
+            "costModel": self.cost_model.to_dict(),
+            "running": [self.status(j) for j in self.running],
+            "queued": [self.status(j, forecast) for j in self.order()],
+        }
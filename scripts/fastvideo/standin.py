@@ -0,0 +1,63 @@
+"""
+CPU stand-in for the parts of the FastVideo API the adapter uses.
+
+With FASTVIDEO_STANDIN=1, fastvideo_server.py imports these instead of
+fastvideo. The adapter then runs its normal scheduling, media and tracing
+paths, but renders a moving gradient on the CPU. This lets dispatcher and
+multi-worker setups run on one box with no GPU. Frames cost
+FASTVIDEO_STANDIN_MS_PER_FRAME (default 5) of sleep each, so queues build
+up the way they would on real hardware. FASTVIDEO_STANDIN_LOAD_MS (default 0)
+is slept once when the generator is created, like a model load.
+
+Usage:
+    FASTVIDEO_STANDIN=1 FASTVIDEO_PORT=8056 python scripts/fastvideo/fastvideo_server.py
+"""
+import os
+import time
+from typing import Any, Dict, List
+
+import numpy as np
+
+
+class FastVideoArgs:
+    def __init__(self, **kwargs: Any):
+        self.__dict__.update(kwargs)
+
+
+class MultiprocExecutor:
+    pass
+
+
+class SamplingParam:
+    def __init__(self, prompt: str = "", num_frames: int = 16, fps: int = 16, width: int = 256,
+                 height: int = 256, seed: int = -1, negative_prompt: str = "", image=None, **kwargs: Any):
+        self.prompt = prompt
+        self.num_frames = num_frames
+        self.fps = fps
+        self.width = width
+        self.height = height
+        self.seed = seed
+        self.negative_prompt = negative_prompt
+        self.image = image
+        self.__dict__.update(kwargs)
+
+
+class VideoGenerator:
+    def __init__(self, args: FastVideoArgs, executor_class=None, log_stats: bool = False):
+        self.args = args
+        self.ms_per_frame = float(os.environ.get("FASTVIDEO_STANDIN_MS_PER_FRAME", "5"))
+        time.sleep(float(os.environ.get("FASTVIDEO_STANDIN_LOAD_MS", "0")) / 1000)
+
+    def generate_video(self, sampling_param: SamplingParam) -> Dict[str, List[np.ndarray]]:
+        p = sampling_param
+        rng = np.random.default_rng(p.seed if p.seed >= 0 else None)
+        base = rng.integers(0, 256, 3)
+        x = np.linspace(0, 255, p.width, dtype=np.float32)[None, :, None]
+        y = np.linspace(0, 255, p.height, dtype=np.float32)[:, None, None]
+        frames = []
+        for i in range(p.num_frames):
+            shift = 255 * i / max(1, p.num_frames)
+            frame = (base + (x + shift) * (0.5, 0.3, 0.1) + y * (0.1, 0.3, 0.5)) % 256
+            frames.append(frame.astype(np.uint8))
+            time.sleep(self.ms_per_frame / 1000)
+        return {"video": frames}
@@ -0,0 +1,98 @@
+"""
+Image and video helpers for the FastVideo adapter.
+
+Kept free of FastVideo/FastAPI imports so they can be reused and
+benchmarked without a GPU stack.
+"""
+import base64
+from io import BytesIO
+from pathlib import Path
+from typing import List, Sequence, Tuple, Union
+
+from PIL import Image
+
+PREVIEW_WIDTH = 320
+PREVIEW_MAX_FPS = 12
+POSTER_WIDTH = 640
+
+
+def decode_base64_image(base64_str: str) -> Image.Image:
+    """Decode base64 string to PIL Image (strips data URL prefix if present)"""
+    if base64_str.startswith("data:"):
+        base64_str = base64_str.split(",", 1)[1]
+
+    image_data = base64.b64decode(base64_str)
+    return Image.open(BytesIO(image_data)).convert("RGB")
+
+
+def resize_keyframe(image: Image.Image, size: Tuple[int, int],
+                    resample: Image.Resampling = Image.Resampling.LANCZOS) -> Image.Image:
+    """Resize a keyframe to the target (width, height) if it differs."""
+    if image.size == size:
+        return image
+    return image.resize(size, resample)
+
+
+def write_video(frames: Sequence, output_path: Union[str, Path], fps: int) -> str:
+    """Encode frames (PIL images or HxWx3 arrays) to an MP4 with imageio."""
+    import imageio
+
+    imageio.mimsave(str(output_path), frames, fps=fps)
+    return str(output_path)
+
+
+def derivative_paths(video_path: Union[str, Path]) -> Tuple[Path, Path]:
+    """(preview clip, poster JPEG) stored next to an MP4: <stem>.preview.mp4 and <stem>.poster.jpg."""
+    video_path = Path(video_path)
+    return (video_path.with_name(f"{video_path.stem}.preview.mp4"),
+            video_path.with_name(f"{video_path.stem}.poster.jpg"))
+
+
+def _scaled_size(size: Tuple[int, int], width: int, block: int = 16) -> Tuple[int, int]:
+    """Fit to `width` keeping aspect, rounded to codec-friendly multiples of `block`."""
+    w, h = size
+    if w <= width:
+        width = w
+    height = h * width / w
+    return max(block, round(width / block) * block), max(block, round(height / block) * block)
+
+
+def _as_image(frame) -> Image.Image:
+    return frame if isinstance(frame, Image.Image) else Image.fromarray(frame)
+
+
+def write_derivatives(frames: Sequence, video_path: Union[str, Path], fps: int) -> Tuple[Path, Path]:
+    """
+    Write a low-res preview clip and a poster thumbnail for a video.
+
+    The preview is PREVIEW_WIDTH wide at no more than PREVIEW_MAX_FPS
+    (frames are strided, so the duration is unchanged). The poster is the
+    first frame, matching what a <video> element shows before playback.
+    """
+    import imageio
+    import numpy as np
+
+    preview_path, poster_path = derivative_paths(video_path)
+    first = _as_image(frames[0])
+    stride = max(1, -(-fps // PREVIEW_MAX_FPS))
+    size = _scaled_size(first.size, PREVIEW_WIDTH)
+    preview = [np.asarray(_as_image(f).convert("RGB").resize(size, Image.Resampling.BILINEAR))
+               for f in frames[::stride]]
+    imageio.mimsave(str(preview_path), preview, fps=max(1, round(fps / stride)))
+
+    poster = first.convert("RGB")
+    poster.thumbnail((POSTER_WIDTH, POSTER_WIDTH * poster.height // poster.width or 1), Image.Resampling.LANCZOS)
+    poster.save(poster_path, format="JPEG", quality=85, optimize=True)
+    return preview_path, poster_path
+
+
+def read_video_frames(video_path: Union[str, Path]) -> Tuple[List, int]:
+    """Decode an MP4 into frames (HxWx3 arrays) and its fps."""
+    import imageio
+
+    reader = imageio.get_reader(str(video_path))
+    try:
+        fps = int(round(reader.get_meta_data().get("fps", 16)))
+        return [frame for frame in reader], fps
+    finally:
+        reader.close()
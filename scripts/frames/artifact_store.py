@@ -0,0 +1,596 @@
+#!/usr/bin/env python3
+"""
+Content-addressed artifact store for frames, keyframes and videos.
+
+Every run copied its scene frames and keyframes into its own directory, and
+cleanup-runs.ts can only delete whole runs. Golden-set and replay runs
+therefore kept many copies of identical PNGs and MP4s. The store keeps each
+distinct file once, under its SHA-256:
+
+    <store>/objects/ab/cdef...    read-only blobs
+    <store>/index.sqlite          runs, references and the hash cache (WAL)
+
+Ingesting a completed scene (one with a `<prefix>.done` marker from
+comfyui_nodes/write_done_marker.py) does three things. It hashes the scene's
+files on a thread pool, adds the blobs the store does not have yet, and
+materializes every file in the run directory. Materializing uses a hardlink
+when the run is on the store's filesystem, else a reflink (FICLONE on Linux
+copy-on-write filesystems), else a copy. A source file whose size and mtime
+match an earlier hash is not read again.
+
+Blobs are reference-counted by the run files that point at them. `gc` first
+drops references whose run file is gone or was replaced, so deleting a run
+directory (e.g. with cleanup-runs.ts) releases its blobs. It then deletes
+blobs that nothing references. Blobs are read-only, so a tool that rewrites
+a materialized file in place fails instead of changing every run that shares
+it. Writing a new file and renaming it over the old one is fine.
+
+GEMDIRECT_ARTIFACT_STORE sets the store directory (default: artifacts/store
+in the repo). Keep it on the same filesystem as the run directories so
+materializing is a hardlink. Standard library only.
+
+Usage:
+    python scripts/frames/artifact_store.py ingest --output-dir <ComfyUI>/output --run-dir logs/<run>/scene-001/generated-frames --prefix gemdirect1_scene-001
+    python scripts/frames/artifact_store.py add --run-dir logs/<run>/keyframes keyframes/scene-001.png
+    python scripts/frames/artifact_store.py stats
+    python scripts/frames/artifact_store.py gc --dry-run
+    python scripts/frames/artifact_store.py release logs/<run>
+    python scripts/frames/artifact_store.py benchmark --runs 5 --frames 120
+
+Exit codes:
+- 0: Command succeeded
+- 1: A scene or file could not be ingested
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import stat
+import tempfile
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Union
+
+ENV_ARTIFACT_STORE = "GEMDIRECT_ARTIFACT_STORE"
+DEFAULT_STORE = Path(__file__).resolve().parents[2] / "artifacts" / "store"
+SCHEMA_VERSION = 1
+DONE_SUFFIX = ".done"
+FRAME_EXTENSIONS = {".png", ".jpg", ".jpeg", ".webp"}
+VIDEO_EXTENSIONS = {".mp4", ".webm", ".mov", ".mkv"}
+# Blobs unreferenced for less than this may belong to an ingest still in progress
+DEFAULT_GRACE_S = 3600
+_FICLONE = 0x40049409  # linux/fs.h
+_BLOCK = 1 << 20
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    digest    TEXT PRIMARY KEY,
+    size      INTEGER NOT NULL,
+    created   REAL NOT NULL,
+    last_used REAL NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS runs (
+    path    TEXT PRIMARY KEY,
+    created REAL NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS refs (
+    run      TEXT NOT NULL,
+    path     TEXT NOT NULL,
+    digest   TEXT NOT NULL,
+    method   TEXT NOT NULL,
+    size     INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    PRIMARY KEY (run, path)
+);
+CREATE INDEX IF NOT EXISTS refs_digest ON refs(digest);
+CREATE TABLE IF NOT EXISTS hashes (
+    path     TEXT PRIMARY KEY,
+    size     INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    digest   TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+def default_store_path() -> Path:
+    override = os.environ.get(ENV_ARTIFACT_STORE, "").strip()
+    return Path(override) if override else DEFAULT_STORE
+
+
+def _file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(_BLOCK), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _reflink(src: Path, dest: Path) -> bool:
+    """Copy-on-write clone of `src` at `dest`; False where the OS or filesystem cannot."""
+    try:
+        import fcntl
+    except ImportError:
+        return False
+    with open(src, "rb") as s, open(dest, "wb") as d:
+        try:
+            fcntl.ioctl(d.fileno(), _FICLONE, s.fileno())
+            return True
+        except OSError:
+            pass
+    os.remove(dest)
+    return False
+
+
+def _make_writable(path: Path) -> None:
+    try:
+        os.chmod(path, stat.S_IREAD | stat.S_IWRITE)
+    except OSError:
+        pass
+
+
+def _replace(src: Path, dest: Path) -> None:
+    try:
+        os.replace(src, dest)
+    except PermissionError:  # Windows will not replace a read-only file
+        _make_writable(dest)
+        os.replace(src, dest)
+
+
+def _unlink(path: Path) -> None:
+    try:
+        os.remove(path)
+    except PermissionError:
+        _make_writable(path)
+        os.remove(path)
+
+
+def completed_prefixes(output_dir: Union[str, Path]) -> List[str]:
+    """Prefixes with a done marker in `output_dir`."""
+    return sorted(
+        entry.name[:-len(DONE_SUFFIX)]
+        for entry in os.scandir(output_dir)
+        if entry.is_file() and entry.name.endswith(DONE_SUFFIX)
+    )
+
+
+def scene_files(output_dir: Union[str, Path], prefix: str, frames_only: bool = False) -> List[Path]:
+    """`<prefix>_*` frames (and videos unless `frames_only`) in `output_dir`, by name."""
+    extensions = FRAME_EXTENSIONS if frames_only else FRAME_EXTENSIONS | VIDEO_EXTENSIONS
+    with os.scandir(output_dir) as entries:
+        return sorted(
+            Path(entry.path) for entry in entries
+            if entry.is_file() and entry.name.startswith(f"{prefix}_")
+            and os.path.splitext(entry.name)[1].lower() in extensions
+        )
+
+
+@dataclass
+class IngestResult:
+    run_dir: str
+    files: int = 0
+    new_blobs: int = 0
+    bytes: int = 0             # materialized in the run
+    new_bytes: int = 0         # added to the store
+    methods: Counter = field(default_factory=Counter)
+    hash_ms: float = 0.0
+    materialize_ms: float = 0.0
+
+    @property
+    def deduplicated(self) -> int:
+        return self.files - self.new_blobs
+
+
+class ArtifactStore:
+    def __init__(self, root: Optional[Union[str, Path]] = None, workers: Optional[int] = None, clock=time.time):
+        self.root = Path(root) if root else default_store_path()
+        self.objects = self.root / "objects"
+        self.objects.mkdir(parents=True, exist_ok=True)
+        self.workers = workers or min(8, os.cpu_count() or 1)
+        self.clock = clock
+        self._no_reflink: set = set()  # st_dev values where FICLONE failed
+        self._db = sqlite3.connect(str(self.root / "index.sqlite"), timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        version = self._db.execute("SELECT value FROM meta WHERE key='version'").fetchone()
+        if version is None:
+            self._db.execute("INSERT INTO meta VALUES ('version', ?)", (str(SCHEMA_VERSION),))
+            self._db.commit()
+        elif int(version[0]) != SCHEMA_VERSION:
+            raise RuntimeError(f"{self.root} has store schema {version[0]}, expected {SCHEMA_VERSION}")
+
+    def close(self) -> None:
+        self._db.close()
+
+    def __enter__(self) -> "ArtifactStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def blob_path(self, digest: str) -> Path:
+        return self.objects / digest[:2] / digest[2:]
+
+    # --- Hashing ---
+
+    def hash_files(self, paths: Sequence[Path]) -> List[str]:
+        """SHA-256 of each file; unchanged files (same size and mtime) come from the hash cache."""
+        keys = [str(Path(p).resolve()) for p in paths]
+        stats = [os.stat(p) for p in paths]
+        cached: Dict[str, tuple] = {}
+        for i in range(0, len(keys), 500):
+            chunk = keys[i:i + 500]
+            rows = self._db.execute(
+                f"SELECT path, size, mtime_ns, digest FROM hashes WHERE path IN ({', '.join('?' * len(chunk))})", chunk)
+            cached.update((row[0], row[1:]) for row in rows)
+        digests: List[Optional[str]] = []
+        missing = []
+        for i, (key, st) in enumerate(zip(keys, stats)):
+            hit = cached.get(key)
+            if hit and hit[0] == st.st_size and hit[1] == st.st_mtime_ns:
+                digests.append(hit[2])
+            else:
+                digests.append(None)
+                missing.append(i)
+        if missing:
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                # hashlib releases the GIL on large buffers, so reads and hashing overlap across files
+                for i, digest in zip(missing, pool.map(_file_sha256, [paths[i] for i in missing])):
+                    digests[i] = digest
+            self._db.executemany("INSERT OR REPLACE INTO hashes VALUES (?, ?, ?, ?)",
+                                 [(keys[i], stats[i].st_size, stats[i].st_mtime_ns, digests[i]) for i in missing])
+            self._db.commit()
+        return digests
+
+    # --- Blobs and links ---
+
+    def _clone_or_copy(self, src: Path, dest: Path) -> str:
+        device = os.stat(src).st_dev
+        if device not in self._no_reflink:
+            if _reflink(src, dest):
+                return "reflink"
+            self._no_reflink.add(device)
+        shutil.copyfile(src, dest)
+        return "copy"
+
+    def _store_blob(self, src: Path, digest: str) -> bool:
+        """Add `src` as blob `digest` unless present; True if it was new."""
+        dest = self.blob_path(digest)
+        if dest.exists():
+            return False
+        dest.parent.mkdir(exist_ok=True)
+        tmp = dest.with_name(f".{dest.name}.{uuid.uuid4().hex}.tmp")
+        try:
+            self._clone_or_copy(src, tmp)
+            os.chmod(tmp, stat.S_IREAD | stat.S_IRGRP | stat.S_IROTH)
+            _replace(tmp, dest)
+        except BaseException:
+            if tmp.exists():
+                _unlink(tmp)
+            raise
+        return True
+
+    def _materialize(self, digest: str, dest: Path) -> str:
+        """Point `dest` at blob `digest`: hardlink, else reflink, else copy. Returns the method used."""
+        blob = self.blob_path(digest)
+        if dest.exists() and os.path.samefile(blob, dest):
+            return "hardlink"
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        tmp = dest.with_name(f".{dest.name}.{uuid.uuid4().hex}.tmp")
+        try:
+            try:
+                os.link(blob, tmp)
+                method = "hardlink"
+            except OSError:  # other filesystem, or links unsupported
+                method = self._clone_or_copy(blob, tmp)
+            _replace(tmp, dest)
+        except BaseException:
+            if tmp.exists():
+                _unlink(tmp)
+            raise
+        return method
+
+    # --- Ingest ---
+
+    def add_files(self, run_dir: Union[str, Path], files: Sequence[Path],
+                  names: Optional[Sequence[str]] = None) -> IngestResult:
+        """Store `files` and materialize them in `run_dir` (as `names`, default their file names)."""
+        run_dir = Path(run_dir).resolve()
+        files = [Path(f) for f in files]
+        names = list(names) if names is not None else [f.name for f in files]
+        result = IngestResult(str(run_dir))
+
+        start = time.perf_counter()
+        digests = self.hash_files(files)
+        result.hash_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        now = self.clock()
+        rows = []
+        for src, name, digest in zip(files, names, digests):
+            size = src.stat().st_size
+            if self._store_blob(src, digest):
+                result.new_blobs += 1
+                result.new_bytes += size
+            dest = run_dir / name
+            method = self._materialize(digest, dest)
+            st = dest.stat()
+            rows.append((str(run_dir), name, digest, method, st.st_size, st.st_mtime_ns))
+            result.files += 1
+            result.bytes += size
+            result.methods[method] += 1
+        with self._db:
+            self._db.executemany(
+                "INSERT INTO blobs VALUES (?, ?, ?, ?) ON CONFLICT(digest) DO UPDATE SET last_used = excluded.last_used",
+                [(digest, src.stat().st_size, now, now) for src, digest in zip(files, digests)],
+            )
+            self._db.execute("INSERT INTO runs VALUES (?, ?, ?) ON CONFLICT(path) DO UPDATE SET updated = ?",
+                             (str(run_dir), now, now, now))
+            self._db.executemany("INSERT OR REPLACE INTO refs VALUES (?, ?, ?, ?, ?, ?)", rows)
+        result.materialize_ms = (time.perf_counter() - start) * 1000
+        return result
+
+    def ingest_scene(self, output_dir: Union[str, Path], prefix: str, run_dir: Union[str, Path],
+                     frames_only: bool = False) -> Optional[IngestResult]:
+        """Ingest a completed scene into `run_dir`; None if it has no done marker yet."""
+        output_dir = Path(output_dir)
+        marker = output_dir / f"{prefix}{DONE_SUFFIX}"
+        if not marker.exists():
+            return None
+        files = scene_files(output_dir, prefix, frames_only)
+        try:
+            expected = json.loads(marker.read_text(encoding="utf-8") or "{}").get("FrameCount")
+        except ValueError:
+            expected = None
+        frames = sum(f.suffix.lower() in FRAME_EXTENSIONS for f in files)
+        if expected is not None and expected != frames:
+            print(f"[WARN] {prefix}: marker reports {expected} frames, found {frames}")
+        return self.add_files(run_dir, files)
+
+    # --- References and GC ---
+
+    def _ref_is_current(self, run: str, path: str, digest: str, method: str, size: int, mtime_ns: int) -> bool:
+        file = Path(run) / path
+        try:
+            st = file.stat()
+        except OSError:
+            return False
+        if method == "hardlink":
+            try:
+                return os.path.samefile(self.blob_path(digest), file)
+            except OSError:
+                return False
+        return st.st_size == size and st.st_mtime_ns == mtime_ns
+
+    def release(self, run_dir: Union[str, Path], delete_files: bool = False) -> int:
+        """Drop every reference held by `run_dir` (optionally deleting its materialized files)."""
+        run = str(Path(run_dir).resolve())
+        refs = self._db.execute("SELECT path, digest, method, size, mtime_ns FROM refs WHERE run = ?",
+                                (run,)).fetchall()
+        if delete_files:
+            for path, digest, method, size, mtime_ns in refs:
+                if self._ref_is_current(run, path, digest, method, size, mtime_ns):
+                    _unlink(Path(run) / path)
+        with self._db:
+            self._db.execute("DELETE FROM refs WHERE run = ?", (run,))
+            self._db.execute("DELETE FROM runs WHERE path = ?", (run,))
+        return len(refs)
+
+    def gc(self, grace_s: float = DEFAULT_GRACE_S, dry_run: bool = False) -> dict:
+        """
+        Drop references whose run file is missing or replaced, then delete
+        blobs with no references (and stray files in objects/) untouched for
+        `grace_s`.
+        """
+        now = self.clock()
+        stale = [(run, path) for run, path, *ref in self._db.execute("SELECT * FROM refs").fetchall()
+                 if not self._ref_is_current(run, path, *ref)]
+        stale_set = set(stale)
+        live = Counter(digest for run, path, digest in self._db.execute("SELECT run, path, digest FROM refs")
+                       if (run, path) not in stale_set)
+        garbage = [(digest, size) for digest, size, last_used in
+                   self._db.execute("SELECT digest, size, last_used FROM blobs").fetchall()
+                   if not live[digest] and last_used <= now - grace_s]
+        known = {digest for (digest,) in self._db.execute("SELECT digest FROM blobs")}
+        strays = [p for p in self.objects.glob("*/*")
+                  if p.parent.name + p.name.split(".")[0] not in known and p.stat().st_mtime <= now - grace_s]
+        summary = {
+            "refs_dropped": len(stale),
+            "blobs_deleted": len(garbage),
+            "bytes_freed": sum(size for _, size in garbage),
+            "strays_deleted": len(strays),
+            "dry_run": dry_run,
+        }
+        if dry_run:
+            return summary
+
+        with self._db:
+            self._db.executemany("DELETE FROM refs WHERE run = ? AND path = ?", stale)
+            self._db.execute("DELETE FROM runs WHERE path NOT IN (SELECT DISTINCT run FROM refs)")
+            self._db.executemany("DELETE FROM blobs WHERE digest = ?", [(d,) for d, _ in garbage])
+        for digest, _ in garbage:
+            try:
+                _unlink(self.blob_path(digest))
+            except FileNotFoundError:
+                pass
+        for path in strays:
+            _unlink(path)
+        for shard in self.objects.iterdir():
+            if shard.is_dir() and not any(shard.iterdir()):
+                shard.rmdir()
+        missing = [key for (key,) in self._db.execute("SELECT path FROM hashes") if not os.path.exists(key)]
+        self._db.executemany("DELETE FROM hashes WHERE path = ?", [(k,) for k in missing])
+        self._db.commit()
+        return summary
+
+    def stats(self) -> dict:
+        blobs, stored = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM blobs").fetchone()
+        refs, logical = self._db.execute(
+            "SELECT COUNT(*), COALESCE(SUM(b.size), 0) FROM refs r JOIN blobs b ON b.digest = r.digest").fetchone()
+        runs = self._db.execute("SELECT COUNT(*) FROM runs").fetchone()[0]
+        methods = dict(self._db.execute("SELECT method, COUNT(*) FROM refs GROUP BY method").fetchall())
+        return {
+            "store": str(self.root),
+            "runs": runs,
+            "blobs": blobs,
+            "refs": refs,
+            "stored_bytes": stored,
+            "logical_bytes": logical,
+            "saved_bytes": logical - stored,
+            "dedup_ratio": round(logical / stored, 2) if stored else None,
+            "methods": methods,
+        }
+
+
+def _disk_bytes(roots: Iterable[Path]) -> int:
+    """Bytes used by the files under `roots`, counting each hardlinked inode once."""
+    seen = set()
+    total = 0
+    for root in roots:
+        for dirpath, _, filenames in os.walk(root):
+            for name in filenames:
+                st = os.stat(os.path.join(dirpath, name))
+                if (st.st_dev, st.st_ino) not in seen:
+                    seen.add((st.st_dev, st.st_ino))
+                    total += st.st_size
+    return total
+
+
+def run_benchmark(runs: int, frames: int, frame_kb: int = 600, video_mb: int = 8) -> dict:
+    """Materialize the same scene into `runs` run directories by copying vs through the store."""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        output, prefix = tmp / "output", "bench_scene-001"
+        output.mkdir()
+        for i in range(frames):
+            (output / f"{prefix}_{i + 1:05d}_.png").write_bytes(os.urandom(frame_kb * 1024))
+        (output / f"{prefix}_00001.mp4").write_bytes(os.urandom(video_mb * 1024 * 1024))
+        (output / f"{prefix}{DONE_SUFFIX}").write_text(json.dumps({"FrameCount": frames}))
+        files = scene_files(output, prefix)
+
+        start = time.perf_counter()
+        for r in range(runs):
+            run_dir = tmp / "copied" / f"run-{r}"
+            run_dir.mkdir(parents=True)
+            for f in files:
+                shutil.copy2(f, run_dir / f.name)
+        copy_s = time.perf_counter() - start
+
+        methods: Counter = Counter()
+        with ArtifactStore(tmp / "store") as store:
+            timings = []
+            for r in range(runs):
+                start = time.perf_counter()
+                result = store.ingest_scene(output, prefix, tmp / "stored" / f"run-{r}")
+                timings.append(time.perf_counter() - start)
+                methods.update(result.methods)
+            store_s = sum(timings)
+            stats = store.stats()
+
+        copy_bytes = _disk_bytes([tmp / "copied"])
+        store_bytes = _disk_bytes([tmp / "stored", tmp / "store" / "objects"])
+    return {
+        "runs": runs,
+        "files": len(files),
+        "sceneMb": round(stats["stored_bytes"] / 2**20, 1),
+        "copyS": round(copy_s, 3),
+        "storeS": round(store_s, 3),
+        "storeFirstRunS": round(timings[0], 3),     # hashes and stores the blobs
+        "storeRepeatRunS": round(sum(timings[1:]) / max(runs - 1, 1), 3),  # hash cache + links only
+        "copyPerRunS": round(copy_s / runs, 3),
+        "speedup": round(copy_s / store_s, 1) if store_s else None,
+        "copyDiskMb": round(copy_bytes / 2**20, 1),
+        "storeDiskMb": round(store_bytes / 2**20, 1),
+        "dedupRatio": stats["dedup_ratio"],
+        "methods": dict(methods),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Content-addressed store for run frames, keyframes and videos")
+    parser.add_argument("--store", default=None, help=f"Store directory (default: ${ENV_ARTIFACT_STORE} or {DEFAULT_STORE})")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    ingest = sub.add_parser("ingest", help="Ingest completed scenes (with a .done marker) into a run directory")
+    ingest.add_argument("--output-dir", required=True, help="Directory holding the frames and .done markers")
+    ingest.add_argument("--run-dir", required=True, help="Run directory to materialize the files in")
+    ingest.add_argument("--prefix", action="append", help="Scene prefix (repeatable; default: every completed scene)")
+    ingest.add_argument("--frames-only", action="store_true", help="Skip videos")
+
+    add = sub.add_parser("add", help="Ingest arbitrary files (e.g. keyframes) into a run directory")
+    add.add_argument("--run-dir", required=True)
+    add.add_argument("files", nargs="+")
+
+    sub.add_parser("stats", help="Print store size and deduplication")
+    gc = sub.add_parser("gc", help="Drop stale references and delete unreferenced blobs")
+    gc.add_argument("--dry-run", action="store_true")
+    gc.add_argument("--grace-hours", type=float, default=DEFAULT_GRACE_S / 3600)
+    release = sub.add_parser("release", help="Drop a run's references (then run gc)")
+    release.add_argument("run_dir")
+    release.add_argument("--delete-files", action="store_true", help="Also delete the run's materialized files")
+
+    bench = sub.add_parser("benchmark", help="Compare copying a scene into N runs with materializing it from the store")
+    bench.add_argument("--runs", type=int, default=5)
+    bench.add_argument("--frames", type=int, default=120)
+    bench.add_argument("--frame-kb", type=int, default=600)
+    bench.add_argument("--video-mb", type=int, default=8)
+    args = parser.parse_args(argv)
+
+    if args.command == "benchmark":
+        print(json.dumps(run_benchmark(args.runs, args.frames, args.frame_kb, args.video_mb), indent=2))
+        return 0
+
+    with ArtifactStore(args.store) as store:
+        if args.command == "stats":
+            print(json.dumps(store.stats(), indent=2))
+        elif args.command == "gc":
+            print(json.dumps(store.gc(args.grace_hours * 3600, args.dry_run), indent=2))
+        elif args.command == "release":
+            print(f"[OK] Released {store.release(args.run_dir, args.delete_files)} references from {args.run_dir}")
+        elif args.command == "add":
+            try:
+                result = store.add_files(args.run_dir, [Path(f) for f in args.files])
+            except OSError as exc:
+                print(f"[ERROR] {exc}")
+                return 1
+            print(f"[OK] {result.files} file(s) -> {args.run_dir} ({result.new_blobs} new, "
+                  f"{dict(result.methods)})")
+        else:
+            prefixes = args.prefix or completed_prefixes(args.output_dir)
+            if not prefixes:
+                print(f"[INFO] No completed scenes in {args.output_dir}")
+                return 0
+            failed = 0
+            for prefix in prefixes:
+                try:
+                    result = store.ingest_scene(args.output_dir, prefix, args.run_dir, args.frames_only)
+                except OSError as exc:
+                    print(f"[ERROR] {prefix}: {exc}")
+                    failed += 1
+                    continue
+                if result is None:
+                    print(f"[SKIP] {prefix}: no {DONE_SUFFIX} marker yet")
+                    failed += 1
+                    continue
+                print(f"[OK] {prefix}: {result.files} file(s) -> {args.run_dir} ({result.deduplicated} already stored, "
+                      f"{result.new_bytes / 2**20:.1f} MB new, {dict(result.methods)}, "
+                      f"hash {result.hash_ms:.0f} ms, link {result.materialize_ms:.0f} ms)")
+            return 1 if failed else 0
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
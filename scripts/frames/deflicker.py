@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+CPU temporal deflicker stage for completed scenes.
+
+Implements the `temporal_blend` and `histogram_match` methods of
+`DeflickerConfig` (services/deflickerService.ts) so deflicker works without
+the TemporalSmoothing / VideoDeflicker ComfyUI nodes:
+
+- temporal_blend: each frame is blended with the mean of the centred window
+  of `windowSize` frames: out = (1 - strength) * frame + strength * mean
+- histogram_match: each frame's per-channel histogram is matched to the
+  window's mean histogram, then blended with the original by `strength`
+
+Frames are streamed: at most `windowSize` decoded frames are resident per
+scene, and scenes are processed in parallel worker processes. A scene is
+eligible once its `<prefix>.done` marker exists; the result is written as
+`<prefix><suffix>_NNNNN_.png` followed by a `<prefix><suffix>.done` marker
+(comfyui_nodes/write_done_marker.py), so downstream consumers wait on it the
+same way they wait on ComfyUI output.
+
+Usage:
+    python deflicker.py --output-dir <ComfyUI>/output                      # every completed scene
+    python deflicker.py --output-dir <dir> --prefix gemdirect1_scene-001 --method histogram_match
+    python deflicker.py --output-dir <dir> --settings localGenSettings.json  # strength/window from featureFlags
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Deque, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "comfyui_nodes"))
+
+from frame_io import iter_source_chunks, to_luma  # noqa: E402
+from frame_store import DONE_SUFFIX, completed_prefixes  # noqa: E402
+from write_done_marker import write_done_marker  # noqa: E402
+
+METHODS = ("temporal_blend", "histogram_match")
+DEFAULT_SUFFIX = "_deflicker"
+
+
+@dataclass
+class DeflickerConfig:
+    """Mirror of DeflickerConfig in services/deflickerService.ts."""
+
+    strength: float = 0.35
+    window_size: int = 3
+    method: str = "temporal_blend"
+
+    @classmethod
+    def from_settings(cls, settings: dict, method: Optional[str] = None) -> "DeflickerConfig":
+        """Read deflickerStrength / deflickerWindowSize from a settings object's featureFlags."""
+        flags = settings.get("featureFlags") or {}
+        defaults = cls()
+        strength = flags.get("deflickerStrength")
+        window = flags.get("deflickerWindowSize")
+        return cls(
+            strength=strength if isinstance(strength, (int, float)) else defaults.strength,
+            window_size=window if isinstance(window, int) else defaults.window_size,
+            method=method or defaults.method,
+        )
+
+    def validate(self) -> None:
+        if self.method not in METHODS:
+            raise ValueError(f"unsupported deflicker method '{self.method}' (supported: {', '.join(METHODS)})")
+        if not 0.0 <= self.strength <= 1.0:
+            raise ValueError("strength must be between 0.0 and 1.0")
+        if self.window_size < 1:
+            raise ValueError("window_size must be at least 1")
+
+
+def _histograms(frame: np.ndarray) -> np.ndarray:
+    """(H, W, C) uint8 -> (C, 256) normalised per-channel histograms."""
+    channels = frame.shape[-1]
+    offsets = (np.arange(channels, dtype=np.int64) * 256)
+    counts = np.bincount((frame.reshape(-1, channels) + offsets).ravel(), minlength=256 * channels)
+    return counts.reshape(channels, 256) / (frame.shape[0] * frame.shape[1])
+
+
+def _match_histogram(frame: np.ndarray, hist: np.ndarray, target: np.ndarray) -> np.ndarray:
+    """Remap each channel so its CDF follows `target` (both (C, 256))."""
+    src_cdf = np.cumsum(hist, axis=1)
+    ref_cdf = np.cumsum(target, axis=1)
+    levels = np.arange(256, dtype=np.float32)
+    out = np.empty(frame.shape, dtype=np.float32)
+    for c in range(frame.shape[-1]):
+        lut = np.interp(src_cdf[c], ref_cdf[c], levels).astype(np.float32)
+        out[..., c] = lut[frame[..., c]]
+    return out
+
+
+def _iter_frames(chunks: Iterable[np.ndarray]) -> Iterator[np.ndarray]:
+    for chunk in chunks:
+        for frame in chunk:
+            yield np.asarray(frame)
+
+
+def deflicker_frames(frames: Iterable[np.ndarray], config: DeflickerConfig) -> Iterator[np.ndarray]:
+    """
+    Stream deflickered uint8 frames. Uses a centred window (clamped at the
+    scene edges) holding at most `window_size` frames.
+    """
+    config.validate()
+    half = (config.window_size - 1) // 2
+    lookahead = config.window_size - 1 - half
+    window: Deque[np.ndarray] = deque()
+    hists: Deque[np.ndarray] = deque()
+    running: Optional[np.ndarray] = None
+    strength = np.float32(config.strength)
+    pending = 0  # index within `window` of the next frame to emit
+
+    def emit() -> np.ndarray:
+        frame = window[pending]
+        if config.method == "temporal_blend":
+            reference = running / len(window)
+        else:
+            reference = _match_histogram(frame, hists[pending], np.mean(hists, axis=0))
+        out = frame.astype(np.float32) * (1 - strength) + reference * strength
+        return np.clip(out + 0.5, 0, 255).astype(np.uint8)
+
+    def push(frame: np.ndarray) -> None:
+        nonlocal running
+        window.append(frame)
+        if config.method == "temporal_blend":
+            f = frame.astype(np.float32)
+            running = f if running is None else running + f
+        else:
+            hists.append(_histograms(frame))
+
+    def pop_oldest() -> None:
+        nonlocal running
+        old = window.popleft()
+        if config.method == "temporal_blend":
+            running -= old.astype(np.float32)
+        else:
+            hists.popleft()
+
+    for frame in frames:
+        push(frame)
+        if len(window) > pending + lookahead:
+            yield emit()
+            if pending < half:
+                pending += 1
+            else:
+                pop_oldest()
+    # Flush the tail: remaining frames see a window clamped at the end
+    while pending < len(window):
+        yield emit()
+        if pending < half or len(window) <= 1:
+            pending += 1
+        else:
+            pop_oldest()
+
+
+def process_scene(
+    output_dir: str,
+    prefix: str,
+    config: DeflickerConfig,
+    suffix: str = DEFAULT_SUFFIX,
+    dest_dir: Optional[str] = None,
+) -> dict:
+    """Deflicker one completed scene and publish it with a done marker. Returns a DeflickerResult-shaped dict."""
+    from PIL import Image
+
+    start = time.perf_counter()
+    src_dir = Path(output_dir)
+    out_dir = Path(dest_dir) if dest_dir else src_dir
+    out_dir.mkdir(parents=True, exist_ok=True)
+    out_prefix = f"{prefix}{suffix}"
+
+    _, chunks = iter_source_chunks(src_dir, prefix, chunk_size=max(1, config.window_size))
+    before: List[float] = []
+    after: List[float] = []
+    count = 0
+    source = _iter_frames(chunks)
+
+    def tracked(frames: Iterable[np.ndarray]) -> Iterator[np.ndarray]:
+        for frame in frames:
+            before.append(float(to_luma(frame[None]).mean()))
+            yield frame
+
+    for frame in deflicker_frames(tracked(source), config):
+        count += 1
+        after.append(float(to_luma(frame[None]).mean()))
+        Image.fromarray(frame).save(out_dir / f"{out_prefix}_{count:05d}_.png", compress_level=4)
+
+    if count == 0:
+        raise FileNotFoundError(f"no frames found for {prefix} in {src_dir}")
+    write_done_marker(str(out_dir), out_prefix, frame_count=count)
+
+    jump_before = float(np.mean(np.abs(np.diff(before)))) if len(before) > 1 else 0.0
+    jump_after = float(np.mean(np.abs(np.diff(after)))) if len(after) > 1 else 0.0
+    reduction = (1 - jump_after / jump_before) * 100 if jump_before > 0 else 0.0
+    return {
+        "success": True,
+        "prefix": prefix,
+        "outputPrefix": out_prefix,
+        "outputPath": str(out_dir),
+        "originalFrameCount": count,
+        "processingTimeMs": round((time.perf_counter() - start) * 1000, 1),
+        "flickerReduction": round(max(0.0, min(100.0, reduction)), 1),
+        "method": config.method,
+    }
+
+
+def pending_prefixes(output_dir: str, suffix: str = DEFAULT_SUFFIX, dest_dir: Optional[str] = None,
+                     force: bool = False) -> List[str]:
+    """Completed scenes whose deflickered output is missing or older than their done marker."""
+    out_dir = Path(dest_dir) if dest_dir else Path(output_dir)
+    result = []
+    for prefix in completed_prefixes(output_dir):
+        if prefix.endswith(suffix):
+            continue
+        marker = Path(output_dir) / f"{prefix}{DONE_SUFFIX}"
+        done = out_dir / f"{prefix}{suffix}{DONE_SUFFIX}"
+        if force or not done.exists() or done.stat().st_mtime_ns < marker.stat().st_mtime_ns:
+            result.append(prefix)
+    return result
+
+
+def run(output_dir: str, prefixes: List[str], config: DeflickerConfig, suffix: str = DEFAULT_SUFFIX,
+        dest_dir: Optional[str] = None, jobs: Optional[int] = None) -> List[dict]:
+    """Process scenes in parallel worker processes; failures are reported, not raised."""
+    results = []
+    jobs = max(1, min(jobs or os.cpu_count() or 1, len(prefixes)))
+    if jobs == 1:
+        for prefix in prefixes:
+            try:
+                results.append(process_scene(output_dir, prefix, config, suffix, dest_dir))
+            except (OSError, ValueError) as exc:
+                results.append({"success": False, "prefix": prefix, "error": str(exc)})
+        return results
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = {pool.submit(process_scene, output_dir, p, config, suffix, dest_dir): p for p in prefixes}
+        for future in as_completed(futures):
+            try:
+                results.append(future.result())
+            except (OSError, ValueError) as exc:
+                results.append({"success": False, "prefix": futures[future], "error": str(exc)})
+    return sorted(results, key=lambda r: r["prefix"])
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Temporal deflicker for completed scenes (CPU)")
+    parser.add_argument("--output-dir", required=True, help="Directory holding the frames and .done markers")
+    parser.add_argument("--prefix", action="append", help="Scene prefix (repeatable; default: every completed scene)")
+    parser.add_argument("--dest-dir", default=None, help="Where to write deflickered frames (default: --output-dir)")
+    parser.add_argument("--settings", default=None, help="localGenSettings.json to read deflicker featureFlags from")
+    parser.add_argument("--method", choices=METHODS, default=None)
+    parser.add_argument("--strength", type=float, default=None)
+    parser.add_argument("--window-size", type=int, default=None)
+    parser.add_argument("--suffix", default=DEFAULT_SUFFIX, help="Appended to the prefix of the output frames")
+    parser.add_argument("--jobs", type=int, default=None, help="Scenes processed in parallel (default: CPU count)")
+    parser.add_argument("--force", action="store_true", help="Reprocess scenes that already have output")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args(argv)
+
+    if args.settings:
+        with open(args.settings, "r", encoding="utf-8") as f:
+            config = DeflickerConfig.from_settings(json.load(f), args.method)
+    else:
+        config = DeflickerConfig(method=args.method or DeflickerConfig.method)
+    if args.strength is not None:
+        config.strength = args.strength
+    if args.window_size is not None:
+        config.window_size = args.window_size
+    try:
+        config.validate()
+    except ValueError as exc:
+        parser.error(str(exc))
+
+    prefixes = args.prefix or pending_prefixes(args.output_dir, args.suffix, args.dest_dir, args.force)
+    if not prefixes:
+        print(f"[INFO] No completed scenes to deflicker in {args.output_dir}")
+        return 0
+
+    results = run(args.output_dir, prefixes, config, args.suffix, args.dest_dir, args.jobs)
+    if args.json:
+        print(json.dumps({"config": asdict(config), "results": results}, indent=2))
+    else:
+        for r in results:
+            if r["success"]:
+                print(f"[OK] {r['prefix']} -> {r['outputPrefix']}: {r['originalFrameCount']} frames, "
+                      f"flicker -{r['flickerReduction']}% ({r['processingTimeMs']:.0f} ms)")
+            else:
+                print(f"[ERROR] {r['prefix']}: {r['error']}")
+    return 0 if all(r["success"] for r in results) else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,331 @@
+"""
+Perceptual frame hashes and a Hamming-distance index over run history.
+
+Each frame gets a 64-bit pHash (low-frequency DCT signs vs. median) and a
+64-bit dHash (horizontal gradient signs). Hashes are persisted per run in
+`frame-hashes.json`; `HashHistory` merges every run under a logs directory
+into one NumPy table (cached as `frame-hash-history.npz`, refreshed only for
+runs whose hash file changed), and `MultiIndexHashTable` answers radius
+queries with multi-index hashing over four 16-bit bands, so a lookup is a
+handful of binary searches instead of a scan.
+"""
+from __future__ import annotations
+
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from itertools import combinations
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+HASHES_FILENAME = "frame-hashes.json"
+HISTORY_FILENAME = "frame-hash-history.npz"
+HASHES_VERSION = 1
+
+_DCT_SIZE = 32
+_LOW_FREQ = 8
+_POPCOUNT8 = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def _dct_matrix(n: int) -> np.ndarray:
+    k = np.arange(n)[:, None]
+    i = np.arange(n)[None, :]
+    m = np.cos(np.pi * (2 * i + 1) * k / (2 * n)) * np.sqrt(2.0 / n)
+    m[0] /= np.sqrt(2.0)
+    return m.astype(np.float32)
+
+
+_DCT = _dct_matrix(_DCT_SIZE)
+
+
+def _pack_bits(bits: np.ndarray) -> np.ndarray:
+    """(N, 64) bool -> (N,) uint64, first bit most significant."""
+    return np.packbits(bits.reshape(len(bits), 64), axis=1).view(">u8").ravel().astype(np.uint64)
+
+
+def phash(gray32: np.ndarray) -> np.ndarray:
+    """(N, 32, 32) grayscale -> (N,) uint64 pHash."""
+    coeffs = _DCT @ gray32.astype(np.float32) @ _DCT.T
+    low = coeffs[:, :_LOW_FREQ, :_LOW_FREQ].reshape(len(gray32), -1)
+    median = np.median(low[:, 1:], axis=1, keepdims=True)
+    return _pack_bits(low > median)
+
+
+def dhash(gray9x8: np.ndarray) -> np.ndarray:
+    """(N, 8, 9) grayscale -> (N,) uint64 dHash."""
+    return _pack_bits(gray9x8[:, :, 1:] > gray9x8[:, :, :-1])
+
+
+def _thumbnails(path: Path) -> Tuple[np.ndarray, np.ndarray]:
+    from PIL import Image
+
+    with Image.open(path) as img:
+        img.draft("L", (_DCT_SIZE * 4, _DCT_SIZE * 4))
+        gray = img.convert("L")
+        return (np.asarray(gray.resize((_DCT_SIZE, _DCT_SIZE), Image.BOX), dtype=np.float32),
+                np.asarray(gray.resize((9, 8), Image.BOX), dtype=np.int16))
+
+
+def hash_files(paths: Sequence[Path], workers: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """pHash and dHash arrays for image files, decoded on a thread pool."""
+    if not paths:
+        return np.zeros(0, np.uint64), np.zeros(0, np.uint64)
+    with ThreadPoolExecutor(max_workers=workers or min(8, os.cpu_count() or 1)) as pool:
+        thumbs = list(pool.map(_thumbnails, paths))
+    return phash(np.stack([t[0] for t in thumbs])), dhash(np.stack([t[1] for t in thumbs]))
+
+
+def hash_frames(frames: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """pHash and dHash arrays for already decoded (N, H, W, 3) uint8 frames."""
+    from PIL import Image
+
+    small, tiny = [], []
+    for frame in frames:
+        gray = Image.fromarray(frame).convert("L")
+        small.append(np.asarray(gray.resize((_DCT_SIZE, _DCT_SIZE), Image.BOX), dtype=np.float32))
+        tiny.append(np.asarray(gray.resize((9, 8), Image.BOX), dtype=np.int16))
+    return phash(np.stack(small)), dhash(np.stack(tiny))
+
+
+def popcount(values: np.ndarray) -> np.ndarray:
+    values = np.ascontiguousarray(values, dtype=np.uint64)
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(values).astype(np.int64)
+    return _POPCOUNT8[values.view(np.uint8)].reshape(len(values), 8).sum(axis=1).astype(np.int64)
+
+
+def hamming(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    return popcount(np.bitwise_xor(np.asarray(a, np.uint64), np.asarray(b, np.uint64)).ravel())
+
+
+def to_hex(values: np.ndarray) -> List[str]:
+    return [f"{int(v):016x}" for v in values]
+
+
+def from_hex(values: Sequence[str]) -> np.ndarray:
+    return np.array([int(v, 16) for v in values], dtype=np.uint64)
+
+
+@dataclass
+class Segment:
+    start: int
+    end: int  # inclusive frame index
+
+    @property
+    def length(self) -> int:
+        return self.end - self.start + 1
+
+    def to_dict(self) -> dict:
+        return {"start": self.start, "end": self.end, "length": self.length}
+
+
+def frozen_segments(phashes: np.ndarray, dhashes: np.ndarray, max_distance: int = 2,
+                    min_length: int = 4) -> List[Segment]:
+    """Runs of at least `min_length` consecutive frames that are near-identical to their predecessor."""
+    if len(phashes) < 2:
+        return []
+    same = (hamming(phashes[1:], phashes[:-1]) <= max_distance) & (hamming(dhashes[1:], dhashes[:-1]) <= max_distance)
+    # Boundaries of runs of True in `same`; a run of k transitions spans k + 1 frames
+    padded = np.concatenate([[False], same, [False]]).astype(np.int8)
+    edges = np.flatnonzero(np.diff(padded))
+    segments = []
+    for start, stop in zip(edges[::2], edges[1::2]):
+        if stop - start + 1 >= min_length:
+            segments.append(Segment(int(start), int(stop)))
+    return segments
+
+
+def repeated_frames(phashes: np.ndarray, max_distance: int = 2, min_gap: int = 8) -> List[Tuple[int, int]]:
+    """(earlier, later) frame pairs at least `min_gap` apart with matching hashes — loops or ping-pong clips."""
+    n = len(phashes)
+    if n <= min_gap:
+        return []
+    x = np.bitwise_xor(phashes[:, None], phashes[None, :])
+    dist = popcount(x.ravel()).reshape(n, n)
+    i, j = np.nonzero(np.triu(dist <= max_distance, k=min_gap))
+    return list(zip(i.tolist(), j.tolist()))
+
+
+_BAND_BITS = 16
+_BANDS = 64 // _BAND_BITS
+
+
+def _flip_masks(bits: int, max_flips: int) -> np.ndarray:
+    """Every `bits`-wide mask with at most `max_flips` bits set."""
+    masks = [0]
+    for flips in range(1, max_flips + 1):
+        masks.extend(sum(1 << b for b in combo) for combo in combinations(range(bits), flips))
+    return np.array(masks, dtype=np.uint64)
+
+
+class MultiIndexHashTable:
+    """
+    Exact Hamming radius search over uint64 hashes via multi-index hashing.
+
+    The hashes are split into four 16-bit bands, each kept as a sorted
+    column. A hash within distance r of the query differs in at most r // 4
+    bits on at least one band, so probing every band key within that many
+    bit flips (1, 17 or 137 keys for r < 12) finds all matches.
+    """
+
+    def __init__(self, hashes: np.ndarray, radius: int = 6):
+        self.hashes = np.ascontiguousarray(hashes, dtype=np.uint64)
+        self.radius = radius
+        self._flips = _flip_masks(_BAND_BITS, radius // _BANDS)
+        self._bands = []
+        mask = np.uint64((1 << _BAND_BITS) - 1)
+        for band in range(_BANDS):
+            shift = np.uint64(band * _BAND_BITS)
+            keys = (self.hashes >> shift) & mask
+            order = np.argsort(keys, kind="stable")
+            self._bands.append((shift, mask, keys[order], order))
+
+    def __len__(self) -> int:
+        return len(self.hashes)
+
+    def query(self, value: int, radius: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Indices and distances of stored hashes within `radius` (<= the table's radius) of `value`."""
+        radius = self.radius if radius is None else min(radius, self.radius)
+        value = np.uint64(value)
+        candidates = []
+        for shift, mask, keys, order in self._bands:
+            probes = ((value >> shift) & mask) ^ self._flips
+            lo = np.searchsorted(keys, probes, "left")
+            hi = np.searchsorted(keys, probes, "right")
+            for a, b in zip(lo[hi > lo], hi[hi > lo]):
+                candidates.append(order[a:b])
+        if not candidates:
+            return np.zeros(0, np.int64), np.zeros(0, np.int64)
+        idx = np.unique(np.concatenate(candidates))
+        dist = hamming(self.hashes[idx], np.full(len(idx), value, np.uint64))
+        keep = dist <= radius
+        return idx[keep], dist[keep]
+
+
+# ---------------------------------------------------------------------------
+# Per-run persistence and history
+# ---------------------------------------------------------------------------
+
+def load_run_hashes(run_dir: Path) -> dict:
+    path = Path(run_dir) / HASHES_FILENAME
+    if path.exists():
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+            if data.get("version") == HASHES_VERSION:
+                return data
+        except (OSError, ValueError):
+            pass
+    return {"version": HASHES_VERSION, "scenes": {}}
+
+
+def save_run_hashes(run_dir: Path, data: dict) -> Path:
+    path = Path(run_dir) / HASHES_FILENAME
+    tmp = path.with_suffix(".json.tmp")
+    tmp.write_text(json.dumps(data, separators=(",", ":")), encoding="utf-8")
+    os.replace(tmp, path)
+    return path
+
+
+class HashHistory:
+    """
+    Every frame hash recorded under a logs directory, as flat arrays:
+    `phash`, and per row the run, scene and frame index it came from.
+    """
+
+    def __init__(self, logs_dir: Path, cache_path: Optional[Path] = None):
+        self.logs_dir = Path(logs_dir)
+        self.cache_path = Path(cache_path) if cache_path else self.logs_dir / HISTORY_FILENAME
+        self.runs: List[str] = []
+        self.scenes: List[str] = []
+        self.phash = np.zeros(0, np.uint64)
+        self.run_idx = np.zeros(0, np.int32)
+        self.scene_idx = np.zeros(0, np.int32)
+        self.frame_idx = np.zeros(0, np.int32)
+        self._table: Optional[MultiIndexHashTable] = None
+        self.loaded_runs = 0
+
+    def load(self) -> "HashHistory":
+        manifest = self._load_cache()
+        current = {}
+        for entry in os.scandir(self.logs_dir):
+            if entry.is_dir():
+                hashes = os.path.join(entry.path, HASHES_FILENAME)
+                if os.path.exists(hashes):
+                    current[entry.name] = os.stat(hashes).st_mtime_ns
+
+        stale = {run for run, mtime in manifest.items() if current.get(run) != mtime}
+        if stale:
+            stale_ids = [i for i, run in enumerate(self.runs) if run in stale]
+            keep = ~np.isin(self.run_idx, stale_ids)
+            self._take(keep)
+        parts = []
+        for run in sorted(current):
+            if manifest.get(run) == current[run]:
+                continue
+            parts.extend(self._run_rows(run, load_run_hashes(self.logs_dir / run)))
+            self.loaded_runs += 1
+        if parts:
+            columns = list(zip(*parts))
+            self.phash = np.concatenate([self.phash, *columns[0]])
+            self.run_idx = np.concatenate([self.run_idx, *columns[1]])
+            self.scene_idx = np.concatenate([self.scene_idx, *columns[2]])
+            self.frame_idx = np.concatenate([self.frame_idx, *columns[3]])
+        if stale or self.loaded_runs:
+            self._save_cache(current)
+        self._table = None
+        return self
+
+    def table(self, radius: int) -> MultiIndexHashTable:
+        if self._table is None or self._table.radius < radius:
+            self._table = MultiIndexHashTable(self.phash, radius)
+        return self._table
+
+    def describe(self, row: int) -> Tuple[str, str, int]:
+        return (self.runs[self.run_idx[row]], self.scenes[self.scene_idx[row]], int(self.frame_idx[row]))
+
+    def __len__(self) -> int:
+        return len(self.phash)
+
+    def _run_rows(self, run: str, data: dict) -> List[Tuple[np.ndarray, ...]]:
+        if run not in self.runs:
+            self.runs.append(run)
+        run_id = self.runs.index(run)
+        rows = []
+        for scene_id, scene in data.get("scenes", {}).items():
+            values = from_hex(scene.get("phash", []))
+            if scene_id not in self.scenes:
+                self.scenes.append(scene_id)
+            rows.append((values,
+                         np.full(len(values), run_id, np.int32),
+                         np.full(len(values), self.scenes.index(scene_id), np.int32),
+                         np.arange(len(values), dtype=np.int32)))
+        return rows
+
+    def _take(self, mask: np.ndarray) -> None:
+        self.phash, self.run_idx = self.phash[mask], self.run_idx[mask]
+        self.scene_idx, self.frame_idx = self.scene_idx[mask], self.frame_idx[mask]
+
+    def _load_cache(self) -> Dict[str, int]:
+        if not self.cache_path.exists():
+            return {}
+        try:
+            with np.load(self.cache_path, allow_pickle=False) as data:
+                meta = json.loads(str(data["meta"]))
+                if meta.get("version") != HASHES_VERSION:
+                    return {}
+                self.runs, self.scenes = meta["runs"], meta["scenes"]
+                self.phash = data["phash"]
+                self.run_idx, self.scene_idx, self.frame_idx = data["run_idx"], data["scene_idx"], data["frame_idx"]
+                return {run: int(mtime) for run, mtime in meta["mtimes"].items()}
+        except (OSError, ValueError, KeyError):
+            return {}
+
+    def _save_cache(self, mtimes: Dict[str, int]) -> None:
+        meta = {"version": HASHES_VERSION, "runs": self.runs, "scenes": self.scenes, "mtimes": mtimes}
+        tmp = self.cache_path.with_name(self.cache_path.name + ".tmp.npz")
+        np.savez(tmp, meta=np.array(json.dumps(meta)), phash=self.phash, run_idx=self.run_idx,
+                 scene_idx=self.scene_idx, frame_idx=self.frame_idx)
+        os.replace(tmp, self.cache_path)
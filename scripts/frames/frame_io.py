@@ -0,0 +1,133 @@
+"""
+Frame decoding helpers shared by the Python frame tooling.
+
+Decodes a scene once into NumPy arrays with bounded memory: PNG sequences
+(sorted by their trailing frame number) are decoded in fixed-size chunks on
+a thread pool (zlib releases the GIL), and MP4s are streamed through
+imageio so only `chunk_size` frames are resident at a time. Scenes packed
+by frame_store.py are read from their memory-mapped store instead.
+"""
+from __future__ import annotations
+
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".webp"}
+VIDEO_EXTENSIONS = {".mp4", ".webm", ".mov", ".mkv"}
+_TRAILING_NUMBER = re.compile(r"(\d+)_?$")
+DEFAULT_CHUNK_SIZE = 32
+
+# ITU-R BT.601 luma weights (what ffmpeg signalstats reports as Y for yuv420p)
+LUMA_WEIGHTS = np.array([0.299, 0.587, 0.114], dtype=np.float32)
+
+
+def frame_number(path: Path) -> int:
+    match = _TRAILING_NUMBER.search(path.stem)
+    return int(match.group(1)) if match else -1
+
+
+def list_frames(frames_dir: Path, prefix: Optional[str] = None) -> List[Path]:
+    """Image files in `frames_dir` (optionally only `<prefix>_<number>` frames), in frame order."""
+    frames = []
+    # "<prefix>_00001_.png" but not "<prefix>_deflicker_00001_.png"
+    own_frame = re.compile(re.escape(prefix) + r"_\d+_?\.") if prefix else None
+    with os.scandir(frames_dir) as entries:
+        for entry in entries:
+            if not entry.is_file():
+                continue
+            if own_frame and not own_frame.match(entry.name):
+                continue
+            if os.path.splitext(entry.name)[1].lower() in IMAGE_EXTENSIONS:
+                frames.append(Path(entry.path))
+    return sorted(frames, key=lambda p: (frame_number(p), p.name))
+
+
+def find_video(frames_dir: Path) -> Optional[Path]:
+    videos = sorted(p for p in frames_dir.iterdir() if p.suffix.lower() in VIDEO_EXTENSIONS)
+    return videos[0] if videos else None
+
+
+def load_image(path: Path) -> np.ndarray:
+    """Decode one image to an (H, W, 3) uint8 array."""
+    from PIL import Image
+
+    with Image.open(path) as img:
+        return np.asarray(img.convert("RGB"))
+
+
+def iter_image_chunks(
+    paths: Sequence[Path],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    workers: Optional[int] = None,
+) -> Iterator[np.ndarray]:
+    """Yield (N, H, W, 3) uint8 batches of at most `chunk_size` frames."""
+    workers = workers or min(8, os.cpu_count() or 1)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for start in range(0, len(paths), chunk_size):
+            yield np.stack(list(pool.map(load_image, paths[start:start + chunk_size])))
+
+
+def iter_video_chunks(path: Path, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[np.ndarray]:
+    """Stream an MP4 (or other container imageio can read) in (N, H, W, 3) batches."""
+    import imageio.v3 as iio
+
+    batch: List[np.ndarray] = []
+    for frame in iio.imiter(path):
+        batch.append(np.asarray(frame)[..., :3])
+        if len(batch) == chunk_size:
+            yield np.stack(batch)
+            batch = []
+    if batch:
+        yield np.stack(batch)
+
+
+def iter_source_chunks(
+    source: Path,
+    prefix: Optional[str] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Tuple[str, Iterator[np.ndarray]]:
+    """
+    Resolve a scene's frames to ("store" | "png" | "video", chunk iterator):
+    a packed frame store for `prefix` when one is current, else the PNG
+    directory, falling back to a video inside it, or a video file.
+    """
+    if source.is_dir():
+        from frame_store import FrameStore, find_store
+
+        store_path = find_store(source, prefix)
+        if store_path is not None:
+            return "store", FrameStore(store_path).iter_chunks(chunk_size)
+        frames = list_frames(source, prefix)
+        if frames:
+            return "png", iter_image_chunks(frames, chunk_size)
+        video = find_video(source)
+        if video is None:
+            raise FileNotFoundError(f"No frames or video found in {source}")
+        source = video
+    if not source.exists():
+        raise FileNotFoundError(f"Frame source not found: {source}")
+    return "video", iter_video_chunks(source, chunk_size)
+
+
+def to_luma(frames: np.ndarray) -> np.ndarray:
+    """(N, H, W, 3) uint8 -> (N, H, W) float32 luma in 0-255."""
+    return frames.astype(np.float32) @ LUMA_WEIGHTS
+
+
+def downscale(frames: np.ndarray, max_side: Optional[int]) -> np.ndarray:
+    """Area-average downscale by an integer factor so max(H, W) <= max_side."""
+    if not max_side:
+        return frames
+    height, width = frames.shape[1:3]
+    factor = int(np.ceil(max(height, width) / max_side))
+    if factor <= 1:
+        return frames
+    h, w = (height // factor) * factor, (width // factor) * factor
+    trimmed = frames[:, :h, :w]
+    shape = (frames.shape[0], h // factor, factor, w // factor, factor) + frames.shape[3:]
+    return trimmed.reshape(shape).mean(axis=(2, 4)).astype(frames.dtype)
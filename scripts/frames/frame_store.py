@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+"""
+Memory-mapped frame store for completed scenes.
+
+Packs a scene's PNG sequence into one `<prefix>.frames` file once its
+`<prefix>.done` marker (comfyui_nodes/write_done_marker.py) exists:
+
+    b"GDFRAMES" | uint32 header length | JSON header | padding | raw frames
+
+The header records shape [N, H, W, C], dtype, fps, prefix, the source frame
+names and their SHA-256 digests. Frame data starts on a 4 KiB boundary and is
+stored uncompressed, so `FrameStore` opens it as a read-only np.memmap:
+slicing frames costs a page fault, not a PNG decode.
+
+Usage:
+    python frame_store.py pack --output-dir <ComfyUI>/output            # every completed scene
+    python frame_store.py pack --output-dir <dir> --prefix gemdirect1_scene-001
+    python frame_store.py info <dir>/gemdirect1_scene-001.frames
+    python frame_store.py benchmark --frames 120 --width 576 --height 1024
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import struct
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Iterator, List, Optional, Sequence, Union
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from frame_io import DEFAULT_CHUNK_SIZE, iter_image_chunks, list_frames  # noqa: E402
+
+MAGIC = b"GDFRAMES"
+STORE_VERSION = 1
+STORE_SUFFIX = ".frames"
+DONE_SUFFIX = ".done"
+_ALIGN = 4096
+
+
+def store_path_for(output_dir: Union[str, Path], prefix: str) -> Path:
+    return Path(output_dir) / f"{prefix}{STORE_SUFFIX}"
+
+
+def _file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _read_marker(output_dir: Path, prefix: str) -> Optional[dict]:
+    marker = output_dir / f"{prefix}{DONE_SUFFIX}"
+    if not marker.exists():
+        return None
+    try:
+        return json.loads(marker.read_text(encoding="utf-8") or "{}")
+    except ValueError:
+        return {}
+
+
+def _read_header(f) -> tuple:
+    magic = f.read(len(MAGIC))
+    if magic != MAGIC:
+        raise ValueError("not a frame store file")
+    (length,) = struct.unpack("<I", f.read(4))
+    header = json.loads(f.read(length).decode("utf-8"))
+    if header.get("version") != STORE_VERSION:
+        raise ValueError(f"unsupported frame store version {header.get('version')}")
+    return header, header["data_offset"]
+
+
+class FrameStore:
+    """Read-only, zero-copy view of a packed scene."""
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            self.header, offset = _read_header(f)
+        shape = tuple(self.header["shape"])
+        self.frames = np.memmap(self.path, dtype=self.header["dtype"], mode="r", offset=offset, shape=shape)
+
+    @property
+    def shape(self) -> tuple:
+        return self.frames.shape
+
+    @property
+    def fps(self) -> Optional[float]:
+        return self.header.get("fps")
+
+    @property
+    def prefix(self) -> str:
+        return self.header["prefix"]
+
+    @property
+    def frame_names(self) -> List[str]:
+        return self.header["frames"]
+
+    def __len__(self) -> int:
+        return self.frames.shape[0]
+
+    def __getitem__(self, index):
+        return self.frames[index]
+
+    def iter_chunks(self, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[np.ndarray]:
+        for start in range(0, len(self), chunk_size):
+            yield self.frames[start:start + chunk_size]
+
+    def is_current(self, frames_dir: Optional[Path] = None) -> bool:
+        """True if the source PNGs are unchanged (by name and size) since packing."""
+        frames_dir = Path(frames_dir) if frames_dir else self.path.parent
+        current = list_frames(frames_dir, self.prefix)
+        if [p.name for p in current] != self.frame_names:
+            return False
+        return [p.stat().st_size for p in current] == self.header.get("sizes")
+
+    def close(self) -> None:
+        # Frames handed out are views into the map; it is unmapped once the last one is collected
+        self.frames = None
+
+    def __enter__(self) -> "FrameStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def pack_frames(
+    frames: Sequence[Path],
+    dest: Path,
+    prefix: str,
+    fps: Optional[float] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    extra: Optional[dict] = None,
+) -> Path:
+    """Decode `frames` once and write them as a frame store at `dest` (atomic rename)."""
+    if not frames:
+        raise ValueError(f"no frames to pack for {prefix}")
+    chunks = iter_image_chunks(frames, chunk_size)
+    first = next(chunks)
+    shape = (len(frames),) + first.shape[1:]
+    header = {
+        "version": STORE_VERSION,
+        "prefix": prefix,
+        "shape": list(shape),
+        "dtype": str(first.dtype),
+        "fps": fps,
+        "frames": [p.name for p in frames],
+        "sizes": [p.stat().st_size for p in frames],
+        "sha256": [_file_sha256(p) for p in frames],
+        "created": time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+    }
+    if extra:
+        header.update(extra)
+    # Reserve room for data_offset itself, then round up to the page size
+    encoded = json.dumps({**header, "data_offset": 0}).encode("utf-8")
+    offset = -(-(len(MAGIC) + 4 + len(encoded) + 16) // _ALIGN) * _ALIGN
+    encoded = json.dumps({**header, "data_offset": offset}).encode("utf-8")
+
+    dest = Path(dest)
+    fd, tmp = tempfile.mkstemp(prefix=dest.name, suffix=".tmp", dir=dest.parent)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(MAGIC + struct.pack("<I", len(encoded)) + encoded)
+            f.write(b"\0" * (offset - f.tell()))
+            f.write(first.tobytes())
+            written = len(first)
+            for chunk in chunks:
+                if chunk.shape[1:] != first.shape[1:]:
+                    raise ValueError(f"frame size changed within {prefix}: {chunk.shape[1:]} != {first.shape[1:]}")
+                f.write(chunk.tobytes())
+                written += len(chunk)
+            assert written == shape[0]
+        os.replace(tmp, dest)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    return dest
+
+
+def pack_scene(
+    output_dir: Union[str, Path],
+    prefix: str,
+    dest_dir: Optional[Union[str, Path]] = None,
+    fps: Optional[float] = None,
+    force: bool = False,
+) -> Optional[Path]:
+    """
+    Pack a completed scene. Returns the store path, or None if the scene has
+    no done marker yet. An existing store is kept unless it is older than the
+    marker or the frames changed (or `force`).
+    """
+    output_dir = Path(output_dir)
+    marker = _read_marker(output_dir, prefix)
+    if marker is None:
+        return None
+    dest = store_path_for(dest_dir or output_dir, prefix)
+    marker_mtime = (output_dir / f"{prefix}{DONE_SUFFIX}").stat().st_mtime_ns
+    if not force and dest.exists() and dest.stat().st_mtime_ns >= marker_mtime:
+        with FrameStore(dest) as existing:
+            if existing.is_current(output_dir):
+                return dest
+    frames = list_frames(output_dir, prefix)
+    expected = marker.get("FrameCount")
+    if expected is not None and expected != len(frames):
+        print(f"[WARN] {prefix}: marker reports {expected} frames, found {len(frames)}")
+    return pack_frames(frames, dest, prefix, fps, extra={"marker": marker})
+
+
+def completed_prefixes(output_dir: Union[str, Path]) -> List[str]:
+    """Prefixes with a done marker in `output_dir`."""
+    return sorted(
+        entry.name[:-len(DONE_SUFFIX)]
+        for entry in os.scandir(output_dir)
+        if entry.is_file() and entry.name.endswith(DONE_SUFFIX)
+    )
+
+
+def find_store(frames_dir: Path, prefix: Optional[str]) -> Optional[Path]:
+    """An up-to-date store for `prefix` in `frames_dir`, if one exists."""
+    if not prefix:
+        return None
+    path = store_path_for(frames_dir, prefix)
+    if not path.exists():
+        return None
+    try:
+        with FrameStore(path) as store:
+            return path if store.is_current(frames_dir) else None
+    except (OSError, ValueError):
+        return None
+
+
+def run_benchmark(frame_count: int, width: int, height: int) -> dict:
+    """Compare decoding a PNG sequence with reading the same scene from a store."""
+    from PIL import Image
+
+    rng = np.random.default_rng(0)
+    base = rng.integers(0, 255, size=(height // 8, width // 8, 3), dtype=np.uint8)
+    base = np.asarray(Image.fromarray(base).resize((width, height), Image.BILINEAR))
+    with tempfile.TemporaryDirectory() as tmp:
+        out = Path(tmp)
+        prefix = "bench_scene"
+        for i in range(frame_count):
+            Image.fromarray(np.roll(base, i * 4, axis=1)).save(out / f"{prefix}_{i + 1:05d}_.png", compress_level=1)
+        frames = list_frames(out, prefix)
+
+        t0 = time.perf_counter()
+        png_sum = sum(int(chunk[:, ::64, ::64].sum()) for chunk in iter_image_chunks(frames))
+        png_s = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        dest = pack_frames(frames, store_path_for(out, prefix), prefix)
+        pack_s = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        with FrameStore(dest) as store:
+            store_sum = sum(int(chunk[:, ::64, ::64].sum()) for chunk in store.iter_chunks())
+            full = float(np.asarray(store.frames).mean())  # touches every byte
+        store_s = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        with FrameStore(dest) as store:
+            _ = np.asarray(store[frame_count // 2]).copy()
+        random_ms = (time.perf_counter() - t0) * 1000
+
+    assert png_sum == store_sum
+    return {
+        "frames": frame_count,
+        "width": width,
+        "height": height,
+        "png_decode_s": round(png_s, 3),
+        "pack_s": round(pack_s, 3),
+        "store_read_s": round(store_s, 3),
+        "speedup": round(png_s / store_s, 1) if store_s else None,
+        "random_frame_ms": round(random_ms, 2),
+        "mean_pixel": round(full, 2),
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Pack completed scenes into memory-mapped frame stores")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    pack = sub.add_parser("pack", help="Pack scenes that have a .done marker")
+    pack.add_argument("--output-dir", required=True, help="Directory holding the frames and .done markers")
+    pack.add_argument("--prefix", action="append", help="Scene prefix (repeatable; default: every completed scene)")
+    pack.add_argument("--dest-dir", default=None, help="Where to write .frames files (default: --output-dir)")
+    pack.add_argument("--fps", type=float, default=None)
+    pack.add_argument("--force", action="store_true", help="Repack even if the store is current")
+
+    info = sub.add_parser("info", help="Print a store's header")
+    info.add_argument("path")
+
+    bench = sub.add_parser("benchmark", help="Compare PNG decode with store reads on synthetic frames")
+    bench.add_argument("--frames", type=int, default=120)
+    bench.add_argument("--width", type=int, default=576)
+    bench.add_argument("--height", type=int, default=1024)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "info":
+        with FrameStore(args.path) as store:
+            header = dict(store.header)
+            header.pop("sha256", None)
+            header.pop("sizes", None)
+            header["frames"] = f"{len(store)} frames ({header['frames'][0]} .. {header['frames'][-1]})"
+            print(json.dumps(header, indent=2))
+        return 0
+
+    if args.command == "benchmark":
+        print(json.dumps(run_benchmark(args.frames, args.width, args.height), indent=2))
+        return 0
+
+    prefixes = args.prefix or completed_prefixes(args.output_dir)
+    if not prefixes:
+        print(f"[INFO] No completed scenes in {args.output_dir}")
+        return 0
+    failed = 0
+    for prefix in prefixes:
+        t0 = time.perf_counter()
+        try:
+            dest = pack_scene(args.output_dir, prefix, args.dest_dir, args.fps, args.force)
+        except (OSError, ValueError) as exc:
+            print(f"[ERROR] {prefix}: {exc}")
+            failed += 1
+            continue
+        if dest is None:
+            print(f"[SKIP] {prefix}: no {DONE_SUFFIX} marker yet")
+        else:
+            print(f"[OK] {prefix} -> {dest} ({(time.perf_counter() - t0) * 1000:.0f} ms)")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
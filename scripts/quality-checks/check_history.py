@@ -0,0 +1,433 @@
+#!/usr/bin/env python3
+"""
+Shared history store for quality-check results.
+
+Every check still writes its `<check>-check-report.json` into the run
+directory, but trend questions ("how has aggregate_alignment moved over the
+last three months?") used to mean walking the logs tree and re-parsing
+thousands of reports. Each check now also records its report here: one row
+per (check, run, scene, metric) in a SQLite table indexed by check name,
+metric and run time, plus one row per (check, run) with the pass/fail
+verdict. Trend queries are single indexed SELECTs and take milliseconds.
+
+Records are derived generically from the report: every numeric (or boolean)
+field of each entry in `scenes` becomes a scene-level metric, and every
+numeric top-level field a run-level metric (scene_id ''). Nested dicts are
+flattened with dots, e.g. `start_bookend.ssim` or `theme_distribution.action`.
+Recording a run again replaces its previous rows.
+
+The store defaults to `<logs>/check-history.sqlite`, next to the run
+directories. A run directory outside a logs directory (not under `logs/`
+and not named like `20251101-120000`) keeps its own store instead.
+GEMDIRECT_CHECK_HISTORY overrides the path; set it to 0 to disable
+recording.
+A store written with another schema version is moved aside to
+`check-history.v<N>.sqlite`, with a warning, rather than cleared.
+
+Usage:
+    python scripts/quality-checks/check_history.py import logs
+    python scripts/quality-checks/check_history.py trend --check similarity --metric aggregate_alignment
+    python scripts/quality-checks/check_history.py daily --check video_quality --metric ssim --since 2025-09-01
+    python scripts/quality-checks/check_history.py --benchmark 2000
+
+Exit codes:
+- 0: Query succeeded
+- 1: Query returned no rows
+- 2: History store or logs directory missing
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple, Union
+
+HISTORY_FILENAME = "check-history.sqlite"
+ENV_HISTORY = "GEMDIRECT_CHECK_HISTORY"
+REPORT_SUFFIX = "-check-report.json"
+RUN_DIR_FORMAT = "%Y%m%d-%H%M%S"
+SCHEMA_VERSION = 1
+_DISABLED = {"0", "off", "false", "no"}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    check_name TEXT NOT NULL,
+    run        TEXT NOT NULL,
+    run_time   REAL NOT NULL,
+    scene_id   TEXT NOT NULL,
+    metric     TEXT NOT NULL,
+    value      REAL,
+    PRIMARY KEY (check_name, run, scene_id, metric)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS results_trend ON results(check_name, metric, scene_id, run_time, value);
+CREATE INDEX IF NOT EXISTS results_run ON results(run);
+CREATE TABLE IF NOT EXISTS runs (
+    check_name   TEXT NOT NULL,
+    run          TEXT NOT NULL,
+    run_time     REAL NOT NULL,
+    passed       INTEGER,
+    report_file  TEXT,
+    report_mtime REAL,
+    recorded_at  REAL NOT NULL,
+    PRIMARY KEY (check_name, run)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS runs_time ON runs(check_name, run_time);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+@dataclass
+class ImportStats:
+    reports: int = 0
+    recorded: int = 0
+    skipped: int = 0
+    rows: int = 0
+    duration_ms: float = 0.0
+
+
+def run_time_for(run: str, fallback: Optional[float] = None) -> float:
+    """Epoch seconds for a `%Y%m%d-%H%M%S` run directory name (else `fallback`, else now)."""
+    try:
+        return datetime.strptime(run[:15], RUN_DIR_FORMAT).timestamp()
+    except ValueError:
+        return fallback if fallback is not None else time.time()
+
+
+def _parse_date(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    return datetime.fromisoformat(value).timestamp()
+
+
+def numeric_fields(record: dict, prefix: str = "") -> Iterator[Tuple[str, float]]:
+    """(metric, value) for numeric/boolean fields of a report entry, nested dicts flattened with dots."""
+    for key, value in record.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, bool):
+            yield name, float(value)
+        elif isinstance(value, (int, float)):
+            if math.isfinite(value):
+                yield name, float(value)
+        elif isinstance(value, dict):
+            yield from numeric_fields(value, f"{name}.")
+
+
+def report_rows(report: dict) -> List[Tuple[str, str, float]]:
+    """(scene_id, metric, value) rows for a check report; run-level metrics use scene_id ''."""
+    rows = [("", metric, value) for metric, value in
+            numeric_fields({k: v for k, v in report.items() if k != "scenes"})]
+    for i, scene in enumerate(report.get("scenes") or []):
+        if not isinstance(scene, dict):
+            continue
+        scene_id = str(scene.get("scene_id") or f"scene_{i}")
+        rows.extend((scene_id, metric, value) for metric, value in numeric_fields(scene))
+    return rows
+
+
+def logs_dir_for(run_dir: Union[str, Path]) -> Optional[Path]:
+    """
+    The logs directory a run lives in: its parent when that is named `logs`
+    or the run directory has a `%Y%m%d-%H%M%S` name. None for ad-hoc
+    directories such as temp-validate-run, whose parent may be the repo root.
+    """
+    run_dir = Path(run_dir).resolve()
+    if run_dir.parent.name == "logs":
+        return run_dir.parent
+    try:
+        datetime.strptime(run_dir.name[:15], RUN_DIR_FORMAT)
+    except ValueError:
+        return None
+    return run_dir.parent
+
+
+def default_history_path(run_dir: Union[str, Path]) -> Optional[Path]:
+    """
+    History store for a run: GEMDIRECT_CHECK_HISTORY, else <logs>/check-history.sqlite,
+    else (outside a logs directory) the run directory itself. None if disabled.
+    """
+    override = os.environ.get(ENV_HISTORY, "").strip()
+    if override.lower() in _DISABLED:
+        return None
+    if override:
+        return Path(override)
+    return (logs_dir_for(run_dir) or Path(run_dir).resolve()) / HISTORY_FILENAME
+
+
+class CheckHistory:
+    def __init__(self, db_path: Union[str, Path]):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = self._connect()
+        version = self._db.execute("SELECT value FROM meta WHERE key='version'").fetchone()
+        if version is not None and version[0] != str(SCHEMA_VERSION):
+            self._set_aside(version[0])
+        if version is None or version[0] != str(SCHEMA_VERSION):
+            self._db.execute("INSERT OR REPLACE INTO meta VALUES ('version', ?)", (str(SCHEMA_VERSION),))
+            self._db.commit()
+
+    def _connect(self) -> sqlite3.Connection:
+        db = sqlite3.connect(str(self.db_path), timeout=30)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.executescript(_SCHEMA)
+        return db
+
+    def _set_aside(self, version: str) -> None:
+        """Move a store written with another schema to check-history.v<version>.sqlite and start a new one."""
+        self._db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        self._db.close()
+        backup = self.db_path.with_name(f"{self.db_path.stem}.v{version}{self.db_path.suffix}")
+        os.replace(self.db_path, backup)
+        for suffix in ("-wal", "-shm"):
+            Path(f"{self.db_path}{suffix}").unlink(missing_ok=True)
+        print(f"[WARN] {self.db_path} uses history schema v{version}, not v{SCHEMA_VERSION}; "
+              f"moved it to {backup} and started a new history")
+        self._db = self._connect()
+
+    def close(self) -> None:
+        self._db.close()
+
+    def __enter__(self) -> "CheckHistory":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def record(self, report: dict, run: str, run_time: Optional[float] = None, report_file: Optional[str] = None,
+               report_mtime: Optional[float] = None, commit: bool = True) -> int:
+        """Replace the stored rows for (report's check_name, run). Returns the number of metric rows."""
+        check_name = report.get("check_name") or "unknown"
+        run_time = run_time if run_time is not None else run_time_for(run, report_mtime)
+        rows = report_rows(report)
+        passed = report.get("meets_threshold")
+        self._db.execute("DELETE FROM results WHERE check_name = ? AND run = ?", (check_name, run))
+        self._db.executemany(
+            "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?)",
+            [(check_name, run, run_time, scene_id, metric, value) for scene_id, metric, value in rows],
+        )
+        self._db.execute(
+            "INSERT OR REPLACE INTO runs VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (check_name, run, run_time, None if passed is None else int(bool(passed)),
+             report_file, report_mtime, time.time()),
+        )
+        if commit:
+            self._db.commit()
+        return len(rows)
+
+    def import_logs(self, logs_dir: Union[str, Path]) -> ImportStats:
+        """Record every <run>/*-check-report.json under logs_dir, skipping reports unchanged since last import."""
+        start = time.perf_counter()
+        stats = ImportStats()
+        known = {(r, f): m for r, f, m in self._db.execute("SELECT run, report_file, report_mtime FROM runs")}
+        for report_path in sorted(Path(logs_dir).glob(f"*/*{REPORT_SUFFIX}")):
+            stats.reports += 1
+            run = report_path.parent.name
+            mtime = report_path.stat().st_mtime
+            if known.get((run, report_path.name)) == mtime:
+                stats.skipped += 1
+                continue
+            try:
+                with open(report_path, "r", encoding="utf-8-sig") as f:
+                    report = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"[WARN] Skipping unreadable report {report_path}: {e}")
+                continue
+            report.setdefault("check_name", report_path.name[: -len(REPORT_SUFFIX)].replace("-", "_"))
+            stats.rows += self.record(report, run, report_file=report_path.name, report_mtime=mtime, commit=False)
+            stats.recorded += 1
+        self._db.commit()
+        stats.duration_ms = round((time.perf_counter() - start) * 1000, 2)
+        return stats
+
+    def trend(self, check_name: str, metric: str, scene_id: str = "", since: Optional[float] = None,
+              until: Optional[float] = None, limit: Optional[int] = None) -> List[Tuple[str, float, float]]:
+        """(run, run_time, value) in time order; the most recent `limit` runs when limit is given."""
+        sql = ("SELECT run, run_time, value FROM results WHERE check_name = ? AND metric = ? AND scene_id = ?"
+               " AND run_time >= ? AND run_time <= ? ORDER BY run_time DESC")
+        params: list = [check_name, metric, scene_id, since or 0.0, until or float("inf")]
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return list(reversed(self._db.execute(sql, params).fetchall()))
+
+    def daily(self, check_name: str, metric: str, since: Optional[float] = None,
+              until: Optional[float] = None) -> List[dict]:
+        """Per-day rollup of a metric over all scenes (or the run-level value when it has no scene rows)."""
+        scene_rows = self._db.execute(
+            "SELECT 1 FROM results WHERE check_name = ? AND metric = ? AND scene_id != '' LIMIT 1",
+            (check_name, metric),
+        ).fetchone()
+        rows = self._db.execute(
+            "SELECT date(run_time, 'unixepoch', 'localtime') AS day, COUNT(*), COUNT(DISTINCT run),"
+            " AVG(value), MIN(value), MAX(value) FROM results"
+            " WHERE check_name = ? AND metric = ? AND run_time >= ? AND run_time <= ?"
+            f" AND scene_id {'!=' if scene_rows else '='} '' GROUP BY day ORDER BY day",
+            (check_name, metric, since or 0.0, until or float("inf")),
+        ).fetchall()
+        return [
+            {"day": day, "samples": n, "runs": runs, "mean": round(mean, 4), "min": lo, "max": hi}
+            for day, n, runs, mean, lo, hi in rows
+        ]
+
+    def pass_rate(self, check_name: str, since: Optional[float] = None) -> Tuple[int, int]:
+        """(passed runs, runs with a verdict) for a check since a time."""
+        passed, total = self._db.execute(
+            "SELECT COALESCE(SUM(passed), 0), COUNT(passed) FROM runs WHERE check_name = ? AND run_time >= ?",
+            (check_name, since or 0.0),
+        ).fetchone()
+        return passed, total
+
+    def metrics(self, check_name: Optional[str] = None) -> List[Tuple[str, str, int]]:
+        """(check_name, metric, rows) for everything stored."""
+        sql = "SELECT check_name, metric, COUNT(*) FROM results"
+        params: tuple = ()
+        if check_name:
+            sql += " WHERE check_name = ?"
+            params = (check_name,)
+        return self._db.execute(sql + " GROUP BY check_name, metric ORDER BY check_name, metric", params).fetchall()
+
+
+def record_run(report: dict, run_dir: Union[str, Path], report_path: Optional[Path] = None) -> Optional[Path]:
+    """
+    Record a check's report in the shared history. Called by each check after
+    writing its report; a failure here only warns and never fails the check.
+    """
+    db_path = default_history_path(run_dir)
+    if db_path is None:
+        return None
+    try:
+        name = report_path.name if report_path is not None else None
+        mtime = report_path.stat().st_mtime if report_path is not None else None
+        with CheckHistory(db_path) as history:
+            rows = history.record(report, Path(run_dir).name, report_file=name, report_mtime=mtime)
+    except (OSError, sqlite3.Error) as e:
+        print(f"[WARN] Could not update check history {db_path}: {e}")
+        return None
+    print(f"[INFO] History updated: {db_path} ({rows} records)")
+    return db_path
+
+
+def run_benchmark(runs: int, scenes: int = 20) -> dict:
+    """Time a trend query over `runs` synthetic runs: walking report files vs. the history store."""
+    workdir = Path(tempfile.mkdtemp(prefix="check-history-bench-"))
+    try:
+        logs_dir = workdir / "logs"
+        base = datetime(2025, 1, 1).timestamp()
+        for r in range(runs):
+            run_dir = logs_dir / datetime.fromtimestamp(base + r * 3600).strftime(RUN_DIR_FORMAT)
+            run_dir.mkdir(parents=True)
+            scores = [0.6 + ((r * 7 + s * 13) % 40) / 100 for s in range(scenes)]
+            report = {
+                "check_name": "similarity",
+                "timestamp": run_dir.name,
+                "scenes": [{"scene_id": f"scene-{s:03d}", "similarity": v} for s, v in enumerate(scores)],
+                "aggregate_alignment": round(sum(scores) / scenes, 3),
+                "meets_threshold": sum(scores) / scenes >= 0.75,
+            }
+            (run_dir / f"similarity{REPORT_SUFFIX}").write_text(json.dumps(report, indent=2))
+
+        start = time.perf_counter()
+        walked = []
+        for path in sorted(logs_dir.glob(f"*/similarity{REPORT_SUFFIX}")):
+            with open(path, "r", encoding="utf-8") as f:
+                walked.append((path.parent.name, json.load(f)["aggregate_alignment"]))
+        walk_ms = (time.perf_counter() - start) * 1000
+
+        with CheckHistory(workdir / HISTORY_FILENAME) as history:
+            imported = history.import_logs(logs_dir)
+            start = time.perf_counter()
+            trend = history.trend("similarity", "aggregate_alignment")
+            trend_ms = (time.perf_counter() - start) * 1000
+            start = time.perf_counter()
+            daily = history.daily("similarity", "similarity")
+            daily_ms = (time.perf_counter() - start) * 1000
+            reimport = history.import_logs(logs_dir)
+
+        assert len(trend) == len(walked) == runs
+        return {
+            "runs": runs,
+            "scenesPerRun": scenes,
+            "walkReportsMs": round(walk_ms, 2),
+            "importMs": imported.duration_ms,
+            "reimportUnchangedMs": reimport.duration_ms,
+            "trendQueryMs": round(trend_ms, 3),
+            "dailyRollupMs": round(daily_ms, 3),
+            "dailyRows": len(daily),
+        }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Query and backfill the shared quality-check history")
+    parser.add_argument("command", nargs="?", choices=["import", "trend", "daily", "metrics"])
+    parser.add_argument("logs_dir", nargs="?", default="logs", help="Logs directory (for import; default: logs)")
+    parser.add_argument("--db", type=Path, default=None, help=f"History store (default: <logs>/{HISTORY_FILENAME})")
+    parser.add_argument("--check", help="Check name as in the report's check_name, e.g. similarity, video_quality")
+    parser.add_argument("--metric", help="Metric name, e.g. aggregate_alignment or start_bookend.ssim")
+    parser.add_argument("--scene", default="", help="Scene id for trend (default: run-level metric)")
+    parser.add_argument("--since", help="ISO date/time lower bound")
+    parser.add_argument("--until", help="ISO date/time upper bound")
+    parser.add_argument("--last", type=int, default=None, help="Only the most recent N runs (trend)")
+    parser.add_argument("--json", action="store_true", help="Emit machine-readable JSON")
+    parser.add_argument("--benchmark", type=int, metavar="RUNS", help="Run a synthetic benchmark with this many runs")
+    args = parser.parse_args(argv)
+
+    if args.benchmark:
+        print(json.dumps(run_benchmark(args.benchmark), indent=2))
+        return 0
+    if not args.command:
+        parser.error("a command is required unless --benchmark is given")
+
+    db_path = args.db or Path(os.environ.get(ENV_HISTORY) or Path(args.logs_dir) / HISTORY_FILENAME)
+    if args.command == "import":
+        if not Path(args.logs_dir).is_dir():
+            print(f"[ERROR] Logs directory not found: {args.logs_dir}")
+            return 2
+        with CheckHistory(db_path) as history:
+            stats = history.import_logs(args.logs_dir)
+        print(f"[OK] {stats.recorded} report(s) recorded ({stats.rows} rows), "
+              f"{stats.skipped} unchanged, in {stats.duration_ms} ms -> {db_path}")
+        return 0
+
+    if not db_path.exists():
+        print(f"[ERROR] History store not found: {db_path} (run 'import' first)")
+        return 2
+    with CheckHistory(db_path) as history:
+        if args.command == "metrics":
+            rows = [{"check": c, "metric": m, "rows": n} for c, m, n in history.metrics(args.check)]
+        else:
+            if not args.check or not args.metric:
+                parser.error(f"{args.command} requires --check and --metric")
+            since, until = _parse_date(args.since), _parse_date(args.until)
+            if args.command == "trend":
+                rows = [
+                    {"run": run, "time": datetime.fromtimestamp(t).isoformat(timespec="seconds"), "value": value}
+                    for run, t, value in history.trend(args.check, args.metric, args.scene, since, until, args.last)
+                ]
+            else:
+                rows = history.daily(args.check, args.metric, since, until)
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+    else:
+        for row in rows:
+            print("  ".join(f"{key}={value}" for key, value in row.items()))
+        print(f"[INFO] {len(rows)} row(s)")
+    return 0 if rows else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,39 +5,66 @@ Coherence Check: Narrative flow analysis using spaCy.
 Measures how well entities (characters) are tracked and pronouns are resolved
 across sentences in generated story scenes.
 
+Parsed Docs are cached across runs (doc_cache.py), so unchanged prompts are
+deserialized rather than re-parsed; the report's `doc_cache` block has the
+hit rate. Pass --no-doc-cache to parse everything.
+
 Exit codes:
 - 0: Coherence score meets threshold (>=0.85)
 - 1: Coherence score below threshold
 - 2: Setup failed (missing dependencies)
 """
 
+import argparse
+import functools
 import json
 import sys
 from pathlib import Path
 from typing import Optional
 
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "tracing"))
+import tracing  # noqa: E402
+from check_history import record_run  # noqa: E402
+from doc_cache import DocCache, open_default_cache  # noqa: E402
+from quality_common import load_metadata, module_available, resolve_metadata_path  # noqa: E402
+
+SPACY_MODEL = "en_core_web_sm"
+
 def check_dependencies():
-    """Verify required packages."""
-    try:
-        import spacy
+    """Verify required packages (without importing them)."""
+    if module_available("spacy"):
         return True
-    except ImportError:
-        print("[ERROR] spacy not installed. Run: pip install spacy")
-        print("[ERROR] Download model: python -m spacy download en_core_web_sm")
-        return False
-
-def load_metadata(metadata_path: str) -> Optional[dict]:
-    """Load artifact-metadata.json."""
-    try:
-        with open(metadata_path, 'r') as f:
-            return json.load(f)
-    except Exception as e:
-        print(f"[ERROR] Failed to load metadata: {e}")
-        return None
-
-def analyze_coherence(text: str) -> dict:
+    print("[ERROR] spacy not installed. Run: pip install spacy")
+    print(f"[ERROR] Download model: python -m spacy download {SPACY_MODEL}")
+    return False
+
+@functools.lru_cache(maxsize=None)
+def load_nlp():
+    """Load the spaCy pipeline once per process, downloading the model if needed."""
+    import spacy
+    
+    with tracing.span("spacy.load", model=SPACY_MODEL):
+        try:
+            return spacy.load(SPACY_MODEL)
+        except OSError:
+            print(f"[WARN] {SPACY_MODEL} model not found. Attempting download...")
+            import subprocess
+            subprocess.run([sys.executable, "-m", "spacy", "download", SPACY_MODEL], check=False)
+            return spacy.load(SPACY_MODEL)
+
+@tracing.traced
+def analyze_coherence(text: str, cache: Optional[DocCache] = None) -> dict:
+    """Analyze narrative coherence of `text` (see analyze_doc), using the parsed-doc cache if given."""
+    nlp = load_nlp()
+
+    with tracing.span("nlp", chars=len(text)):
+        doc = cache.parse(nlp, [text])[0] if cache else nlp(text)
+    return analyze_doc(doc)
+
+def analyze_doc(doc) -> dict:
     """
-    Analyze narrative coherence.
+    Analyze narrative coherence of a parsed Doc.
     
     Returns dict with:
     - entity_count: unique entities found
@@ -46,18 +73,6 @@ def analyze_coherence(text: str) -> dict:
     - link_ratio: entity_links / pronoun_count (0-1)
     - score: overall coherence (0-1)
     """
-    import spacy
-    
-    try:
-        nlp = spacy.load("en_core_web_sm")
-    except OSError:
-        print("[WARN] en_core_web_sm model not found. Attempting download...")
-        import subprocess
-        subprocess.run([sys.executable, "-m", "spacy", "download", "en_core_web_sm"], check=False)
-        nlp = spacy.load("en_core_web_sm")
-    
-    doc = nlp(text)
-    
     # Extract entities
     entities = set()
     for ent in doc.ents:
@@ -90,39 +105,23 @@ def analyze_coherence(text: str) -> dict:
 
 def main():
     """Run coherence checks on all scenes."""
+    parser = argparse.ArgumentParser(description="Narrative coherence (entity tracking, pronoun resolution) per scene")
+    parser.add_argument("metadata_path", nargs="?", default=None,
+                        help="artifact-metadata.json, a run directory, or a logs directory (default: logs)")
+    parser.add_argument("--no-doc-cache", action="store_true",
+                        help="Parse every prompt instead of reusing cached Docs")
+    args = parser.parse_args()
+    tracing.start("coherence-check")
+
     if not check_dependencies():
         sys.exit(2)
     
-    # Find metadata
-    metadata_path = "logs"
-    if len(sys.argv) > 1:
-        metadata_path = sys.argv[1]
-    elif not Path("logs").exists():
-        print("[ERROR] No logs directory found")
-        sys.exit(2)
-    
-    # Use most recent run if directory specified
-    if Path(metadata_path).is_dir():
-        # Check if metadata file exists directly in this directory
-        candidate = Path(metadata_path) / "artifact-metadata.json"
-        if candidate.exists():
-            metadata_path = candidate
-        else:
-            # Otherwise find most recent subdirectory
-            logs = sorted(Path(metadata_path).glob("*"), key=lambda p: p.stat().st_mtime, reverse=True)
-            if logs:
-                metadata_path = logs[0] / "artifact-metadata.json"
-    else:
-        # If given a file path, use as-is
-        metadata_path = Path(metadata_path) if not isinstance(metadata_path, Path) else metadata_path
-        if not str(metadata_path).endswith('artifact-metadata.json'):
-            metadata_path = Path(str(metadata_path) + "/artifact-metadata.json")
-    
-    if not metadata_path.exists():
-        print(f"[ERROR] artifact-metadata.json not found at {metadata_path}")
+    metadata_path = resolve_metadata_path(args.metadata_path)
+    if metadata_path is None or not metadata_path.exists():
+        print(f"[ERROR] artifact-metadata.json not found at {metadata_path or 'logs'}")
         sys.exit(2)
     
-    metadata = load_metadata(str(metadata_path))
+    metadata = load_metadata(metadata_path)
     if not metadata:
         sys.exit(2)
     
@@ -134,7 +133,7 @@ def main():
         "scenes": []
     }
     
-    total_score = 0
+    scenes = []
     for i, scene in enumerate(metadata.get("Scenes", [])):
         scene_id = scene.get("SceneId", f"scene_{i}")
         prompt = scene.get("Prompt", "")
@@ -142,8 +141,21 @@ def main():
         if not prompt:
             print(f"[WARN] Scene {scene_id}: No prompt found")
             continue
-        
-        coherence = analyze_coherence(prompt)
+        scenes.append((scene_id, prompt))
+
+    docs = []
+    cache = None
+    if scenes:
+        # One batch for all scenes; prompts parsed by an earlier run come from the cache
+        cache = None if args.no_doc_cache else open_default_cache()
+        nlp = load_nlp()
+        prompts = [prompt for _, prompt in scenes]
+        with tracing.span("nlp", scenes=len(prompts), chars=sum(map(len, prompts))):
+            docs = cache.parse(nlp, prompts) if cache else list(nlp.pipe(prompts))
+
+    total_score = 0
+    for (scene_id, prompt), doc in zip(scenes, docs):
+        coherence = analyze_doc(doc)
         coherence["scene_id"] = scene_id
         results["scenes"].append(coherence)
         total_score += coherence["score"]
@@ -155,6 +167,11 @@ def main():
         avg_score = round(total_score / len(results["scenes"]), 3)
         results["average_score"] = avg_score
         results["meets_threshold"] = avg_score >= 0.85
+        if cache:
+            results["doc_cache"] = cache.stats()
+            cache.close()
+            print(f"[INFO] Parsed-doc cache: {results['doc_cache']['hits']} hits, "
+                  f"{results['doc_cache']['misses']} parsed")
         
         print(f"\n[RESULT] Average coherence score: {avg_score} (threshold: 0.85)")
         print(f"[STATUS] {'PASS' if results['meets_threshold'] else 'FAIL'}")
@@ -164,6 +181,8 @@ def main():
         with open(report_path, 'w') as f:
             json.dump(results, f, indent=2)
         print(f"[INFO] Report saved: {report_path}")
+        record_run(results, Path(metadata_path).parent, report_path)
+        tracing.finish(Path(metadata_path).parent)
         
         sys.exit(0 if results['meets_threshold'] else 1)
     else:
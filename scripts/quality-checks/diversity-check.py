@@ -5,28 +5,39 @@ Diversity Check: Thematic diversity measurement using entropy.
 Calculates Shannon entropy over thematic tags extracted from scenes.
 Higher entropy = more diverse themes.
 
+`--mode clusters` (or GEMDIRECT_DIVERSITY_MODE=clusters) also embeds each
+prompt with the similarity check's model and scores the run against theme
+clusters learned over the whole run history (entropy, novelty, surprisal);
+see theme_clusters.py. The gate then uses the cluster entropy.
+
 Exit codes:
 - 0: Diversity entropy meets threshold (>=2.0)
 - 1: Entropy below threshold
 - 2: Setup failed
 """
 
+import argparse
 import json
+import os
 import sys
 import math
+import sqlite3
 from pathlib import Path
 from typing import Optional, List, Dict
 from collections import Counter
 
-def load_metadata(metadata_path: str) -> Optional[dict]:
-    """Load artifact-metadata.json."""
-    try:
-        with open(metadata_path, 'r') as f:
-            return json.load(f)
-    except Exception as e:
-        print(f"[ERROR] Failed to load metadata: {e}")
-        return None
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "tracing"))
+import tracing  # noqa: E402
+import theme_clusters  # noqa: E402
+from check_history import record_run, run_time_for  # noqa: E402
+from quality_common import load_metadata, resolve_metadata_path  # noqa: E402
 
+MODES = ("keywords", "clusters")
+ENV_MODE = "GEMDIRECT_DIVERSITY_MODE"
+ENTROPY_THRESHOLD = 2.0
+
+@tracing.traced
 def extract_themes(text: str) -> List[str]:
     """
     Extract thematic tags from scene text.
@@ -58,6 +69,7 @@ def extract_themes(text: str) -> List[str]:
     
     return detected_themes if detected_themes else ["other"]
 
+@tracing.traced
 def calculate_entropy(themes: List[str]) -> float:
     """Calculate Shannon entropy: H = -Σ(p_i * log(p_i))"""
     if not themes:
@@ -74,38 +86,51 @@ def calculate_entropy(themes: List[str]) -> float:
     
     return entropy
 
+def score_clusters(run_dir: Path, prompts: List[tuple], backend: str, k: Optional[int]) -> Dict:
+    """Score the run against the history's theme clusters and fold its new scenes in. Exits 2 on setup failure."""
+    store_path = theme_clusters.default_store_path(run_dir)
+    if store_path is None:
+        print(f"[ERROR] --mode clusters needs the theme cluster store ({theme_clusters.ENV_THEME_CLUSTERS} is off)")
+        sys.exit(2)
+    with tracing.span("load_model", model=theme_clusters.MODEL_NAME, backend=backend):
+        model = theme_clusters.load_model(backend)
+    if model is None:
+        sys.exit(2)
+    try:
+        with theme_clusters.ThemeClusters(store_path, theme_clusters.model_key(backend), k) as store:
+            with tracing.span("cluster_run", scenes=len(prompts)):
+                summary, per_scene = store.add_run(
+                    run_dir.name, prompts, lambda texts: model.encode(texts, convert_to_numpy=True),
+                    run_time_for(run_dir.name),
+                )
+    except (OSError, ValueError, sqlite3.Error) as e:
+        print(f"[ERROR] Theme clustering failed: {e}")
+        sys.exit(2)
+    print(f"[INFO] Theme clusters: {store_path} ({summary['encoded']} prompts encoded)")
+    return {**summary, "per_scene": per_scene}
+
 def main():
     """Run diversity checks on all scenes."""
-    # Find metadata
-    metadata_path = "logs"
-    if len(sys.argv) > 1:
-        metadata_path = sys.argv[1]
-    elif not Path("logs").exists():
-        print("[ERROR] No logs directory found")
-        sys.exit(2)
-    
-    # Use most recent run if directory specified
-    if Path(metadata_path).is_dir():
-        # Check if metadata file exists directly in this directory
-        candidate = Path(metadata_path) / "artifact-metadata.json"
-        if candidate.exists():
-            metadata_path = candidate
-        else:
-            # Otherwise find most recent subdirectory
-            logs = sorted(Path(metadata_path).glob("*"), key=lambda p: p.stat().st_mtime, reverse=True)
-            if logs:
-                metadata_path = logs[0] / "artifact-metadata.json"
-    else:
-        # If given a file path, use as-is
-        metadata_path = Path(metadata_path) if not isinstance(metadata_path, Path) else metadata_path
-        if not str(metadata_path).endswith('artifact-metadata.json'):
-            metadata_path = Path(str(metadata_path) + "/artifact-metadata.json")
-    
-    if not metadata_path.exists():
-        print(f"[ERROR] artifact-metadata.json not found at {metadata_path}")
+    parser = argparse.ArgumentParser(description="Thematic diversity (Shannon entropy of scene themes)")
+    parser.add_argument("metadata_path", nargs="?", default=None,
+                        help="artifact-metadata.json, a run directory, or a logs directory (default: logs)")
+    parser.add_argument("--mode", choices=MODES, default=os.environ.get(ENV_MODE) or "keywords",
+                        help=f"keywords (8 fixed themes) or clusters (embedding clusters over the run history) "
+                             f"(default: ${ENV_MODE} or keywords)")
+    parser.add_argument("--backend", choices=theme_clusters.BACKENDS,
+                        default=os.environ.get(theme_clusters.ENV_BACKEND) or "torch",
+                        help=f"Embedding backend for --mode clusters (default: ${theme_clusters.ENV_BACKEND} or torch)")
+    parser.add_argument("--clusters", type=int, default=None,
+                        help=f"Number of theme clusters when creating the store (default: {theme_clusters.DEFAULT_CLUSTERS})")
+    args = parser.parse_args()
+    tracing.start("diversity-check", mode=args.mode)
+
+    metadata_path = resolve_metadata_path(args.metadata_path)
+    if metadata_path is None or not metadata_path.exists():
+        print(f"[ERROR] artifact-metadata.json not found at {metadata_path or 'logs'}")
         sys.exit(2)
     
-    metadata = load_metadata(str(metadata_path))
+    metadata = load_metadata(metadata_path)
     if not metadata:
         sys.exit(2)
     
@@ -114,11 +139,13 @@ def main():
     results = {
         "check_name": "diversity",
         "timestamp": str(Path(metadata_path).parent.name),
+        "mode": args.mode,
         "scenes": [],
         "theme_distribution": {}
     }
     
     all_themes = []
+    prompts = []
     for i, scene in enumerate(metadata.get("Scenes", [])):
         scene_id = scene.get("SceneId", f"scene_{i}")
         prompt = scene.get("Prompt", "")
@@ -129,6 +156,7 @@ def main():
         
         themes = extract_themes(prompt)
         all_themes.extend(themes)
+        prompts.append((scene_id, prompt))
         
         results["scenes"].append({
             "scene_id": scene_id,
@@ -146,10 +174,23 @@ def main():
         results["theme_distribution"][theme] = count
     
     results["entropy"] = round(entropy, 3)
-    results["meets_threshold"] = entropy >= 2.0
+    results["meets_threshold"] = entropy >= ENTROPY_THRESHOLD
     
-    print(f"\n[RESULT] Thematic entropy: {results['entropy']} (threshold: 2.0)")
+    print(f"\n[RESULT] Thematic entropy: {results['entropy']} (threshold: {ENTROPY_THRESHOLD})")
     print(f"[RESULT] Theme distribution: {dict(theme_counts)}")
+
+    if args.mode == "clusters" and prompts:
+        clusters = score_clusters(Path(metadata_path).parent, prompts, args.backend, args.clusters)
+        for scene, scored in zip(results["scenes"], clusters.pop("per_scene")):
+            scene.update(scored)
+        results["clusters"] = clusters
+        if clusters["warming_up"]:
+            print(f"[INFO] Theme clusters warming up ({clusters['history_scenes']} scenes in history); "
+                  f"gating on keyword entropy")
+        else:
+            results["meets_threshold"] = clusters["entropy"] >= ENTROPY_THRESHOLD
+        print(f"[RESULT] Cluster entropy: {clusters['entropy']} over {clusters['clusters_used']}/{clusters['k']} "
+              f"clusters, novelty {clusters['novelty']}, surprisal {clusters['surprisal_bits']} bits")
     print(f"[STATUS] {'PASS' if results['meets_threshold'] else 'WARN'}")
     
     # Save results
@@ -157,6 +198,8 @@ def main():
     with open(report_path, 'w') as f:
         json.dump(results, f, indent=2)
     print(f"[INFO] Report saved: {report_path}")
+    record_run(results, Path(metadata_path).parent, report_path)
+    tracing.finish(Path(metadata_path).parent)
     
     sys.exit(0 if results['meets_threshold'] else 1)
 
@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+Persistent cache of parsed spaCy documents for the coherence check.
+
+Scene prompts barely change across replays, requeues and golden-set runs, yet
+every coherence run parsed each one again with the full pipeline. Parsed
+`Doc`s are now stored as one-document DocBin blobs in a SQLite table. Each is
+keyed by a hash of the text and the pipeline identity: language, package
+name and version, spaCy version, and the enabled components. A later run,
+or any new metric computed from the same Docs, deserializes the blob instead
+of parsing. Only the misses go through `nlp.pipe`, in one batch.
+
+The store is bounded by size. Once its blobs exceed the budget, the least
+recently used are deleted until it is back under 90% of the budget. Hits,
+misses and evictions are reported per run (see `stats()`), and
+coherence-check.py writes them to its report as `doc_cache`.
+
+GEMDIRECT_DOC_CACHE sets the store path (default
+~/.cache/gemdirect/spacy-docs.sqlite); set it to 0 to disable caching.
+GEMDIRECT_DOC_CACHE_MB sets the budget (default 256).
+
+Usage:
+    python scripts/quality-checks/doc_cache.py stats
+    python scripts/quality-checks/doc_cache.py clear
+    python scripts/quality-checks/doc_cache.py --benchmark 300
+
+Exit codes:
+- 0: Command succeeded
+- 2: spaCy or the model is missing, or the cache is disabled
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Union
+
+if TYPE_CHECKING:
+    from spacy.language import Language
+    from spacy.tokens import Doc
+
+ENV_DOC_CACHE = "GEMDIRECT_DOC_CACHE"
+ENV_DOC_CACHE_MB = "GEMDIRECT_DOC_CACHE_MB"
+DEFAULT_DOC_CACHE = Path.home() / ".cache" / "gemdirect" / "spacy-docs.sqlite"
+DEFAULT_MAX_MB = 256
+EVICT_TO = 0.9
+SCHEMA_VERSION = 1
+_DISABLED = {"0", "off", "false", "no"}
+_LOOKUP_CHUNK = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS docs (
+    key       TEXT PRIMARY KEY,
+    model     TEXT NOT NULL,
+    doc       BLOB NOT NULL,
+    size      INTEGER NOT NULL,
+    last_used REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS docs_lru ON docs(last_used);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+# Scene prompts in the register of real runs; used by the benchmark
+TEMPLATES = [
+    "Maria confronts the captain on the deck. She accuses him of hiding the map, and he laughs at her.",
+    "Detective Rivera follows the courier through the market. He loses sight of her near the fountain.",
+    "The crew of the Nautilus gathers in the galley. They argue about the storm while the cook ignores them.",
+    "Apple engineers unveil the prototype. It hums quietly as they explain its purpose to the board.",
+    "John waits at the station in the rain. His sister arrives late and hands him a sealed letter.",
+]
+
+
+def model_key(nlp: "Language") -> str:
+    """Pipeline identity: Docs parsed by a different model or component set must not be reused."""
+    import spacy
+
+    meta = nlp.meta
+    return (f"{meta.get('lang')}_{meta.get('name')}-{meta.get('version')}"
+            f"|spacy-{spacy.__version__}|{','.join(nlp.pipe_names)}")
+
+
+def text_key(text: str, model: str) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(model.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(text.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def default_cache_path() -> Optional[Path]:
+    """GEMDIRECT_DOC_CACHE, else ~/.cache/gemdirect/spacy-docs.sqlite. None if disabled."""
+    override = os.environ.get(ENV_DOC_CACHE, "").strip()
+    if override.lower() in _DISABLED:
+        return None
+    return Path(override) if override else DEFAULT_DOC_CACHE
+
+
+class DocCache:
+    def __init__(self, db_path: Union[str, Path], max_bytes: Optional[int] = None):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        if max_bytes is None:
+            max_bytes = int(float(os.environ.get(ENV_DOC_CACHE_MB, DEFAULT_MAX_MB)) * 1024 * 1024)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.parse_ms = 0.0
+        self.load_ms = 0.0
+        self.model: Optional[str] = None
+        self._db = sqlite3.connect(str(self.db_path), timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        version = self._db.execute("SELECT value FROM meta WHERE key='version'").fetchone()
+        if version is None or int(version[0]) != SCHEMA_VERSION:
+            self._db.execute("DELETE FROM docs")
+            self._db.execute("INSERT OR REPLACE INTO meta VALUES ('version', ?)", (str(SCHEMA_VERSION),))
+            self._db.commit()
+
+    def close(self) -> None:
+        self._db.close()
+
+    def __enter__(self) -> "DocCache":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _lookup(self, keys: Sequence[str]) -> Dict[str, bytes]:
+        found: Dict[str, bytes] = {}
+        for i in range(0, len(keys), _LOOKUP_CHUNK):
+            chunk = keys[i:i + _LOOKUP_CHUNK]
+            sql = f"SELECT key, doc FROM docs WHERE key IN ({', '.join('?' * len(chunk))})"
+            found.update(self._db.execute(sql, chunk).fetchall())
+        return found
+
+    def parse(self, nlp: "Language", texts: Sequence[str], batch_size: int = 64) -> List["Doc"]:
+        """Docs for `texts` in order: stored ones deserialized, the rest parsed in one nlp.pipe batch and stored."""
+        from spacy.tokens import DocBin
+
+        self.model = model_key(nlp)
+        keys = [text_key(t, self.model) for t in texts]
+        unique = list(dict.fromkeys(keys))
+        docs: Dict[str, "Doc"] = {}
+
+        start = time.perf_counter()
+        stored = self._lookup(unique)
+        for key, blob in stored.items():
+            docs[key] = next(iter(DocBin().from_bytes(blob).get_docs(nlp.vocab)))
+        self.load_ms += (time.perf_counter() - start) * 1000
+        self.hits += len(stored)
+
+        missing = [k for k in unique if k not in stored]
+        self.misses += len(missing)
+        now = time.time()
+        if missing:
+            text_for = dict(zip(keys, texts))
+            start = time.perf_counter()
+            parsed = list(nlp.pipe((text_for[k] for k in missing), batch_size=batch_size))
+            self.parse_ms += (time.perf_counter() - start) * 1000
+            rows = []
+            for key, doc in zip(missing, parsed):
+                docs[key] = doc
+                blob = DocBin(docs=[doc]).to_bytes()
+                rows.append((key, self.model, blob, len(blob), now))
+            self._db.executemany("INSERT OR REPLACE INTO docs VALUES (?, ?, ?, ?, ?)", rows)
+        if stored:
+            self._db.executemany("UPDATE docs SET last_used = ? WHERE key = ?", [(now, k) for k in stored])
+        self._db.commit()
+        self.evict()
+        return [docs[k] for k in keys]
+
+    def total_bytes(self) -> int:
+        return self._db.execute("SELECT COALESCE(SUM(size), 0) FROM docs").fetchone()[0]
+
+    def evict(self) -> int:
+        """Drop least recently used Docs once over max_bytes, down to EVICT_TO of it. Returns Docs removed."""
+        total = self.total_bytes()
+        if total <= self.max_bytes:
+            return 0
+        target = total - int(self.max_bytes * EVICT_TO)
+        victims, freed = [], 0
+        for key, size in self._db.execute("SELECT key, size FROM docs ORDER BY last_used, key"):
+            if freed >= target:
+                break
+            victims.append((key,))
+            freed += size
+        self._db.executemany("DELETE FROM docs WHERE key = ?", victims)
+        self._db.commit()
+        self.evictions += len(victims)
+        return len(victims)
+
+    def clear(self) -> int:
+        removed = self._db.execute("DELETE FROM docs").rowcount
+        self._db.commit()
+        self._db.execute("VACUUM")
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        entries, size = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM docs").fetchone()
+        return {
+            "path": str(self.db_path),
+            "model": self.model,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+            "evictions": self.evictions,
+            "entries": entries,
+            "bytes": size,
+            "max_bytes": self.max_bytes,
+            "parse_ms": round(self.parse_ms, 2),
+            "load_ms": round(self.load_ms, 2),
+        }
+
+
+def open_default_cache() -> Optional[DocCache]:
+    """The shared cache, or None when disabled or unopenable (the check then parses without it)."""
+    path = default_cache_path()
+    if path is None:
+        return None
+    try:
+        return DocCache(path)
+    except (OSError, sqlite3.Error) as e:
+        print(f"[WARN] Parsed-doc cache unavailable ({path}): {e}")
+        return None
+
+
+def benchmark_texts(count: int) -> List[str]:
+    return [f"{TEMPLATES[i % len(TEMPLATES)]} Scene {i}." for i in range(count)]
+
+
+def run_benchmark(count: int, model_name: str) -> dict:
+    """Cold parse vs warm cache for `count` distinct prompts, in a throwaway store."""
+    import spacy
+
+    nlp = spacy.load(model_name)
+    texts = benchmark_texts(count)
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        list(nlp.pipe(texts))
+        uncached_ms = (time.perf_counter() - start) * 1000
+        with DocCache(Path(tmp) / "docs.sqlite", max_bytes=1 << 40) as cache:
+            cache.parse(nlp, texts)
+        with DocCache(Path(tmp) / "docs.sqlite", max_bytes=1 << 40) as cache:
+            start = time.perf_counter()
+            cache.parse(nlp, texts)
+            cached_ms = (time.perf_counter() - start) * 1000
+            stats = cache.stats()
+    return {
+        "model": model_name,
+        "texts": count,
+        "parseMs": round(uncached_ms, 1),
+        "cachedMs": round(cached_ms, 1),
+        "speedup": round(uncached_ms / max(cached_ms, 1e-3), 1),
+        "bytesPerDoc": round(stats["bytes"] / count),
+        "hitRate": stats["hit_rate"],
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Inspect or benchmark the parsed-doc cache used by coherence-check.py")
+    parser.add_argument("command", nargs="?", choices=["stats", "clear"])
+    parser.add_argument("--model", default="en_core_web_sm", help="spaCy model for --benchmark")
+    parser.add_argument("--benchmark", type=int, metavar="TEXTS", help="Compare parsing vs cache loads for TEXTS prompts")
+    args = parser.parse_args(argv)
+
+    if args.benchmark:
+        try:
+            print(json.dumps(run_benchmark(args.benchmark, args.model), indent=2))
+        except (ImportError, OSError) as e:
+            print(f"[ERROR] {e}")
+            return 2
+        return 0
+    if not args.command:
+        parser.error("a command is required unless --benchmark is given")
+
+    path = default_cache_path()
+    if path is None:
+        print(f"[ERROR] Parsed-doc cache disabled by {ENV_DOC_CACHE}")
+        return 2
+    with DocCache(path) as cache:
+        if args.command == "clear":
+            print(f"[OK] Removed {cache.clear()} Docs from {path}")
+        else:
+            print(json.dumps(cache.stats(), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
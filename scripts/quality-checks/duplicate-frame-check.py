@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Duplicate Frame Check: frozen segments, looping clips and duplicate scenes.
+
+Hashes every frame in each scene's GeneratedFramesDir (pHash + dHash,
+persisted in the run's frame-hashes.json and reused while the directory is
+unchanged), then:
+- flags frozen segments: runs of consecutive near-identical frames
+- flags repeats: non-adjacent frames within a scene that match (loops)
+- looks each scene up in the hash history of every run under the logs
+  directory and flags scenes whose frames mostly match another scene
+
+Exit codes:
+- 0: No frozen segments or duplicate scenes
+- 1: Frozen segments or duplicate scenes found
+- 2: Setup failed
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "frames"))
+
+from check_history import logs_dir_for, record_run  # noqa: E402
+from quality_common import lazy_import, load_metadata, resolve_metadata_path, resolve_scene_path  # noqa: E402
+
+# Deferred so --help and metadata errors don't pay for numpy/Pillow
+np = lazy_import("numpy")
+frame_hash = lazy_import("frame_hash")
+frame_io = lazy_import("frame_io")
+
+DUPLICATE_RADIUS = 6
+DUPLICATE_FRACTION = 0.5
+# Consecutive frames must hash identically to count as frozen: slow pans move
+# pHash/dHash by only 1-2 bits per frame and were flagged at distance 2
+FROZEN_DISTANCE = 0
+SAMPLE_FRAMES = 32
+
+
+def scene_hashes(run_dir: Path, scene: dict, cached: dict):
+    """(phash, dhash, reused) for a scene, reusing cached hashes while its frames are unchanged."""
+    frames_dir = resolve_scene_path(run_dir, scene.get("GeneratedFramesDir"))
+    if frames_dir is None or not frames_dir.is_dir():
+        raise FileNotFoundError(f"frames directory not found: {scene.get('GeneratedFramesDir')}")
+    prefix = Path(scene.get("FramePrefix") or "").name or None
+    frames = frame_io.list_frames(frames_dir, prefix)
+    if not frames:
+        raise FileNotFoundError(f"no frames in {frames_dir}")
+    mtime_ns = os.stat(frames_dir).st_mtime_ns
+    if cached and cached.get("frames") == len(frames) and cached.get("mtime_ns") == mtime_ns:
+        return frame_hash.from_hex(cached["phash"]), frame_hash.from_hex(cached["dhash"]), True
+    phashes, dhashes = frame_hash.hash_files(frames)
+    return phashes, dhashes, False
+
+
+def find_duplicate_scenes(history: frame_hash.HashHistory, run: str, scene_id: str, phashes: np.ndarray,
+                          radius: int, fraction: float, sample: int):
+    """Other (run, scene) pairs matching at least `fraction` of this scene's sampled frames."""
+    if len(history) == 0:
+        return []
+    table = history.table(radius)
+    run_id = history.runs.index(run) if run in history.runs else -1
+    scene_key = history.scenes.index(scene_id) if scene_id in history.scenes else -1
+    picks = np.unique(np.linspace(0, len(phashes) - 1, min(sample, len(phashes))).round().astype(int))
+
+    matches = {}
+    for frame in picks:
+        rows, dists = table.query(int(phashes[frame]), radius)
+        own = (history.run_idx[rows] == run_id) & (history.scene_idx[rows] == scene_key)
+        rows, dists = rows[~own], dists[~own]
+        if not len(rows):
+            continue
+        keys = history.run_idx[rows].astype(np.int64) << 32 | history.scene_idx[rows].astype(np.int64)
+        for key in np.unique(keys):
+            best = int(dists[keys == key].min())
+            hits = matches.setdefault(int(key), [])
+            hits.append(best)
+
+    duplicates = []
+    for key, dists in matches.items():
+        matched = len(dists) / len(picks)
+        if matched >= fraction:
+            duplicates.append({
+                "run": history.runs[key >> 32],
+                "scene_id": history.scenes[key & 0xFFFFFFFF],
+                "matched_fraction": round(matched, 3),
+                "mean_distance": round(float(np.mean(dists)), 2),
+            })
+    return sorted(duplicates, key=lambda d: -d["matched_fraction"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Frozen-frame and duplicate-scene detection via perceptual hashes")
+    parser.add_argument("metadata_path", nargs="?", default=None,
+                        help="artifact-metadata.json, a run directory, or a logs directory (default: logs)")
+    parser.add_argument("--history", default=None,
+                        help="Logs directory whose runs are searched for duplicates "
+                             "(default: the run's logs directory, else the run directory itself)")
+    parser.add_argument("--radius", type=int, default=DUPLICATE_RADIUS,
+                        help="Max pHash Hamming distance for a duplicate frame")
+    parser.add_argument("--frozen-distance", type=int, default=FROZEN_DISTANCE,
+                        help="Max pHash/dHash distance between consecutive frozen frames")
+    parser.add_argument("--min-frozen", type=int, default=4, help="Min frames in a frozen segment")
+    parser.add_argument("--sample", type=int, default=SAMPLE_FRAMES,
+                        help="Frames per scene looked up in the history")
+    args = parser.parse_args()
+
+    metadata_path = resolve_metadata_path(args.metadata_path)
+    if metadata_path is None or not metadata_path.exists():
+        print(f"[ERROR] artifact-metadata.json not found at {metadata_path or 'logs'}")
+        sys.exit(2)
+
+    metadata = load_metadata(metadata_path)
+    if not metadata:
+        sys.exit(2)
+
+    run_dir = metadata_path.parent
+    # An ad-hoc run dir (temp-validate-run) may sit in the repo root: don't treat its siblings as runs
+    history_dir = Path(args.history) if args.history else (logs_dir_for(run_dir) or run_dir)
+
+    print("[INFO] Hashing scene frames...")
+    stored = frame_hash.load_run_hashes(run_dir)
+    hashed = {}
+    for i, scene in enumerate(metadata.get("Scenes", [])):
+        scene_id = scene.get("SceneId", f"scene_{i}")
+        try:
+            hashed[scene_id] = scene_hashes(run_dir, scene, stored["scenes"].get(scene_id))
+        except (FileNotFoundError, OSError, ValueError) as e:
+            print(f"[WARN] Scene {scene_id}: {e}")
+            continue
+        if not hashed[scene_id][2]:
+            frames_dir = resolve_scene_path(run_dir, scene.get("GeneratedFramesDir"))
+            phashes, dhashes, _ = hashed[scene_id]
+            stored["scenes"][scene_id] = {
+                "frames": len(phashes),
+                "mtime_ns": os.stat(frames_dir).st_mtime_ns,
+                "phash": frame_hash.to_hex(phashes),
+                "dhash": frame_hash.to_hex(dhashes),
+            }
+
+    if not hashed:
+        print("[ERROR] No scenes with frames to hash")
+        sys.exit(2)
+    frame_hash.save_run_hashes(run_dir, stored)
+
+    start = time.perf_counter()
+    history = frame_hash.HashHistory(history_dir).load()
+    history_ms = (time.perf_counter() - start) * 1000
+    print(f"[INFO] Hash history: {len(history)} frames from {len(history.runs)} runs ({history_ms:.0f} ms)")
+
+    results = {
+        "check_name": "duplicate_frames",
+        "timestamp": str(run_dir.name),
+        "radius": args.radius,
+        "history_frames": len(history),
+        "history_runs": len(history.runs),
+        "scenes": [],
+    }
+
+    failures = 0
+    for scene_id, (phashes, dhashes, reused) in hashed.items():
+        t0 = time.perf_counter()
+        frozen = frame_hash.frozen_segments(phashes, dhashes, args.frozen_distance, args.min_frozen)
+        repeats = frame_hash.repeated_frames(phashes, args.frozen_distance)
+        duplicates = find_duplicate_scenes(history, run_dir.name, scene_id, phashes,
+                                           args.radius, DUPLICATE_FRACTION, args.sample)
+        lookup_ms = (time.perf_counter() - t0) * 1000
+
+        passed = not frozen and not duplicates
+        failures += 0 if passed else 1
+        results["scenes"].append({
+            "scene_id": scene_id,
+            "frame_count": len(phashes),
+            "hashes_reused": reused,
+            "frozen_segments": [s.to_dict() for s in frozen],
+            "frozen_frames": sum(s.length for s in frozen),
+            "repeat_pairs": len(repeats),
+            "first_repeat": list(repeats[0]) if repeats else None,
+            "duplicates": duplicates,
+            "lookup_ms": round(lookup_ms, 2),
+            "passed": passed,
+        })
+
+        details = f"frozen={len(frozen)}, repeats={len(repeats)}, duplicates={len(duplicates)}"
+        if duplicates:
+            details += f" (e.g. {duplicates[0]['run']}/{duplicates[0]['scene_id']})"
+        print(f"[{'OK' if passed else 'WARN'}] Scene {scene_id}: {details} ({lookup_ms:.1f} ms)")
+
+    results["meets_threshold"] = failures == 0
+
+    print(f"\n[RESULT] Scenes checked: {len(results['scenes'])}, flagged: {failures}")
+    print(f"[STATUS] {'PASS' if results['meets_threshold'] else 'WARN'}")
+
+    report_path = run_dir / "duplicate-frame-check-report.json"
+    with open(report_path, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"[INFO] Report saved: {report_path}")
+    record_run(results, run_dir, report_path)
+
+    sys.exit(0 if results['meets_threshold'] else 1)
+
+
+if __name__ == "__main__":
+    main()
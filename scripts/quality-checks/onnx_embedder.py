@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+ONNX Runtime backend for the similarity check.
+
+The default backend runs all-MiniLM-L6-v2 through sentence-transformers, so
+every validator run pays for importing torch and for fp32 inference on CPU.
+This module exports the same model to ONNX once, applies int8 dynamic
+quantization to its weights, and afterwards embeds text with onnxruntime and
+the `tokenizers` package only. Scoring a run with `--backend onnx` never
+imports torch.
+
+The export is cached per model under GEMDIRECT_ONNX_CACHE (default
+~/.cache/gemdirect/onnx): the quantized graph, the fp32 graph it was built
+from, tokenizer.json and pooling.json (sequence length, pooling and
+normalization read from the sentence-transformers pipeline). The export step
+itself needs sentence-transformers and torch; CI can run `export` once and
+cache the directory.
+
+Usage:
+    python scripts/quality-checks/onnx_embedder.py export
+    python scripts/quality-checks/onnx_embedder.py --benchmark 200
+    python scripts/quality-checks/similarity-check.py logs/<run> --backend onnx
+
+Exit codes:
+- 0: Export or benchmark succeeded
+- 2: Required packages missing or export failed
+"""
+from __future__ import annotations
+
+import argparse
+import inspect
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import List, Optional, Sequence, Union
+
+ENV_CACHE_DIR = "GEMDIRECT_ONNX_CACHE"
+DEFAULT_CACHE_DIR = Path.home() / ".cache" / "gemdirect" / "onnx"
+DEFAULT_MODEL = "all-MiniLM-L6-v2"
+MODEL_FILE = "model-int8.onnx"
+FP32_MODEL_FILE = "model.onnx"
+TOKENIZER_FILE = "tokenizer.json"
+POOLING_FILE = "pooling.json"
+RUNTIME_MODULES = ("onnxruntime", "tokenizers")
+EXPORT_MODULES = ("sentence_transformers", "torch", "onnxruntime")
+
+# Prompt/description pairs in the register of real scenes; used by the benchmark
+PAIRS = [
+    ("A detective chases a thief across rooftops while rain hides every clue",
+     "Rain-soaked rooftops; a detective sprints after a fleeing thief"),
+    ("Two lovers share a quiet embrace at dawn",
+     "At sunrise a couple holds each other on an empty pier"),
+    ("The captain explains the plan and reveals the secret map to the crew",
+     "A ship captain unrolls a map before the gathered sailors"),
+    ("A street musician laughs at a clumsy joke",
+     "A guitarist on a busy corner grins as a passer-by trips"),
+    ("In the dark hallway danger waits",
+     "A dim corridor, a door creaks open, something moves in the shadows"),
+    ("Maria talks with John about the conflict",
+     "A city skyline at night with fireworks over the river"),
+]
+
+
+def cache_dir(directory: Union[str, Path, None] = None) -> Path:
+    """Root of the export cache: `directory`, GEMDIRECT_ONNX_CACHE, or ~/.cache/gemdirect/onnx."""
+    return Path(directory or os.environ.get(ENV_CACHE_DIR) or DEFAULT_CACHE_DIR)
+
+
+def model_dir(model_name: str = DEFAULT_MODEL, directory: Union[str, Path, None] = None) -> Path:
+    """Export directory for `model_name` (a hub id or a local sentence-transformers path)."""
+    return cache_dir(directory) / Path(model_name.replace("\\", "/")).name
+
+
+def is_exported(path: Path) -> bool:
+    return all((path / name).exists() for name in (MODEL_FILE, TOKENIZER_FILE, POOLING_FILE))
+
+
+def _pooling_mode(pooling) -> str:
+    if hasattr(pooling, "get_pooling_mode_str"):  # sentence-transformers < 6
+        return pooling.get_pooling_mode_str()
+    mode = pooling.pooling_mode
+    return mode if isinstance(mode, str) else "+".join(map(str, mode))
+
+
+def export_model(model_name: str = DEFAULT_MODEL, directory: Union[str, Path, None] = None,
+                 quantize: bool = True) -> Path:
+    """
+    Export a sentence-transformers model to ONNX and quantize it to int8.
+
+    Only the transformer runs in the graph (input_ids, attention_mask,
+    token_type_ids -> last_hidden_state); pooling and normalization are
+    replayed in numpy from pooling.json. Returns the export directory.
+    """
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from sentence_transformers import SentenceTransformer
+    from sentence_transformers.models import Normalize, Pooling
+
+    out = model_dir(model_name, directory)
+    out.mkdir(parents=True, exist_ok=True)
+    st_model = SentenceTransformer(model_name, device="cpu")
+    transformer = st_model[0]
+    modules = list(st_model)
+    pooling = next((m for m in modules if isinstance(m, Pooling)), None)
+    pooling_mode = _pooling_mode(pooling) if pooling is not None else "mean"
+    if pooling_mode not in ("mean", "cls"):
+        raise ValueError(f"Unsupported pooling mode: {pooling_mode}")
+
+    class _LastHiddenState(torch.nn.Module):
+        def __init__(self, model):
+            super().__init__()
+            self.model = model
+
+        def forward(self, input_ids, attention_mask, token_type_ids):
+            return self.model(input_ids=input_ids, attention_mask=attention_mask,
+                              token_type_ids=token_type_ids, return_dict=False)[0]
+
+    sample = transformer.tokenizer(["export sample"], return_tensors="pt", return_token_type_ids=True)
+    inputs = (sample["input_ids"], sample["attention_mask"], sample["token_type_ids"])
+    axes = {0: "batch", 1: "sequence"}
+    export_kwargs = {}
+    if "dynamo" in inspect.signature(torch.onnx.export).parameters:
+        export_kwargs["dynamo"] = False  # TorchScript exporter: no onnxscript dependency
+    fp32_path = out / FP32_MODEL_FILE
+    with torch.no_grad():
+        torch.onnx.export(
+            _LastHiddenState(transformer.auto_model.eval()), inputs, str(fp32_path),
+            input_names=["input_ids", "attention_mask", "token_type_ids"],
+            output_names=["last_hidden_state"],
+            dynamic_axes={"input_ids": axes, "attention_mask": axes, "token_type_ids": axes,
+                          "last_hidden_state": axes},
+            opset_version=14,
+            **export_kwargs,
+        )
+    if quantize:
+        quantize_dynamic(str(fp32_path), str(out / MODEL_FILE), weight_type=QuantType.QInt8)
+    else:
+        (out / MODEL_FILE).write_bytes(fp32_path.read_bytes())
+
+    transformer.tokenizer.backend_tokenizer.save(str(out / TOKENIZER_FILE))
+    config = {
+        "model": model_name,
+        "max_seq_length": transformer.max_seq_length,
+        "pooling": pooling_mode,
+        "normalize": any(isinstance(m, Normalize) for m in modules),
+        "pad_token": transformer.tokenizer.pad_token,
+        "pad_token_id": transformer.tokenizer.pad_token_id,
+        "quantized": quantize,
+    }
+    (out / POOLING_FILE).write_text(json.dumps(config, indent=2))
+    return out
+
+
+class OnnxEmbedder:
+    """
+    Drop-in for SentenceTransformer.encode backed by an exported ONNX graph.
+
+    Batches are padded to their longest member, so short prompts are not
+    run at max_seq_length.
+    """
+
+    def __init__(self, path: Union[str, Path], threads: Optional[int] = None):
+        import numpy as np
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        self._np = np
+        self.path = Path(path)
+        self.config = json.loads((self.path / POOLING_FILE).read_text())
+        self.tokenizer = Tokenizer.from_file(str(self.path / TOKENIZER_FILE))
+        self.tokenizer.enable_truncation(self.config["max_seq_length"])
+        self.tokenizer.enable_padding(pad_id=self.config["pad_token_id"], pad_token=self.config["pad_token"])
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(str(self.path / MODEL_FILE), options,
+                                            providers=["CPUExecutionProvider"])
+        self._input_names = {i.name for i in self.session.get_inputs()}
+
+    def _embed_batch(self, texts: Sequence[str]):
+        np = self._np
+        encodings = self.tokenizer.encode_batch(list(texts))
+        feeds = {
+            "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+            "attention_mask": np.array([e.attention_mask for e in encodings], dtype=np.int64),
+            "token_type_ids": np.array([e.type_ids for e in encodings], dtype=np.int64),
+        }
+        hidden = self.session.run(None, {k: v for k, v in feeds.items() if k in self._input_names})[0]
+        if self.config["pooling"] == "cls":
+            pooled = hidden[:, 0]
+        else:
+            mask = feeds["attention_mask"][..., None].astype(hidden.dtype)
+            pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        if self.config["normalize"]:
+            pooled = pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+        return pooled.astype(np.float32)
+
+    def encode(self, sentences: Union[str, Sequence[str]], convert_to_numpy: bool = True,
+               batch_size: int = 32, **_):
+        np = self._np
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        # Sort by length so each batch pads to similar sizes, then restore order
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        chunks = [self._embed_batch([texts[i] for i in order[start:start + batch_size]])
+                  for start in range(0, len(order), batch_size)]
+        embeddings = np.empty((len(texts), chunks[0].shape[1]), dtype=np.float32)
+        embeddings[order] = np.concatenate(chunks)
+        return embeddings[0] if single else embeddings
+
+
+def load_embedder(model_name: str = DEFAULT_MODEL, directory: Union[str, Path, None] = None) -> OnnxEmbedder:
+    """Load the cached export for `model_name`, exporting it first if needed."""
+    path = model_dir(model_name, directory)
+    if not is_exported(path):
+        print(f"[INFO] No ONNX export at {path}; exporting {model_name} (one-time, needs torch)...")
+        export_model(model_name, directory)
+    return OnnxEmbedder(path)
+
+
+def _peak_rss_mb() -> Optional[float]:
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _probe(backend: str, model_name: str, directory: Optional[str], pairs: int) -> dict:
+    """Load one backend and score `pairs` pairs; runs in a fresh interpreter per backend."""
+    start = time.perf_counter()
+    if backend == "onnx":
+        model = OnnxEmbedder(model_dir(model_name, directory))
+    else:
+        from sentence_transformers import SentenceTransformer
+        model = SentenceTransformer(model_name, device="cpu")
+    load_ms = (time.perf_counter() - start) * 1000
+    prompts = [PAIRS[i % len(PAIRS)][0] for i in range(pairs)]
+    descriptions = [PAIRS[i % len(PAIRS)][1] for i in range(pairs)]
+    model.encode(prompts[:1], convert_to_numpy=True)  # warm-up
+    start = time.perf_counter()
+    a = model.encode(prompts, convert_to_numpy=True)
+    b = model.encode(descriptions, convert_to_numpy=True)
+    encode_ms = (time.perf_counter() - start) * 1000
+    scores = (a * b).sum(axis=1) / ((a * a).sum(axis=1) * (b * b).sum(axis=1)) ** 0.5
+    return {
+        "loadMs": round(load_ms, 1),
+        "encodeMs": round(encode_ms, 1),
+        "peakRssMb": _peak_rss_mb(),
+        "scores": [round(float(s), 4) for s in scores[:len(PAIRS)]],
+    }
+
+
+def run_benchmark(pairs: int, model_name: str = DEFAULT_MODEL, directory: Union[str, Path, None] = None) -> dict:
+    """Compare cold load, encode time, peak RSS and scores of the torch and ONNX int8 backends."""
+    if not is_exported(model_dir(model_name, directory)):
+        export_model(model_name, directory)
+    results = {}
+    for backend in ("torch", "onnx"):
+        cmd = [sys.executable, str(Path(__file__).resolve()), "--probe", backend,
+               "--model", model_name, "--benchmark", str(pairs)]
+        if directory:
+            cmd += ["--cache-dir", str(directory)]
+        proc = subprocess.run(cmd, capture_output=True, text=True, check=True)
+        results[backend] = json.loads(proc.stdout.strip().splitlines()[-1])
+    torch_run, onnx_run = results["torch"], results["onnx"]
+    summary = {
+        "model": model_name,
+        "pairs": pairs,
+        "torch": {k: v for k, v in torch_run.items() if k != "scores"},
+        "onnx": {k: v for k, v in onnx_run.items() if k != "scores"},
+        "loadSpeedup": round(torch_run["loadMs"] / max(onnx_run["loadMs"], 1e-3), 2),
+        "encodeSpeedup": round(torch_run["encodeMs"] / max(onnx_run["encodeMs"], 1e-3), 2),
+        "maxScoreDelta": round(max(abs(t - o) for t, o in zip(torch_run["scores"], onnx_run["scores"])), 4),
+    }
+    if torch_run["peakRssMb"] and onnx_run["peakRssMb"]:
+        summary["peakRssReductionMb"] = round(torch_run["peakRssMb"] - onnx_run["peakRssMb"], 1)
+    return summary
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Export and benchmark the ONNX int8 similarity backend")
+    parser.add_argument("command", nargs="?", choices=["export"])
+    parser.add_argument("--model", default=DEFAULT_MODEL, help=f"sentence-transformers model (default: {DEFAULT_MODEL})")
+    parser.add_argument("--cache-dir", default=None, help=f"Export cache (default: ${ENV_CACHE_DIR} or {DEFAULT_CACHE_DIR})")
+    parser.add_argument("--no-quantize", action="store_true", help="Keep fp32 weights (for parity debugging)")
+    parser.add_argument("--benchmark", type=int, metavar="PAIRS", help="Compare torch vs ONNX on this many pairs")
+    parser.add_argument("--probe", choices=["torch", "onnx"], help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.probe:
+        print(json.dumps(_probe(args.probe, args.model, args.cache_dir, args.benchmark or len(PAIRS))))
+        return 0
+
+    from quality_common import module_available
+    missing = [m for m in EXPORT_MODULES if not module_available(m)]
+    if missing:
+        print(f"[ERROR] Missing packages for export: {', '.join(missing)}")
+        print("[INFO] Install with: pip install onnxruntime sentence-transformers")
+        return 2
+    if args.benchmark:
+        print(json.dumps(run_benchmark(args.benchmark, args.model, args.cache_dir), indent=2))
+        return 0
+    if not args.command:
+        parser.error("a command is required unless --benchmark is given")
+
+    try:
+        path = export_model(args.model, args.cache_dir, quantize=not args.no_quantize)
+    except Exception as e:
+        print(f"[ERROR] Export failed: {e}")
+        return 2
+    size_mb = (path / MODEL_FILE).stat().st_size / (1024 * 1024)
+    print(f"[OK] Exported {args.model} -> {path / MODEL_FILE} ({size_mb:.1f} MB)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,96 @@
+"""
+Helpers shared by the quality-check scripts: locating artifact-metadata.json
+for a run, resolving scene-relative paths, and deferring heavy imports so
+`--help` and error paths stay fast.
+"""
+from __future__ import annotations
+
+import importlib.util
+import json
+import os
+import sys
+from pathlib import Path
+from types import ModuleType
+from typing import Optional, Union
+
+
+def module_available(name: str) -> bool:
+    """True if `name` is importable, checked via find_spec without importing it."""
+    if name in sys.modules:
+        return True
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+def lazy_import(name: str) -> ModuleType:
+    """
+    Return module `name`, executing it on first attribute access.
+
+    Used for numpy and the frame helpers so a check only pays their import
+    cost once it touches a scene. Modules that are already imported are
+    returned as-is; a missing module raises ImportError immediately.
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ImportError(f"No module named '{name}'", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+def resolve_metadata_path(metadata_path: Union[str, Path, None] = None) -> Optional[Path]:
+    """
+    Resolve a CLI argument to an artifact-metadata.json path.
+
+    Accepts the metadata file itself, a run directory containing it, or a logs
+    directory (the most recently modified run is used). Defaults to "logs".
+    Returns None when nothing usable is found.
+    """
+    if metadata_path is None:
+        if not Path("logs").exists():
+            return None
+        metadata_path = "logs"
+
+    path = Path(metadata_path)
+    if path.is_dir():
+        candidate = path / "artifact-metadata.json"
+        if candidate.exists():
+            return candidate
+        runs = sorted((p for p in path.glob("*") if p.is_dir()), key=lambda p: p.stat().st_mtime, reverse=True)
+        return runs[0] / "artifact-metadata.json" if runs else None
+    if not str(path).endswith("artifact-metadata.json"):
+        path = path / "artifact-metadata.json"
+    return path
+
+
+def load_metadata(metadata_path: Union[str, Path]) -> Optional[dict]:
+    """Load artifact-metadata.json."""
+    try:
+        with open(metadata_path, "r", encoding="utf-8-sig") as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"[ERROR] Failed to load metadata: {e}")
+        return None
+
+
+def resolve_scene_path(run_dir: Path, value: Optional[str]) -> Optional[Path]:
+    """Resolve a path recorded in a scene entry (absolute, or relative to the run dir)."""
+    if not value:
+        return None
+    path = Path(value)
+    if path.is_absolute() and path.exists():
+        return path
+    candidate = run_dir / value
+    if candidate.exists():
+        return candidate
+    # Windows paths recorded by the PowerShell harness, read on another OS
+    candidate = run_dir / Path(value.replace("\\", os.sep)).name
+    return candidate if candidate.exists() else path
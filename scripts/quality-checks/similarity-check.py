@@ -5,39 +5,61 @@ Similarity Check: Semantic alignment between input prompts and generated scenes.
 Uses sentence-transformers (BERT) to compute cosine similarity.
 Higher similarity = better prompt adherence.
 
+`--backend onnx` (or GEMDIRECT_SIMILARITY_BACKEND=onnx) runs the same model
+through ONNX Runtime with int8 weights instead of torch; see onnx_embedder.py.
+
 Exit codes:
 - 0: Alignment meets threshold (>=0.75)
 - 1: Alignment below threshold
 - 2: Setup failed
 """
 
+from __future__ import annotations
+
+import argparse
 import json
+import os
 import sys
-import numpy as np
 from pathlib import Path
-from typing import Optional, List, Tuple
 
-def load_metadata(metadata_path: str) -> Optional[dict]:
-    """Load artifact-metadata.json."""
-    try:
-        with open(metadata_path, 'r') as f:
-            return json.load(f)
-    except Exception as e:
-        print(f"[ERROR] Failed to load metadata: {e}")
-        return None
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "tracing"))
+import onnx_embedder  # noqa: E402
+import tracing  # noqa: E402
+from check_history import record_run  # noqa: E402
+from quality_common import lazy_import, load_metadata, module_available, resolve_metadata_path  # noqa: E402
+
+# numpy (and torch, via sentence-transformers) load only once a scene is encoded
+np = lazy_import("numpy")
+
+MODEL_NAME = onnx_embedder.DEFAULT_MODEL
+BACKENDS = ("torch", "onnx")
+ENV_BACKEND = "GEMDIRECT_SIMILARITY_BACKEND"
 
 def import_transformers():
     """Import and initialize sentence-transformers."""
     try:
         from sentence_transformers import SentenceTransformer
-        print("[INFO] Loading BERT model (sentence-transformers/all-MiniLM-L6-v2)...")
-        model = SentenceTransformer('all-MiniLM-L6-v2')
+        print(f"[INFO] Loading BERT model (sentence-transformers/{MODEL_NAME})...")
+        model = SentenceTransformer(MODEL_NAME)
         return model
     except ImportError:
         print("[ERROR] sentence-transformers not installed")
         print("[INFO] Install with: pip install sentence-transformers")
         return None
 
+def import_onnx_model():
+    """Load the int8 ONNX export of the model, exporting it on first use."""
+    try:
+        print(f"[INFO] Loading ONNX int8 model ({MODEL_NAME})...")
+        return onnx_embedder.load_embedder(MODEL_NAME)
+    except ImportError as e:
+        print(f"[ERROR] ONNX export needs sentence-transformers and torch once: {e}")
+        return None
+    except Exception as e:
+        print(f"[ERROR] Failed to load ONNX model: {e}")
+        return None
+
 def cosine_similarity(vec1: np.ndarray, vec2: np.ndarray) -> float:
     """Compute cosine similarity between two vectors."""
     norm1 = np.linalg.norm(vec1)
@@ -50,41 +72,21 @@ def cosine_similarity(vec1: np.ndarray, vec2: np.ndarray) -> float:
 
 def main():
     """Run similarity checks on all scenes."""
-    # Load transformer model
-    model = import_transformers()
-    if not model:
-        sys.exit(2)
-    
-    # Find metadata
-    metadata_path = "logs"
-    if len(sys.argv) > 1:
-        metadata_path = sys.argv[1]
-    elif not Path("logs").exists():
-        print("[ERROR] No logs directory found")
-        sys.exit(2)
-    
-    # Use most recent run if directory specified
-    if Path(metadata_path).is_dir():
-        # Check if metadata file exists directly in this directory
-        candidate = Path(metadata_path) / "artifact-metadata.json"
-        if candidate.exists():
-            metadata_path = candidate
-        else:
-            # Otherwise find most recent subdirectory
-            logs = sorted(Path(metadata_path).glob("*"), key=lambda p: p.stat().st_mtime, reverse=True)
-            if logs:
-                metadata_path = logs[0] / "artifact-metadata.json"
-    else:
-        # If given a file path, use as-is
-        metadata_path = Path(metadata_path) if not isinstance(metadata_path, Path) else metadata_path
-        if not str(metadata_path).endswith('artifact-metadata.json'):
-            metadata_path = Path(str(metadata_path) + "/artifact-metadata.json")
-    
-    if not metadata_path.exists():
-        print(f"[ERROR] artifact-metadata.json not found at {metadata_path}")
+    parser = argparse.ArgumentParser(description="Semantic alignment between scene prompts and generated descriptions")
+    parser.add_argument("metadata_path", nargs="?", default=None,
+                        help="artifact-metadata.json, a run directory, or a logs directory (default: logs)")
+    parser.add_argument("--backend", choices=BACKENDS, default=os.environ.get(ENV_BACKEND) or "torch",
+                        help=f"Embedding backend: torch (sentence-transformers) or onnx (int8, no torch) "
+                             f"(default: ${ENV_BACKEND} or torch)")
+    args = parser.parse_args()
+    tracing.start("similarity-check", backend=args.backend)
+
+    metadata_path = resolve_metadata_path(args.metadata_path)
+    if metadata_path is None or not metadata_path.exists():
+        print(f"[ERROR] artifact-metadata.json not found at {metadata_path or 'logs'}")
         sys.exit(2)
     
-    metadata = load_metadata(str(metadata_path))
+    metadata = load_metadata(metadata_path)
     if not metadata:
         sys.exit(2)
     
@@ -93,11 +95,12 @@ def main():
     results = {
         "check_name": "similarity",
         "timestamp": str(Path(metadata_path).parent.name),
+        "backend": args.backend,
         "scenes": [],
         "aggregate_alignment": 0.0
     }
     
-    similarities = []
+    scenes = []
     for i, scene in enumerate(metadata.get("Scenes", [])):
         scene_id = scene.get("SceneId", f"scene_{i}")
         prompt = scene.get("Prompt", "")
@@ -106,17 +109,36 @@ def main():
         if not prompt or not description:
             print(f"[WARN] Scene {scene_id}: Missing prompt or description")
             continue
-        
+        scenes.append((scene_id, prompt, description))
+    
+    # Load transformer model only when there is something to encode
+    model = None
+    if scenes:
+        required = onnx_embedder.RUNTIME_MODULES if args.backend == "onnx" else ("sentence_transformers",)
+        missing = [name for name in required if not module_available(name)]
+        if missing:
+            print(f"[ERROR] {', '.join(missing)} not installed")
+            print(f"[INFO] Install with: pip install {' '.join(m.replace('_', '-') for m in missing)}")
+            sys.exit(2)
+        with tracing.span("load_model", model=MODEL_NAME, backend=args.backend):
+            model = import_onnx_model() if args.backend == "onnx" else import_transformers()
+        if not model:
+            sys.exit(2)
+    
+    similarities = []
+    for scene_id, prompt, description in scenes:
         # Encode texts
         try:
-            prompt_embedding = model.encode(prompt, convert_to_numpy=True)
-            description_embedding = model.encode(description, convert_to_numpy=True)
+            with tracing.span("encode", scene_id=scene_id, chars=len(prompt) + len(description)):
+                prompt_embedding = model.encode(prompt, convert_to_numpy=True)
+                description_embedding = model.encode(description, convert_to_numpy=True)
         except Exception as e:
             print(f"[ERROR] Scene {scene_id}: Failed to encode - {e}")
             continue
         
         # Compute similarity
-        similarity = cosine_similarity(prompt_embedding, description_embedding)
+        with tracing.span("cosine_similarity", scene_id=scene_id):
+            similarity = cosine_similarity(prompt_embedding, description_embedding)
         similarities.append(similarity)
         
         results["scenes"].append({
@@ -130,7 +152,7 @@ def main():
     
     # Aggregate alignment
     if similarities:
-        aggregate = np.mean(similarities)
+        aggregate = float(np.mean(similarities))
         results["aggregate_alignment"] = round(aggregate, 3)
         results["meets_threshold"] = aggregate >= 0.75
     else:
@@ -145,6 +167,8 @@ def main():
     with open(report_path, 'w') as f:
         json.dump(results, f, indent=2)
     print(f"[INFO] Report saved: {report_path}")
+    record_run(results, Path(metadata_path).parent, report_path)
+    tracing.finish(Path(metadata_path).parent)
     
     sys.exit(0 if results['meets_threshold'] else 1)
 
@@ -0,0 +1,530 @@
+#!/usr/bin/env python3
+"""
+Embedding-based theme clusters for the diversity check.
+
+The keyword mode of diversity-check.py can only tell eight hard-coded themes
+apart, and it judges each run on its own. In `--mode clusters` each scene
+prompt is instead embedded with the similarity check's model
+(all-MiniLM-L6-v2, torch or ONNX backend). The embeddings are clustered
+across the whole run history, and each run is scored against those global
+clusters. The store is tagged with model and backend: the ONNX model is
+int8-quantized, so its embeddings never share centroids with torch's.
+
+Clustering is streaming mini-batch k-means on unit vectors. A centroid is the
+running mean of every scene ever assigned to it, so folding a batch in is
+one matrix product plus a per-centroid update weighted by its count (the
+1/count learning rate). A run therefore costs the same whether the history
+holds a thousand scenes or several hundred thousand. Only scenes that are
+new to the store update the centroids: re-checking a run rescores it but
+changes nothing. Empty slots are seeded k-means++ style from the incoming
+batch. `rebuild` reclusters offline from the stored embeddings, which is
+also how `k` is changed.
+
+Each run is scored against the centroids as they were before its own scenes
+were folded in:
+- entropy: Shannon entropy (bits) of the run's cluster assignments
+- novelty: mean cosine distance from each scene to its nearest centroid
+- surprisal_bits: mean -log2 of the global share of each scene's cluster,
+  which is high when a run lives in themes the history rarely visits
+
+Until the store has fitted WARMUP_PER_CLUSTER scenes per cluster, the result
+is marked `warming_up`, and the check gates on keyword entropy instead.
+
+The store defaults to `<logs>/theme-clusters.sqlite`, next to the run
+directories; a run directory outside a logs directory keeps its own. It holds
+the centroids plus one float16 embedding per (run, scene), so prompts that
+were seen before are not re-encoded. A store written with another schema or
+embedding model is moved aside (theme-clusters.v<N>.sqlite or
+theme-clusters.<model>.sqlite) and a new one started.
+GEMDIRECT_THEME_CLUSTERS overrides the path; set it to 0 to disable.
+
+Usage:
+    python scripts/quality-checks/diversity-check.py logs/<run> --mode clusters
+    python scripts/quality-checks/theme_clusters.py import logs
+    python scripts/quality-checks/theme_clusters.py stats
+    python scripts/quality-checks/theme_clusters.py rebuild --clusters 32
+    python scripts/quality-checks/theme_clusters.py --benchmark 200000
+
+Exit codes:
+- 0: Command succeeded
+- 2: Store, logs directory or embedding backend missing
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import re
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+import onnx_embedder  # noqa: E402
+from check_history import logs_dir_for, run_time_for  # noqa: E402
+from quality_common import lazy_import, load_metadata, module_available  # noqa: E402
+
+np = lazy_import("numpy")
+
+CLUSTERS_FILENAME = "theme-clusters.sqlite"
+ENV_THEME_CLUSTERS = "GEMDIRECT_THEME_CLUSTERS"
+ENV_BACKEND = "GEMDIRECT_SIMILARITY_BACKEND"
+MODEL_NAME = onnx_embedder.DEFAULT_MODEL
+BACKENDS = ("torch", "onnx")
+DEFAULT_CLUSTERS = 24
+BATCH_SIZE = 1024
+WARMUP_PER_CLUSTER = 10
+SCHEMA_VERSION = 1
+_DISABLED = {"0", "off", "false", "no"}
+_LOOKUP_CHUNK = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS scenes (
+    run        TEXT NOT NULL,
+    scene_id   TEXT NOT NULL,
+    prompt_key TEXT NOT NULL,
+    run_time   REAL NOT NULL,
+    embedding  BLOB NOT NULL,
+    PRIMARY KEY (run, scene_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS scenes_prompt ON scenes(prompt_key);
+CREATE TABLE IF NOT EXISTS centroids (
+    cluster INTEGER PRIMARY KEY,
+    vector  BLOB NOT NULL,
+    count   INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+Encoder = Callable[[List[str]], Any]
+
+
+def prompt_key(text: str, model: str) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(model.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(text.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def default_store_path(run_dir: Union[str, Path]) -> Optional[Path]:
+    """
+    Cluster store for a run: GEMDIRECT_THEME_CLUSTERS, else <logs>/theme-clusters.sqlite,
+    else (outside a logs directory) the run directory itself. None if disabled.
+    """
+    override = os.environ.get(ENV_THEME_CLUSTERS, "").strip()
+    if override.lower() in _DISABLED:
+        return None
+    if override:
+        return Path(override)
+    return (logs_dir_for(run_dir) or Path(run_dir).resolve()) / CLUSTERS_FILENAME
+
+
+def model_key(backend: str) -> str:
+    """Store tag for MODEL_NAME embedded on `backend`."""
+    return f"{MODEL_NAME}@{backend}"
+
+
+def load_model(backend: str):
+    """The similarity check's embedding model on `backend`; None (after printing why) if it cannot load."""
+    required = onnx_embedder.RUNTIME_MODULES if backend == "onnx" else ("sentence_transformers",)
+    missing = [name for name in required if not module_available(name)]
+    if missing:
+        print(f"[ERROR] {', '.join(missing)} not installed")
+        print(f"[INFO] Install with: pip install {' '.join(m.replace('_', '-') for m in missing)}")
+        return None
+    try:
+        if backend == "onnx":
+            print(f"[INFO] Loading ONNX int8 model ({MODEL_NAME})...")
+            return onnx_embedder.load_embedder(MODEL_NAME)
+        from sentence_transformers import SentenceTransformer
+        print(f"[INFO] Loading BERT model (sentence-transformers/{MODEL_NAME})...")
+        return SentenceTransformer(MODEL_NAME)
+    except Exception as e:
+        print(f"[ERROR] Failed to load {backend} model: {e}")
+        return None
+
+
+def _unit(vectors):
+    """Rows scaled to unit length, rounded through float16 as stored (zero rows stay zero)."""
+    vectors = np.asarray(vectors, dtype=np.float32).astype(np.float16).astype(np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms > 0, norms, 1.0)
+
+
+def entropy_bits(labels) -> float:
+    """Shannon entropy (bits) of a label array."""
+    if len(labels) == 0:
+        return 0.0
+    p = np.bincount(labels) / len(labels)
+    p = p[p > 0]
+    return float(-(p * np.log2(p)).sum())
+
+
+class ThemeClusters:
+    def __init__(self, db_path: Union[str, Path], model: Optional[str] = None, k: Optional[int] = None,
+                 seed: int = 0):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = self._connect()
+        meta = dict(self._db.execute("SELECT key, value FROM meta"))
+        model = model or meta.get("model") or MODEL_NAME
+        if meta.get("version", str(SCHEMA_VERSION)) != str(SCHEMA_VERSION):
+            self._set_aside(f"v{meta['version']}", f"uses schema v{meta['version']}, not v{SCHEMA_VERSION}")
+            meta = {}
+        elif meta.get("model", model) != model:
+            # Embeddings from another model live in another space: start over, keeping the old store
+            self._set_aside(re.sub(r"[^\w.-]+", "-", meta["model"]), f"holds {meta['model']} embeddings, not {model}")
+            meta = {}
+        stored_k = int(meta["k"]) if "k" in meta else None
+        if k is not None and stored_k is not None and k != stored_k:
+            raise ValueError(f"{self.db_path} has k={stored_k}; use 'rebuild --clusters {k}' to change it")
+        self.model = model
+        self.k = stored_k or k or DEFAULT_CLUSTERS
+        self.seed = seed
+        self._set_meta(version=SCHEMA_VERSION, model=model, k=self.k)
+        self._db.commit()
+        self._load_centroids()
+
+    def _connect(self) -> sqlite3.Connection:
+        db = sqlite3.connect(str(self.db_path), timeout=30)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.executescript(_SCHEMA)
+        return db
+
+    def _set_aside(self, tag: str, reason: str) -> None:
+        """Move the store to theme-clusters.<tag>.sqlite and start a new one."""
+        self._db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        self._db.close()
+        backup = self.db_path.with_name(f"{self.db_path.stem}.{tag}{self.db_path.suffix}")
+        os.replace(self.db_path, backup)
+        for suffix in ("-wal", "-shm"):
+            Path(f"{self.db_path}{suffix}").unlink(missing_ok=True)
+        print(f"[WARN] {self.db_path} {reason}; moved it to {backup} and started a new store")
+        self._db = self._connect()
+
+    def close(self) -> None:
+        self._db.close()
+
+    def __enter__(self) -> "ThemeClusters":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _set_meta(self, **values) -> None:
+        self._db.executemany("INSERT OR REPLACE INTO meta VALUES (?, ?)", [(k, str(v)) for k, v in values.items()])
+
+    def _load_centroids(self) -> None:
+        rows = self._db.execute("SELECT vector, count FROM centroids ORDER BY cluster").fetchall()
+        self._means = (np.stack([np.frombuffer(v, dtype=np.float32) for v, _ in rows]) if rows
+                       else np.zeros((0, 0), dtype=np.float32))
+        self.counts = np.array([c for _, c in rows], dtype=np.int64)
+        self._refresh_unit()
+
+    def _save_centroids(self) -> None:
+        self._db.execute("DELETE FROM centroids")
+        self._db.executemany("INSERT INTO centroids VALUES (?, ?, ?)",
+                             [(i, self._means[i].astype(np.float32).tobytes(), int(self.counts[i]))
+                              for i in range(len(self._means))])
+
+    def _refresh_unit(self) -> None:
+        norms = np.linalg.norm(self._means, axis=1, keepdims=True)
+        self._unit_means = self._means / np.where(norms > 0, norms, 1.0)
+
+    @property
+    def fitted(self) -> int:
+        return int(self.counts.sum())
+
+    @property
+    def warm(self) -> bool:
+        return self.fitted >= self.k * WARMUP_PER_CLUSTER
+
+    def assign(self, vectors) -> Tuple[Any, Any]:
+        """(nearest cluster, cosine similarity to it) for unit `vectors`."""
+        sims = vectors @ self._unit_means.T
+        labels = sims.argmax(axis=1)
+        return labels, sims[np.arange(len(vectors)), labels]
+
+    def _seed(self, batch) -> None:
+        """Fill empty centroid slots k-means++ style: sample far-away batch points with p ∝ distance²."""
+        need = self.k - len(self._means)
+        if need <= 0:
+            return
+        rng = np.random.default_rng(self.seed + self.fitted)
+        best = (batch @ self._unit_means.T).max(axis=1) if len(self._means) else np.full(len(batch), -1.0)
+        picked = []
+        for _ in range(need):
+            weights = np.clip(1.0 - best, 0.0, None) ** 2
+            total = weights.sum()
+            if total <= 1e-9:
+                break  # every remaining point duplicates a centroid
+            i = rng.choice(len(batch), p=weights / total)
+            picked.append(batch[i])
+            best = np.maximum(best, batch @ batch[i])
+        if picked:
+            seeds = np.stack(picked)
+            self._means = np.vstack([self._means, seeds]) if len(self._means) else seeds
+            self.counts = np.concatenate([self.counts, np.zeros(len(picked), dtype=np.int64)])
+            self._refresh_unit()
+
+    def partial_fit(self, vectors, batch_size: int = BATCH_SIZE) -> None:
+        """Fold unit `vectors` into the centroids, one mini-batch at a time (not persisted until commit)."""
+        for start in range(0, len(vectors), batch_size):
+            batch = vectors[start:start + batch_size]
+            self._seed(batch)
+            labels, _ = self.assign(batch)
+            onehot = np.zeros((len(batch), len(self._means)), dtype=np.float32)
+            onehot[np.arange(len(batch)), labels] = 1.0
+            added = np.bincount(labels, minlength=len(self._means))
+            totals = self.counts + added
+            moved = added > 0
+            self._means[moved] = ((self._means[moved] * self.counts[moved, None] + (onehot.T @ batch)[moved])
+                                  / totals[moved, None])
+            self.counts = totals
+            self._refresh_unit()
+
+    def _lookup(self, keys: Sequence[str]) -> Dict[str, bytes]:
+        found: Dict[str, bytes] = {}
+        for i in range(0, len(keys), _LOOKUP_CHUNK):
+            chunk = keys[i:i + _LOOKUP_CHUNK]
+            sql = f"SELECT prompt_key, embedding FROM scenes WHERE prompt_key IN ({', '.join('?' * len(chunk))})"
+            found.update(self._db.execute(sql, chunk).fetchall())
+        return found
+
+    def embed(self, prompts: Sequence[str], encode: Encoder) -> Tuple[Any, int]:
+        """(unit embeddings, prompts encoded) for `prompts`, reusing embeddings already in the store."""
+        keys = [prompt_key(p, self.model) for p in prompts]
+        unique = list(dict.fromkeys(keys))
+        vectors = {k: np.frombuffer(blob, dtype=np.float16).astype(np.float32)
+                   for k, blob in self._lookup(unique).items()}
+        missing = [k for k in unique if k not in vectors]
+        if missing:
+            text_for = dict(zip(keys, prompts))
+            vectors.update(zip(missing, np.asarray(encode([text_for[k] for k in missing]), dtype=np.float32)))
+        return _unit(np.stack([vectors[k] for k in keys])), len(missing)
+
+    def add_run(self, run: str, scenes: Sequence[Tuple[str, str]], encode: Encoder,
+                run_time: Optional[float] = None) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+        """
+        Score a run's (scene_id, prompt) pairs against the global clusters, then
+        fold its new scenes in. Returns (run summary, per-scene cluster and novelty).
+        """
+        if not scenes:
+            raise ValueError("no scenes to cluster")
+        vectors, encoded = self.embed([p for _, p in scenes], encode)
+        if len(self._means) and vectors.shape[1] != self._means.shape[1]:
+            raise ValueError(f"embedding size {vectors.shape[1]} != stored {self._means.shape[1]}")
+        keys = [prompt_key(p, self.model) for _, p in scenes]
+        previous = dict(self._db.execute("SELECT scene_id, prompt_key FROM scenes WHERE run = ?", (run,)))
+        fresh = [i for i, (scene_id, _) in enumerate(scenes) if previous.get(scene_id) != keys[i]]
+
+        warming_up = not self.warm
+        if not warming_up:
+            labels, sims = self.assign(vectors)
+            counts = self.counts.copy()
+        if fresh:
+            self.partial_fit(vectors[fresh])
+        if warming_up:
+            labels, sims = self.assign(vectors)
+            counts = self.counts
+        run_time = run_time if run_time is not None else run_time_for(run)
+        self._db.executemany(
+            "INSERT OR REPLACE INTO scenes VALUES (?, ?, ?, ?, ?)",
+            [(run, scenes[i][0], keys[i], run_time, vectors[i].astype(np.float16).tobytes()) for i in fresh],
+        )
+        self._save_centroids()
+        self._set_meta(dim=vectors.shape[1])
+        self._db.commit()
+
+        share = (counts[labels] + 1) / (counts.sum() + len(counts))
+        entropy = entropy_bits(labels)
+        ceiling = math.log2(min(self.k, len(scenes))) if len(scenes) > 1 else 0.0
+        distribution = np.bincount(labels, minlength=len(counts))
+        summary = {
+            "k": self.k,
+            "entropy": round(entropy, 3),
+            "normalized_entropy": round(entropy / ceiling, 3) if ceiling else 0.0,
+            "novelty": round(float(np.mean(1.0 - sims)), 4),
+            "surprisal_bits": round(float(np.mean(-np.log2(share))), 3),
+            "clusters_used": int((distribution > 0).sum()),
+            "distribution": {str(c): int(n) for c, n in enumerate(distribution) if n},
+            "history_scenes": self.fitted,
+            "new_scenes": len(fresh),
+            "encoded": encoded,
+            "warming_up": warming_up,
+        }
+        per_scene = [{"cluster": int(c), "novelty": round(float(1.0 - s), 4)} for c, s in zip(labels, sims)]
+        return summary, per_scene
+
+    def _iter_embeddings(self, batch_size: int) -> Iterator[Any]:
+        # prompt_key is a hash, so this order is effectively a shuffle of the history
+        cursor = self._db.execute("SELECT embedding FROM scenes ORDER BY prompt_key")
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                return
+            yield _unit(np.stack([np.frombuffer(blob, dtype=np.float16) for blob, in rows]))
+
+    def rebuild(self, k: Optional[int] = None, batch_size: int = BATCH_SIZE) -> Dict[str, Any]:
+        """Recluster every stored scene from scratch: one mini-batch pass, then one exact Lloyd step."""
+        self.k = k or self.k
+        self._means = np.zeros((0, 0), dtype=np.float32)
+        self.counts = np.zeros(0, dtype=np.int64)
+        self._refresh_unit()
+        for batch in self._iter_embeddings(batch_size):
+            self.partial_fit(batch, batch_size)
+        if len(self._means):
+            sums = np.zeros_like(self._means)
+            counts = np.zeros(len(self._means), dtype=np.int64)
+            for batch in self._iter_embeddings(batch_size):
+                labels, _ = self.assign(batch)
+                onehot = np.zeros((len(batch), len(counts)), dtype=np.float32)
+                onehot[np.arange(len(batch)), labels] = 1.0
+                sums += onehot.T @ batch
+                counts += np.bincount(labels, minlength=len(counts))
+            filled = counts > 0
+            self._means[filled] = sums[filled] / counts[filled, None]
+            self.counts = counts
+            self._refresh_unit()
+        self._save_centroids()
+        self._set_meta(k=self.k)
+        self._db.commit()
+        return self.stats()
+
+    def import_logs(self, logs_dir: Union[str, Path], encode: Encoder) -> Dict[str, int]:
+        """Add every run under logs_dir (oldest first) whose artifact-metadata.json is not in the store yet."""
+        known = {run for run, in self._db.execute("SELECT DISTINCT run FROM scenes")}
+        stats = {"runs": 0, "skipped": 0, "scenes": 0, "encoded": 0}
+        for metadata_path in sorted(Path(logs_dir).glob("*/artifact-metadata.json")):
+            run = metadata_path.parent.name
+            if run in known:
+                stats["skipped"] += 1
+                continue
+            metadata = load_metadata(metadata_path) or {}
+            scenes = [(scene.get("SceneId", f"scene_{i}"), scene["Prompt"])
+                      for i, scene in enumerate(metadata.get("Scenes", [])) if scene.get("Prompt")]
+            if not scenes:
+                continue
+            summary, _ = self.add_run(run, scenes, encode, run_time_for(run, metadata_path.stat().st_mtime))
+            stats["runs"] += 1
+            stats["scenes"] += summary["new_scenes"]
+            stats["encoded"] += summary["encoded"]
+        return stats
+
+    def stats(self) -> Dict[str, Any]:
+        scenes, runs = self._db.execute("SELECT COUNT(*), COUNT(DISTINCT run) FROM scenes").fetchone()
+        page_count = self._db.execute("PRAGMA page_count").fetchone()[0]
+        page_size = self._db.execute("PRAGMA page_size").fetchone()[0]
+        return {
+            "path": str(self.db_path),
+            "model": self.model,
+            "k": self.k,
+            "centroids": len(self._means),
+            "fitted": self.fitted,
+            "warm": self.warm,
+            "scenes": scenes,
+            "runs": runs,
+            "cluster_sizes": [int(c) for c in self.counts],
+            "bytes": page_count * page_size,
+        }
+
+
+def synthetic_embeddings(count: int, themes: int = 40, dim: int = 384, seed: int = 0):
+    """Unit vectors scattered around `themes` random directions, standing in for prompt embeddings."""
+    rng = np.random.default_rng(seed)
+    centers = _unit(rng.standard_normal((themes, dim)))
+    return _unit(centers[rng.integers(themes, size=count)] + 0.08 * rng.standard_normal((count, dim)))
+
+
+def run_benchmark(scenes: int, k: int = DEFAULT_CLUSTERS, run_size: int = 20) -> dict:
+    """Fold `scenes` synthetic embeddings into a store, then time one more run incrementally vs. a full rebuild."""
+    history = synthetic_embeddings(scenes)
+    extra = synthetic_embeddings(run_size, seed=1)
+    prompts = [f"benchmark prompt {i}" for i in range(run_size)]
+    lookup = dict(zip(prompts, extra))
+    with tempfile.TemporaryDirectory() as tmp:
+        with ThemeClusters(Path(tmp) / CLUSTERS_FILENAME, model="synthetic", k=k) as store:
+            start = time.perf_counter()
+            store.partial_fit(history)
+            fit_ms = (time.perf_counter() - start) * 1000
+            rows = [(f"run-{i // run_size:06d}", f"scene-{i % run_size:03d}", f"{i:032x}", 0.0,
+                     v.astype(np.float16).tobytes()) for i, v in enumerate(history)]
+            store._db.executemany("INSERT INTO scenes VALUES (?, ?, ?, ?, ?)", rows)
+            store._save_centroids()
+            store._db.commit()
+
+            start = time.perf_counter()
+            summary, _ = store.add_run("run-new", [(f"scene-{i:03d}", p) for i, p in enumerate(prompts)],
+                                       lambda texts: np.stack([lookup[t] for t in texts]))
+            add_run_ms = (time.perf_counter() - start) * 1000
+            start = time.perf_counter()
+            store.rebuild()
+            rebuild_ms = (time.perf_counter() - start) * 1000
+            size = store.stats()["bytes"]
+    return {
+        "scenes": scenes,
+        "k": k,
+        "fitMs": round(fit_ms, 1),
+        "scenesPerSec": round(scenes / max(fit_ms / 1000, 1e-9)),
+        "addRunMs": round(add_run_ms, 2),
+        "rebuildMs": round(rebuild_ms, 1),
+        "storeMb": round(size / 1024 / 1024, 1),
+        "runEntropy": summary["entropy"],
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Inspect, backfill or rebuild the diversity check's theme clusters")
+    parser.add_argument("command", nargs="?", choices=["import", "stats", "rebuild"])
+    parser.add_argument("logs_dir", nargs="?", default="logs", help="Logs directory (default: logs)")
+    parser.add_argument("--db", type=Path, default=None, help=f"Cluster store (default: <logs>/{CLUSTERS_FILENAME})")
+    parser.add_argument("--clusters", type=int, default=None, help=f"k for a new store or rebuild (default: {DEFAULT_CLUSTERS})")
+    parser.add_argument("--backend", choices=BACKENDS, default=os.environ.get(ENV_BACKEND) or "torch",
+                        help=f"Embedding backend for import (default: ${ENV_BACKEND} or torch)")
+    parser.add_argument("--benchmark", type=int, metavar="SCENES", help="Cluster SCENES synthetic embeddings and time a run")
+    args = parser.parse_args(argv)
+
+    if args.benchmark:
+        print(json.dumps(run_benchmark(args.benchmark, args.clusters or DEFAULT_CLUSTERS), indent=2))
+        return 0
+    if not args.command:
+        parser.error("a command is required unless --benchmark is given")
+
+    override = os.environ.get(ENV_THEME_CLUSTERS, "").strip()
+    if override.lower() in _DISABLED and not args.db:
+        print(f"[ERROR] Theme clusters disabled by {ENV_THEME_CLUSTERS}")
+        return 2
+    db_path = args.db or Path(override or Path(args.logs_dir) / CLUSTERS_FILENAME)
+    if args.command == "import":
+        if not Path(args.logs_dir).is_dir():
+            print(f"[ERROR] Logs directory not found: {args.logs_dir}")
+            return 2
+        model = load_model(args.backend)
+        if model is None:
+            return 2
+        with ThemeClusters(db_path, model_key(args.backend), k=args.clusters) as store:
+            stats = store.import_logs(args.logs_dir, lambda texts: model.encode(texts, convert_to_numpy=True))
+        print(f"[OK] {stats['runs']} run(s) added ({stats['scenes']} scenes, {stats['encoded']} encoded), "
+              f"{stats['skipped']} already stored -> {db_path}")
+        return 0
+
+    if not db_path.exists():
+        print(f"[ERROR] Theme cluster store not found: {db_path} (run 'import' first)")
+        return 2
+    with ThemeClusters(db_path) as store:
+        print(json.dumps(store.rebuild(args.clusters) if args.command == "rebuild" else store.stats(), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+Video Quality Check: frame-level temporal metrics for generated scenes.
+
+Decodes each scene once (the PNG sequence in GeneratedFramesDir, or the MP4
+when no frames are present) in fixed-size chunks and computes, with batched
+NumPy operations:
+- luma mean / variance per frame, brightness variance across the scene
+- flicker: mean-luma jumps between consecutive frames (count above
+  --flicker-threshold, max jump, mean jump) and jitter (second derivative)
+- motion energy: mean absolute per-pixel luma change between frames
+- bookend fidelity: SSIM / PSNR of the first frame against the start
+  keyframe and the last frame against the end keyframe, when recorded
+
+Metric definitions follow scripts/benchmarks/video-quality-benchmark.ts
+(ffmpeg signalstats) and scripts/bookend-frame-similarity.ts.
+
+Exit codes:
+- 0: No flicker frames and bookend SSIM meets threshold (>=0.6)
+- 1: Flicker detected or bookend SSIM below threshold
+- 2: Setup failed
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "frames"))
+
+from check_history import record_run  # noqa: E402
+from quality_common import lazy_import, load_metadata, resolve_metadata_path, resolve_scene_path  # noqa: E402
+
+# Deferred so --help and metadata errors don't pay for numpy/Pillow
+np = lazy_import("numpy")
+frame_io = lazy_import("frame_io")
+
+FLICKER_THRESHOLD = 40.0
+SSIM_THRESHOLD = 0.6
+SSIM_WINDOW = 7
+_C1 = (0.01 * 255) ** 2
+_C2 = (0.03 * 255) ** 2
+
+
+def _box_mean(x: np.ndarray, size: int) -> np.ndarray:
+    """Mean over every size x size window of the last two axes (valid region only)."""
+    c = np.cumsum(np.cumsum(x, axis=-2, dtype=np.float64), axis=-1)
+    c = np.pad(c, [(0, 0)] * (x.ndim - 2) + [(1, 0), (1, 0)])
+    total = c[..., size:, size:] - c[..., :-size, size:] - c[..., size:, :-size] + c[..., :-size, :-size]
+    return total / (size * size)
+
+
+def ssim(a: np.ndarray, b: np.ndarray, window: int = SSIM_WINDOW) -> float:
+    """Mean structural similarity of two luma images (uniform window, 0-255 range)."""
+    a = a.astype(np.float64)
+    b = b.astype(np.float64)
+    mu_a, mu_b = _box_mean(a, window), _box_mean(b, window)
+    var_a = _box_mean(a * a, window) - mu_a ** 2
+    var_b = _box_mean(b * b, window) - mu_b ** 2
+    cov = _box_mean(a * b, window) - mu_a * mu_b
+    num = (2 * mu_a * mu_b + _C1) * (2 * cov + _C2)
+    den = (mu_a ** 2 + mu_b ** 2 + _C1) * (var_a + var_b + _C2)
+    return float(np.mean(num / den))
+
+
+def psnr(a: np.ndarray, b: np.ndarray) -> float:
+    mse = float(np.mean((a.astype(np.float32) - b.astype(np.float32)) ** 2))
+    return float("inf") if mse == 0 else 10 * np.log10(255.0 ** 2 / mse)
+
+
+def _match_size(image: np.ndarray, shape) -> np.ndarray:
+    if image.shape[:2] == tuple(shape[:2]):
+        return image
+    from PIL import Image
+
+    return np.asarray(Image.fromarray(image).resize((shape[1], shape[0]), Image.BILINEAR))
+
+
+def compare_to_keyframe(frame: np.ndarray, keyframe: np.ndarray) -> Dict:
+    """SSIM/PSNR on luma plus the 0-100 mean-abs-diff score used by bookend-frame-similarity.ts."""
+    keyframe = _match_size(keyframe, frame.shape)
+    similarity = 100 - float(np.mean(np.abs(frame.astype(np.int16) - keyframe.astype(np.int16)))) / 255 * 100
+    value = psnr(frame, keyframe)
+    return {
+        "ssim": round(ssim(frame_io.to_luma(frame[None])[0], frame_io.to_luma(keyframe[None])[0]), 4),
+        "psnr": None if value == float("inf") else round(value, 2),
+        "similarity": round(similarity, 1),
+    }
+
+
+class SceneMetrics:
+    """Accumulates per-frame statistics over decoded chunks, carrying state across chunk boundaries."""
+
+    def __init__(self):
+        self.y_avg = []
+        self.y_var = []
+        self.motion = []
+        self.first_frame: Optional[np.ndarray] = None
+        self.last_frame: Optional[np.ndarray] = None
+        self._prev_luma: Optional[np.ndarray] = None
+        self.width = self.height = 0
+
+    def add(self, frames: np.ndarray) -> None:
+        luma = frame_io.to_luma(frames)
+        self.y_avg.append(luma.mean(axis=(1, 2)))
+        self.y_var.append(luma.var(axis=(1, 2)))
+        if self._prev_luma is not None:
+            luma_seq = np.concatenate([self._prev_luma[None], luma])
+        else:
+            luma_seq = luma
+        if len(luma_seq) > 1:
+            self.motion.append(np.abs(np.diff(luma_seq, axis=0)).mean(axis=(1, 2)))
+        if self.first_frame is None:
+            self.first_frame = frames[0].copy()
+            self.height, self.width = frames.shape[1:3]
+        self.last_frame = frames[-1].copy()
+        self._prev_luma = luma[-1]
+
+    def summary(self, flicker_threshold: float = FLICKER_THRESHOLD) -> Dict:
+        y_avg = np.concatenate(self.y_avg) if self.y_avg else np.zeros(0)
+        y_var = np.concatenate(self.y_var) if self.y_var else np.zeros(0)
+        motion = np.concatenate(self.motion) if self.motion else np.zeros(0)
+        jumps = np.abs(np.diff(y_avg))
+        accel = np.abs(np.diff(y_avg, n=2))
+        return {
+            "frame_count": int(y_avg.size),
+            "width": int(self.width),
+            "height": int(self.height),
+            "luma_mean": round(float(y_avg.mean()), 2) if y_avg.size else 0.0,
+            "luma_variance_mean": round(float(y_var.mean()), 2) if y_var.size else 0.0,
+            "brightness_variance": round(float(y_avg.std()), 2) if y_avg.size > 1 else 0.0,
+            "max_brightness_jump": round(float(jumps.max()), 2) if jumps.size else 0.0,
+            "flicker_frame_count": int((jumps > flicker_threshold).sum()),
+            "frame_difference_score": round(float(jumps.mean()), 2) if jumps.size else 0.0,
+            "jitter_score": round(float(accel.mean()), 2) if accel.size else 0.0,
+            "motion_energy": round(float(motion.mean()), 3) if motion.size else 0.0,
+            "max_motion_energy": round(float(motion.max()), 3) if motion.size else 0.0,
+        }
+
+
+def analyze_frames(
+    chunks: Iterable[np.ndarray],
+    start_keyframe: Optional[np.ndarray] = None,
+    end_keyframe: Optional[np.ndarray] = None,
+    flicker_threshold: float = FLICKER_THRESHOLD,
+    max_side: Optional[int] = None,
+) -> Dict:
+    """Compute scene metrics from an iterable of (N, H, W, 3) uint8 chunks."""
+    metrics = SceneMetrics()
+    decode_s = compute_s = 0.0
+    it = iter(chunks)
+    while True:
+        t0 = time.perf_counter()
+        try:
+            chunk = next(it)
+        except StopIteration:
+            break
+        t1 = time.perf_counter()
+        metrics.add(frame_io.downscale(chunk, max_side))
+        decode_s += t1 - t0
+        compute_s += time.perf_counter() - t1
+
+    result = metrics.summary(flicker_threshold)
+    if metrics.first_frame is not None:
+        if start_keyframe is not None:
+            result["start_bookend"] = compare_to_keyframe(metrics.first_frame, frame_io.downscale(start_keyframe[None], max_side)[0])
+        if end_keyframe is not None:
+            result["end_bookend"] = compare_to_keyframe(metrics.last_frame, frame_io.downscale(end_keyframe[None], max_side)[0])
+    result["timing_ms"] = {"decode": round(decode_s * 1000, 1), "metrics": round(compute_s * 1000, 1)}
+    return result
+
+
+def _load_keyframe(run_dir: Path, scene: dict, *keys: str) -> Optional[np.ndarray]:
+    for key in keys:
+        path = resolve_scene_path(run_dir, scene.get(key))
+        if path is not None and path.is_file():
+            return frame_io.load_image(path)
+    return None
+
+
+def analyze_scene(run_dir: Path, scene: dict, args) -> Dict:
+    frames_dir = resolve_scene_path(run_dir, scene.get("GeneratedFramesDir") or scene.get("VideoPath"))
+    if frames_dir is None:
+        raise FileNotFoundError("scene has no GeneratedFramesDir")
+    prefix = Path(scene.get("FramePrefix") or "").name or None
+    source_kind, chunks = frame_io.iter_source_chunks(frames_dir, prefix, args.chunk_size or frame_io.DEFAULT_CHUNK_SIZE)
+    result = analyze_frames(
+        chunks,
+        start_keyframe=_load_keyframe(run_dir, scene, "StartKeyframe", "KeyframeSource"),
+        end_keyframe=_load_keyframe(run_dir, scene, "EndKeyframe"),
+        flicker_threshold=args.flicker_threshold,
+        max_side=args.max_side,
+    )
+    result["source"] = source_kind
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Frame-level video quality metrics for a run")
+    parser.add_argument("metadata_path", nargs="?", default=None,
+                        help="artifact-metadata.json, a run directory, or a logs directory (default: logs)")
+    parser.add_argument("--chunk-size", type=int, default=None, help="Frames decoded per batch (default: 32)")
+    parser.add_argument("--max-side", type=int, default=None,
+                        help="Downscale frames so the longest side is at most this many pixels")
+    parser.add_argument("--flicker-threshold", type=float, default=FLICKER_THRESHOLD,
+                        help="Mean-luma jump that counts as a flicker frame (0-255)")
+    parser.add_argument("--ssim-threshold", type=float, default=SSIM_THRESHOLD)
+    args = parser.parse_args()
+
+    metadata_path = resolve_metadata_path(args.metadata_path)
+    if metadata_path is None or not metadata_path.exists():
+        print(f"[ERROR] artifact-metadata.json not found at {metadata_path or 'logs'}")
+        sys.exit(2)
+
+    metadata = load_metadata(metadata_path)
+    if not metadata:
+        sys.exit(2)
+
+    run_dir = metadata_path.parent
+    print("[INFO] Analyzing frame-level video quality...")
+
+    results = {
+        "check_name": "video_quality",
+        "timestamp": str(run_dir.name),
+        "flicker_threshold": args.flicker_threshold,
+        "ssim_threshold": args.ssim_threshold,
+        "scenes": [],
+    }
+
+    start = time.perf_counter()
+    failures = 0
+    bookend_ssims = []
+    for i, scene in enumerate(metadata.get("Scenes", [])):
+        scene_id = scene.get("SceneId", f"scene_{i}")
+        try:
+            metrics = analyze_scene(run_dir, scene, args)
+        except (FileNotFoundError, ImportError, OSError, ValueError) as e:
+            print(f"[WARN] Scene {scene_id}: {e}")
+            continue
+
+        bookends = [metrics[k]["ssim"] for k in ("start_bookend", "end_bookend") if k in metrics]
+        bookend_ssims.extend(bookends)
+        passed = metrics["flicker_frame_count"] == 0 and all(s >= args.ssim_threshold for s in bookends)
+        failures += 0 if passed else 1
+        results["scenes"].append({"scene_id": scene_id, "passed": passed, **metrics})
+
+        bookend_text = ", ".join(f"{k.split('_')[0]} ssim={metrics[k]['ssim']}"
+                                 for k in ("start_bookend", "end_bookend") if k in metrics)
+        print(f"[{'OK' if passed else 'WARN'}] Scene {scene_id}: frames={metrics['frame_count']}, "
+              f"flicker={metrics['flicker_frame_count']}, motion={metrics['motion_energy']}"
+              + (f", {bookend_text}" if bookend_text else "")
+              + f" ({metrics['timing_ms']['decode'] + metrics['timing_ms']['metrics']:.0f} ms)")
+
+    if not results["scenes"]:
+        print("[ERROR] No scenes with decodable frames")
+        sys.exit(2)
+
+    results["duration_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    results["mean_bookend_ssim"] = round(float(np.mean(bookend_ssims)), 4) if bookend_ssims else None
+    results["meets_threshold"] = failures == 0
+
+    print(f"\n[RESULT] Scenes analyzed: {len(results['scenes'])}, failing: {failures}")
+    if results["mean_bookend_ssim"] is not None:
+        print(f"[RESULT] Mean bookend SSIM: {results['mean_bookend_ssim']} (threshold: {args.ssim_threshold})")
+    print(f"[STATUS] {'PASS' if results['meets_threshold'] else 'WARN'}")
+
+    report_path = run_dir / "video-quality-check-report.json"
+    with open(report_path, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"[INFO] Report saved: {report_path}")
+    record_run(results, run_dir, report_path)
+
+    sys.exit(0 if results['meets_threshold'] else 1)
+
+
+if __name__ == "__main__":
+    main()
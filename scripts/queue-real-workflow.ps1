@@ -658,8 +658,18 @@ while (-not $framesFound -and ((New-TimeSpan -Start $frameWaitStart).TotalSecond
         }
         New-Item -ItemType Directory -Path $attemptFramesDir -Force | Out-Null
 
-        foreach ($frame in $framesToCopy) {
-            Copy-Item -Path $frame.FullName -Destination (Join-Path $attemptFramesDir $frame.Name) -Force
+        # With GEMDIRECT_ARTIFACT_STORE set, frames already stored by earlier runs are
+        # hardlinked from the content-addressed store instead of copied again.
+        $storedViaArtifactStore = $false
+        if ($env:GEMDIRECT_ARTIFACT_STORE -and (Test-Path $markerPath)) {
+            $artifactStore = Join-Path $PSScriptRoot 'frames\artifact_store.py'
+            & python $artifactStore ingest --output-dir $best.Dir --prefix $scenePrefix --run-dir $attemptFramesDir --frames-only 2>&1 | ForEach-Object { Write-SceneLog ("ArtifactStore: {0}" -f $_) }
+            $storedViaArtifactStore = ($LASTEXITCODE -eq 0)
+        }
+        if (-not $storedViaArtifactStore) {
+            foreach ($frame in $framesToCopy) {
+                Copy-Item -Path $frame.FullName -Destination (Join-Path $attemptFramesDir $frame.Name) -Force
+            }
         }
         $sceneFrames = $framesToCopy
         $copiedFrom = @($best.Dir)
@@ -5,19 +5,72 @@
  * the result to public/preflight-status.json for the UI to read or for local
  * inspection. This is intentionally lightweight and does not touch the run
  * registry or summaries.
+ *
+ * Workflow graphs are validated statically by
+ * scripts/comfyui-tools/workflow_validator.py against the cached ComfyUI node
+ * schema (no HTTP probing); results are cached by file hash so repeat runs
+ * take milliseconds.
  */
 
+import { spawnSync } from 'child_process';
 import { promises as fs } from 'fs';
 import path from 'path';
 import { runPreflight } from '../utils/preflight';
 
+type WorkflowValidationSummary = {
+    schemaAvailable: boolean;
+    durationMs: number;
+    total: number;
+    failed: number;
+    cached: number;
+    failures: { source: string; errors: string[] }[];
+};
+
+/**
+ * Run the static workflow validator. Returns null when Python is unavailable.
+ */
+function validateWorkflows(): WorkflowValidationSummary | null {
+    const script = path.resolve(process.cwd(), 'scripts', 'comfyui-tools', 'workflow_validator.py');
+    for (const python of ['python3', 'python']) {
+        const res = spawnSync(python, [script, '--json'], { encoding: 'utf-8' });
+        if (res.error || (res.status !== 0 && res.status !== 1) || !res.stdout) {
+            continue;
+        }
+        try {
+            const report = JSON.parse(res.stdout);
+            return {
+                schemaAvailable: report.schemaAvailable,
+                durationMs: report.durationMs,
+                total: report.total,
+                failed: report.failed,
+                cached: report.cached,
+                failures: report.workflows
+                    .filter((w: { ok: boolean }) => !w.ok)
+                    .map((w: { source: string; errors: string[] }) => ({ source: w.source, errors: w.errors })),
+            };
+        } catch {
+            return null;
+        }
+    }
+    return null;
+}
+
 async function main() {
     const outPath = path.resolve(process.cwd(), 'public', 'preflight-status.json');
     const result = await runPreflight();
+    const workflowValidation = validateWorkflows();
+    if (!workflowValidation) {
+        result.warnings.push('workflow validation skipped (python not available)');
+    } else {
+        workflowValidation.failures.forEach(f =>
+            result.warnings.push(`workflow ${f.source}: ${f.errors[0]}`)
+        );
+    }
     const payload = {
         version: '1.0',
         generatedAt: new Date().toISOString(),
         result,
+        workflowValidation,
     };
 
     await fs.mkdir(path.dirname(outPath), { recursive: true });
@@ -28,6 +81,12 @@ async function main() {
     console.log(`  tmix normalize supported: ${result.tmixNormalizeSupported}`);
     console.log(`  VLM endpoint: ${result.vlmEndpoint}`);
     console.log(`  VLM reachable: ${result.vlmReachable}`);
+    if (workflowValidation) {
+        console.log(
+            `  Workflows valid: ${workflowValidation.total - workflowValidation.failed}/${workflowValidation.total}` +
+            ` (${workflowValidation.durationMs} ms, ${workflowValidation.cached} cached)`
+        );
+    }
     if (result.warnings.length) {
         console.log('Warnings:');
         result.warnings.forEach(w => console.log(`  - ${w}`));
@@ -0,0 +1,383 @@
+#!/usr/bin/env python3
+"""
+Lightweight hot-path tracing for the Python tools.
+
+Spans are recorded as Chrome trace events ("X" complete events) and written
+as `<name>.trace.json`, which opens directly in https://ui.perfetto.dev or
+chrome://tracing. Quality checks write their trace next to the run's
+artifact-metadata.json; the FastVideo adapter writes one per request next to
+the generated MP4.
+
+Tracing is off unless GEMDIRECT_TRACE=1. When off, `span()` returns a shared
+no-op object and `@traced` functions call straight through, so instrumented
+code pays one context-variable lookup per span.
+
+Environment:
+    GEMDIRECT_TRACE=1            Enable tracing
+    GEMDIRECT_TRACE_PROFILE=1    Also run the sampling profiler (writes <name>.folded)
+    GEMDIRECT_TRACE_INTERVAL_MS  Profiler sampling interval (default 5)
+    GEMDIRECT_TRACE_DIR          Write traces here instead of the tool's default
+
+Usage:
+    tracing.start("similarity-check")          # no-op unless enabled
+    with tracing.span("encode", scene_id=sid):
+        ...
+    tracing.finish(run_dir)                     # writes run_dir/similarity-check.trace.json
+
+    @tracing.traced("analyze_coherence")
+    def analyze_coherence(text): ...
+
+    with tracing.trace_request("fastvideo", output_dir) as tracer:   # per request
+        ...
+"""
+import contextlib
+import contextvars
+import functools
+import inspect
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Union
+
+ENV_ENABLE = "GEMDIRECT_TRACE"
+ENV_PROFILE = "GEMDIRECT_TRACE_PROFILE"
+ENV_INTERVAL = "GEMDIRECT_TRACE_INTERVAL_MS"
+ENV_DIR = "GEMDIRECT_TRACE_DIR"
+TRACE_SUFFIX = ".trace.json"
+FOLDED_SUFFIX = ".folded"
+DEFAULT_INTERVAL_MS = 5.0
+PROFILE_TOP = 25
+
+_TRUTHY = {"1", "true", "yes", "on"}
+
+
+def _env_flag(name: str) -> bool:
+    return os.environ.get(name, "").strip().lower() in _TRUTHY
+
+
+def enabled_from_env() -> bool:
+    return _env_flag(ENV_ENABLE)
+
+
+class SamplingProfiler:
+    """
+    Statistical profiler for one thread.
+
+    A daemon thread snapshots the target thread's stack every `interval`
+    seconds via sys._current_frames() and counts identical stacks, so cost
+    scales with the sampling rate rather than with the number of calls.
+    """
+
+    def __init__(self, thread_id: Optional[int] = None, interval: float = DEFAULT_INTERVAL_MS / 1000, max_depth: int = 64):
+        self.thread_id = thread_id if thread_id is not None else threading.get_ident()
+        self.interval = interval
+        self.max_depth = max_depth
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "SamplingProfiler":
+        self._thread = threading.Thread(target=self._run, name="trace-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None and len(stack) < self.max_depth:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            self.stacks[tuple(reversed(stack))] += 1
+            self.samples += 1
+
+    def folded(self) -> List[str]:
+        """Collapsed stacks ("root;child;leaf count"), as read by flamegraph.pl and speedscope."""
+        return [f"{';'.join(stack)} {count}" for stack, count in self.stacks.most_common()]
+
+    def top(self, n: int = PROFILE_TOP) -> List[Dict[str, Any]]:
+        """Frames ranked by samples where they were the leaf (self) and anywhere on the stack (total)."""
+        own: Counter = Counter()
+        total: Counter = Counter()
+        for stack, count in self.stacks.items():
+            own[stack[-1]] += count
+            for frame in set(stack):
+                total[frame] += count
+        samples = max(self.samples, 1)
+        return [
+            {
+                "frame": frame,
+                "self_pct": round(100 * own[frame] / samples, 1),
+                "total_pct": round(100 * total[frame] / samples, 1),
+            }
+            for frame, _ in own.most_common(n)
+        ]
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, **attrs) -> None:
+        pass
+
+
+_NOOP = _NoopSpan()
+
+
+class Span:
+    __slots__ = ("tracer", "name", "cat", "args", "start")
+
+    def __init__(self, tracer: "Tracer", name: str, cat: str, args: Dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.cat = cat
+        self.args = args
+        self.start = 0
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        self.tracer.add_span(self.name, self.start, time.perf_counter_ns(), self.cat, **self.args)
+        return False
+
+    def set(self, **attrs) -> None:
+        """Attach attributes discovered inside the span (e.g. result sizes)."""
+        self.args.update(attrs)
+
+
+class Tracer:
+    """Collects trace events for one run or request."""
+
+    def __init__(self, name: str, **metadata):
+        self.name = name
+        self.metadata = metadata
+        self.events: List[dict] = []
+        self.pid = os.getpid()
+        self.started_at = datetime.now(timezone.utc)
+        self._origin_ns = time.perf_counter_ns()
+        self._threads: Dict[int, str] = {}
+        self.profiler: Optional[SamplingProfiler] = None
+        self.path: Optional[Path] = None
+
+    def _ts(self, ns: int) -> float:
+        return (ns - self._origin_ns) / 1000.0
+
+    def _tid(self) -> int:
+        tid = threading.get_native_id()
+        if tid not in self._threads:
+            self._threads[tid] = threading.current_thread().name
+        return tid
+
+    def span(self, name: str, cat: str = "span", **args) -> Span:
+        return Span(self, name, cat, args)
+
+    def add_span(self, name: str, start_ns: int, end_ns: int, cat: str = "span", **args) -> None:
+        """Record a complete event from perf_counter_ns() timestamps (e.g. reconstructed from callbacks)."""
+        self.events.append({
+            "name": name, "cat": cat, "ph": "X",
+            "ts": self._ts(start_ns), "dur": (end_ns - start_ns) / 1000.0,
+            "pid": self.pid, "tid": self._tid(), "args": args,
+        })
+
+    def mark(self, name: str, cat: str = "mark", **args) -> None:
+        self.events.append({
+            "name": name, "cat": cat, "ph": "i", "s": "t",
+            "ts": self._ts(time.perf_counter_ns()),
+            "pid": self.pid, "tid": self._tid(), "args": args,
+        })
+
+    def start_profiler(self, interval_ms: float = DEFAULT_INTERVAL_MS) -> SamplingProfiler:
+        self.profiler = SamplingProfiler(interval=interval_ms / 1000).start()
+        return self.profiler
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Per span name: count, total_ms and max_ms."""
+        out: Dict[str, Dict[str, float]] = {}
+        for event in self.events:
+            if event["ph"] != "X":
+                continue
+            stats = out.setdefault(event["name"], {"count": 0, "total_ms": 0.0, "max_ms": 0.0})
+            ms = event["dur"] / 1000.0
+            stats["count"] += 1
+            stats["total_ms"] = round(stats["total_ms"] + ms, 3)
+            stats["max_ms"] = round(max(stats["max_ms"], ms), 3)
+        return out
+
+    def to_chrome(self) -> dict:
+        meta = [{"name": "process_name", "ph": "M", "pid": self.pid, "args": {"name": self.name}}]
+        meta += [
+            {"name": "thread_name", "ph": "M", "pid": self.pid, "tid": tid, "args": {"name": name}}
+            for tid, name in self._threads.items()
+        ]
+        other = {"tool": self.name, "startedAt": self.started_at.isoformat(), **self.metadata,
+                 "summary": self.summary()}
+        if self.profiler is not None:
+            other["profile"] = {
+                "intervalMs": self.profiler.interval * 1000,
+                "samples": self.profiler.samples,
+                "top": self.profiler.top(),
+            }
+        return {"traceEvents": meta + self.events, "displayTimeUnit": "ms", "otherData": other}
+
+    def write(self, path: Union[str, Path]) -> Path:
+        """Stop the profiler (if any) and write the trace plus <stem>.folded stacks."""
+        if self.profiler is not None:
+            self.profiler.stop()
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_chrome(), f, default=str)
+        if self.profiler is not None:
+            folded = path.with_name(path.name[: -len(TRACE_SUFFIX)] + FOLDED_SUFFIX) \
+                if path.name.endswith(TRACE_SUFFIX) else path.with_suffix(FOLDED_SUFFIX)
+            folded.write_text("\n".join(self.profiler.folded()) + "\n", encoding="utf-8")
+        self.path = path
+        return path
+
+
+# Request-scoped tracer (set by trace_request) takes precedence over the process-wide one
+_context_tracer: contextvars.ContextVar[Optional[Tracer]] = contextvars.ContextVar("gemdirect_tracer", default=None)
+_process_tracer: Optional[Tracer] = None
+
+
+def current() -> Optional[Tracer]:
+    return _context_tracer.get() or _process_tracer
+
+
+def span(name: str, cat: str = "span", **args):
+    """Context manager timing a block; a shared no-op when tracing is off."""
+    tracer = _context_tracer.get() or _process_tracer
+    if tracer is None:
+        return _NOOP
+    return Span(tracer, name, cat, args)
+
+
+def mark(name: str, **args) -> None:
+    tracer = _context_tracer.get() or _process_tracer
+    if tracer is not None:
+        tracer.mark(name, **args)
+
+
+def add_span(name: str, start_ns: int, end_ns: int, cat: str = "span", **args) -> None:
+    tracer = _context_tracer.get() or _process_tracer
+    if tracer is not None:
+        tracer.add_span(name, start_ns, end_ns, cat, **args)
+
+
+def traced(name: Optional[Union[str, Callable]] = None, cat: str = "function"):
+    """Decorator recording each call as a span. Works on sync and async functions."""
+
+    def decorate(fn: Callable) -> Callable:
+        span_name = name if isinstance(name, str) else fn.__qualname__
+
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                tracer = _context_tracer.get() or _process_tracer
+                if tracer is None:
+                    return await fn(*args, **kwargs)
+                with Span(tracer, span_name, cat, {}):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            tracer = _context_tracer.get() or _process_tracer
+            if tracer is None:
+                return fn(*args, **kwargs)
+            with Span(tracer, span_name, cat, {}):
+                return fn(*args, **kwargs)
+        return wrapper
+
+    if callable(name):
+        return decorate(name)
+    return decorate
+
+
+def _profile_interval() -> float:
+    try:
+        return float(os.environ.get(ENV_INTERVAL, DEFAULT_INTERVAL_MS))
+    except ValueError:
+        return DEFAULT_INTERVAL_MS
+
+
+def start(name: str, enabled: Optional[bool] = None, profile: Optional[bool] = None, **metadata) -> Optional[Tracer]:
+    """Install a process-wide tracer for a CLI run. Returns None (and records nothing) when disabled."""
+    global _process_tracer
+    if not (enabled if enabled is not None else enabled_from_env()):
+        return None
+    _process_tracer = Tracer(name, **metadata)
+    if profile if profile is not None else _env_flag(ENV_PROFILE):
+        _process_tracer.start_profiler(_profile_interval())
+    return _process_tracer
+
+
+def trace_path(output_dir: Union[str, Path], stem: str) -> Path:
+    return Path(os.environ.get(ENV_DIR) or output_dir) / f"{stem}{TRACE_SUFFIX}"
+
+
+def finish(output_dir: Union[str, Path], stem: Optional[str] = None) -> Optional[Path]:
+    """Write and uninstall the process-wide tracer. Returns the trace path, or None when tracing is off."""
+    global _process_tracer
+    tracer, _process_tracer = _process_tracer, None
+    if tracer is None:
+        return None
+    path = tracer.write(trace_path(output_dir, stem or tracer.name))
+    print(f"[INFO] Trace saved: {path}")
+    return path
+
+
+@contextlib.contextmanager
+def trace_request(
+    name: str,
+    output_dir: Union[str, Path],
+    enabled: Optional[bool] = None,
+    profile: Optional[bool] = None,
+    **metadata,
+) -> Iterator[Optional[Tracer]]:
+    """
+    Trace one request in the current context (thread or asyncio task).
+
+    Yields the Tracer, or None when disabled. On exit the trace is written to
+    `<output_dir>/<name>-<timestamp>.trace.json`; `tracer.path` holds it.
+    """
+    if not (enabled if enabled is not None else enabled_from_env()):
+        yield None
+        return
+    tracer = Tracer(name, **metadata)
+    if profile if profile is not None else _env_flag(ENV_PROFILE):
+        tracer.start_profiler(_profile_interval())
+    token = _context_tracer.set(tracer)
+    stamp = tracer.started_at.strftime("%Y%m%d-%H%M%S-%f")[:-3]
+    tracer.path = trace_path(output_dir, f"{name}-{stamp}")
+    try:
+        with Span(tracer, name, "request", {}):
+            yield tracer
+    finally:
+        _context_tracer.reset(token)
+        tracer.write(tracer.path)
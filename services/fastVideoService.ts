@@ -16,6 +16,10 @@ export interface FastVideoGenerateRequest {
     height: number;
     seed?: number;
     outputDir: string;
+    /** Scheduling lane; the adapter picks one from the estimated cost when omitted */
+    lane?: 'interactive' | 'batch';
+    /** Model the request needs; a dispatcher routes to workers serving it */
+    modelId?: string;
 }
 
 export interface FastVideoGenerateResponse {
@@ -26,6 +30,23 @@ export interface FastVideoGenerateResponse {
     seed?: number;
     warnings?: string[];
     error?: string;
+    tracePath?: string;
+    jobId?: string;
+    lane?: 'interactive' | 'batch';
+    queueWaitMs?: number;
+    estimatedMs?: number;
+    preprocessMs?: number;
+    keyframeCacheHit?: boolean;
+    /** Answered from the adapter's job journal instead of re-rendering */
+    fromJournal?: boolean;
+    /** Relative to the adapter URL; served with Range support */
+    videoId?: string;
+    videoUrl?: string;
+    previewUrl?: string;
+    posterUrl?: string;
+    /** Set when served through the dispatcher */
+    worker?: string;
+    attempts?: number;
 }
 
 export interface FastVideoHealthResponse {
@@ -34,6 +55,8 @@ export interface FastVideoHealthResponse {
     modelId: string;
     modelLoaded: boolean;
     attentionBackend: string;
+    queued?: number;
+    running?: number;
 }
 
 /**
@@ -139,7 +162,8 @@ export const queueFastVideoPrompt = async (
         width: fastVideoConfig.width,
         height: fastVideoConfig.height,
         seed: fastVideoConfig.seed,
-        outputDir: fastVideoConfig.outputDir
+        outputDir: fastVideoConfig.outputDir,
+        modelId: fastVideoConfig.modelId || undefined
     };
 
     // Telemetry tracking
@@ -221,6 +245,9 @@ export const queueFastVideoPrompt = async (
         telemetry.actualFrames = result.frames;
         telemetry.actualSeed = result.seed;
         telemetry.warnings = result.warnings || [];
+        telemetry.lane = result.lane;
+        telemetry.queueWaitMs = result.queueWaitMs;
+        telemetry.worker = result.worker;
         
         await writeTelemetrySummary(telemetry, fastVideoConfig.outputDir);
 
@@ -2,12 +2,19 @@
 """Test ComfyUI workflow - Comprehensive validation script."""
 
 import json
-import requests
-import time
 import os
-import uuid
-import websocket
-from pathlib import Path
+import sys
+import time
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "scripts", "comfyui-tools"))
+from comfyui_client import ComfyUIClient, ComfyUIError
+from frame_inventory import FrameInventory
+from workflow_validator import validate_workflow
+from ws_trace import TraceRecorder
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "scripts", "tracing"))
+import tracing
 
 # Configuration
 COMFYUI_URL = "http://127.0.0.1:8188"
@@ -16,12 +23,18 @@ INPUT_IMAGE = "test_keyframe.jpg"
 OUTPUT_DIR = r"C:\ComfyUI\ComfyUI_windows_portable\ComfyUI\output"
 TIMEOUT = 300  # 5 minutes
 
+# Set COMFYUI_TRACE=<file>.jsonl.gz to record /ws and /history traffic for ws_trace.py replay
+TRACE_PATH = os.environ.get("COMFYUI_TRACE")
+
+# One pooled HTTP session + one WebSocket for every step of the test
+client = ComfyUIClient(COMFYUI_URL, trace=TraceRecorder(TRACE_PATH, COMFYUI_URL) if TRACE_PATH else None)
+
+@tracing.traced
 def check_server():
     """Verify ComfyUI server is running."""
     print("🔍 Checking ComfyUI server...")
     try:
-        response = requests.get(f"{COMFYUI_URL}/system_stats", timeout=5)
-        stats = response.json()
+        stats = client.system_stats()
         print(f"✅ ComfyUI Server: Running")
         print(f"   CPU Cores: {stats.get('cpu_count', 'unknown')}")
         print(f"   RAM: {stats.get('ram', {}).get('total', 'unknown')} bytes")
@@ -30,20 +43,20 @@ def check_server():
         print(f"❌ Server check failed: {e}")
         return False
 
+@tracing.traced
 def check_models():
     """Verify required models are available."""
     print("\n📦 Checking models...")
     try:
-        response = requests.get(f"{COMFYUI_URL}/api/models", timeout=10)
-        if response.status_code == 200:
-            models = response.json()
-            print(f"✅ Models endpoint working")
-            return True
+        client.get_json("/api/models")
+        print(f"✅ Models endpoint working")
+        return True
     except Exception as e:
         print(f"⚠️  Model check warning: {e}")
         # This may not be critical
         return True
 
+@tracing.traced
 def load_workflow():
     """Load workflow JSON."""
     print("\n📋 Loading workflow...")
@@ -53,26 +66,22 @@ def load_workflow():
     print(f"   Nodes: {list(workflow.keys())}")
     return workflow
 
+@tracing.traced
 def verify_workflow_connections(workflow):
-    """Verify all nodes are properly connected."""
+    """Verify all nodes are properly connected (links, cycles, outputs)."""
     print("\n🔗 Verifying workflow connections...")
-    issues = []
+    report = validate_workflow(workflow, source=WORKFLOW_PATH)
     
-    for node_id, node in workflow.items():
-        inputs = node.get('inputs', {})
-        for input_name, input_value in inputs.items():
-            if isinstance(input_value, list) and len(input_value) == 2:
-                ref_node_id = str(input_value[0])
-                if ref_node_id not in workflow:
-                    issues.append(f"Node {node_id}: references non-existent node {ref_node_id}")
-    
-    if issues:
+    if report.errors:
         print("❌ Connection issues found:")
-        for issue in issues:
+        for issue in report.errors:
             print(f"   - {issue}")
         return False
     else:
-        print(f"✅ All {len(workflow)} nodes properly connected")
+        for warning in report.warnings:
+            print(f"   ⚠️  {warning}")
+        print(f"✅ All {report.node_count} nodes properly connected")
+        print(f"   Execution order: {' -> '.join(report.execution_order)}")
         return True
 
 def update_workflow_image(workflow, image_name):
@@ -82,90 +91,62 @@ def update_workflow_image(workflow, image_name):
     print(f"✅ Workflow updated to use: {image_name}")
     return workflow
 
+@tracing.traced
 def queue_prompt(workflow):
     """Queue the prompt for generation."""
     print("\n⏳ Queueing prompt...")
-    client_id = str(uuid.uuid4())
-    
-    payload = {
-        "prompt": workflow,
-        "client_id": client_id
-    }
     
     try:
-        response = requests.post(f"{COMFYUI_URL}/prompt", json=payload, timeout=10)
-        if response.status_code == 200:
-            data = response.json()
-            prompt_id = data.get('prompt_id')
-            print(f"✅ Prompt queued")
-            print(f"   Prompt ID: {prompt_id}")
-            print(f"   Client ID: {client_id}")
-            return prompt_id, client_id
-        else:
-            print(f"❌ Failed to queue prompt: {response.status_code}")
-            print(f"   Response: {response.text}")
-            return None, None
+        handle = client.queue_prompt(workflow)
+        print(f"✅ Prompt queued")
+        print(f"   Prompt ID: {handle.prompt_id}")
+        print(f"   Client ID: {client.client_id}")
+        return handle
+    except ComfyUIError as e:
+        print(f"❌ Failed to queue prompt: {e}")
+        print(f"   Response: {e.details}")
+        return None
     except Exception as e:
         print(f"❌ Queue error: {e}")
-        return None, None
+        return None
 
-def wait_for_completion(prompt_id, client_id, timeout=TIMEOUT):
-    """Wait for generation to complete via WebSocket."""
+@tracing.traced
+def wait_for_completion(handle, timeout=TIMEOUT):
+    """Wait for generation to complete via the shared WebSocket."""
     print(f"\n⏳ Waiting for generation (timeout: {timeout}s)...")
-    
+    last_progress = [0]
+    # (node id, perf_counter_ns when it started) for per-node trace spans
+    current_node = [None, 0]
+    
+    def on_event(msg_type, data):
+        if msg_type == 'executing':
+            now = time.perf_counter_ns()
+            if current_node[0] is not None:
+                tracing.add_span(f"node {current_node[0]}", current_node[1], now, cat="comfyui", node=current_node[0])
+            current_node[0], current_node[1] = data.get('node'), now
+            if data.get('node') is not None:
+                print(f"   Executing node: {data.get('node')}")
+        elif msg_type == 'progress':
+            progress = data.get('value', 0)
+            max_progress = data.get('max', 100)
+            if progress != last_progress[0]:
+                pct = (progress / max_progress * 100) if max_progress > 0 else 0
+                print(f"   Progress: {progress}/{max_progress} ({pct:.0f}%)")
+                last_progress[0] = progress
+    
+    handle.add_listener(on_event)
     try:
-        ws_url = f"ws://127.0.0.1:8188/ws?clientId={client_id}"
-        ws = websocket.create_connection(ws_url, timeout=10)
-        
-        start_time = time.time()
-        last_progress = 0
-        
-        while time.time() - start_time < timeout:
-            try:
-                msg = ws.recv()
-                if not msg:
-                    continue
-                
-                data = json.loads(msg)
-                msg_type = data.get('type')
-                
-                if msg_type == 'executing':
-                    node = data.get('data', {}).get('node')
-                    print(f"   Executing node: {node}")
-                
-                elif msg_type == 'progress':
-                    progress = data.get('data', {}).get('value', 0)
-                    max_progress = data.get('data', {}).get('max', 100)
-                    if progress != last_progress:
-                        pct = (progress / max_progress * 100) if max_progress > 0 else 0
-                        print(f"   Progress: {progress}/{max_progress} ({pct:.0f}%)")
-                        last_progress = progress
-                
-                elif msg_type == 'executed':
-                    print(f"   ✅ Generation complete!")
-                    ws.close()
-                    return True
-                
-                elif msg_type == 'error':
-                    error = data.get('data', {}).get('exception_message', 'Unknown error')
-                    print(f"   ❌ Error: {error}")
-                    ws.close()
-                    return False
-                    
-            except json.JSONDecodeError:
-                continue
-            except Exception as e:
-                print(f"   ⚠️  WebSocket error: {e}")
-                continue
-        
-        ws.close()
+        result = handle.result(timeout)
+        print(f"   ✅ Generation complete! ({result.duration_s:.1f}s)")
+        return True
+    except FutureTimeoutError:
         print(f"❌ Timeout after {timeout} seconds")
         return False
-        
-    except Exception as e:
-        print(f"❌ WebSocket connection error: {e}")
+    except ComfyUIError as e:
+        print(f"   ❌ Error: {e}")
         return False
 
+@tracing.traced
 def verify_output():
     """Verify that output files were generated."""
     print("\n📁 Verifying output...")
@@ -174,17 +155,20 @@ def verify_output():
         print(f"❌ Output directory not found: {OUTPUT_DIR}")
         return False
     
-    # Look for PNG files with our prefix
-    png_files = list(Path(OUTPUT_DIR).glob("gemdirect1_shot_*.png"))
-    
-    if png_files:
-        print(f"✅ Output files generated: {len(png_files)} PNG files")
-        for f in sorted(png_files)[:5]:  # Show first 5
-            size_kb = f.stat().st_size / 1024
-            print(f"   - {f.name} ({size_kb:.1f} KB)")
-        if len(png_files) > 5:
-            print(f"   ... and {len(png_files) - 5} more")
-        return len(png_files) >= 25  # Should have 25 frames for 25-frame video
+    # Look for PNG frames with our prefix via the incremental frame index
+    with FrameInventory(OUTPUT_DIR) as inventory:
+        inventory.refresh()
+        summary = inventory.query("gemdirect1_shot")
+    
+    if summary.frame_count:
+        print(f"✅ Output files generated: {summary.frame_count} PNG files ({summary.total_bytes / 1024:.1f} KB)")
+        for number, name, size in summary.frames[:5]:  # Show first 5
+            print(f"   - {name} ({size / 1024:.1f} KB)")
+        if summary.frame_count > 5:
+            print(f"   ... and {summary.frame_count - 5} more")
+        for first, last in summary.gaps:
+            print(f"   ⚠️  Missing frames {first}..{last}")
+        return summary.frame_count >= 25  # Should have 25 frames for 25-frame video
     else:
         print(f"❌ No output files found in {OUTPUT_DIR}")
         return False
@@ -219,13 +203,13 @@ def main():
     workflow = update_workflow_image(workflow, INPUT_IMAGE)
     
     # Step 6: Queue prompt
-    prompt_id, client_id = queue_prompt(workflow)
-    if not prompt_id:
+    handle = queue_prompt(workflow)
+    if not handle:
         print("❌ Failed to queue prompt")
         return False
     
     # Step 7: Wait for completion
-    if not wait_for_completion(prompt_id, client_id):
+    if not wait_for_completion(handle):
         print("❌ Generation failed or timed out")
         return False
     
@@ -240,5 +224,13 @@ def main():
     return True
 
 if __name__ == "__main__":
-    success = main()
+    tracing.start("test-workflow", comfyuiUrl=COMFYUI_URL, workflow=WORKFLOW_PATH)
+    try:
+        with tracing.span("main"):
+            success = main()
+    finally:
+        client.close()
+        if client.trace is not None:
+            client.trace.close()
+        tracing.finish("logs")
     exit(0 if success else 1)